@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Low-latency input over a persistent adb shell.
+
+A tap, swipe or key press sent through Appium goes Python -> HTTP -> Appium
+-> UiAutomator2 server -> device. install_adb_input() sends those three
+actions as `input tap|swipe|keyevent` lines into one long-lived
+`adb -s <udid> shell` process per device instead; element queries, clicks on
+elements and everything else stay on Appium. Each line waits for its own
+completion marker, so the caller sees the action done before its next step,
+as with Appium.
+
+Timings of both backends are kept per action for format_input_latency_report();
+bench_input.py measures both on a connected phone. A shell that fails or
+times out is closed and that session's input goes back to Appium. An action
+is only resent through Appium if it can't have run: when its line was never
+written, or finished with an error. One that timed out or lost the shell
+midway may already have happened on the device (a second BACK would leave
+WhatsApp), so its error is raised to the caller instead.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+
+KEYCODE_COMMAND = 'mobile: pressKey'
+ACTIONS_COMMAND = 'actions'
+SCRIPT_COMMAND = 'w3cExecuteScript'
+
+# Seconds to wait for an input line to finish on the device
+COMMAND_TIMEOUT = 5.0
+
+# Presses held at least this long are sent as a long press (swipe in place)
+LONG_PRESS_MS = 500
+
+INPUT_ACTIONS = ('tap', 'swipe', 'keyevent')
+
+_shells = {}            # udid -> AdbShell
+
+_input_stats = {
+    'adb': {},          # action -> {'count', 'total'}
+    'appium': {},
+    'fallbacks': 0,     # adb input lines that failed and went to Appium
+    'unconfirmed': 0    # adb input lines that may have run; raised, not resent
+}
+
+
+class AdbShellError(Exception):
+    """A shell command that failed; may_have_run is set when it was written but never seen to finish"""
+
+    def __init__(self, message, may_have_run=False):
+        super().__init__(message)
+        self.may_have_run = may_have_run
+
+
+class AdbShell:
+    """One `adb shell` process fed command lines on stdin; run() blocks until a line has finished"""
+
+    def __init__(self, udid=None, argv=None):
+        self.udid = udid
+        self.argv = argv or (['adb'] + (['-s', udid] if udid else []) + ['shell'])
+        self._process = None
+        self._lines = queue.Queue()
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._process = subprocess.Popen(self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.STDOUT, text=True, bufsize=1)
+        threading.Thread(target=self._read_output, args=(self._process, self._lines), daemon=True).start()
+        return self
+
+    @staticmethod
+    def _read_output(process, lines):
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)  # shell exited
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def run(self, command, timeout=COMMAND_TIMEOUT):
+        """Run one shell command line and return its output; raises AdbShellError on failure or timeout"""
+        with self._lock:
+            if not self.is_alive():
+                raise AdbShellError("adb shell is not running")
+            self._counter += 1
+            marker = f"__adb_input_{self._counter}__"
+            try:
+                self._process.stdin.write(f"{command}; echo {marker} $?\n")
+                self._process.stdin.flush()
+            except OSError as e:
+                raise AdbShellError(f"adb shell closed: {e}")
+
+            output = []
+            deadline = time.time() + timeout
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    self.close()
+                    raise AdbShellError(f"'{command}' did not finish within {timeout:.1f}s", may_have_run=True)
+                if line is None:
+                    raise AdbShellError(f"adb shell exited during '{command}'", may_have_run=True)
+                if line.startswith(marker):
+                    status = line.split()[-1]
+                    if status != '0':
+                        raise AdbShellError(f"'{command}' exited with {status}: {''.join(output).strip()}")
+                    return "".join(output)
+                output.append(line)
+
+    def close(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+
+
+def get_adb_shell(udid):
+    """The running shell for a device, started on first use"""
+    shell = _shells.get(udid)
+    if shell is None or not shell.is_alive():
+        shell = _shells[udid] = AdbShell(udid).start()
+    return shell
+
+
+def close_adb_shells():
+    for shell in _shells.values():
+        shell.close()
+    _shells.clear()
+
+
+def _pointer_actions(params):
+    """Actions of the single touch pointer in a W3C actions payload, or None"""
+    pointers = [source for source in params.get('actions', []) if source.get('type') == 'pointer']
+    others = [source for source in params.get('actions', []) if source.get('type') != 'pointer']
+    if len(pointers) != 1 or any(action.get('type') != 'pause'
+                                 for source in others for action in source.get('actions', [])):
+        return None
+    return pointers[0].get('actions', [])
+
+
+def input_command(driver_command, params):
+    """(action, `input ...` line) for a tap, swipe or plain key press, or None if adb can't send it"""
+    params = params or {}
+    if driver_command == SCRIPT_COMMAND and params.get('script') == KEYCODE_COMMAND:
+        args = (params.get('args') or [{}])[0]
+        if set(args) == {'keycode'}:
+            return 'keyevent', f"input keyevent {int(args['keycode'])}"
+        return None
+    if driver_command != ACTIONS_COMMAND:
+        return None
+
+    actions = _pointer_actions(params)
+    if not actions:
+        return None
+    moves = [action for action in actions if action['type'] == 'pointerMove']
+    kinds = [action['type'] for action in actions if action['type'] != 'pause']
+    if any(move.get('origin', 'viewport') != 'viewport' for move in moves):
+        return None
+    points = [(int(move['x']), int(move['y'])) for move in moves]
+
+    # move, down, [pause], up: a tap (or a long press when held)
+    if kinds == ['pointerMove', 'pointerDown', 'pointerUp']:
+        held = sum(action.get('duration', 0) for action in actions if action['type'] == 'pause')
+        x, y = points[0]
+        if held >= LONG_PRESS_MS:
+            return 'swipe', f"input swipe {x} {y} {x} {y} {held}"
+        return 'tap', f"input tap {x} {y}"
+    # move, down, move, up: a swipe over the second move's duration
+    if kinds == ['pointerMove', 'pointerDown', 'pointerMove', 'pointerUp']:
+        (x1, y1), (x2, y2) = points
+        duration = max(int(moves[1].get('duration', 0)), 1)
+        return 'swipe', f"input swipe {x1} {y1} {x2} {y2} {duration}"
+    return None
+
+
+def _record(backend, action, seconds):
+    stats = _input_stats[backend].setdefault(action, {'count': 0, 'total': 0.0})
+    stats['count'] += 1
+    stats['total'] += seconds
+
+
+def install_adb_input(driver, udid=None, shell=None):
+    """Send the driver's taps, swipes and key presses through a persistent adb shell
+
+    udid defaults to the device of the session (capability deviceUDID/udid).
+    If the shell can't be started the driver is returned unchanged.
+    """
+    if shell is None:
+        capabilities = getattr(driver, 'capabilities', None) or {}
+        udid = udid or capabilities.get('deviceUDID') or capabilities.get('udid')
+        try:
+            shell = get_adb_shell(udid)
+        except OSError as e:
+            print(f"[INPUT] adb shell could not be started, input stays on Appium: {e}")
+            return driver
+    original_execute = driver.execute
+    state = {'shell': shell}
+
+    def adb_execute(driver_command, params=None):
+        command = input_command(driver_command, params)
+        if command is None:
+            return original_execute(driver_command, params)
+
+        action, line = command
+        if state['shell'] is not None:
+            start = time.perf_counter()
+            try:
+                state['shell'].run(line)
+                _record('adb', action, time.perf_counter() - start)
+                return {'value': None}
+            except AdbShellError as e:
+                state['shell'].close()
+                state['shell'] = None
+                if e.may_have_run:
+                    print(f"[INPUT] adb {action} may have run, not resending it; using Appium for this session: {e}")
+                    _input_stats['unconfirmed'] += 1
+                    raise
+                print(f"[INPUT] adb input failed, using Appium for this session: {e}")
+                _input_stats['fallbacks'] += 1
+
+        start = time.perf_counter()
+        response = original_execute(driver_command, params)
+        _record('appium', action, time.perf_counter() - start)
+        return response
+
+    driver.execute = adb_execute
+    return driver
+
+
+def record_appium_input(action, seconds):
+    """Add an Appium-side timing (for comparisons run without the adb hook)"""
+    _record('appium', action, seconds)
+
+
+def get_input_stats():
+    return _input_stats
+
+
+def reset_input_stats():
+    _input_stats.update(adb={}, appium={}, fallbacks=0, unconfirmed=0)
+
+
+def format_input_latency_report():
+    """Lines comparing average time per input action on each backend"""
+    if not _input_stats['adb'] and not _input_stats['appium']:
+        return []
+    lines = ["[INPUT] Input latency per action (adb shell vs Appium):"]
+    for action in INPUT_ACTIONS:
+        averages = {}
+        parts = []
+        for backend in ('adb', 'appium'):
+            stats = _input_stats[backend].get(action)
+            if stats:
+                averages[backend] = stats['total'] / stats['count']
+                parts.append(f"{backend} {stats['count']} x {averages[backend] * 1000:.0f}ms")
+        if not parts:
+            continue
+        line = f"   - {action}: " + ", ".join(parts)
+        if len(averages) == 2 and averages['adb'] > 0:
+            line += f" ({averages['appium'] / averages['adb']:.1f}x)"
+        lines.append(line)
+    if _input_stats['fallbacks']:
+        lines.append(f"   - {_input_stats['fallbacks']} adb input failures fell back to Appium")
+    if _input_stats['unconfirmed']:
+        lines.append(f"   - {_input_stats['unconfirmed']} adb input actions were not confirmed and not resent")
+    return lines
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+adb device queries (device list, model, resolution, installed app version)
+and device settings (Android settings, input method).
+
+Plain subprocess calls; no Appium session needed.
+"""
+
+import subprocess
+
+
+def get_adb_devices():
+    """Get list of connected ADB devices"""
+    try:
+        result = subprocess.run(['adb', 'devices', '-l'],
+                              capture_output=True,
+                              text=True,
+                              check=True)
+
+        lines = result.stdout.strip().split('\n')
+        devices = []
+
+        # Skip first line "List of devices attached"
+        for line in lines[1:]:
+            if line.strip() and 'device' in line:
+                parts = line.split()
+                if len(parts) >= 2:
+                    udid = parts[0]
+                    # Extract model and product info if available
+                    model = "Unknown"
+                    product = "Unknown"
+
+                    for part in parts:
+                        if part.startswith('model:'):
+                            model = part.split(':')[1]
+                        elif part.startswith('product:'):
+                            product = part.split(':')[1]
+
+                    devices.append({
+                        'udid': udid,
+                        'model': model,
+                        'product': product
+                    })
+
+        return devices
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] Failed to get ADB devices: {e}")
+        return []
+    except FileNotFoundError:
+        print("[ERROR] ADB command not found. Please ensure ADB is installed and in PATH.")
+        return []
+
+
+def get_installed_app_version(udid=None, package="com.whatsapp"):
+    """Get the installed versionName of an app via adb, or None if it can't be read"""
+    command = ['adb']
+    if udid:
+        command += ['-s', udid]
+    command += ['shell', 'dumpsys', 'package', package]
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=15)
+        for line in result.stdout.split('\n'):
+            line = line.strip()
+            if line.startswith('versionName='):
+                return line.split('=', 1)[1]
+        return None
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError) as e:
+        print(f"[ERROR] Failed to read {package} version: {e}")
+        return None
+
+
+def get_screen_resolution(udid=None):
+    """Screen resolution as 'WxH' from adb wm size (override size wins), or None"""
+    command = ['adb']
+    if udid:
+        command += ['-s', udid]
+    command += ['shell', 'wm', 'size']
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=10)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError) as e:
+        print(f"[ERROR] Failed to read screen resolution: {e}")
+        return None
+
+    sizes = {}
+    for line in result.stdout.split('\n'):
+        if ':' in line:
+            label, value = line.split(':', 1)
+            sizes[label.strip().lower()] = value.strip()
+    return sizes.get('override size') or sizes.get('physical size')
+
+
+def get_device_model(udid):
+    """adb model name of a connected device, or 'Unknown'"""
+    for device in get_adb_devices():
+        if device['udid'] == udid:
+            return device['model']
+    return "Unknown"
+
+
+def _adb_shell_command(udid, arguments, timeout=10):
+    """stdout of `adb [-s udid] shell <arguments>`, or None on failure"""
+    command = ['adb']
+    if udid:
+        command += ['-s', udid]
+    command += ['shell'] + list(arguments)
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=timeout)
+        return result.stdout
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError) as e:
+        print(f"[ERROR] adb shell {' '.join(arguments)} failed: {e}")
+        return None
+
+
+def get_device_setting(udid, namespace, key):
+    """Value of an Android setting (namespace: system, secure or global), or None"""
+    output = _adb_shell_command(udid, ['settings', 'get', namespace, key])
+    if output is None:
+        return None
+    value = output.strip()
+    return None if value in ("", "null") else value
+
+
+def put_device_setting(udid, namespace, key, value):
+    """Write an Android setting; returns True on success"""
+    return _adb_shell_command(udid, ['settings', 'put', namespace, key, str(value)]) is not None
+
+
+def list_input_methods(udid):
+    """Ids of the installed input methods (enabled or not)"""
+    output = _adb_shell_command(udid, ['ime', 'list', '-a', '-s'])
+    return [line.strip() for line in (output or "").split('\n') if line.strip()]
+
+
+def set_input_method(udid, ime_id):
+    """Enable and select an input method; returns True on success"""
+    return (_adb_shell_command(udid, ['ime', 'enable', ime_id]) is not None
+            and _adb_shell_command(udid, ['ime', 'set', ime_id]) is not None)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Session bootstrap benchmark: time-to-first-command of cold vs fast sessions
+
+Creates the given number of sessions in each bootstrap mode (cold first, so
+the server APKs are on the device for the fast ones) and reports session
+creation and time-to-first-command per mode, as setup_driver records them.
+WhatsApp is left running between sessions, so the fast sessions attach to
+it. Needs a connected device and a running Appium server.
+
+Usage: python bench_bootstrap.py [runs]
+"""
+
+import sys
+
+import whatsapp
+from session_bootstrap import BOOTSTRAP_MODES, format_bootstrap_report, reset_bootstrap_stats
+
+DEFAULT_RUNS = 3
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+
+    devices = whatsapp.get_adb_devices()
+    if not devices:
+        print("[ERROR] No ADB devices found")
+        return
+    udid = devices[0]['udid']
+    whatsapp.SELECTED_ADB_DEVICE = udid
+    # Only the bootstrap is measured; leave the device settings alone
+    whatsapp.PERFORMANCE_PROFILE = "stock"
+    print(f"[BENCH] Device: {udid} ({devices[0]['model']}), {runs} sessions per mode")
+
+    reset_bootstrap_stats()
+    for mode in BOOTSTRAP_MODES:
+        for _ in range(runs):
+            driver = whatsapp.setup_driver(mode)
+            driver.quit()
+
+    print("\n" + "=" * 60)
+    print("SESSION BOOTSTRAP BENCHMARK")
+    print("=" * 60)
+    for line in format_bootstrap_report(udid):
+        print(f"[BOOTSTRAP] {line}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Chat cycle benchmark on the fake driver
+
+Runs process_target_chats() end to end against FakeWhatsAppDriver (see
+fake_driver.py) in a scratch directory, so the search and send paths can be
+timed on any machine with selenium installed; no phone or Appium server is
+needed. Each scenario reports chats/minute, Appium round-trips per chat and
+time and round-trips per phase (search, send, other).
+
+Scenarios:
+    text       every chat exists, text message only
+    photo      every chat exists, photo with caption
+    not_found  a third of the chats don't exist (half of those only match messages)
+    flaky      text messages with 2% of commands failing
+
+Usage:
+    python bench_chat_cycle.py [scenario ...] [--chats N] [--latency SECONDS]
+                               [--hierarchies DIR] [--save FILE] [--baseline FILE] [--verbose]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import whatsapp
+from chat_plan import parse_row_spec
+from device_configs import DEVICE_CONFIGS, DEFAULT_DEVICE_CONFIG_NAME, set_device_config
+from device_latency import reset_latency_stats
+from fake_driver import FakeWhatsAppDriver, DEFAULT_LATENCY, load_recorded_screens
+from journal import journal_flush
+from run_state import close_run_state
+from session_recovery import reset_recovery_stats
+
+SCENARIOS = {
+    'text': {'photo': False, 'missing': 0.0, 'failure_rate': {}},
+    'photo': {'photo': True, 'missing': 0.0, 'failure_rate': {}},
+    'not_found': {'photo': False, 'missing': 1 / 3, 'failure_rate': {}},
+    'flaky': {'photo': False, 'missing': 0.0, 'failure_rate': {'default': 0.02}},
+}
+DEFAULT_CHATS = 6
+CHAT_PREFIX = whatsapp.CHAT_NAME_PREFIX_TO_REMOVE
+BENCH_MESSAGE = "Benchmark message: good morning, today's offer is in the photo above."
+# Allowed slowdown against a saved baseline before a metric counts as a regression
+REGRESSION_TOLERANCE = 0.15
+
+# Functions timed as phases; everything else in the chat loop counts as 'other'
+PHASE_FUNCTIONS = {
+    'search_and_find_chat': 'search',
+    'send_message_with_photo': 'send',
+    'send_message_to_chat': 'send',
+}
+
+
+def build_chat_plan(count, missing):
+    """(chat names for chat_name.txt, existing contacts, names that only match messages)"""
+    names = [f"{CHAT_PREFIX}Bench{index:03d}" for index in range(1, count + 1)]
+    missing_count = round(count * missing)
+    missing_names = names[-missing_count:] if missing_count else []
+    contacts = [name for name in names if name not in missing_names]
+    # Half of the missing chats show a 'Messages' section instead of 'No results'
+    message_only = [name[len(CHAT_PREFIX):] for name in missing_names[::2]]
+    return names, contacts, message_only
+
+
+def reset_run_state():
+    """Forget per-run state in whatsapp.py so scenarios don't influence each other"""
+    whatsapp._validated_screens.clear()
+    whatsapp._wait_stats.clear()
+    whatsapp._clipboard_state.update(session=None, text=None)
+    for stats in list(whatsapp._search_prepare_stats.values()) + list(whatsapp._entry_timing_stats.values()):
+        stats.update(count=0, total=0.0)
+    reset_latency_stats()
+    reset_recovery_stats()
+    close_run_state()
+
+
+def _timed_phase(name, function, driver_holder, phase_times):
+    def timed(driver, *args, **kwargs):
+        driver_holder['driver'] = driver
+        driver.phase = name
+        start = time.time()
+        try:
+            return function(driver, *args, **kwargs)
+        finally:
+            driver.phase = None
+            phase_times.setdefault(name, []).append(time.time() - start)
+    return timed
+
+
+@contextlib.contextmanager
+def patched_whatsapp(driver_holder, phase_times):
+    """Time the phase functions and hand out fake sessions instead of real ones"""
+    originals = {name: getattr(whatsapp, name) for name in list(PHASE_FUNCTIONS) + ['setup_driver']}
+    for function_name, phase in PHASE_FUNCTIONS.items():
+        setattr(whatsapp, function_name, _timed_phase(phase, originals[function_name], driver_holder, phase_times))
+    whatsapp.setup_driver = lambda fast=False: driver_holder['driver'].new_session()
+    try:
+        yield
+    finally:
+        for name, function in originals.items():
+            setattr(whatsapp, name, function)
+
+
+def run_scenario(name, chat_count, latency, recorded_screens, verbose):
+    """Run one scenario in a scratch directory; returns its metrics"""
+    scenario = SCENARIOS[name]
+    names, contacts, message_only = build_chat_plan(chat_count, scenario['missing'])
+    driver = FakeWhatsAppDriver(contacts=contacts, message_only_names=message_only,
+                                latency={key: value * latency / DEFAULT_LATENCY['default']
+                                         for key, value in DEFAULT_LATENCY.items()},
+                                jitter=0.2, failure_rate=scenario['failure_rate'],
+                                recorded_screens=recorded_screens, seed=chat_count)
+    whatsapp.install_latency_tracking(driver)
+    driver_holder = {'driver': driver}
+    phase_times = {}
+
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            os.makedirs('txt')
+            with open('txt/chat_name.txt', 'w', encoding='utf-8') as file:
+                file.write("\n".join(names) + "\n")
+            with open('txt/daily_message.txt', 'w', encoding='utf-8') as file:
+                file.write(BENCH_MESSAGE)
+            if scenario['photo']:
+                os.makedirs('daily_photos')
+                with open('daily_photos/bench.jpg', 'wb') as file:
+                    file.write(os.urandom(200 * 1024))
+
+            reset_run_state()
+            whatsapp.CHAT_NAME_FILE = 'txt/chat_name.txt'
+            whatsapp.ROW_SELECTION = parse_row_spec('all')
+            whatsapp.NON_INTERACTIVE = True
+            # A serial no device has, so adb calls fail fast instead of reaching a real phone
+            whatsapp.SELECTED_ADB_DEVICE = 'fake-bench-device'
+            set_device_config(DEVICE_CONFIGS[DEFAULT_DEVICE_CONFIG_NAME], DEFAULT_DEVICE_CONFIG_NAME)
+
+            output = sys.stdout if verbose else open('bench.log', 'w', encoding='utf-8')
+            start = time.time()
+            try:
+                with patched_whatsapp(driver_holder, phase_times), contextlib.redirect_stdout(output):
+                    whatsapp.process_target_chats(driver)
+            finally:
+                elapsed = time.time() - start
+                if output is not sys.stdout:
+                    output.close()
+                journal_flush()
+                close_run_state()
+        finally:
+            os.chdir(previous_dir)
+
+    stats = driver.get_command_stats()
+    sent = sum(1 for messages in driver.messages.values() for text in messages if text)
+    metrics = {
+        'chats': chat_count,
+        'seconds': elapsed,
+        'chats_per_minute': chat_count / elapsed * 60 if elapsed else 0.0,
+        'round_trips_per_chat': stats['commands'] / chat_count,
+        'page_sources_per_chat': stats['by_command'].get('getPageSource', {}).get('count', 0) / chat_count,
+        'sent': sent,
+        'command_failures': stats['failures'],
+        'phases': {},
+    }
+    timed_total = 0.0
+    for phase in ('search', 'send'):
+        times = phase_times.get(phase, [])
+        timed_total += sum(times)
+        metrics['phases'][phase] = {
+            'seconds_per_chat': sum(times) / chat_count,
+            'round_trips_per_chat': stats['by_phase'].get(phase, {}).get('count', 0) / chat_count,
+        }
+    metrics['phases']['other'] = {
+        'seconds_per_chat': max(elapsed - timed_total, 0.0) / chat_count,
+        'round_trips_per_chat': stats['by_phase'].get('other', {}).get('count', 0) / chat_count,
+    }
+    return metrics
+
+
+def print_report(results):
+    print("\n" + "=" * 78)
+    print("CHAT CYCLE BENCHMARK (fake driver)")
+    print("=" * 78)
+    print(f"{'scenario':<10} {'chats':>5} {'sent':>5} {'chats/min':>10} {'rt/chat':>8} {'src/chat':>9} "
+          f"{'search s':>9} {'send s':>7} {'other s':>8}")
+    for name, metrics in results.items():
+        phases = metrics['phases']
+        print(f"{name:<10} {metrics['chats']:>5} {metrics['sent']:>5} {metrics['chats_per_minute']:>10.1f} "
+              f"{metrics['round_trips_per_chat']:>8.1f} {metrics['page_sources_per_chat']:>9.1f} "
+              f"{phases['search']['seconds_per_chat']:>9.2f} {phases['send']['seconds_per_chat']:>7.2f} "
+              f"{phases['other']['seconds_per_chat']:>8.2f}")
+    print("-" * 78)
+    print("Round-trips per chat by phase:")
+    for name, metrics in results.items():
+        parts = ", ".join(f"{phase} {values['round_trips_per_chat']:.1f}"
+                          for phase, values in metrics['phases'].items())
+        failures = f" ({metrics['command_failures']} injected failures)" if metrics['command_failures'] else ""
+        print(f"   - {name}: {parts}{failures}")
+    print("=" * 78)
+
+
+def compare_with_baseline(results, baseline):
+    """Regressions against a saved run: slower chats/minute or more round-trips per chat"""
+    regressions = []
+    for name, metrics in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if metrics['chats_per_minute'] < old['chats_per_minute'] * (1 - REGRESSION_TOLERANCE):
+            regressions.append(f"{name}: chats/min {old['chats_per_minute']:.1f} -> {metrics['chats_per_minute']:.1f}")
+        if metrics['round_trips_per_chat'] > old['round_trips_per_chat'] * (1 + REGRESSION_TOLERANCE):
+            regressions.append(f"{name}: round-trips/chat {old['round_trips_per_chat']:.1f} -> "
+                               f"{metrics['round_trips_per_chat']:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chat cycle against the fake WhatsApp driver")
+    parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--chats', type=int, default=DEFAULT_CHATS,
+                        help=f"Chats per scenario (default: {DEFAULT_CHATS})")
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY['default'],
+                        help=f"Base seconds per Appium command (default: {DEFAULT_LATENCY['default']}); "
+                             "page source and file push scale with it")
+    parser.add_argument('--hierarchies', help="Directory of recorded <screen>.xml page sources to serve")
+    parser.add_argument('--save', help="Write the results as JSON (use as a later --baseline)")
+    parser.add_argument('--baseline', help="JSON results of an earlier run; exit 1 on a regression")
+    parser.add_argument('--verbose', action='store_true', help="Show the bot's output instead of logging it")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    recorded_screens = load_recorded_screens(args.hierarchies) if args.hierarchies else {}
+    if args.hierarchies:
+        print(f"[BENCH] Serving recorded screens: {', '.join(recorded_screens) or 'none found'}")
+
+    results = {}
+    for name in args.scenarios or list(SCENARIOS):
+        print(f"[BENCH] Running '{name}' with {args.chats} chats...")
+        results[name] = run_scenario(name, args.chats, args.latency, recorded_screens, args.verbose)
+    print_report(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"[BENCH] Results saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            regressions = compare_with_baseline(results, json.load(file))
+        if regressions:
+            print("[BENCH] Regressions against the baseline:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print("[BENCH] No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Input latency benchmark: Appium vs persistent adb shell
+
+Sends the same key press, tap and swipe through the Appium session, then
+through the persistent adb shell of adb_input.py, and for reference through a
+new `adb shell input ...` process per command. The actions are harmless on
+any screen: KEYCODE_WAKEUP, the (50, 50) presence tap the unlock step uses,
+and a short horizontal swipe on the status bar. Needs a connected device and
+a running Appium server.
+
+Usage: python bench_input.py [runs]
+"""
+
+import subprocess
+import sys
+import time
+
+import whatsapp
+from adb_input import (install_adb_input, record_appium_input, get_adb_shell, close_adb_shells,
+                       format_input_latency_report, reset_input_stats)
+
+DEFAULT_RUNS = 10
+KEYCODE_WAKEUP = 224
+
+# action -> (driver call, `input` arguments)
+ACTIONS = {
+    'keyevent': (lambda driver: driver.press_keycode(KEYCODE_WAKEUP), ['keyevent', str(KEYCODE_WAKEUP)]),
+    'tap': (lambda driver: driver.tap([(50, 50)]), ['tap', '50', '50']),
+    'swipe': (lambda driver: driver.swipe(50, 40, 150, 40, 100), ['swipe', '50', '40', '150', '40', '100']),
+}
+
+
+def time_one_shot(udid, arguments, runs):
+    """Average seconds for `adb shell input ...` started as a new process each time"""
+    total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(['adb', '-s', udid, 'shell', 'input'] + arguments, capture_output=True, timeout=15)
+        total += time.perf_counter() - start
+    return total / runs
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+
+    devices = whatsapp.get_adb_devices()
+    if not devices:
+        print("[ERROR] No ADB devices found")
+        return
+    udid = devices[0]['udid']
+    whatsapp.SELECTED_ADB_DEVICE = udid
+    whatsapp.INPUT_MODE = "appium"
+    print(f"[BENCH] Device: {udid} ({devices[0]['model']}), {runs} runs per action")
+
+    reset_input_stats()
+    driver = whatsapp.setup_driver()
+    one_shot = {}
+    try:
+        for action, (send, _) in ACTIONS.items():
+            for _ in range(runs):
+                start = time.perf_counter()
+                send(driver)
+                record_appium_input(action, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        get_adb_shell(udid)
+        startup = time.perf_counter() - start
+        install_adb_input(driver, udid)
+        for action, (send, _) in ACTIONS.items():
+            for _ in range(runs):
+                send(driver)
+
+        for action, (_, arguments) in ACTIONS.items():
+            one_shot[action] = time_one_shot(udid, arguments, runs)
+    finally:
+        driver.quit()
+        close_adb_shells()
+
+    print("\n" + "=" * 60)
+    print("INPUT LATENCY BENCHMARK")
+    print("=" * 60)
+    for line in format_input_latency_report():
+        print(line)
+    print(f"[INPUT] adb shell startup (once per device): {startup * 1000:.0f}ms")
+    print("[INPUT] New `adb shell input` process per command:")
+    for action, seconds in one_shot.items():
+        print(f"   - {action}: {seconds * 1000:.0f}ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Photo transfer benchmark: streaming adb transfer vs single-call push_file
+
+Generates 1, 10 and 50 MB test files (or the sizes given on the command line,
+in MB), transfers each one with both paths and reports time, throughput and
+peak Python memory. Needs a connected device and a running Appium server.
+
+Usage: python bench_photo_transfer.py [size_mb ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import whatsapp
+
+DEFAULT_SIZES_MB = [1, 10, 50]
+BENCH_DEVICE_PATH = "/sdcard/Pictures/whatsapp_bench_transfer.jpg"
+
+
+def create_test_file(directory, size_mb):
+    """Write a file of random bytes of the given size"""
+    path = os.path.join(directory, f"bench_{size_mb}mb.jpg")
+    with open(path, 'wb') as file:
+        for _ in range(size_mb):
+            file.write(os.urandom(1024 * 1024))
+    return path
+
+
+def measure(transfer):
+    """Run a transfer callable and return (success, seconds, peak_bytes)"""
+    tracemalloc.start()
+    start = time.time()
+    try:
+        success = transfer()
+    except Exception as e:
+        print(f"[BENCH] Transfer raised: {e}")
+        success = False
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return success, elapsed, peak
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES_MB
+
+    devices = whatsapp.get_adb_devices()
+    if not devices:
+        print("[ERROR] No ADB devices found")
+        return
+    whatsapp.SELECTED_ADB_DEVICE = devices[0]['udid']
+    print(f"[BENCH] Device: {devices[0]['udid']} ({devices[0]['model']})")
+
+    driver = whatsapp.setup_driver()
+    results = []
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for size_mb in sizes:
+                local_path = create_test_file(tmp, size_mb)
+
+                paths = [
+                    ('stream', lambda: whatsapp.stream_photo_to_device(local_path, BENCH_DEVICE_PATH)),
+                    ('push_file', lambda: whatsapp.push_photo_single_call(driver, local_path, BENCH_DEVICE_PATH)),
+                ]
+                for name, transfer in paths:
+                    whatsapp.run_adb_shell(['rm', '-f', BENCH_DEVICE_PATH])
+                    success, elapsed, peak = measure(transfer)
+                    results.append((size_mb, name, success, elapsed, peak))
+
+                os.remove(local_path)
+    finally:
+        whatsapp.run_adb_shell(['rm', '-f', BENCH_DEVICE_PATH])
+        driver.quit()
+
+    print("\n" + "=" * 60)
+    print("PHOTO TRANSFER BENCHMARK")
+    print("=" * 60)
+    print(f"{'Size':>6}  {'Path':<10} {'Result':<7} {'Time':>8} {'MB/s':>7} {'Peak mem':>10}")
+    for size_mb, name, success, elapsed, peak in results:
+        throughput = size_mb / elapsed if elapsed and success else 0
+        print(f"{size_mb:>4}MB  {name:<10} {'ok' if success else 'FAILED':<7} {elapsed:>7.2f}s "
+              f"{throughput:>7.2f} {peak / (1024 * 1024):>8.1f}MB")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Selector micro-benchmark: XPath vs native lookups
+
+Takes every XPath selector written in whatsapp.py and whatsapp_scraper.py,
+compiles it with native_selectors.compile_selector() and times one lookup
+of each form per screen dump.
+
+Offline (default) the device's work is modelled on the dump itself: an XPath
+lookup serializes the whole tree to XML, parses it and evaluates the
+expression; a native lookup walks the nodes directly. Both forms must find
+the same nodes, otherwise the selector is reported as a mismatch. Dumps come
+from XML files (--dump), from the page sources in a session trace (--trace),
+or from the fake driver's screens.
+
+With --device the lookups run against the screen currently shown on a
+connected phone through a live Appium session.
+
+Usage:
+    python bench_selectors.py [--dump FILE_OR_DIR ...] [--trace FILE] [--runs N]
+    python bench_selectors.py --device [--runs N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+from native_selectors import compile_selector, BY_XPATH
+from ui_snapshot import parse_hierarchy, find_by_selector
+from session_trace import read_trace
+
+SOURCE_FILES = ["whatsapp.py", "whatsapp_scraper.py"]
+DEFAULT_RUNS = 20
+DEVICE_RUNS = 5
+
+# (AppiumBy.XPATH, "...") literals; f-strings are skipped since their value is only known at run time
+_XPATH_LITERAL = re.compile(r'AppiumBy\.XPATH,\s*(f?)"([^"]+)"')
+
+
+def collect_xpath_selectors(paths=SOURCE_FILES):
+    """Distinct XPath selector literals in the given source files, in order of appearance"""
+    selectors = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as file:
+            for is_format, xpath in _XPATH_LITERAL.findall(file.read()):
+                if not is_format and xpath not in selectors:
+                    selectors.append(xpath)
+    return selectors
+
+
+def load_dumps(paths):
+    """{name: xml} for XML files and directories of XML files"""
+    dumps = {}
+    for path in paths:
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.xml')] \
+            if os.path.isdir(path) else [path]
+        for file_path in files:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                dumps[os.path.basename(file_path)] = file.read()
+    return dumps
+
+
+def trace_dumps(path):
+    """{name: xml} for the distinct page sources recorded in a session trace"""
+    blobs = read_trace(path)['blobs']
+    return {f"trace-{digest[:8]}": data for digest, data in blobs.items() if '<hierarchy' in data[:300]}
+
+
+def fake_dumps():
+    """Page sources of the fake driver's screens along a photo send"""
+    from fake_driver import FakeWhatsAppDriver, SEARCH_FIELD_ID, ATTACH_ID
+    from device_configs import DEVICE_CONFIGS, DEFAULT_DEVICE_CONFIG_NAME
+    from ui_snapshot import classify_search_results, node_center
+
+    config = DEVICE_CONFIGS[DEFAULT_DEVICE_CONFIG_NAME]
+    contacts = [f"Bench Contact {index:02d}" for index in range(1, 25)]
+    driver = FakeWhatsAppDriver(contacts=contacts, latency={'default': 0}, search_delay=0)
+    dumps = {'chat_list': driver.page_source}
+    driver.tap([(config['search_button_x'], config['search_button_y'])])
+    driver.find_element('id', SEARCH_FIELD_ID).send_keys("Bench Contact 07")
+    dumps['search'] = driver.page_source
+    match = classify_search_results(parse_hierarchy(dumps['search']), "Bench Contact 07")['match']
+    driver.tap([node_center(match)])
+    dumps['conversation'] = driver.page_source
+    driver.find_element('id', ATTACH_ID).click()
+    dumps['attach'] = driver.page_source
+    driver.find_element('xpath', "//*[@text='Gallery']").click()
+    dumps['gallery'] = driver.page_source
+    return dumps
+
+
+def _best_time(function, runs):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _xpath_lookup(root, xpath):
+    """What UiAutomator2 does for XPath: dump the tree to XML, parse it, evaluate"""
+    from fake_driver import hierarchy_to_xml
+    return find_by_selector(parse_hierarchy(hierarchy_to_xml(root)), BY_XPATH, xpath)
+
+
+def _node_keys(nodes):
+    return [(node['class'], node['rid'], node['text'], node['bounds']) for node in nodes or []]
+
+
+def run_offline(selectors, dumps, runs):
+    """Print per-selector lookup times; returns the selectors whose native form matched different nodes"""
+    roots = {name: parse_hierarchy(xml) for name, xml in dumps.items()}
+    roots = {name: root for name, root in roots.items() if root is not None}
+    node_counts = {name: sum(1 for _ in re.finditer(r"<[^/?]", dumps[name])) for name in roots}
+    print(f"[BENCH] {len(roots)} dumps: " + ", ".join(f"{name} ({count} nodes)" for name, count in node_counts.items()))
+
+    mismatches = []
+    totals = {'before': 0.0, 'after': 0.0}
+    print(f"\n{'selector':<62} {'strategy':<21} {'xpath us':>9} {'native us':>10} {'speedup':>8}")
+    print("-" * 114)
+    for xpath in selectors:
+        scoped = xpath.startswith('.')
+        by, value = compile_selector(BY_XPATH, xpath, scoped=scoped)
+        lookup_xpath = xpath[1:] if scoped else xpath
+        before = after = 0.0
+        for name, root in roots.items():
+            expected = _node_keys(_xpath_lookup(root, lookup_xpath))
+            if _node_keys(find_by_selector(root, by, value)) != expected and xpath not in mismatches:
+                mismatches.append(xpath)
+            before += _best_time(lambda: _xpath_lookup(root, lookup_xpath), runs)
+            after += _best_time(lambda: find_by_selector(root, by, value), runs) if by != BY_XPATH else \
+                _best_time(lambda: _xpath_lookup(root, lookup_xpath), runs)
+        before, after = before / len(roots), after / len(roots)
+        totals['before'] += before
+        totals['after'] += after
+        print(f"{xpath[:62]:<62} {by:<21} {before * 1e6:>9.0f} {after * 1e6:>10.0f} {before / after:>7.1f}x")
+
+    print("-" * 114)
+    count = len(selectors)
+    print(f"{'average per lookup':<62} {'':<21} {totals['before'] / count * 1e6:>9.0f} "
+          f"{totals['after'] / count * 1e6:>10.0f} {totals['before'] / totals['after']:>7.1f}x")
+    native = sum(1 for xpath in selectors if compile_selector(BY_XPATH, xpath, xpath.startswith('.'))[0] != BY_XPATH)
+    print(f"[BENCH] {native}/{count} selectors compile to a native strategy")
+    return mismatches
+
+
+def run_device(selectors, runs):
+    """Time find_elements with each selector in both forms on the phone's current screen"""
+    import whatsapp
+
+    devices = whatsapp.get_adb_devices()
+    if not devices:
+        print("[ERROR] No ADB devices found")
+        return []
+    whatsapp.SELECTED_ADB_DEVICE = devices[0]['udid']
+    whatsapp.SELECTOR_MODE = "xpath"  # send both forms exactly as written here
+    print(f"[BENCH] Device: {devices[0]['udid']} ({devices[0]['model']})")
+    driver = whatsapp.setup_driver()
+    mismatches = []
+    totals = {'before': 0.0, 'after': 0.0}
+    try:
+        print(f"\n{'selector':<62} {'strategy':<21} {'xpath ms':>9} {'native ms':>10} {'found':>7}")
+        print("-" * 113)
+        for xpath in selectors:
+            if xpath.startswith('.'):
+                continue  # element-relative; needs a parent element on screen
+            by, value = compile_selector(BY_XPATH, xpath)
+            before = _best_time(lambda: driver.find_elements(BY_XPATH, xpath), runs)
+            after = _best_time(lambda: driver.find_elements(by, value), runs)
+            found_xpath = len(driver.find_elements(BY_XPATH, xpath))
+            found_native = len(driver.find_elements(by, value))
+            if found_xpath != found_native:
+                mismatches.append(xpath)
+            totals['before'] += before
+            totals['after'] += after
+            print(f"{xpath[:62]:<62} {by:<21} {before * 1000:>9.1f} {after * 1000:>10.1f} "
+                  f"{found_xpath:>3}/{found_native:<3}")
+        print("-" * 113)
+        print(f"{'total':<62} {'':<21} {totals['before'] * 1000:>9.1f} {totals['after'] * 1000:>10.1f}")
+    finally:
+        driver.quit()
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-lookup time of the bot's XPath selectors vs their native form")
+    parser.add_argument('--dump', nargs='*', default=[], help="page_source XML files or directories of them")
+    parser.add_argument('--trace', help="Use the page sources recorded in this session trace")
+    parser.add_argument('--device', action='store_true', help="Time lookups on a connected phone instead")
+    parser.add_argument('--runs', type=int, help=f"Lookups per selector, best is reported "
+                                                 f"(default: {DEFAULT_RUNS}, {DEVICE_RUNS} with --device)")
+    args = parser.parse_args()
+
+    selectors = collect_xpath_selectors()
+    print(f"[BENCH] {len(selectors)} XPath selectors in {', '.join(SOURCE_FILES)}")
+
+    if args.device:
+        mismatches = run_device(selectors, args.runs or DEVICE_RUNS)
+    else:
+        dumps = load_dumps(args.dump)
+        if args.trace:
+            dumps.update(trace_dumps(args.trace))
+        if not dumps:
+            print("[BENCH] No dumps given, using the fake driver's screens")
+            dumps = fake_dumps()
+        mismatches = run_offline(selectors, dumps, args.runs or DEFAULT_RUNS)
+
+    if mismatches:
+        print("[BENCH] Native form found different elements for:")
+        for xpath in mismatches:
+            print(f"   - {xpath}")
+        sys.exit(1)
+    print("[BENCH] Native and XPath forms found the same elements")
+
+
+if __name__ == "__main__":
+    main()
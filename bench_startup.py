@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Startup and shutdown benchmark
+
+Startup: imports each module in a fresh interpreter with `python -X importtime`
+and checks its cumulative import time against a budget. The config, planning
+and log modules must also import without pulling in appium or selenium.
+whatsapp.py itself has its own budget: it may load selenium's exception and
+locator modules, but not the WebDriver client or its wait support, which it
+imports once a session is created.
+
+Shutdown: times quitting a driver by scanning the heap with gc.get_objects()
+(the old Ctrl+C path) against the driver registry, with growing numbers of
+live objects. No device or Appium server is needed.
+
+Usage: python bench_startup.py [--budget-ms N] [--runs N]
+"""
+
+import argparse
+import gc
+import re
+import subprocess
+import sys
+import time
+
+from driver_registry import register_driver, quit_registered_drivers
+
+# Modules that tools and tests import on their own; none of them may load the WebDriver stack
+LIGHT_MODULES = [
+    "device_configs", "adb_tools", "run_logs", "chat_plan", "run_state", "journal",
+    "device_profiles", "calibration", "ui_snapshot", "session_recovery", "selector_cache",
+    "photo_prep", "driver_registry", "whatsapp_fleet", "session_trace", "native_selectors",
+    "screen_state", "adb_input", "performance_profile", "session_bootstrap", "json_store",
+]
+HEAVY_MODULES = ("appium", "selenium")
+# Entry scripts: module -> (budget ms, modules it must not load at import)
+SCRIPT_MODULES = {
+    "whatsapp": (100.0, ("appium", "selenium.webdriver.remote", "selenium.webdriver.support")),
+}
+DEFAULT_BUDGET_MS = 50.0
+DEFAULT_RUNS = 3
+HEAP_SIZES = [0, 200_000, 1_000_000]
+
+# "import time:      1234 |       5678 | module"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def measure_import(module, heavy_modules=HEAVY_MODULES):
+    """Import a module in a fresh interpreter; returns (cumulative_ms, heavy_modules_loaded) or None"""
+    check = (f"import sys, {module}; "
+             f"print(','.join(sorted({{h for h in {tuple(heavy_modules)!r} for m in sys.modules "
+             f"if m == h or m.startswith(h + '.')}})))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+                            capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        print(f"[BENCH] import {module} failed: {result.stderr.strip().splitlines()[-1:]}")
+        return None
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # The top-level entry for the module itself has no indentation
+        if match and match.group(4) == module and len(match.group(3)) <= 1:
+            cumulative_us = int(match.group(2))
+    heavy = [name for name in result.stdout.strip().split(',') if name]
+    return (cumulative_us or 0) / 1000.0, heavy
+
+
+def run_startup_benchmark(modules, budget_ms, runs, heavy_modules=HEAVY_MODULES, header=True):
+    """Print import time per module; returns the modules that are over budget or load heavy modules"""
+    failures = []
+    if header:
+        print(f"\n{'module':<20} {'best ms':>9} {'budget':>8}  heavy imports")
+        print("-" * 60)
+    for module in modules:
+        samples = [measure_import(module, heavy_modules) for _ in range(runs)]
+        samples = [sample for sample in samples if sample is not None]
+        if not samples:
+            failures.append(module)
+            continue
+        best_ms = min(ms for ms, _ in samples)
+        heavy = samples[0][1]
+        over = best_ms > budget_ms
+        status = "OVER" if over else "ok"
+        print(f"{module:<20} {best_ms:>9.1f} {budget_ms:>7.0f}  {', '.join(heavy) or '-'}  {status}")
+        if over or heavy:
+            failures.append(module)
+    return failures
+
+
+class _BenchDriver:
+    """Stands in for a live session: only quit() is called"""
+
+    def __init__(self):
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+# Matches the type check the old gc scan used ('webdriver' in str(type(obj)))
+_BenchDriver.__module__ = "bench.webdriver"
+
+
+def quit_by_gc_scan():
+    """The old shutdown path: find a driver among every object on the heap"""
+    for obj in gc.get_objects():
+        if hasattr(obj, 'quit') and 'webdriver' in str(type(obj)):
+            obj.quit()
+            return True
+    return False
+
+
+def run_shutdown_benchmark(heap_sizes):
+    """Print gc-scan vs registry quit times for each heap size"""
+    print(f"\n{'live objects':>14} {'gc scan ms':>12} {'registry ms':>12}")
+    print("-" * 42)
+    for size in heap_sizes:
+        ballast = [[index] for index in range(size)]
+        driver = _BenchDriver()
+        start = time.perf_counter()
+        quit_by_gc_scan()
+        scan_ms = (time.perf_counter() - start) * 1000
+
+        register_driver(driver)
+        start = time.perf_counter()
+        quit_registered_drivers()
+        registry_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{len(gc.get_objects()):>14,} {scan_ms:>12.2f} {registry_ms:>12.3f}")
+        del ballast, driver
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and shutdown benchmark")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Cumulative import budget per module in ms (default: {DEFAULT_BUDGET_MS:.0f})")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS,
+                        help=f"Fresh-interpreter imports per module, best is reported (default: {DEFAULT_RUNS})")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("STARTUP: python -X importtime")
+    print("=" * 60)
+    failures = run_startup_benchmark(LIGHT_MODULES, args.budget_ms, args.runs)
+    for module, (budget_ms, heavy_modules) in SCRIPT_MODULES.items():
+        failures += run_startup_benchmark([module], budget_ms, args.runs, heavy_modules, header=False)
+
+    print("\n" + "=" * 60)
+    print("SHUTDOWN: quit via gc scan vs driver registry")
+    print("=" * 60)
+    run_shutdown_benchmark(HEAP_SIZES)
+
+    if failures:
+        print(f"\n[BENCH] Over budget or loading {'/'.join(HEAVY_MODULES)}: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n[BENCH] All modules within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+UiAutomator2 settings benchmark: per-command latency with each performance feature on and off
+
+Runs the same short workload on the chat list (page_source, an id lookup, an
+XPath lookup, a presence tap, a key press and a search open/close round trip)
+with every performance feature off, each one alone, all of them on, and the
+features that helped on their own together. The fastest configuration is
+stored in the device profile cache, where the "auto" profile of whatsapp.py
+and whatsapp_scraper.py picks up its session features (the device ones stay
+opt-in through the "full" profile). Device settings are put back at the end.
+Needs a connected device and a running Appium server.
+
+Usage: python bench_uia2_settings.py [--rounds N] [--no-save]
+"""
+
+import argparse
+import statistics
+import time
+
+import whatsapp
+from adb_tools import get_device_model, get_screen_resolution
+from device_profiles import save_performance_result
+from performance_profile import FEATURES, apply_performance_profile, restore_device_settings
+from screen_state import navigate_to_chat_list
+
+DEFAULT_ROUNDS = 5
+KEYCODE_WAKEUP = 224
+SEARCH_BUTTON_ID = "com.whatsapp:id/menuitem_search"
+
+
+def _search_round_trip(driver):
+    driver.find_element('id', SEARCH_BUTTON_ID).click()
+    whatsapp.wait_for_ui(driver, 'search_field_focused', timeout=5.0)
+    navigate_to_chat_list(driver)
+
+
+# command -> call; all of them start and end on the chat list
+WORKLOAD = {
+    'page_source': lambda driver: driver.page_source,
+    'find_id': lambda driver: driver.find_elements('id', SEARCH_BUTTON_ID),
+    'find_xpath': lambda driver: driver.find_elements('xpath', "//*[@text='Chats']"),
+    'tap': lambda driver: driver.tap([(50, 50)]),
+    'press_key': lambda driver: driver.press_keycode(KEYCODE_WAKEUP),
+    'search_round_trip': _search_round_trip,
+}
+
+
+def run_configuration(driver, udid, features, rounds):
+    """Median seconds per workload command with these features applied (one warm-up round first)"""
+    features = apply_performance_profile(driver, udid, features)
+    navigate_to_chat_list(driver)
+    timings = {command: [] for command in WORKLOAD}
+    for round_number in range(rounds + 1):
+        for command, call in WORKLOAD.items():
+            start = time.perf_counter()
+            call(driver)
+            if round_number:
+                timings[command].append(time.perf_counter() - start)
+    medians = {command: statistics.median(seconds) for command, seconds in timings.items()}
+    return features, medians
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-command latency of the UiAutomator2 performance features")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS,
+                        help=f"Timed rounds per configuration (default {DEFAULT_ROUNDS})")
+    parser.add_argument('--no-save', action='store_true', help="Don't store the fastest configuration")
+    args = parser.parse_args()
+
+    devices = whatsapp.get_adb_devices()
+    if not devices:
+        print("[ERROR] No ADB devices found")
+        return
+    udid = devices[0]['udid']
+    whatsapp.SELECTED_ADB_DEVICE = udid
+    whatsapp.PERFORMANCE_PROFILE = "stock"
+    model, resolution = get_device_model(udid), get_screen_resolution(udid)
+    print(f"[BENCH] Device: {udid} ({model}, {resolution}), {args.rounds} rounds per configuration")
+
+    driver = whatsapp.setup_driver()
+    results = {}    # label -> (features in effect, {command: median seconds})
+    try:
+        results['all off'] = run_configuration(driver, udid, (), args.rounds)
+        baseline = sum(results['all off'][1].values())
+        helpful = []
+        for feature in FEATURES:
+            results[feature] = run_configuration(driver, udid, (feature,), args.rounds)
+            if results[feature][0] and sum(results[feature][1].values()) < baseline:
+                helpful.append(feature)
+        results['all on'] = run_configuration(driver, udid, FEATURES, args.rounds)
+        if helpful and len(helpful) < len(FEATURES):
+            results['helpful'] = run_configuration(driver, udid, tuple(helpful), args.rounds)
+    finally:
+        restore_device_settings()
+        driver.quit()
+
+    fastest = min(results, key=lambda label: sum(results[label][1].values()))
+
+    print("\n" + "=" * 100)
+    print("UIAUTOMATOR2 SETTINGS BENCHMARK (median ms per command)")
+    print("=" * 100)
+    print(f"{'Configuration':<18}" + "".join(f"{command:>13}" for command in WORKLOAD) + f"{'total':>10}")
+    for label, (features, medians) in results.items():
+        marker = " *" if label == fastest else ""
+        print(f"{label + marker:<18}" + "".join(f"{medians[command] * 1000:>13.0f}" for command in WORKLOAD)
+              + f"{sum(medians.values()) * 1000:>10.0f}")
+    print(f"\n* Fastest: {fastest} ({', '.join(results[fastest][0]) or 'no features'})")
+    print("=" * 100)
+
+    if not args.no_save and model and resolution:
+        save_performance_result(model, resolution, results[fastest][0], {
+            label: {'features': list(features), 'median_ms': {c: round(s * 1000, 1) for c, s in medians.items()}}
+            for label, (features, medians) in results.items()
+        })
+        print(f"[BENCH] Stored for {model} at {resolution}; the 'auto' profile will use its session features")
+
+
+if __name__ == "__main__":
+    main()
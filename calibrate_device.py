@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Coordinate calibration for the connected device
+
+Walks chat list -> conversation -> attach -> gallery -> photo preview once,
+reads the bounds of the search button, first gallery photo, caption field
+and send button from the UI hierarchy, and stores them as the device's
+calibrated profile (keyed by model, resolution and WhatsApp version).
+Nothing is sent: the preview is closed with BACK.
+
+Usage:
+    python calibrate_device.py [--udid UDID] [--chat "chat name"]
+"""
+
+import argparse
+
+import whatsapp
+from selenium.webdriver.common.by import By as AppiumBy
+from calibration import (coordinates_from_snapshot, find_first_thumbnail, find_send_button, SCREEN_KEYS)
+from device_profiles import save_calibrated_profile
+from ui_snapshot import parse_hierarchy, find_node, node_center, CONTACT_ROW_ID
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Calibrate tap coordinates from the UI hierarchy")
+    parser.add_argument('--udid', help="ADB device UDID (default: the only connected device)")
+    parser.add_argument('--chat', help="Chat to open for the attach/gallery screens (default: first chat in the list)")
+    return parser.parse_args()
+
+
+def snapshot(driver):
+    return parse_hierarchy(driver.page_source)
+
+
+def open_chat(driver, chat_name):
+    """Open the given chat via search, or the first chat row in the list"""
+    if chat_name:
+        return whatsapp.search_and_find_chat(driver, whatsapp.clean_chat_name(chat_name))
+    row = find_node(snapshot(driver), rid=CONTACT_ROW_ID)
+    if row is None:
+        print("[CALIBRATE] No chat row on screen")
+        return False
+    driver.tap([node_center(row)])
+    return bool(whatsapp.wait_for_ui(driver, 'conversation', timeout=5.0))
+
+
+def walk_screens(driver, chat_name, width):
+    """Visit each screen once and collect its coordinates; returns {screen: values}"""
+    found = {'chat_list': coordinates_from_snapshot('chat_list', snapshot(driver), width)}
+
+    if not open_chat(driver, chat_name):
+        print("[CALIBRATE] Could not open a chat, only the chat list was calibrated")
+        return found
+
+    driver.find_element(AppiumBy.ID, "com.whatsapp:id/attach").click()
+    gallery = whatsapp.wait_for_ui(driver, lambda drv: find_node(snapshot(drv), text="Gallery"),
+                                   timeout=5.0, label='calibrate_attach_sheet')
+    if not gallery:
+        print("[CALIBRATE] Attach sheet did not show 'Gallery'")
+        return found
+    driver.tap([node_center(gallery)])
+
+    thumbnail = whatsapp.wait_for_ui(driver, lambda drv: find_first_thumbnail(snapshot(drv), width),
+                                     timeout=8.0, label='calibrate_gallery')
+    if not thumbnail:
+        print("[CALIBRATE] No photo found in the gallery")
+        return found
+    found['gallery'] = coordinates_from_snapshot('gallery', snapshot(driver), width)
+    driver.tap([node_center(thumbnail)])
+
+    if whatsapp.wait_for_ui(driver, lambda drv: find_send_button(snapshot(drv)), timeout=8.0,
+                            label='calibrate_preview'):
+        found['preview'] = coordinates_from_snapshot('preview', snapshot(driver), width)
+    else:
+        print("[CALIBRATE] Photo preview did not show a send button")
+    return found
+
+
+def back_to_chat_list(driver):
+    """Close preview/gallery/chat without sending"""
+    for _ in range(5):
+        if whatsapp.wait_for_ui(driver, 'chat_list', timeout=0.8, label='calibrate_chat_list'):
+            return
+        driver.press_keycode(4)  # KEYCODE_BACK
+
+
+def main():
+    args = parse_args()
+    whatsapp.NON_INTERACTIVE = True
+
+    udid = args.udid or whatsapp.select_adb_device()
+    if not udid:
+        return
+    whatsapp.SELECTED_ADB_DEVICE = udid
+
+    model = whatsapp.get_device_model(udid)
+    resolution = whatsapp.get_screen_resolution(udid)
+    version = whatsapp.get_installed_app_version(udid)
+    base_name = whatsapp.match_device_config(model) or whatsapp.DEFAULT_DEVICE_CONFIG_NAME
+    config = dict(whatsapp.DEVICE_CONFIGS[base_name])
+    print(f"[CALIBRATE] {model} {resolution}, WhatsApp {version}, starting from '{base_name}'")
+
+    driver = whatsapp.setup_driver()
+    try:
+        if not whatsapp.turn_screen_on_and_unlock(driver) or not whatsapp.open_whatsapp_business(driver):
+            print("[CALIBRATE] Could not open WhatsApp")
+            return
+        width = whatsapp.get_screen_size(driver)['width']
+        try:
+            found = walk_screens(driver, args.chat, width)
+        finally:
+            back_to_chat_list(driver)
+    finally:
+        driver.quit()
+
+    print("\n" + "=" * 60)
+    print("CALIBRATION RESULT")
+    print("=" * 60)
+    for screen, keys in SCREEN_KEYS.items():
+        values = found.get(screen, {})
+        for key in keys:
+            if key in values:
+                marker = "" if values[key] == config[key] else f"  (was {config[key]})"
+                print(f"  {key:<24} {values[key]}{marker}")
+                config[key] = values[key]
+            else:
+                print(f"  {key:<24} {config[key]}  (not calibrated, kept)")
+    print("=" * 60)
+
+    if not any(found.values()):
+        print("[CALIBRATE] Nothing calibrated, profile not saved")
+        return
+    save_calibrated_profile(model, resolution, version, config)
+    print(f"[CALIBRATE] Saved calibrated profile for {model} {resolution} WhatsApp {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Coordinate calibration from UI hierarchy snapshots.
+
+Finds the elements behind the DEVICE_CONFIGS tap coordinates (search button,
+first gallery photo, caption field, send button) in page_source snapshots
+and turns their bounds into a coordinate profile. The same lookups are used
+to check a profile against the live screen.
+"""
+
+from ui_snapshot import find_node, iter_nodes, node_center
+
+SEARCH_BUTTON_IDS = ("com.whatsapp:id/menuitem_search", "com.whatsapp:id/search")
+CAPTION_IDS = ("com.whatsapp:id/caption", "com.whatsapp:id/media_caption")
+SEND_BUTTON_IDS = ("com.whatsapp:id/send", "com.whatsapp:id/send_media_btn")
+THUMBNAIL_ID_HINTS = ("thumb", "gallery_item", "media_item")
+
+# Coordinate keys set by calibration, per screen
+SCREEN_KEYS = {
+    'chat_list': ('search_button_x', 'search_button_y'),
+    'gallery': ('photo_select_x', 'photo_select_y'),
+    'preview': ('caption_area_x_offset', 'caption_area_y', 'send_button_x', 'send_button_y'),
+}
+
+
+def point_in_bounds(point, bounds):
+    """True if an (x, y) point lies inside (x1, y1, x2, y2) bounds"""
+    x, y = point
+    x1, y1, x2, y2 = bounds
+    return x1 <= x <= x2 and y1 <= y <= y2
+
+
+def _find_first_id(root, ids):
+    for rid in ids:
+        node = find_node(root, rid=rid)
+        if node is not None:
+            return node
+    return None
+
+
+def find_search_button(root):
+    """Search button on the chat list"""
+    node = _find_first_id(root, SEARCH_BUTTON_IDS)
+    if node is None:
+        node = find_node(root, text="Search")
+    return node
+
+
+def find_first_thumbnail(root, screen_width):
+    """Top-left photo in the gallery picker
+
+    Uses thumbnail resource ids when the build has them, otherwise the
+    top-left roughly square image at least a sixth of the screen wide.
+    """
+    candidates = [node for node in iter_nodes(root)
+                  if node['displayed'] and any(hint in node['rid'] for hint in THUMBNAIL_ID_HINTS)]
+    if not candidates:
+        for node in iter_nodes(root):
+            if not node['displayed'] or 'ImageView' not in node['class']:
+                continue
+            x1, y1, x2, y2 = node['bounds']
+            width, height = x2 - x1, y2 - y1
+            if width >= screen_width // 6 and width < screen_width and height and 0.8 <= width / height <= 1.25:
+                candidates.append(node)
+    if not candidates:
+        return None
+    return min(candidates, key=lambda node: (node['bounds'][1], node['bounds'][0]))
+
+
+def find_caption_field(root):
+    """Caption input on the media preview screen"""
+    node = _find_first_id(root, CAPTION_IDS)
+    if node is None:
+        node = find_node(root, cls='android.widget.EditText')
+    return node
+
+
+def find_send_button(root):
+    """Send button on the media preview screen"""
+    node = _find_first_id(root, SEND_BUTTON_IDS)
+    if node is None:
+        for candidate in iter_nodes(root):
+            if candidate['displayed'] and candidate['desc'].lower() == 'send':
+                return candidate
+    return node
+
+
+def coordinates_from_snapshot(screen, root, screen_width):
+    """Coordinate values for one screen ('chat_list', 'gallery' or 'preview'); missing elements are skipped"""
+    values = {}
+    if root is None:
+        return values
+
+    if screen == 'chat_list':
+        node = find_search_button(root)
+        if node is not None:
+            values['search_button_x'], values['search_button_y'] = node_center(node)
+    elif screen == 'gallery':
+        node = find_first_thumbnail(root, screen_width)
+        if node is not None:
+            values['photo_select_x'], values['photo_select_y'] = node_center(node)
+    elif screen == 'preview':
+        caption = find_caption_field(root)
+        if caption is not None:
+            x, y = node_center(caption)
+            values['caption_area_x_offset'] = x - screen_width // 2
+            values['caption_area_y'] = y
+        send = find_send_button(root)
+        if send is not None:
+            values['send_button_x'], values['send_button_y'] = node_center(send)
+    return values
+
+
+def check_config_against_snapshot(config, screen, root, screen_width):
+    """Keys of the profile whose tap point misses its element on this screen
+
+    Returns None if the element isn't in the snapshot (nothing to check).
+    """
+    if root is None:
+        return None
+
+    if screen == 'chat_list':
+        checks = [(find_search_button(root), ('search_button_x', 'search_button_y'))]
+    elif screen == 'gallery':
+        checks = [(find_first_thumbnail(root, screen_width), ('photo_select_x', 'photo_select_y'))]
+    elif screen == 'preview':
+        caption_point = (screen_width // 2 + config['caption_area_x_offset'], config['caption_area_y'])
+        send = find_send_button(root)
+        caption = find_caption_field(root)
+        mismatched = []
+        if caption is not None and not point_in_bounds(caption_point, caption['bounds']):
+            mismatched += ['caption_area_x_offset', 'caption_area_y']
+        if send is not None and not point_in_bounds((config['send_button_x'], config['send_button_y']), send['bounds']):
+            mismatched += ['send_button_x', 'send_button_y']
+        return mismatched if caption is not None or send is not None else None
+    else:
+        raise ValueError(f"Unknown screen '{screen}'")
+
+    mismatched = []
+    found = False
+    for node, (key_x, key_y) in checks:
+        if node is None:
+            continue
+        found = True
+        if not point_in_bounds((config[key_x], config[key_y]), node['bounds']):
+            mismatched += [key_x, key_y]
+    return mismatched if found else None
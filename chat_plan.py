@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Chat list planning: reading txt/chat_name.txt and choosing which rows to
+process, interactively or from a --rows spec. No Appium needed.
+"""
+
+# Default chat list
+CHAT_NAME_FILE = "txt/chat_name.txt"
+
+
+def analyze_chat_entries(chat_file=CHAT_NAME_FILE):
+    """Analyze the chat list file (txt/chat_name.txt by default) and categorize entries"""
+    try:
+        with open(chat_file, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+
+        total_entries = 0
+        phone_numbers = 0
+        groups = 0
+        all_entries = []
+
+        for line_num, line in enumerate(lines, 1):
+            line = line.strip()
+            # Skip empty lines and comments
+            if line and not line.startswith('#'):
+                # Parse formatted entries like "  - Row 982: NepalWin🇳🇵Shankartr88"
+                chat_name = line
+                original_row = line_num
+
+                # Check if line has the "- Row X:" format
+                if "- Row" in line and ":" in line:
+                    parts = line.split(":", 1)
+                    if len(parts) == 2:
+                        # Extract row number from "- Row 982" part
+                        row_part = parts[0].strip()
+                        if "Row" in row_part:
+                            try:
+                                row_number = int(row_part.split("Row")[1].strip())
+                                original_row = row_number
+                            except:
+                                pass  # Keep original line_num if parsing fails
+
+                        # Extract chat name from the part after ":"
+                        chat_name = parts[1].strip()
+
+                # Skip if chat name is empty after parsing
+                if not chat_name:
+                    continue
+
+                all_entries.append((original_row, chat_name))
+                total_entries += 1
+
+                # Check if it's a phone number (contains only digits and +)
+                clean_for_check = chat_name.replace('NepalWin🇳🇵', '').replace('+', '').replace(' ', '').replace('-', '')
+                if clean_for_check.isdigit():
+                    phone_numbers += 1
+                else:
+                    groups += 1
+
+        return {
+            'total': total_entries,
+            'phones': phone_numbers,
+            'groups': groups,
+            'entries': all_entries
+        }
+
+    except FileNotFoundError:
+        print(f"[ERROR] {chat_file} not found!")
+        return None
+    except Exception as e:
+        print(f"[ERROR] Error analyzing chat entries: {str(e)}")
+        return None
+
+
+def show_selection_menu(analysis):
+    """Show interactive menu for row selection"""
+    print("\n" + "="*60)
+    print("[TARGET] CHAT TARGETING MENU")
+    print("="*60)
+    print(f"[STATS] Total entries in file: {analysis['total']} ({analysis['phones']} phones + {analysis['groups']} groups)")
+    print()
+    print("[TARGET] Row Selection Options:")
+    print("1. Process all entries (default)")
+    print("2. Start from specific row")
+    print("3. Process specific range")
+    print("4. Process only first N entries")
+    print()
+
+    while True:
+        try:
+            choice = input("Enter your choice (1-4) or press ENTER for default: ").strip()
+
+            # Default choice (process all)
+            if choice == "" or choice == "1":
+                return {
+                    'mode': 'all',
+                    'start': 1,
+                    'end': analysis['total'],
+                    'entries': analysis['entries']
+                }
+
+            # Start from specific row
+            elif choice == "2":
+                while True:
+                    try:
+                        start_row = input(f"Enter starting row number (1-{analysis['total']}): ").strip()
+                        start_row = int(start_row)
+                        if 1 <= start_row <= analysis['total']:
+                            selected_entries = analysis['entries'][start_row-1:]
+                            print(f"[SUCCESS] Will process {len(selected_entries)} entries starting from row {start_row}")
+                            return {
+                                'mode': 'start_from',
+                                'start': start_row,
+                                'end': analysis['total'],
+                                'entries': selected_entries
+                            }
+                        else:
+                            print(f"[ERROR] Please enter a number between 1 and {analysis['total']}")
+                    except ValueError:
+                        print("[ERROR] Please enter a valid number")
+
+            # Process specific range
+            elif choice == "3":
+                while True:
+                    try:
+                        start_row = input(f"Enter starting row (1-{analysis['total']}): ").strip()
+                        start_row = int(start_row)
+                        if not (1 <= start_row <= analysis['total']):
+                            print(f"[ERROR] Start row must be between 1 and {analysis['total']}")
+                            continue
+
+                        end_row = input(f"Enter ending row ({start_row}-{analysis['total']}): ").strip()
+                        end_row = int(end_row)
+                        if not (start_row <= end_row <= analysis['total']):
+                            print(f"[ERROR] End row must be between {start_row} and {analysis['total']}")
+                            continue
+
+                        selected_entries = analysis['entries'][start_row-1:end_row]
+                        print(f"[SUCCESS] Will process {len(selected_entries)} entries from row {start_row} to {end_row}")
+                        return {
+                            'mode': 'range',
+                            'start': start_row,
+                            'end': end_row,
+                            'entries': selected_entries
+                        }
+                    except ValueError:
+                        print("[ERROR] Please enter valid numbers")
+
+            # Process only first N entries
+            elif choice == "4":
+                while True:
+                    try:
+                        count = input(f"Enter number of entries to process (1-{analysis['total']}): ").strip()
+                        count = int(count)
+                        if 1 <= count <= analysis['total']:
+                            selected_entries = analysis['entries'][:count]
+                            print(f"[SUCCESS] Will process first {count} entries")
+                            return {
+                                'mode': 'first_n',
+                                'start': 1,
+                                'end': count,
+                                'entries': selected_entries
+                            }
+                        else:
+                            print(f"[ERROR] Please enter a number between 1 and {analysis['total']}")
+                    except ValueError:
+                        print("[ERROR] Please enter a valid number")
+
+            else:
+                print("[ERROR] Please enter 1, 2, 3, 4, or press ENTER for default")
+
+        except KeyboardInterrupt:
+            print("\n[ERROR] Operation cancelled by user")
+            return None
+
+
+def parse_row_spec(text):
+    """Parse a row selection: 'all', 'N-' (start from N), 'N-M' (range) or 'N' (first N)
+
+    Row numbers are positions in the chat list, as in the selection menu.
+    """
+    text = str(text).strip().lower()
+    if text in ("", "all"):
+        return {'mode': 'all'}
+    if '-' in text:
+        start, end = text.split('-', 1)
+        start = int(start)
+        if not end.strip():
+            return {'mode': 'start_from', 'start': start}
+        end = int(end)
+        if end < start:
+            raise ValueError(f"end row {end} is before start row {start}")
+        return {'mode': 'range', 'start': start, 'end': end}
+    return {'mode': 'first_n', 'start': 1, 'end': int(text)}
+
+
+def build_row_selection(analysis, spec):
+    """Non-interactive equivalent of show_selection_menu for a parse_row_spec result"""
+    total = analysis['total']
+    start = max(1, spec.get('start', 1))
+    end = min(total, spec.get('end', total))
+    if start > total:
+        print(f"[ERROR] Start row {start} is past the end of the list ({total} entries)")
+        return None
+    selection = {
+        'mode': spec['mode'],
+        'start': start,
+        'end': end,
+        'entries': analysis['entries'][start - 1:end]
+    }
+    print(f"[TARGET] Rows {start}-{end} ({spec['mode']}): {len(selection['entries'])} entries")
+    return selection
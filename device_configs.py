@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Device coordinate profiles.
+
+DEVICE_CONFIGS holds the tap coordinates per phone model; the profile in use
+for this run is kept here too. Importing this module doesn't load Appium, so
+config tools and tests can use it on their own.
+"""
+
+# Device-specific coordinate configurations
+DEVICE_CONFIGS = {
+    "Redmi Note 13 Pro": {
+        "photo_select_x": 180,
+        "photo_select_y": 1350,
+        "photo_select_fallback_x": 180,
+        "photo_select_fallback_y": 400,
+        "caption_area_x_offset": 0,  # Offset from center, 0 means use center
+        "caption_area_y": 2330,
+        "caption_fallback_x": 360,
+        "caption_fallback_y": 1400,
+        "send_button_x": 990,
+        "send_button_y": 2310,
+        "search_button_x": 525,
+        "search_button_y": 330
+    },
+
+    "Redmi 9A": {
+        "photo_select_x": 120,
+        "photo_select_y": 670,
+        "photo_select_fallback_x": 180,
+        "photo_select_fallback_y": 400,
+        "caption_area_x_offset": 0,  # Offset from center, 0 means use center
+        "caption_area_y": 1533,
+        "caption_fallback_x": 360,
+        "caption_fallback_y": 1400,
+        "send_button_x": 650,
+        "send_button_y": 1533,
+        "search_button_x": 525,
+        "search_button_y": 225
+    }
+
+    # Add your custom device configurations here
+    # Example:
+    # "Samsung Galaxy S21": {
+    #     "photo_select_x": 200,
+    #     "photo_select_y": 1400,
+    #     ...
+    # }
+}
+
+# Profile used when none is selected (ENTER in the menu, or unattended runs on an unknown device)
+DEFAULT_DEVICE_CONFIG_NAME = "Redmi Note 13 Pro"
+
+# Profile in use for this run (set by the menu, the command line or the profile cache)
+_selected = {'config': None, 'name': None}
+
+
+def set_device_config(config, name):
+    """Make config the active coordinate profile; returns it"""
+    _selected['config'] = config
+    _selected['name'] = name
+    return config
+
+
+def get_selected_device_config():
+    """Active profile, or None if none was selected yet"""
+    return _selected['config']
+
+
+def get_device_config_name():
+    """Name of the active profile ('calibrated' for calibrated profiles), or None"""
+    return _selected['name']
+
+
+def get_device_config():
+    """Get current device config, fallback to default if not set"""
+    if _selected['config'] is None:
+        print(f"[WARNING] Device config not set, using default ({DEFAULT_DEVICE_CONFIG_NAME})")
+        set_device_config(DEVICE_CONFIGS[DEFAULT_DEVICE_CONFIG_NAME], DEFAULT_DEVICE_CONFIG_NAME)
+    return _selected['config']
+
+
+def select_device_config():
+    """Interactive device selection menu"""
+    print("\n" + "="*60)
+    print("[DEVICE] DEVICE CONFIGURATION SETUP")
+    print("="*60)
+
+    # List all available device configurations
+    device_names = list(DEVICE_CONFIGS.keys())
+
+    print("\n[DEVICE] Available device configurations:")
+    for idx, device_name in enumerate(device_names, 1):
+        print(f"{idx}. {device_name}")
+
+    print(f"\n[DEVICE] Enter device number (1-{len(device_names)}) or press ENTER for default:")
+
+    while True:
+        try:
+            choice = input("Device selection: ").strip()
+
+            # Default choice
+            if choice == "":
+                selected_device = DEFAULT_DEVICE_CONFIG_NAME
+                print(f"[DEVICE] Using default device configuration ({selected_device})")
+                break
+
+            # Validate numeric choice
+            choice_num = int(choice)
+            if 1 <= choice_num <= len(device_names):
+                selected_device = device_names[choice_num - 1]
+                print(f"[DEVICE] Selected device: {selected_device}")
+                break
+            else:
+                print(f"[ERROR] Please enter a number between 1 and {len(device_names)}")
+
+        except ValueError:
+            print("[ERROR] Please enter a valid number or press ENTER for default")
+        except KeyboardInterrupt:
+            print("\n[ERROR] Device selection cancelled")
+            return None
+
+    config = set_device_config(DEVICE_CONFIGS[selected_device], selected_device)
+
+    # Display selected coordinates
+    print(f"\n[DEVICE] Loaded coordinates for '{selected_device}':")
+    print(f"   - Photo select: ({config['photo_select_x']}, {config['photo_select_y']})")
+    print(f"   - Caption area Y: {config['caption_area_y']}")
+    print(f"   - Send button: ({config['send_button_x']}, {config['send_button_y']})")
+    print(f"   - Search button: ({config['search_button_x']}, {config['search_button_y']})")
+    print("="*60)
+
+    return config
+
+
+def match_device_config(model):
+    """Find the DEVICE_CONFIGS entry for an adb model name (e.g. 'Redmi_9A'), or None"""
+    normalized = model.replace('_', ' ').strip().lower()
+    for device_name in DEVICE_CONFIGS:
+        if device_name.lower() == normalized:
+            return device_name
+    return None
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Device latency estimator.
+
+Keeps an exponentially weighted moving average (EWMA) of Appium command
+round-trip times, measured on the commands the bot already sends, plus a
+cached screen size. Delays are derived from the estimate without sending
+extra probe commands.
+"""
+
+import time
+
+# Weight of the newest sample in the moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Commands whose duration reflects payload size or on-device work rather than
+# device responsiveness (page source dumps, file transfer, typing, session setup)
+EXCLUDED_COMMANDS = {
+    'getPageSource',
+    'pushFile',
+    'pullFile',
+    'pullFolder',
+    'executeScript',
+    'w3cExecuteScript',
+    'newSession',
+    'quit'
+}
+
+# Delay thresholds, same as the old per-call responsiveness probe
+SLOW_LATENCY = 0.5
+NORMAL_LATENCY = 0.2
+
+_latency_state = {
+    'ewma': None,
+    'samples': 0,
+    'last': None,
+    'min': None,
+    'max': None,
+    'screen_size': None,
+    'screen_session': None
+}
+
+
+def record_command_latency(seconds):
+    """Fold one observed command latency into the estimate"""
+    state = _latency_state
+    state['last'] = seconds
+    state['samples'] += 1
+    if state['ewma'] is None:
+        state['ewma'] = seconds
+    else:
+        state['ewma'] = LATENCY_EWMA_ALPHA * seconds + (1 - LATENCY_EWMA_ALPHA) * state['ewma']
+    state['min'] = seconds if state['min'] is None else min(state['min'], seconds)
+    state['max'] = seconds if state['max'] is None else max(state['max'], seconds)
+
+
+def install_latency_tracking(driver):
+    """Time every command the driver sends and feed it into the estimator"""
+    original_execute = driver.execute
+
+    def timed_execute(driver_command, params=None):
+        start = time.time()
+        try:
+            return original_execute(driver_command, params)
+        finally:
+            if driver_command not in EXCLUDED_COMMANDS:
+                record_command_latency(time.time() - start)
+
+    driver.execute = timed_execute
+    return driver
+
+
+def get_latency_estimate():
+    """Current EWMA latency in seconds, or None before any command was observed"""
+    return _latency_state['ewma']
+
+
+def compute_adaptive_delay(base_delay=1.0, max_delay=5.0):
+    """Pick a delay for the current latency estimate; returns (delay, category)"""
+    latency = _latency_state['ewma']
+    if latency is None:
+        return base_delay, 'unknown'
+    if latency > SLOW_LATENCY:
+        return min(base_delay * 1.5, max_delay), 'slow'
+    if latency > NORMAL_LATENCY:
+        return base_delay, 'normal'
+    return max(base_delay * 0.7, 0.3), 'fast'
+
+
+def get_screen_size(driver):
+    """Screen size for the driver's session, fetched once and then served from cache"""
+    session = getattr(driver, 'session_id', None)
+    if _latency_state['screen_size'] is None or _latency_state['screen_session'] != session:
+        _latency_state['screen_size'] = driver.get_window_size()
+        _latency_state['screen_session'] = session
+    return _latency_state['screen_size']
+
+
+def get_latency_stats():
+    """Snapshot of the estimator state for metrics and summaries"""
+    return {key: value for key, value in _latency_state.items() if key != 'screen_session'}
+
+
+def reset_latency_stats():
+    """Forget all samples and the cached screen size"""
+    _latency_state.update({
+        'ewma': None,
+        'samples': 0,
+        'last': None,
+        'min': None,
+        'max': None,
+        'screen_size': None,
+        'screen_session': None
+    })
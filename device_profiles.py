@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Device profile cache.
+
+Maps an adb model name plus screen resolution (e.g. "Redmi_9A" at
+"720x1600") to the DEVICE_CONFIGS profile that was used for it, so later
+runs on the same phone pick their coordinates without asking. Calibrated
+coordinate profiles (calibrate_device.py) are stored in the same file,
+keyed by model, resolution and WhatsApp version. The fastest UiAutomator2
+performance settings found by bench_uia2_settings.py are kept per model and
+resolution, and the session bootstrap state (session_bootstrap.py) per device
+serial. The original device settings a performance profile changed are kept
+per device serial too, so a run killed before restoring them leaves a record
+the next run restores from.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from json_store import update_json_file
+
+DEVICE_PROFILE_CACHE_FILE = "txt/device_profiles.json"
+
+
+def profile_key(model, resolution):
+    """Cache key for a device: '<model>|<WxH>'"""
+    return f"{model}|{resolution or 'unknown'}"
+
+
+def _read_profiles(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        print(f"[PROFILE] Failed to read device profile cache, ignoring it: {e}")
+        return {}
+
+
+def lookup_device_profile(model, resolution, path=DEVICE_PROFILE_CACHE_FILE):
+    """Cached profile name for the model and resolution, or None"""
+    entry = _read_profiles(path).get(profile_key(model, resolution))
+    return entry.get('profile') if entry else None
+
+
+def _write_entry(key, entry, path):
+    def put(profiles):
+        profiles[key] = entry
+
+    # Fleet workers save at the same time: locked read-modify-write, atomic replace
+    try:
+        update_json_file(path, put)
+    except Exception as e:
+        print(f"[PROFILE] Failed to save device profile cache: {e}")
+
+
+def remember_device_profile(model, resolution, profile_name, path=DEVICE_PROFILE_CACHE_FILE):
+    """Store the profile name used for the model and resolution"""
+    _write_entry(profile_key(model, resolution), {
+        'profile': profile_name,
+        'updated': datetime.now().isoformat(timespec='seconds')
+    }, path)
+
+
+def calibration_key(model, resolution, app_version):
+    """Cache key for a calibrated profile: '<model>|<WxH>|<WhatsApp version>'"""
+    return f"{profile_key(model, resolution)}|{app_version or 'unknown'}"
+
+
+def load_calibrated_profile(model, resolution, app_version, path=DEVICE_PROFILE_CACHE_FILE):
+    """Calibrated coordinates for this device and WhatsApp version, or None"""
+    entry = _read_profiles(path).get(calibration_key(model, resolution, app_version))
+    return entry.get('config') if entry else None
+
+
+def save_calibrated_profile(model, resolution, app_version, config, path=DEVICE_PROFILE_CACHE_FILE):
+    """Store calibrated coordinates for this device and WhatsApp version"""
+    _write_entry(calibration_key(model, resolution, app_version), {
+        'config': config,
+        'calibrated': datetime.now().isoformat(timespec='seconds')
+    }, path)
+
+
+def performance_key(model, resolution):
+    """Cache key for benchmarked UiAutomator2 settings: '<model>|<WxH>|performance'"""
+    return f"{profile_key(model, resolution)}|performance"
+
+
+def load_performance_result(model, resolution, path=DEVICE_PROFILE_CACHE_FILE):
+    """Fastest performance features measured for this device ({'features', 'results', 'measured'}), or None"""
+    return _read_profiles(path).get(performance_key(model, resolution))
+
+
+def save_performance_result(model, resolution, features, results, path=DEVICE_PROFILE_CACHE_FILE):
+    """Store the fastest feature combination and the per-configuration timings behind it"""
+    _write_entry(performance_key(model, resolution), {
+        'features': list(features),
+        'results': results,
+        'measured': datetime.now().isoformat(timespec='seconds')
+    }, path)
+
+
+def bootstrap_key(udid):
+    """Cache key for a device's session bootstrap state: '<udid>|bootstrap'"""
+    return f"{udid}|bootstrap"
+
+
+def load_bootstrap_state(udid, path=DEVICE_PROFILE_CACHE_FILE):
+    """Bootstrap state of a device ({'known_good', 'first_command'}), or an empty one"""
+    entry = _read_profiles(path).get(bootstrap_key(udid)) or {}
+    return {'known_good': entry.get('known_good'), 'first_command': dict(entry.get('first_command') or {})}
+
+
+def save_bootstrap_state(udid, state, path=DEVICE_PROFILE_CACHE_FILE):
+    """Store whether the device is known-good and its last time-to-first-command per mode"""
+    _write_entry(bootstrap_key(udid), {
+        'known_good': state.get('known_good'),
+        'first_command': state.get('first_command') or {},
+        'updated': datetime.now().isoformat(timespec='seconds')
+    }, path)
+
+
+def device_settings_key(udid):
+    """Cache key for the device settings changed by a performance profile: '<udid>|device_settings'"""
+    return f"{udid}|device_settings"
+
+
+def load_device_settings_backup(udid, path=DEVICE_PROFILE_CACHE_FILE):
+    """Original values of the device settings still changed on the device ({'animations', 'ime'}), or {}"""
+    entry = _read_profiles(path).get(device_settings_key(udid)) or {}
+    return dict(entry.get('originals') or {})
+
+
+def save_device_settings_backup(udid, originals, path=DEVICE_PROFILE_CACHE_FILE):
+    """Store the original values of the changed device settings; an empty dict means none are changed"""
+    _write_entry(device_settings_key(udid), {
+        'originals': originals,
+        'updated': datetime.now().isoformat(timespec='seconds')
+    }, path)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Registry of live Appium drivers.
+
+setup_driver() registers every session it creates, so shutdown paths
+(Ctrl+C, fatal errors) can quit them directly instead of scanning every
+object on the heap with gc.get_objects(). Drivers are held weakly: a
+session that was quit and dropped disappears from the registry by itself.
+"""
+
+import weakref
+
+_drivers = weakref.WeakSet()
+
+
+def register_driver(driver):
+    """Track a driver so quit_registered_drivers() can close it"""
+    _drivers.add(driver)
+    return driver
+
+
+def unregister_driver(driver):
+    """Stop tracking a driver (e.g. after it was quit normally)"""
+    _drivers.discard(driver)
+
+
+def get_registered_drivers():
+    """Drivers that are still alive"""
+    return list(_drivers)
+
+
+def quit_registered_drivers():
+    """Quit every registered driver, ignoring errors; returns how many were quit"""
+    quit_count = 0
+    for driver in list(_drivers):
+        try:
+            driver.quit()
+            quit_count += 1
+        except Exception:
+            pass
+        _drivers.discard(driver)
+    return quit_count
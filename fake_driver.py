@@ -0,0 +1,722 @@
+#!/usr/bin/env python3
+"""
+In-process stand-in for an Appium session on WhatsApp.
+
+FakeWhatsAppDriver answers the driver calls whatsapp.py makes (find_element(s),
+page_source, tap, press_keycode, clipboard, mobile: type, push_file, ...) from
+a simulated WhatsApp: chat list, search, conversation, attach sheet, gallery
+and photo preview. Screens are built as UiAutomator2-style hierarchies, or
+taken from recorded page_source dumps, and every command goes through
+execute() with a configurable latency and failure rate. No phone, Appium
+server or selenium is needed; when selenium is installed its exception types
+are raised so WebDriverWait and the expected conditions behave as on a device.
+"""
+
+import copy
+import itertools
+import os
+import random
+import time
+from xml.sax.saxutils import quoteattr
+
+from ui_snapshot import (parse_hierarchy, iter_nodes, find_by_selector, get_row_name, CONTACT_ROW_ID,
+                         CONTACT_NAME_ID, TITLE_ID, CONVERSATION_NAME_ID, ENTRY_ID)
+
+try:
+    from selenium.common.exceptions import (WebDriverException, NoSuchElementException,
+                                            StaleElementReferenceException, InvalidSessionIdException)
+except ImportError:
+    class WebDriverException(Exception):
+        pass
+
+    class NoSuchElementException(WebDriverException):
+        pass
+
+    class StaleElementReferenceException(WebDriverException):
+        pass
+
+    class InvalidSessionIdException(WebDriverException):
+        pass
+
+FAKE_SCREEN_WIDTH = 1080
+FAKE_SCREEN_HEIGHT = 2400
+WHATSAPP_PACKAGE = "com.whatsapp"
+LAUNCHER_PACKAGE = "com.android.launcher"
+
+# Screens of the simulated app; 'home' is the launcher after backing out of WhatsApp
+SCREEN_HOME = "home"
+SCREEN_CHAT_LIST = "chat_list"
+SCREEN_SEARCH = "search"
+SCREEN_CONVERSATION = "conversation"
+SCREEN_ATTACH = "attach"
+SCREEN_GALLERY = "gallery"
+SCREEN_PREVIEW = "preview"
+
+# Screens that can be replaced by a recorded page_source dump (the others show live data)
+RECORDED_SCREENS = (SCREEN_CHAT_LIST, SCREEN_ATTACH, SCREEN_GALLERY, SCREEN_PREVIEW)
+
+# Seconds per command; 'default' applies to commands without their own entry
+DEFAULT_LATENCY = {
+    'default': 0.03,
+    'getPageSource': 0.12,
+    'pushFile': 0.2,
+}
+
+# Seconds between typing a search query and its results replacing the previous ones
+DEFAULT_SEARCH_DELAY = 0.3
+
+SEARCH_FIELD_ID = "com.whatsapp:id/search_src_text"
+SEARCH_MENU_ID = "com.whatsapp:id/menuitem_search"
+ATTACH_ID = "com.whatsapp:id/attach"
+SEND_ID = "com.whatsapp:id/send"
+CAPTION_ID = "com.whatsapp:id/caption"
+MESSAGE_ID = "com.whatsapp:id/message_text"
+MESSAGE_STATUS_ID = "com.whatsapp:id/status"
+DATE_DIVIDER_ID = "com.whatsapp:id/conversation_row_date_divider"
+THUMBNAIL_ID = "com.whatsapp:id/thumb"
+
+KEYCODE_BACK = 4
+KEYCODE_PASTE = 279
+
+# Text fields of the app, by resource id
+_FIELD_IDS = {SEARCH_FIELD_ID: 'search', ENTRY_ID: 'entry', CAPTION_ID: 'caption'}
+
+_session_counter = itertools.count(1)
+
+
+def _node(cls, rid='', text='', desc='', bounds=(0, 0, 0, 0), children=(), focused=False, package=WHATSAPP_PACKAGE):
+    """Node dict in the ui_snapshot format"""
+    return {'class': cls, 'package': package, 'rid': rid, 'text': text, 'desc': desc, 'bounds': bounds,
+            'displayed': True, 'focused': focused, 'children': list(children)}
+
+
+def _bounds_text(bounds):
+    return "[{},{}][{},{}]".format(*bounds)
+
+
+def _node_xml(node, index=0):
+    attrs = {
+        'index': str(index),
+        'package': node.get('package') or WHATSAPP_PACKAGE,
+        'class': node['class'],
+        'text': node['text'],
+        'resource-id': node['rid'],
+        'content-desc': node['desc'],
+        'focused': 'true' if node['focused'] else 'false',
+        'bounds': _bounds_text(node['bounds']),
+        'displayed': 'true' if node['displayed'] else 'false',
+    }
+    tag = node['class'] or 'node'
+    children = "".join(_node_xml(child, i) for i, child in enumerate(node['children']))
+    attr_text = " ".join(f"{key}={quoteattr(value)}" for key, value in attrs.items())
+    return f"<{tag} {attr_text}>{children}</{tag}>"
+
+
+def hierarchy_to_xml(root):
+    """Serialize a node tree as a UiAutomator2 page_source document"""
+    return "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>" + _node_xml(root)
+
+
+def load_recorded_screens(directory):
+    """Read recorded page_source dumps named <screen>.xml (chat_list, attach, gallery, preview)"""
+    screens = {}
+    for screen in RECORDED_SCREENS:
+        path = os.path.join(directory, f"{screen}.xml")
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                screens[screen] = file.read()
+    return screens
+
+
+def _contains(bounds, point):
+    x1, y1, x2, y2 = bounds
+    return x1 <= point[0] <= x2 and y1 <= point[1] <= y2
+
+
+class FakeElement:
+    """Element handle; re-resolved against the current screen on every call, like a live view"""
+
+    def __init__(self, driver, node):
+        self._driver = driver
+        self._signature = (node['rid'], node['class'], node['bounds'], '' if node['rid'] else node['text'])
+        self.id = f"fake-{id(node):x}"
+
+    def _resolve(self):
+        rid, cls, bounds, text = self._signature
+        for node in iter_nodes(self._driver._current_tree()):
+            if (node['rid'] == rid and node['class'] == cls and node['bounds'] == bounds
+                    and (rid or node['text'] == text)):
+                return node
+        raise StaleElementReferenceException("stale element reference: element is not on the current screen")
+
+    def _command(self, command, **params):
+        return self._driver.execute(command, {'element': self, **params})['value']
+
+    def click(self):
+        self._command('clickElement')
+
+    def clear(self):
+        self._command('clearElement')
+
+    def send_keys(self, *values):
+        self._command('sendKeysToElement', text="".join(str(value) for value in values))
+
+    @property
+    def text(self):
+        return self._command('getElementText')
+
+    def get_attribute(self, name):
+        return self._command('getElementAttribute', name=name)
+
+    def is_displayed(self):
+        return self._command('isElementDisplayed')
+
+    def is_enabled(self):
+        return self._command('isElementEnabled')
+
+    @property
+    def rect(self):
+        return self._command('getElementRect')
+
+    @property
+    def location(self):
+        rect = self.rect
+        return {'x': rect['x'], 'y': rect['y']}
+
+    @property
+    def size(self):
+        rect = self.rect
+        return {'width': rect['width'], 'height': rect['height']}
+
+    def find_element(self, by='id', value=None):
+        return self._command('findChildElement', using=by, value=value)
+
+    def find_elements(self, by='id', value=None):
+        return self._command('findChildElements', using=by, value=value)
+
+
+class _FakeSwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    @property
+    def active_element(self):
+        return self._driver.execute('getActiveElement')['value']
+
+
+class FakeWhatsAppDriver:
+    """Simulated Appium session on WhatsApp
+
+    contacts: chat names that exist (search matches them by substring)
+    message_only_names: queries that only match message text ('Messages' section, no chat)
+    latency: seconds per command name, with a 'default' entry; jitter is a +/- fraction
+    failure_rate: probability per command name (or 'default') of a WebDriverException
+    kill_after: after this many commands the session dies (every command raises)
+    recorded_screens: {screen: page_source xml} used instead of the built-in screens
+    """
+
+    def __init__(self, contacts=(), message_only_names=(), latency=None, jitter=0.0, failure_rate=None,
+                 failure_message="socket hang up", kill_after=None, search_delay=DEFAULT_SEARCH_DELAY,
+                 recorded_screens=None, seed=0):
+        self.contacts = list(contacts)
+        self.message_only_names = [name.lower() for name in message_only_names]
+        self.latency = {**DEFAULT_LATENCY, **(latency or {})}
+        self.jitter = jitter
+        self.failure_rate = dict(failure_rate or {})
+        self.failure_message = failure_message
+        self.kill_after = kill_after
+        self.search_delay = search_delay
+        self.recorded_screens = dict(recorded_screens or {})
+        self._random = random.Random(seed)
+
+        self.session_id = f"fake-session-{next(_session_counter)}"
+        self.capabilities = {'platformName': 'Android', 'automationName': 'UiAutomator2',
+                             'appPackage': WHATSAPP_PACKAGE}
+        self.switch_to = _FakeSwitchTo(self)
+
+        # App state
+        self.screen = SCREEN_CHAT_LIST
+        self.open_chat = None
+        self.messages = {}          # chat name -> list of sent texts/captions
+        self.clipboard = ""
+        self.device_files = {}      # device path -> size in bytes
+        self._fields = {'search': '', 'entry': '', 'caption': ''}
+        self._focus = None
+        self._conversation_origin = SCREEN_CHAT_LIST
+        self._shown_query = None
+        self._results_ready_at = None
+        self._alive = True
+
+        # Command accounting; 'phase' is set by callers that want commands attributed to a step
+        self.phase = None
+        self.command_log = []       # (command, phase, screen, seconds, ok)
+
+    # ------------------------------------------------------------------ commands
+
+    def execute(self, driver_command, params=None):
+        """Run one command with the simulated latency/failures; returns {'value': ...} like selenium"""
+        if not self._alive:
+            raise InvalidSessionIdException("invalid session id: session deleted or not started")
+        start = time.time()
+        delay = self.latency.get(driver_command, self.latency['default'])
+        if self.jitter:
+            delay *= 1 + self.jitter * (self._random.random() * 2 - 1)
+        if delay > 0:
+            time.sleep(delay)
+
+        screen = self.screen
+        ok = False
+        try:
+            if self.kill_after is not None and len(self.command_log) >= self.kill_after:
+                self._alive = False
+                raise InvalidSessionIdException("invalid session id: instrumentation process is not running")
+            rate = self.failure_rate.get(driver_command, self.failure_rate.get('default', 0))
+            if rate and self._random.random() < rate:
+                raise WebDriverException(self.failure_message)
+            handler = getattr(self, f"_cmd_{driver_command}", None)
+            if handler is None:
+                raise WebDriverException(f"Command '{driver_command}' is not supported by the fake driver")
+            value = handler(params or {})
+            ok = True
+            return {'value': value}
+        finally:
+            self.command_log.append((driver_command, self.phase, screen, time.time() - start, ok))
+
+    def new_session(self):
+        """Another session on the same simulated phone (what setup_driver would return after a crash)
+
+        The app state, sent messages and command log are shared with this session.
+        """
+        session = copy.copy(self)
+        # Drop per-instance wrappers such as the latency tracker's execute()
+        session.__dict__.pop('execute', None)
+        session.session_id = f"fake-session-{next(_session_counter)}"
+        session.switch_to = _FakeSwitchTo(session)
+        session.kill_after = None
+        session._alive = True
+        session.phase = None
+        return session
+
+    def get_command_stats(self):
+        """Command counts and time per command, phase and screen"""
+        stats = {'commands': len(self.command_log), 'failures': 0,
+                 'by_command': {}, 'by_phase': {}, 'by_screen': {}}
+        for command, phase, screen, seconds, ok in self.command_log:
+            if not ok:
+                stats['failures'] += 1
+            for key, name in (('by_command', command), ('by_phase', phase or 'other'), ('by_screen', screen)):
+                entry = stats[key].setdefault(name, {'count': 0, 'seconds': 0.0})
+                entry['count'] += 1
+                entry['seconds'] += seconds
+        return stats
+
+    # Public driver API (the subset whatsapp.py uses)
+
+    @property
+    def page_source(self):
+        return self.execute('getPageSource')['value']
+
+    def find_element(self, by='id', value=None):
+        return self.execute('findElement', {'using': by, 'value': value})['value']
+
+    def find_elements(self, by='id', value=None):
+        return self.execute('findElements', {'using': by, 'value': value})['value']
+
+    def tap(self, positions, duration=None):
+        self.execute('tap', {'positions': positions, 'duration': duration})
+        return self
+
+    def press_keycode(self, keycode, metastate=None, flags=None):
+        self.execute('pressKeyCode', {'keycode': keycode})
+        return self
+
+    def set_clipboard_text(self, text, label=None):
+        self.execute('setClipboard', {'text': text})
+
+    def get_clipboard_text(self):
+        return self.execute('getClipboard')['value']
+
+    def execute_script(self, script, *args):
+        return self.execute('w3cExecuteScript', {'script': script, 'args': list(args)})['value']
+
+    def push_file(self, destination_path, base64data=None, source_path=None):
+        self.execute('pushFile', {'path': destination_path, 'data': base64data})
+        return self
+
+    def get_window_size(self, windowHandle='current'):
+        return self.execute('getWindowRect')['value']
+
+    def is_keyboard_shown(self):
+        return self.execute('isKeyboardShown')['value']
+
+    def hide_keyboard(self, key_name=None, key=None, strategy=None):
+        self.execute('hideKeyboard')
+
+    def activate_app(self, app_id):
+        self.execute('activateApp', {'appId': app_id})
+        return self
+
+    def start_activity(self, app_package, app_activity, **opts):
+        self.execute('startActivity', {'appPackage': app_package, 'appActivity': app_activity})
+        return self
+
+    def query_app_state(self, app_id):
+        return self.execute('queryAppState', {'appId': app_id})['value']
+
+    @property
+    def current_package(self):
+        return self.execute('getCurrentPackage')['value']
+
+    def quit(self):
+        self.execute('quit')
+
+    # Command handlers
+
+    def _cmd_getPageSource(self, params):
+        return hierarchy_to_xml(self._current_tree())
+
+    def _find(self, root, by, value):
+        if by == 'xpath' and value.startswith('.//'):
+            value = value[1:]
+        nodes = find_by_selector(root, by, value)
+        if nodes is None:
+            raise WebDriverException(f"invalid selector: {by}={value} is not supported by the fake driver")
+        return [FakeElement(self, node) for node in nodes]
+
+    def _cmd_findElements(self, params):
+        return self._find(self._current_tree(), params['using'], params['value'])
+
+    def _cmd_findElement(self, params):
+        elements = self._cmd_findElements(params)
+        if not elements:
+            raise NoSuchElementException(f"no such element: {params['using']}={params['value']}")
+        return elements[0]
+
+    def _cmd_findChildElements(self, params):
+        return self._find(params['element']._resolve(), params['using'], params['value'])
+
+    def _cmd_findChildElement(self, params):
+        elements = self._cmd_findChildElements(params)
+        if not elements:
+            raise NoSuchElementException(f"no such element: {params['using']}={params['value']}")
+        return elements[0]
+
+    def _cmd_clickElement(self, params):
+        self._activate(params['element']._resolve())
+
+    def _cmd_clearElement(self, params):
+        field = _FIELD_IDS.get(params['element']._resolve()['rid'])
+        if field:
+            self._set_field(field, "")
+
+    def _cmd_sendKeysToElement(self, params):
+        node = params['element']._resolve()
+        field = _FIELD_IDS.get(node['rid'])
+        if field is None:
+            raise WebDriverException("invalid element state: element is not editable")
+        self._focus = field
+        # UiAutomator2 replaces the field's text
+        self._set_field(field, params['text'])
+
+    def _cmd_getElementText(self, params):
+        return params['element']._resolve()['text']
+
+    def _cmd_getElementAttribute(self, params):
+        node = params['element']._resolve()
+        name = params['name']
+        if name in ('focused', 'displayed'):
+            return 'true' if node[name] else 'false'
+        if name == 'enabled':
+            return 'true'
+        key = {'resource-id': 'rid', 'resourceId': 'rid', 'content-desc': 'desc', 'contentDescription': 'desc',
+               'class': 'class', 'className': 'class', 'text': 'text'}.get(name)
+        return node[key] if key else None
+
+    def _cmd_isElementDisplayed(self, params):
+        return params['element']._resolve()['displayed']
+
+    def _cmd_isElementEnabled(self, params):
+        params['element']._resolve()
+        return True
+
+    def _cmd_getElementRect(self, params):
+        x1, y1, x2, y2 = params['element']._resolve()['bounds']
+        return {'x': x1, 'y': y1, 'width': x2 - x1, 'height': y2 - y1}
+
+    def _cmd_getActiveElement(self, params):
+        rid = next((rid for rid, field in _FIELD_IDS.items() if field == self._focus), None)
+        for node in iter_nodes(self._current_tree()):
+            if rid and node['rid'] == rid:
+                return FakeElement(self, node)
+        raise NoSuchElementException("no such element: nothing has focus")
+
+    def _cmd_tap(self, params):
+        point = params['positions'][0]
+        target = None
+        for node in iter_nodes(self._current_tree()):
+            if _contains(node['bounds'], point) and self._node_action(node):
+                target = node
+        if target is not None:
+            self._activate(target)
+
+    def _cmd_pressKeyCode(self, params):
+        keycode = params['keycode']
+        if keycode == KEYCODE_BACK:
+            self._back()
+        elif keycode == KEYCODE_PASTE and self._focus:
+            self._set_field(self._focus, self._fields[self._focus] + self.clipboard)
+
+    def _cmd_setClipboard(self, params):
+        self.clipboard = params['text']
+
+    def _cmd_getClipboard(self, params):
+        return self.clipboard
+
+    def _cmd_w3cExecuteScript(self, params):
+        if params['script'] == 'mobile: type':
+            if not self._focus:
+                raise WebDriverException("no element has focus to type into")
+            text = params['args'][0]['text'] if params['args'] else ""
+            self._set_field(self._focus, self._fields[self._focus] + text)
+        return None
+
+    def _cmd_pushFile(self, params):
+        data = params.get('data') or ""
+        self.device_files[params['path']] = len(data) * 3 // 4
+
+    def _cmd_getWindowRect(self, params):
+        return {'x': 0, 'y': 0, 'width': FAKE_SCREEN_WIDTH, 'height': FAKE_SCREEN_HEIGHT}
+
+    def _cmd_isKeyboardShown(self, params):
+        return self._focus is not None
+
+    def _cmd_hideKeyboard(self, params):
+        self._focus = None
+
+    def _cmd_activateApp(self, params):
+        if self.screen == SCREEN_HOME:
+            self.screen = SCREEN_CHAT_LIST
+
+    def _cmd_startActivity(self, params):
+        self.screen = SCREEN_CHAT_LIST
+        self._focus = None
+
+    def _cmd_queryAppState(self, params):
+        return 2 if self.screen == SCREEN_HOME else 4
+
+    def _cmd_getCurrentPackage(self, params):
+        return LAUNCHER_PACKAGE if self.screen == SCREEN_HOME else WHATSAPP_PACKAGE
+
+    def _cmd_quit(self, params):
+        self._alive = False
+
+    # ------------------------------------------------------------------ app behaviour
+
+    def _set_field(self, field, text):
+        self._fields[field] = text
+        if field == 'search':
+            # Results for the new query replace the old ones after the search delay
+            self._results_ready_at = time.time() + (self.search_delay if text else 0)
+
+    def _node_action(self, node):
+        """What tapping/clicking this node does on the current screen, or None"""
+        rid = node['rid']
+        if rid in _FIELD_IDS:
+            return 'focus'
+        if self.screen == SCREEN_CHAT_LIST and (rid == SEARCH_MENU_ID or node['desc'] == 'Search'):
+            return 'open_search'
+        if rid == CONTACT_ROW_ID and self.screen in (SCREEN_CHAT_LIST, SCREEN_SEARCH):
+            return 'open_chat'
+        if rid == ATTACH_ID and self.screen == SCREEN_CONVERSATION:
+            return 'open_attach'
+        if node['text'] == 'Gallery' and self.screen == SCREEN_ATTACH:
+            return 'open_gallery'
+        if self.screen == SCREEN_GALLERY and ('thumb' in rid or 'ImageView' in node['class']):
+            return 'select_photo'
+        if (rid == SEND_ID or node['desc'] == 'Send') and self.screen in (SCREEN_CONVERSATION, SCREEN_PREVIEW):
+            return 'send'
+        return None
+
+    def _activate(self, node):
+        action = self._node_action(node)
+        if action == 'focus':
+            self._focus = _FIELD_IDS[node['rid']]
+        elif action == 'open_search':
+            self.screen = SCREEN_SEARCH
+            self._fields['search'] = ""
+            self._shown_query = None
+            self._results_ready_at = None
+            self._focus = 'search'
+        elif action == 'open_chat':
+            self._conversation_origin = self.screen
+            self.open_chat = get_row_name(node)
+            self.screen = SCREEN_CONVERSATION
+            self._fields['entry'] = ""
+            self._focus = None
+        elif action == 'open_attach':
+            self.screen = SCREEN_ATTACH
+            self._focus = None
+        elif action == 'open_gallery':
+            self.screen = SCREEN_GALLERY
+        elif action == 'select_photo':
+            self.screen = SCREEN_PREVIEW
+            self._fields['caption'] = ""
+        elif action == 'send':
+            self._send()
+
+    def _send(self):
+        if self.screen == SCREEN_PREVIEW:
+            self.messages.setdefault(self.open_chat, []).append(self._fields['caption'])
+            self._fields['caption'] = ""
+            self.screen = SCREEN_CONVERSATION
+            self._focus = None
+        elif self._fields['entry'].strip():
+            self.messages.setdefault(self.open_chat, []).append(self._fields['entry'])
+            self._fields['entry'] = ""
+
+    def _back(self):
+        self._focus = None
+        if self.screen == SCREEN_SEARCH:
+            self.screen = SCREEN_CHAT_LIST
+            self._fields['search'] = ""
+            self._shown_query = None
+        elif self.screen == SCREEN_CONVERSATION:
+            self.screen = self._conversation_origin
+            self.open_chat = None
+            self._fields['entry'] = ""
+            if self.screen == SCREEN_SEARCH:
+                self._focus = 'search'
+        elif self.screen in (SCREEN_ATTACH, SCREEN_GALLERY):
+            self.screen = SCREEN_CONVERSATION
+        elif self.screen == SCREEN_PREVIEW:
+            self.screen = SCREEN_GALLERY
+        elif self.screen == SCREEN_CHAT_LIST:
+            self.screen = SCREEN_HOME
+
+    # ------------------------------------------------------------------ screens
+
+    def _current_tree(self):
+        if self.screen in self.recorded_screens:
+            root = parse_hierarchy(self.recorded_screens[self.screen])
+            # Recorded text fields show the live text
+            for node in iter_nodes(root):
+                field = _FIELD_IDS.get(node['rid'])
+                if field:
+                    node['text'] = self._fields[field]
+                    node['focused'] = self._focus == field
+            return root
+
+        builder = {
+            SCREEN_HOME: self._home_screen,
+            SCREEN_CHAT_LIST: self._chat_list_screen,
+            SCREEN_SEARCH: self._search_screen,
+            SCREEN_CONVERSATION: self._conversation_screen,
+            SCREEN_ATTACH: self._attach_screen,
+            SCREEN_GALLERY: self._gallery_screen,
+            SCREEN_PREVIEW: self._preview_screen,
+        }[self.screen]
+        package = LAUNCHER_PACKAGE if self.screen == SCREEN_HOME else WHATSAPP_PACKAGE
+        frame = _node('android.widget.FrameLayout', bounds=(0, 0, FAKE_SCREEN_WIDTH, FAKE_SCREEN_HEIGHT),
+                      children=builder(), package=package)
+        return _node('hierarchy', bounds=frame['bounds'], children=[frame])
+
+    def _field(self, field, cls, rid, bounds):
+        return _node(cls, rid=rid, text=self._fields[field], bounds=bounds, focused=self._focus == field)
+
+    @staticmethod
+    def _contact_row(name, y):
+        return _node('android.widget.RelativeLayout', rid=CONTACT_ROW_ID, bounds=(0, y, FAKE_SCREEN_WIDTH, y + 180),
+                     children=[
+                         _node('android.widget.ImageView', rid="com.whatsapp:id/contact_photo",
+                               bounds=(30, y + 30, 150, y + 150)),
+                         _node('android.widget.TextView', rid=CONTACT_NAME_ID, text=name,
+                               bounds=(200, y + 20, 800, y + 80)),
+                         _node('android.widget.TextView', rid="com.whatsapp:id/conversations_row_date",
+                               text="12:30", bounds=(900, y + 20, 1050, y + 80)),
+                     ])
+
+    def _home_screen(self):
+        return [_node('android.widget.TextView', text="WhatsApp Business", desc="WhatsApp Business",
+                      bounds=(400, 1800, 680, 1900), package=LAUNCHER_PACKAGE)]
+
+    def _chat_list_screen(self):
+        nodes = [
+            _node('android.widget.TextView', text="WhatsApp", bounds=(40, 180, 400, 260)),
+            _node('android.widget.Button', rid=SEARCH_MENU_ID, desc="Search", bounds=(465, 270, 585, 390)),
+            _node('android.widget.TextView', text="Chats", bounds=(0, 400, 270, 470)),
+        ]
+        nodes += [self._contact_row(name, 500 + i * 180) for i, name in enumerate(self.contacts[:8])]
+        nodes.append(_node('android.widget.ImageButton', rid="com.whatsapp:id/fab", desc="New chat",
+                           bounds=(900, 2150, 1040, 2290)))
+        return nodes
+
+    def _search_results(self):
+        if self._results_ready_at is not None and time.time() >= self._results_ready_at:
+            self._shown_query = self._fields['search']
+            self._results_ready_at = None
+        query = (self._shown_query or "").lower()
+        if not query:
+            return []
+
+        matches = [name for name in self.contacts if query in name.lower()]
+        if matches:
+            nodes = [_node('android.widget.TextView', rid=TITLE_ID, text="Chats", bounds=(40, 300, 300, 360))]
+            return nodes + [self._contact_row(name, 380 + i * 180) for i, name in enumerate(matches[:8])]
+        if any(query in name for name in self.message_only_names):
+            return [
+                _node('android.widget.TextView', rid=TITLE_ID, text="Messages", bounds=(40, 300, 300, 360)),
+                _node('android.widget.TextView', rid=MESSAGE_ID, text=f"... {query} ...", bounds=(40, 380, 1040, 460)),
+            ]
+        return [_node('android.widget.TextView', text="No results found", bounds=(300, 600, 780, 680))]
+
+    def _search_screen(self):
+        return [self._field('search', 'android.widget.EditText', SEARCH_FIELD_ID, (150, 180, 900, 280))] \
+            + self._search_results()
+
+    def _conversation_nodes(self):
+        nodes = [_node('android.widget.TextView', rid=CONVERSATION_NAME_ID, text=self.open_chat or "",
+                       bounds=(200, 150, 800, 230))]
+        sent = self.messages.get(self.open_chat, [])[-6:]
+        if sent:
+            nodes.append(_node('android.widget.TextView', rid=DATE_DIVIDER_ID, text="Today", bounds=(440, 320, 640, 380)))
+        for i, text in enumerate(sent):
+            y = 400 + i * 200
+            nodes.append(_node('android.widget.LinearLayout', bounds=(300, y, 1040, y + 160), children=[
+                _node('android.widget.TextView', rid=MESSAGE_ID, text=text, bounds=(300, y, 1040, y + 120)),
+                _node('android.widget.ImageView', rid=MESSAGE_STATUS_ID, desc="Delivered",
+                      bounds=(980, y + 120, 1040, y + 160)),
+            ]))
+        nodes.append(self._field('entry', 'android.widget.EditText', ENTRY_ID, (40, 2250, 700, 2370)))
+        nodes.append(_node('android.widget.ImageButton', rid=ATTACH_ID, desc="Attach", bounds=(700, 2250, 800, 2370)))
+        if self._fields['entry']:
+            nodes.append(_node('android.widget.ImageButton', rid=SEND_ID, desc="Send", bounds=(900, 2250, 1060, 2370)))
+        else:
+            nodes.append(_node('android.widget.ImageButton', rid="com.whatsapp:id/voice_note_btn",
+                               desc="Voice message", bounds=(900, 2250, 1060, 2370)))
+        return nodes
+
+    def _conversation_screen(self):
+        return self._conversation_nodes()
+
+    def _attach_screen(self):
+        sheet = _node('android.widget.LinearLayout', bounds=(0, 1700, FAKE_SCREEN_WIDTH, 2200), children=[
+            _node('android.widget.TextView', text=label, bounds=(40 + i * 340, 1800, 340 + i * 340, 1900))
+            for i, label in enumerate(("Document", "Camera", "Gallery"))
+        ])
+        return self._conversation_nodes() + [sheet]
+
+    def _gallery_screen(self):
+        nodes = [_node('android.widget.TextView', text="Recents", bounds=(40, 180, 400, 260))]
+        for index in range(9):
+            row, column = divmod(index, 3)
+            x, y = column * 360, 1170 + row * 360
+            nodes.append(_node('android.widget.ImageView', rid=THUMBNAIL_ID, desc=f"Photo {index + 1}",
+                               bounds=(x, y, x + 360, y + 360)))
+        return nodes
+
+    def _preview_screen(self):
+        return [
+            _node('android.widget.ImageView', rid="com.whatsapp:id/photo_view", bounds=(0, 200, FAKE_SCREEN_WIDTH, 2200)),
+            self._field('caption', 'android.widget.EditText', CAPTION_ID, (40, 2270, 900, 2390)),
+            _node('android.widget.ImageButton', rid=SEND_ID, desc="Send", bounds=(930, 2250, 1050, 2370)),
+        ]
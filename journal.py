@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Background journal writer for the txt/ logs.
+
+Appends (processed chats, not-found chats, script events) are queued and
+written by one background thread, which batches them per file and flushes
+every JOURNAL_FLUSH_INTERVAL seconds. Call journal_flush() before any action
+that must not be repeated on resume, and don't take the action if it returns
+False; call journal_close() at shutdown. The counters are updated by the
+writer thread under _journal_lock.
+"""
+
+import atexit
+import os
+import queue
+import threading
+
+# How long the writer waits for more records before writing a batch
+JOURNAL_FLUSH_INTERVAL = 0.5
+
+_journal_queue = queue.Queue()
+_journal_state = {
+    'thread': None,
+    'stopping': False,
+    'written': 0,
+    'batches': 0,
+    'errors': 0
+}
+_journal_lock = threading.Lock()
+
+
+def _write_batch(records, known_dirs):
+    """Write queued (path, text) records, opening each file once"""
+    by_path = {}
+    for path, text in records:
+        by_path.setdefault(path, []).append(text)
+
+    for path, texts in by_path.items():
+        try:
+            directory = os.path.dirname(path)
+            if directory and directory not in known_dirs:
+                os.makedirs(directory, exist_ok=True)
+                known_dirs.add(directory)
+            with open(path, 'a', encoding='utf-8') as file:
+                file.write("".join(texts))
+                file.flush()
+                os.fsync(file.fileno())
+            with _journal_lock:
+                _journal_state['written'] += len(texts)
+        except Exception as e:
+            with _journal_lock:
+                _journal_state['errors'] += 1
+            print(f"[JOURNAL] Failed to write {path}: {e}")
+    with _journal_lock:
+        _journal_state['batches'] += 1
+
+
+def _writer_loop():
+    """Collect records until the queue is idle for a flush interval, then write them"""
+    known_dirs = set()
+    while True:
+        try:
+            item = _journal_queue.get(timeout=JOURNAL_FLUSH_INTERVAL)
+        except queue.Empty:
+            if _journal_state['stopping']:
+                return
+            continue
+
+        records = []
+        waiters = []
+        while item is not None:
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            else:
+                records.append(item)
+            try:
+                item = _journal_queue.get_nowait()
+            except queue.Empty:
+                item = None
+
+        if records:
+            _write_batch(records, known_dirs)
+        # Flush markers are released only after everything queued before them is on disk
+        for waiter in waiters:
+            waiter.set()
+
+
+def _ensure_writer():
+    with _journal_lock:
+        thread = _journal_state['thread']
+        if thread is None or not thread.is_alive():
+            _journal_state['stopping'] = False
+            thread = threading.Thread(target=_writer_loop, name="journal-writer", daemon=True)
+            _journal_state['thread'] = thread
+            thread.start()
+
+
+def journal_append(path, text):
+    """Queue text to be appended to path (returns immediately)"""
+    _ensure_writer()
+    _journal_queue.put((path, text))
+
+
+def journal_flush(timeout=5.0):
+    """Block until everything queued so far is written; returns False on timeout
+
+    Records left in the queue by a stopped writer are written by a new one.
+    """
+    thread = _journal_state['thread']
+    if (thread is None or not thread.is_alive()) and _journal_queue.empty():
+        return True
+    _ensure_writer()
+    marker = threading.Event()
+    _journal_queue.put(marker)
+    return marker.wait(timeout)
+
+
+def journal_close(timeout=5.0):
+    """Write everything still queued and stop the writer thread
+
+    Safe to call from a signal handler: it only sets a flag and joins, it
+    never takes the queue lock.
+    """
+    thread = _journal_state['thread']
+    if thread is None:
+        return
+    _journal_state['stopping'] = True
+    thread.join(timeout)
+    _journal_state['thread'] = None
+
+
+# Scripts that only import the logging helpers still get their records written
+atexit.register(journal_close)
+
+
+def get_journal_stats():
+    """Records written, batches and write errors so far"""
+    with _journal_lock:
+        return {key: _journal_state[key] for key in ('written', 'batches', 'errors')}
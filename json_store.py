@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+JSON files shared by concurrent processes.
+
+The device profile cache and the selector cache are one JSON file each for
+all devices, and whatsapp_fleet.py starts one worker per device at the same
+moment. update_json_file() does the read-modify-write under a lock file
+(created with O_EXCL, so it works the same on every OS) and writes through a
+per-process temp file renamed over the original, so a reader never sees a
+half-written file and concurrent saves don't drop each other's entries. A
+file that exists but can't be parsed is left alone instead of being replaced
+by a table holding only the caller's entry.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Seconds to wait for another process's lock, and the age after which a lock
+# left by a killed process is taken over
+LOCK_TIMEOUT = 5.0
+STALE_LOCK_SECONDS = 10.0
+
+
+class JsonStoreError(Exception):
+    pass
+
+
+@contextmanager
+def file_lock(path, timeout=None):
+    """Hold '<path>.lock' for the duration of the block (waiting up to LOCK_TIMEOUT by default)"""
+    lock_path = f"{path}.lock"
+    deadline = time.time() + (LOCK_TIMEOUT if timeout is None else timeout)
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_SECONDS:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue  # released in the meantime
+            if time.time() > deadline:
+                raise JsonStoreError(f"{lock_path} is held by another process")
+            time.sleep(0.02)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+def update_json_file(path, update):
+    """Apply update(data) to the dict stored in path and write it back atomically, under the file lock
+
+    Raises JsonStoreError if the lock can't be taken or the existing file isn't a JSON object.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with file_lock(path):
+        data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except ValueError as e:
+                raise JsonStoreError(f"{path} is not valid JSON, not overwriting it: {e}")
+            if not isinstance(data, dict):
+                raise JsonStoreError(f"{path} does not hold a JSON object, not overwriting it")
+        update(data)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    return data
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Native selector compiler.
+
+On UiAutomator2 an XPath lookup serializes the whole accessibility tree to
+XML on the device and evaluates the expression against that document, on
+every call. Resource-id, accessibility id and UiSelector lookups query the
+accessibility nodes directly. compile_selector() turns the simple XPath form
+the bot's selectors use (see ui_snapshot.parse_simple_xpath) into the
+cheapest equivalent native strategy; anything outside that form stays XPath.
+
+install_native_selectors() applies the compiler to every lookup a driver
+sends, so call sites, the selector cache and session traces keep the logical
+XPath selectors. A selector the server rejects in native form is sent as
+XPath from then on.
+"""
+
+import re
+
+from ui_snapshot import parse_simple_xpath
+
+BY_XPATH = 'xpath'
+BY_ID = 'id'
+BY_ACCESSIBILITY_ID = 'accessibility id'
+BY_UIAUTOMATOR = '-android uiautomator'
+
+FIND_COMMANDS = {'findElement', 'findElements', 'findChildElement', 'findChildElements'}
+CHILD_FIND_COMMANDS = {'findChildElement', 'findChildElements'}
+
+# UiSelector method per (op, node key) from parse_simple_xpath()
+_UISELECTOR_METHODS = {
+    ('eq', 'class'): 'className',
+    ('eq', 'text'): 'text',
+    ('contains', 'text'): 'textContains',
+    ('eq', 'desc'): 'description',
+    ('contains', 'desc'): 'descriptionContains',
+    ('eq', 'rid'): 'resourceId',
+    ('contains', 'rid'): 'resourceIdMatches',
+    ('contains', 'class'): 'classNameMatches',
+}
+
+# contains() on resource-id/class becomes a regex match (".*value.*"), so only for values without regex syntax
+_PLAIN_REGEX_VALUE = re.compile(r"^[\w:/ -]+$")
+
+# Errors that mean the server can't run the native form (rather than "not found")
+UNSUPPORTED_SELECTOR_ERRORS = {'InvalidSelectorException', 'InvalidArgumentException', 'UnknownMethodException'}
+
+_compiled = {}          # (xpath, scoped) -> (by, value)
+_rejected = set()       # xpaths the server refused in native form
+
+_native_stats = {
+    'native': {},       # strategy -> lookups sent natively
+    'xpath': 0,         # lookups sent as XPath (not compilable or rejected)
+    'fallbacks': 0      # native lookups the server rejected
+}
+
+
+def _java_string(value):
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _compile_xpath(xpath, scoped):
+    relative = xpath.startswith('.//')
+    # An absolute //... looked up from an element still searches the whole screen;
+    # native strategies only search the element's subtree
+    if scoped and not relative:
+        return BY_XPATH, xpath
+    parsed = parse_simple_xpath(xpath[1:] if relative else xpath)
+    if parsed is None:
+        return BY_XPATH, xpath
+    cls, conditions = parsed
+    if cls is None and not conditions:
+        return BY_XPATH, xpath  # //* (everything) has no native form
+
+    if cls is None and len(conditions) == 1:
+        op, key, value = conditions[0]
+        if op == 'eq' and key == 'rid':
+            return BY_ID, value
+        if op == 'eq' and key == 'desc':
+            return BY_ACCESSIBILITY_ID, value
+
+    parts = []
+    methods = ['className'] if cls is not None else []
+    if cls is not None:
+        parts.append(f".className({_java_string(cls)})")
+    for op, key, value in conditions:
+        method = _UISELECTOR_METHODS[(op, key)]
+        # A second call of the same UiSelector method replaces the first on the device
+        if method in methods:
+            return BY_XPATH, xpath
+        methods.append(method)
+        if method.endswith('Matches'):
+            if not _PLAIN_REGEX_VALUE.match(value):
+                return BY_XPATH, xpath
+            value = f".*{value}.*"
+        parts.append(f".{method}({_java_string(value)})")
+    return BY_UIAUTOMATOR, "new UiSelector()" + "".join(parts)
+
+
+def compile_selector(by, value, scoped=False):
+    """Fastest equivalent (by, value) for a selector; scoped=True for lookups from an element"""
+    if by != BY_XPATH or not isinstance(value, str):
+        return by, value
+    key = (value, scoped)
+    if key not in _compiled:
+        _compiled[key] = _compile_xpath(value.strip(), scoped)
+    return _compiled[key]
+
+
+def _record(strategy):
+    if strategy == BY_XPATH:
+        _native_stats['xpath'] += 1
+    else:
+        _native_stats['native'][strategy] = _native_stats['native'].get(strategy, 0) + 1
+
+
+def install_native_selectors(driver):
+    """Send the driver's XPath lookups in their native form where one exists"""
+    original_execute = driver.execute
+
+    def native_execute(driver_command, params=None):
+        if driver_command not in FIND_COMMANDS or not params or params.get('using') != BY_XPATH:
+            return original_execute(driver_command, params)
+
+        xpath = params.get('value')
+        by, value = (BY_XPATH, xpath) if xpath in _rejected else \
+            compile_selector(BY_XPATH, xpath, scoped=driver_command in CHILD_FIND_COMMANDS)
+        if by != BY_XPATH:
+            try:
+                response = original_execute(driver_command, dict(params, using=by, value=value))
+                _record(by)
+                return response
+            except Exception as e:
+                if type(e).__name__ not in UNSUPPORTED_SELECTOR_ERRORS:
+                    _record(by)
+                    raise
+                print(f"[SELECTOR] Server rejected {by} form of {xpath}, using XPath: {e}")
+                _rejected.add(xpath)
+                _native_stats['fallbacks'] += 1
+        _record(BY_XPATH)
+        return original_execute(driver_command, params)
+
+    driver.execute = native_execute
+    return driver
+
+
+def get_native_selector_stats():
+    return _native_stats
+
+
+def reset_native_selector_stats():
+    _native_stats.update(native={}, xpath=0, fallbacks=0)
+
+
+def format_native_selector_stats():
+    """One-line summary of lookups sent natively vs as XPath"""
+    native = _native_stats['native']
+    total = sum(native.values()) + _native_stats['xpath']
+    if not total:
+        return "[SELECTOR] No element lookups"
+    by_strategy = ", ".join(f"{strategy} {count}" for strategy, count in sorted(native.items()))
+    line = (f"[SELECTOR] {sum(native.values())}/{total} lookups native ({by_strategy or 'none'}), "
+            f"{_native_stats['xpath']} XPath")
+    if _native_stats['fallbacks']:
+        line += f", {_native_stats['fallbacks']} rejected by the server"
+    return line
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+UiAutomator2 performance profiles.
+
+A profile is a set of features, each switchable at run time on a live session:
+
+    idle_wait        waitForIdleTimeout 0 instead of 10s of waiting for the UI to go idle
+    action_ack       actionAcknowledgmentTimeout 0 instead of 3s per element action
+    compressed_tree  ignoreUnimportantViews: layout-only views left out of lookups and page_source
+    no_animations    window, transition and animator scales 0 on the device
+    light_ime        Appium's keyboard-less IME selected, so no soft keyboard slides in
+
+The session settings go in one updateSettings call and end with the
+session. Animations and the IME are device settings changed over adb that
+outlive the run, so they are opt-in (the "full" profile). Their original
+values are written to the device profile cache before anything is changed
+and put back by restore_device_settings(); a run that was killed before
+restoring them leaves the record behind, and the next profile applied on
+that device puts the originals back first. setup_driver applies the profile
+to every session it creates, including the ones made by session recovery.
+bench_uia2_settings.py measures the features on a device and stores the
+fastest combination, whose session features the "auto" profile uses.
+"""
+
+from adb_tools import get_device_setting, put_device_setting, list_input_methods, set_input_method
+from device_profiles import load_performance_result, load_device_settings_backup, save_device_settings_backup
+
+FEATURES = ('idle_wait', 'action_ack', 'compressed_tree', 'no_animations', 'light_ime')
+
+# UiAutomator2 session settings per feature: (value when on, server default when off)
+SESSION_SETTINGS = {
+    'idle_wait': ('waitForIdleTimeout', 0, 10000),
+    'action_ack': ('actionAcknowledgmentTimeout', 0, 3000),
+    'compressed_tree': ('ignoreUnimportantViews', True, False),
+}
+
+# Features that change device settings instead of the session's
+DEVICE_FEATURES = ('no_animations', 'light_ime')
+
+ANIMATION_SCALES = ('window_animation_scale', 'transition_animation_scale', 'animator_duration_scale')
+
+# Installed with the UiAutomator2 server (io.appium.settings); shows no keyboard at all
+LIGHT_IME = "io.appium.settings/.AppiumIME"
+
+PERFORMANCE_PROFILES = {
+    'stock': (),
+    'fast': ('idle_wait', 'action_ack'),
+    'full': FEATURES,
+}
+
+# 'auto' without a benchmark result for the device
+AUTO_FALLBACK_PROFILE = 'fast'
+
+# Device settings changed per udid: {'animations': {key: original}, 'ime': original},
+# mirrored in the device profile cache
+_device_originals = {}
+
+# Device features currently applied per udid (saves the adb calls when a recovered session re-applies)
+_device_features = {}
+
+
+def resolve_profile(name, identity=None):
+    """Feature tuple for a profile name; 'auto' takes the benchmarked session features for the device"""
+    if name == 'auto':
+        result = load_performance_result(identity['model'], identity['resolution']) if identity else None
+        if result:
+            return tuple(feature for feature in FEATURES
+                         if feature in result['features'] and feature not in DEVICE_FEATURES)
+        name = AUTO_FALLBACK_PROFILE
+    return PERFORMANCE_PROFILES[name]
+
+
+def session_settings(features):
+    """updateSettings payload setting every session feature on or back to its default"""
+    return {key: (on if feature in features else off) for feature, (key, on, off) in SESSION_SETTINGS.items()}
+
+
+def _originals(udid):
+    """Changed settings of a device; the first call of a run picks up what an interrupted run left"""
+    if udid not in _device_originals:
+        _device_originals[udid] = load_device_settings_backup(udid)
+        if _device_originals[udid]:
+            print(f"[PERF] Device settings of an interrupted run are still changed, restoring them")
+    return _device_originals[udid]
+
+
+def _set_animations(udid, enabled):
+    originals = _originals(udid)
+    if not enabled:
+        if 'animations' not in originals:
+            originals['animations'] = {key: get_device_setting(udid, 'global', key) for key in ANIMATION_SCALES}
+            save_device_settings_backup(udid, originals)
+        for key in ANIMATION_SCALES:
+            put_device_setting(udid, 'global', key, 0)
+    elif 'animations' in originals:
+        for key, value in originals['animations'].items():
+            put_device_setting(udid, 'global', key, value if value is not None else 1)
+        del originals['animations']
+        save_device_settings_backup(udid, originals)
+
+
+def _set_light_ime(udid, enabled):
+    originals = _originals(udid)
+    if enabled:
+        if LIGHT_IME not in list_input_methods(udid):
+            print(f"[PERF] {LIGHT_IME} is not installed, keeping the current keyboard")
+            return False
+        if 'ime' not in originals:
+            originals['ime'] = get_device_setting(udid, 'secure', 'default_input_method')
+            save_device_settings_backup(udid, originals)
+        return set_input_method(udid, LIGHT_IME)
+    if 'ime' in originals:
+        if originals['ime']:
+            set_input_method(udid, originals['ime'])
+        del originals['ime']
+        save_device_settings_backup(udid, originals)
+    return True
+
+
+def apply_performance_profile(driver, udid, features):
+    """Switch every feature on or off for this session and device; returns the features in effect"""
+    applied = set()
+    try:
+        driver.update_settings(session_settings(features))
+        applied.update(feature for feature in SESSION_SETTINGS if feature in features)
+    except Exception as e:
+        print(f"[PERF] Server rejected the session settings, keeping its defaults: {e}")
+
+    device_features = {feature for feature in DEVICE_FEATURES if feature in features}
+    if _device_features.get(udid) != device_features:
+        _set_animations(udid, 'no_animations' not in device_features)
+        if 'light_ime' in device_features and not _set_light_ime(udid, True):
+            device_features.discard('light_ime')
+        elif 'light_ime' not in device_features:
+            _set_light_ime(udid, False)
+        _device_features[udid] = device_features
+    applied.update(_device_features[udid])
+
+    ordered = tuple(feature for feature in FEATURES if feature in applied)
+    print(f"[PERF] Performance features: {', '.join(ordered) or 'none (stock settings)'}")
+    return ordered
+
+
+def restore_device_settings():
+    """Put back the animation scales and keyboard changed on every device and clear their record"""
+    for udid in list(_device_originals):
+        _set_animations(udid, True)
+        _set_light_ime(udid, False)
+    _device_originals.clear()
+    _device_features.clear()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Daily photo preprocessing.
+
+Downscales and recompresses the daily photo to the resolution WhatsApp
+actually sends, strips metadata, and caches the result under the photo's
+content hash so reruns reuse it for free. The result is a JPEG, so a PNG's
+transparency is flattened onto white; the report says when that happened.
+Needs Pillow; without it the
+original photo is used unchanged.
+"""
+
+import hashlib
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+# WhatsApp's standard-quality limit for the long edge of a sent photo
+WHATSAPP_MAX_LONG_EDGE = 1600
+JPEG_QUALITY = 82
+PREP_CACHE_DIR = "daily_photos/.cache"
+
+
+def compute_file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def has_transparency(image):
+    """True if the image has an alpha channel or a transparent palette entry"""
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def flatten_onto_white(image):
+    """RGB copy of an image with any transparency composited onto a white background"""
+    rgba = image.convert('RGBA')
+    background = Image.new('RGB', rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel('A'))
+    return background
+
+
+def target_long_edge(screen_size=None):
+    """Long edge to resize to: WhatsApp's limit, or the device screen if that is smaller"""
+    if not screen_size:
+        return WHATSAPP_MAX_LONG_EDGE
+    screen_long_edge = max(screen_size['width'], screen_size['height'])
+    return min(WHATSAPP_MAX_LONG_EDGE, screen_long_edge)
+
+
+def prepare_daily_photo(photo_path, screen_size=None, cache_dir=PREP_CACHE_DIR):
+    """Return (path_to_send, report) for the daily photo
+
+    The report dict has original_bytes, prepared_bytes, bytes_saved, long_edge, cached,
+    alpha_flattened and status ('prepared', 'cached', 'original' or 'skipped').
+    """
+    original_bytes = os.path.getsize(photo_path)
+    long_edge = target_long_edge(screen_size)
+    report = {
+        'original_bytes': original_bytes,
+        'prepared_bytes': original_bytes,
+        'bytes_saved': 0,
+        'long_edge': long_edge,
+        'cached': False,
+        'alpha_flattened': False,
+        'status': 'skipped'
+    }
+
+    if Image is None:
+        print("[PREP] Pillow not installed, sending the original photo (pip install Pillow to enable preprocessing)")
+        return photo_path, report
+
+    source_hash = compute_file_hash(photo_path)
+    prepared_path = os.path.join(cache_dir, f"{source_hash[:16]}_{long_edge}.jpg")
+
+    if os.path.exists(prepared_path):
+        report['cached'] = True
+        report['status'] = 'cached'
+        try:
+            # Only the header is read; enough to tell whether the cached JPEG lost an alpha channel
+            with Image.open(photo_path) as image:
+                report['alpha_flattened'] = has_transparency(image)
+        except Exception:
+            pass
+    else:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with Image.open(photo_path) as image:
+                # Apply the EXIF rotation before the metadata is dropped
+                image = ImageOps.exif_transpose(image)
+                if has_transparency(image):
+                    report['alpha_flattened'] = True
+                    image = flatten_onto_white(image)
+                elif image.mode != 'RGB':
+                    image = image.convert('RGB')
+                image.thumbnail((long_edge, long_edge), Image.LANCZOS)
+                # Saving without exif/icc arguments strips all metadata
+                temp_path = f"{prepared_path}.{os.getpid()}.tmp"
+                image.save(temp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+            os.replace(temp_path, prepared_path)
+            report['status'] = 'prepared'
+        except Exception as e:
+            print(f"[PREP] Preprocessing failed, sending the original photo: {e}")
+            return photo_path, report
+
+    prepared_bytes = os.path.getsize(prepared_path)
+    if prepared_bytes >= original_bytes:
+        # Already small enough; recompressing would only cost quality
+        report['status'] = 'original'
+        report['alpha_flattened'] = False
+        return photo_path, report
+
+    report['prepared_bytes'] = prepared_bytes
+    report['bytes_saved'] = original_bytes - prepared_bytes
+    return prepared_path, report
+
+
+def format_prep_report(report, transfer_bytes_per_second=None, device_copy_reused=False):
+    """One-line summary of the bytes (and estimated transfer time) saved
+
+    device_copy_reused means the photo was already on the device, so no transfer happened at all.
+    """
+    original_mb = report['original_bytes'] / (1024 * 1024)
+    prepared_mb = report['prepared_bytes'] / (1024 * 1024)
+    saved_mb = report['bytes_saved'] / (1024 * 1024)
+    line = (f"[PREP] Photo {report['status']}: {original_mb:.2f}MB -> {prepared_mb:.2f}MB "
+            f"(saved {saved_mb:.2f}MB, long edge {report['long_edge']}px)")
+    if device_copy_reused:
+        line += f", already on the device so the {prepared_mb:.2f}MB transfer was skipped"
+    elif transfer_bytes_per_second and report['bytes_saved']:
+        line += f", ~{report['bytes_saved'] / transfer_bytes_per_second:.2f}s transfer time saved"
+    if report.get('alpha_flattened'):
+        line += ", transparency flattened onto white"
+    return line
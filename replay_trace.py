@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Offline replay of recorded sessions
+
+Re-runs whatsapp.py or whatsapp_scraper.py against a trace recorded with
+--trace (see session_trace.py) instead of a phone. Every command the bot sends
+is answered with the recorded response, in order; elements, errors and page
+sources come back exactly as they did on the device. Time is virtual: each
+command advances the clock by its recorded duration and time.sleep() advances
+it by the requested amount, so polling loops and timeouts take the same
+decisions as in the recorded run and the replay takes the same simulated time
+on any machine.
+
+When the code changes, the replay shows the effect on the recorded session:
+a recorded command the bot no longer sends is skipped, a command the trace
+doesn't have ends the replay (the session looks dead to the bot, like a lost
+connection) and is reported as the divergence point. The simulated run time
+then estimates the new run time on the recorded device.
+
+Usage:
+    python replay_trace.py replay TRACE [--lookahead N] [--save FILE] [--baseline FILE] [--verbose]
+    python replay_trace.py summary TRACE
+    python replay_trace.py compare BEFORE_TRACE AFTER_TRACE
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from appium.webdriver.webdriver import WebDriver
+from appium.webdriver.webelement import WebElement as MobileWebElement
+from appium.webdriver.locator_converter import AppiumLocatorConverter
+from appium.common import exceptions as appium_exceptions
+from selenium.common import exceptions as selenium_exceptions
+from selenium.webdriver.remote.mobile import Mobile
+from selenium.webdriver.remote.switch_to import SwitchTo
+
+from session_trace import (read_trace, resolve_blobs, get_trace_notes, summarize_trace, format_trace_summary,
+                           encode_params, command_key)
+
+# Recorded commands the replay may skip to find the one the bot sends
+DEFAULT_LOOKAHEAD = 25
+# Allowed growth against a saved replay before a metric counts as a regression
+REGRESSION_TOLERANCE = 0.15
+# Serial no device has, so adb calls made during a replay fail fast instead of reaching a phone
+REPLAY_DEVICE = 'trace-replay-device'
+
+
+class VirtualClock:
+    """time.time/monotonic/perf_counter/sleep replacement driven by the trace"""
+
+    def __init__(self, start):
+        self.start = start
+        self.now = start
+
+    def advance(self, seconds):
+        if seconds and seconds > 0:
+            self.now += seconds
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    @property
+    def elapsed(self):
+        return self.now - self.start
+
+    @contextlib.contextmanager
+    def installed(self):
+        originals = {name: getattr(time, name) for name in ('time', 'monotonic', 'perf_counter', 'sleep')}
+        time.time = time.monotonic = time.perf_counter = self.time
+        time.sleep = self.sleep
+        try:
+            yield self
+        finally:
+            for name, function in originals.items():
+                setattr(time, name, function)
+
+
+def _exception_class(name):
+    """Selenium/Appium exception class by name (WebDriverException if unknown)"""
+    for module in (selenium_exceptions, appium_exceptions):
+        cls = getattr(module, name, None)
+        if isinstance(cls, type) and issubclass(cls, Exception):
+            return cls
+    return selenium_exceptions.WebDriverException
+
+
+class ReplayDriver(WebDriver):
+    """Appium WebDriver whose commands are answered from a trace instead of a server"""
+
+    def __init__(self, replay, session_id, capabilities=None):
+        # No super().__init__(): that would connect to an Appium server and start a session
+        self.replay = replay
+        self.session_id = session_id
+        self.caps = capabilities or {}
+        self.pinned_scripts = {}
+        self.locator_converter = AppiumLocatorConverter()
+        self._web_element_cls = MobileWebElement
+        self._switch_to = SwitchTo(self)
+        self._mobile = Mobile(self)
+        self._is_remote = True
+        self._authenticator_id = None
+        self._extensions = []
+        self._absent_extensions = set()
+        self._websocket_connection = None
+        self._request = None
+
+    def execute(self, driver_command, params=None):
+        return self.replay.serve(self, driver_command, params)
+
+    def quit(self):
+        self.execute('quit')
+
+
+class TraceReplay:
+    """Cursor over a trace's events that answers commands in recorded order"""
+
+    def __init__(self, trace, lookahead=DEFAULT_LOOKAHEAD):
+        self.trace = trace
+        self.events = trace['events']
+        self.blobs = trace['blobs']
+        self.lookahead = lookahead
+        self.position = 0
+        self.clock = VirtualClock(trace['header']['started'])
+        self.served = 0
+        self.skipped = 0
+        self.changed = 0
+        self.sessions = 0
+        self.divergence = None
+
+    def _skip_to(self, matches, count_skipped=True):
+        """Move past the next event that matches; skipped commands are counted unless told otherwise"""
+        for index in range(self.position, len(self.events)):
+            event = self.events[index]
+            if matches(event):
+                self.position = index + 1
+                return event
+            if event['type'] == 'cmd' and count_skipped:
+                self.skipped += 1
+        self.position = len(self.events)
+        return None
+
+    def new_driver(self):
+        """Driver for the next recorded session (the replay's setup_driver())"""
+        if self.divergence:
+            raise selenium_exceptions.WebDriverException(f"replay ended: {self.divergence}")
+        event = self._skip_to(lambda event: event['type'] == 'session')
+        if event is None:
+            raise selenium_exceptions.WebDriverException("replay: no further session in the trace")
+        self.sessions += 1
+        return ReplayDriver(self, event.get('session_id'), event.get('capabilities'))
+
+    def next_note(self, kind):
+        """Data of the next note of a kind; commands recorded before it are skipped
+
+        Used where the replay stands in for a step that doesn't run offline
+        (photo transfer via adb), so its recorded commands don't count as divergence.
+        """
+        event = self._skip_to(lambda event: event['type'] == 'note' and event['kind'] == kind, count_skipped=False)
+        return resolve_blobs(event['data'], self.blobs) if event else None
+
+    def _find_command(self, key):
+        """Index of the next recorded command with this key within the lookahead, or None"""
+        checked = 0
+        for index in range(self.position, len(self.events)):
+            event = self.events[index]
+            if event['type'] == 'session':
+                return None
+            if event['type'] != 'cmd':
+                continue
+            if command_key(event['cmd'], event.get('params')) == key:
+                return index
+            checked += 1
+            if checked > self.lookahead:
+                return None
+        return None
+
+    def _describe_next(self):
+        for event in self.events[self.position:]:
+            if event['type'] == 'session':
+                break
+            if event['type'] == 'cmd':
+                return command_key(event['cmd'], event.get('params'))
+        return "end of session"
+
+    def serve(self, driver, command, params):
+        """Recorded response for a command the bot sends; raises the recorded error"""
+        if self.divergence:
+            raise selenium_exceptions.InvalidSessionIdException(f"replay ended: {self.divergence}")
+
+        key = command_key(command, params)
+        index = self._find_command(key)
+        if index is None:
+            self.divergence = f"after {self.served} commands the bot sent '{key}', trace has '{self._describe_next()}'"
+            raise selenium_exceptions.InvalidSessionIdException(f"replay ended: {self.divergence}")
+
+        self.skipped += sum(1 for event in self.events[self.position:index] if event['type'] == 'cmd')
+        event = self.events[index]
+        self.position = index + 1
+        self.served += 1
+        if encode_params(params) != event.get('params'):
+            self.changed += 1
+        self.clock.advance(event['dur'])
+
+        if 'error' in event:
+            error = event['error']
+            raise _exception_class(error['class'])(error['message'])
+        value = resolve_blobs(event.get('value'), self.blobs)
+        return {'value': driver._unwrap_value(value), 'sessionId': driver.session_id}
+
+    def results(self, host_seconds):
+        summary = summarize_trace(self.trace)
+        return {
+            'script': summary['script'],
+            'recorded_commands': summary['commands'],
+            'recorded_seconds': summary['wall_seconds'],
+            'served': self.served,
+            'skipped': self.skipped + sum(1 for event in self.events[self.position:] if event['type'] == 'cmd'),
+            'changed_params': self.changed,
+            'sessions': self.sessions,
+            'divergence': self.divergence,
+            'simulated_seconds': self.clock.elapsed,
+            'host_seconds': host_seconds,
+        }
+
+
+def _first_note(trace, kind):
+    notes = get_trace_notes(trace, kind)
+    return notes[0] if notes else None
+
+
+@contextlib.contextmanager
+def _patched(module, replacements):
+    originals = {name: getattr(module, name) for name in replacements}
+    for name, function in replacements.items():
+        setattr(module, name, function)
+    try:
+        yield
+    finally:
+        for name, function in originals.items():
+            setattr(module, name, function)
+
+
+def _write_file(path, text):
+    if text is None:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text)
+
+
+def run_whatsapp_replay(replay):
+    """Re-run whatsapp.run_automation() on the trace, with the recorded inputs"""
+    import whatsapp
+    from device_configs import set_device_config
+    from selector_cache import set_selector_table
+    from journal import journal_flush
+    from run_state import close_run_state
+    from device_latency import reset_latency_stats
+
+    trace = replay.trace
+    # Cached screen size and latency estimate belong to the recorded session, not an earlier replay
+    reset_latency_stats()
+    inputs = _first_note(trace, 'inputs')
+    if inputs is None:
+        raise ValueError("trace has no 'inputs' note (not recorded by whatsapp.py --trace)")
+    selection = _first_note(trace, 'selection')
+    photo = _first_note(trace, 'photo')
+    resume = _first_note(trace, 'resume_state') or {'run_day': None, 'processed': [], 'chat_states': {}}
+
+    _write_file('txt/chat_name.txt', inputs.get('chat_file'))
+    _write_file('txt/daily_message.txt', inputs.get('daily_message'))
+    whatsapp.CHAT_NAME_FILE = 'txt/chat_name.txt'
+    whatsapp.NON_INTERACTIVE = True
+    whatsapp.WORKER_STATUS_FILE = None
+    whatsapp.TRACE_FILE = None
+    whatsapp.SELECTED_ADB_DEVICE = REPLAY_DEVICE
+    set_device_config(inputs['device_config'], inputs.get('device_config_name'))
+    set_selector_table(inputs.get('selectors'))
+
+    run_day = resume['run_day'] or 'replay'
+    replacements = {
+        'setup_driver': lambda mode=None: whatsapp.install_latency_tracking(replay.new_driver()),
+        'show_selection_menu': lambda analysis: selection,
+        'build_row_selection': lambda analysis, spec: selection,
+        'load_processed_chats_today': lambda: (set(resume['processed']), f"txt/processed_chats_{run_day}.txt",
+                                               run_day),
+        'load_chat_states': lambda day=None: dict(resume['chat_states']),
+        'get_daily_photo_path': lambda: photo['path'] if photo else None,
+        'prepare_daily_photo': lambda path, screen_size=None: (path, photo['report']),
+        'transfer_photo_to_device': lambda driver, path: (replay.next_note('photo_transfer') or {}).get('device_path'),
+    }
+    with _patched(whatsapp, replacements):
+        try:
+            whatsapp.run_automation(whatsapp.setup_driver())
+        finally:
+            journal_flush()
+            close_run_state()
+
+
+def run_scraper_replay(replay):
+    """Re-run whatsapp_scraper.run_scraper() on the trace"""
+    import whatsapp_scraper
+    whatsapp_scraper.run_scraper(replay.new_driver())
+
+
+REPLAY_RUNNERS = {
+    'whatsapp': run_whatsapp_replay,
+    'whatsapp_scraper': run_scraper_replay,
+}
+
+
+def replay_trace(trace, lookahead=DEFAULT_LOOKAHEAD, verbose=False):
+    """Replay a loaded trace in a scratch directory; returns the replay results"""
+    script = trace['header'].get('script')
+    if script not in REPLAY_RUNNERS:
+        raise ValueError(f"don't know how to replay a '{script}' trace")
+    replay = TraceReplay(trace, lookahead)
+    host_timer = time.perf_counter
+
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        output = sys.stdout if verbose else open(os.devnull, 'w', encoding='utf-8')
+        start = host_timer()
+        try:
+            with replay.clock.installed(), contextlib.redirect_stdout(output):
+                REPLAY_RUNNERS[script](replay)
+        finally:
+            host_seconds = host_timer() - start
+            if output is not sys.stdout:
+                output.close()
+            os.chdir(previous_dir)
+    return replay.results(host_seconds)
+
+
+def format_replay_results(results):
+    lines = [
+        f"[REPLAY] {results['script']}: served {results['served']} of {results['recorded_commands']} recorded commands "
+        f"in {results['sessions']} session(s)",
+        f"   - Simulated run time: {results['simulated_seconds']:.1f}s (recorded {results['recorded_seconds']:.1f}s)",
+        f"   - Skipped recorded commands: {results['skipped']}, commands with changed parameters: "
+        f"{results['changed_params']}",
+        f"   - Host time: {results['host_seconds']:.2f}s",
+    ]
+    if results['divergence']:
+        lines.append(f"   - Diverged: {results['divergence']}")
+    return "\n".join(lines)
+
+
+def compare_with_baseline(results, baseline):
+    """Regressions against a saved replay: more simulated time or more commands sent"""
+    regressions = []
+    if results['simulated_seconds'] > baseline['simulated_seconds'] * (1 + REGRESSION_TOLERANCE):
+        regressions.append(f"simulated time {baseline['simulated_seconds']:.1f}s -> {results['simulated_seconds']:.1f}s")
+    if results['served'] > baseline['served'] * (1 + REGRESSION_TOLERANCE):
+        regressions.append(f"commands {baseline['served']} -> {results['served']}")
+    if results['divergence'] and not baseline.get('divergence'):
+        regressions.append(f"diverged: {results['divergence']}")
+    return regressions
+
+
+def format_trace_comparison(before, after):
+    """Per-command count and time differences between two recorded traces"""
+    lines = [f"{'command':<44} {'count':>13} {'seconds':>17}"]
+    names = set(before['by_command']) | set(after['by_command'])
+    empty = {'count': 0, 'seconds': 0.0}
+    rows = sorted(names, key=lambda name: abs(after['by_command'].get(name, empty)['seconds'] -
+                                              before['by_command'].get(name, empty)['seconds']), reverse=True)
+    for name in rows:
+        old, new = before['by_command'].get(name, empty), after['by_command'].get(name, empty)
+        lines.append(f"{name[:44]:<44} {old['count']:>5} -> {new['count']:<5} "
+                     f"{old['seconds']:>7.2f} -> {new['seconds']:<7.2f}")
+    lines.append(f"{'total':<44} {before['commands']:>5} -> {after['commands']:<5} "
+                 f"{before['wall_seconds']:>7.2f} -> {after['wall_seconds']:<7.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and compare recorded WhatsApp sessions offline")
+    commands = parser.add_subparsers(dest='command', required=True)
+    replay_parser = commands.add_parser('replay', help="Re-run the bot against a trace")
+    replay_parser.add_argument('trace')
+    replay_parser.add_argument('--lookahead', type=int, default=DEFAULT_LOOKAHEAD,
+                               help=f"Recorded commands that may be skipped to match one (default: {DEFAULT_LOOKAHEAD})")
+    replay_parser.add_argument('--save', help="Write the replay results as JSON (use as a later --baseline)")
+    replay_parser.add_argument('--baseline', help="JSON results of an earlier replay; exit 1 on a regression")
+    replay_parser.add_argument('--verbose', action='store_true', help="Show the bot's output")
+    summary_parser = commands.add_parser('summary', help="Per-command counts and times of a trace")
+    summary_parser.add_argument('trace')
+    compare_parser = commands.add_parser('compare', help="Per-command differences between two traces")
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        print(format_trace_summary(summarize_trace(read_trace(args.trace)), top=50))
+        return
+    if args.command == 'compare':
+        print(format_trace_comparison(summarize_trace(read_trace(args.before)),
+                                      summarize_trace(read_trace(args.after))))
+        return
+
+    results = replay_trace(read_trace(args.trace), args.lookahead, args.verbose)
+    print(format_replay_results(results))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"[REPLAY] Results saved to {args.save}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            regressions = compare_with_baseline(results, json.load(file))
+        if regressions:
+            print("[REPLAY] Regressions against the baseline:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print("[REPLAY] No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Text logs under txt/: script events, not-found chats and processed chats,
+all timestamped in GMT+7 and written through the background journal.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from journal import journal_append
+
+# GMT+7 timezone
+GMT_PLUS_7 = timezone(timedelta(hours=7))
+
+# Global variable to track if timestamp was written for this session
+_timestamp_written_today = False
+
+
+def get_gmt7_time():
+    """Get current time in GMT+7 timezone"""
+    return datetime.now(GMT_PLUS_7)
+
+
+def format_gmt7_time(dt=None):
+    """Format datetime as string in GMT+7"""
+    if dt is None:
+        dt = get_gmt7_time()
+    return dt.strftime("%Y-%m-%d %H:%M:%S GMT+7")
+
+
+def log_not_found_chat(chat_name, row_number=None):
+    """Log chat name that was not found to a file with timestamp"""
+    global _timestamp_written_today
+
+    try:
+        log_filename = f"txt/not_found_chats_{get_gmt7_time().strftime('%Y%m%d')}.txt"
+
+        # Write timestamp only once per script run
+        entry = f"{chat_name}\n"
+        if not _timestamp_written_today:
+            entry = f"[{format_gmt7_time()}]\n" + entry
+            _timestamp_written_today = True
+
+        # Queued; the journal writer creates txt/ and appends in the background
+        journal_append(log_filename, entry)
+
+        print(f"[LOG] Recorded not found chat: {chat_name} in {log_filename}")
+
+    except Exception as e:
+        print(f"[ERROR] Failed to log not found chat: {str(e)}")
+
+
+def log_script_event(event_type, message=""):
+    """Log script start/end events with GMT+7 timestamp"""
+    try:
+        log_filename = f"txt/script_log_{get_gmt7_time().strftime('%Y%m%d')}.txt"
+
+        timestamp = format_gmt7_time()
+        log_entry = f"[{timestamp}] {event_type.upper()}: {message}\n"
+
+        journal_append(log_filename, log_entry)
+
+        print(f"[LOG] {event_type.upper()}: {message}")
+
+    except Exception as e:
+        print(f"[ERROR] Failed to log script event: {str(e)}")
+
+
+def save_processed_chat(log_file, chat_name):
+    """Save a processed chat to today's log file (queued to the journal writer)"""
+    try:
+        journal_append(log_file, f"{chat_name}\n")
+    except Exception as e:
+        print(f"Error saving processed chat: {str(e)}")
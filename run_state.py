@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+SQLite run-state store.
+
+One row per (run day, chat key) with the chat's status, original row number,
+timestamps and timings. The run day is the GMT+7 calendar date, like the
+other logs. Chat keys are normalized names, so "Row65: NepalWin🇳🇵Niresh9090"
+from a log line and the bare name from the chat list map to the same key.
+The old processed_chats_*/not_found_chats_* text files can be imported once.
+
+While a chat is being handled its status walks through the send cycle
+(queued, searching, opened, composing, sent) and is committed at every
+step, so a restarted run knows where the previous one stopped. Getting back
+to the chat list afterwards is stored in returned_at, so it never replaces
+the send outcome. Failed chats are retried by later runs of the same day
+until they have failed MAX_FAILED_ATTEMPTS times.
+"""
+
+import glob
+import os
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime, timezone, timedelta
+
+RUN_STATE_DB = "txt/run_state.db"
+GMT_PLUS_7 = timezone(timedelta(hours=7))
+
+# Per-chat send cycle, persisted at every transition:
+# queued -> searching -> opened -> composing -> sent (return to the chat list: returned_at)
+STATUS_QUEUED = "queued"
+STATUS_SEARCHING = "searching"
+STATUS_OPENED = "opened"
+STATUS_COMPOSING = "composing"
+STATUS_SENT = "sent"
+# Written as a status by older versions; now only found in existing databases
+STATUS_RETURNED = "returned"
+# Terminal outcomes for chats that were not sent
+STATUS_FAILED = "failed"
+STATUS_NOT_FOUND = "not_found"
+
+# Statuses that mean "handled today, don't search for this chat again"
+DONE_STATUSES = (STATUS_SENT, STATUS_RETURNED, STATUS_NOT_FOUND)
+
+# A failed chat is done for the day once it has failed this many times
+MAX_FAILED_ATTEMPTS = 3
+
+# A chat left in 'composing' may or may not have been sent before the crash,
+# and a failed one may have failed after its send went through
+SEND_UNCONFIRMED_STATUSES = (STATUS_COMPOSING, STATUS_FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_runs (
+    run_day TEXT NOT NULL,
+    chat_key TEXT NOT NULL,
+    chat_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    row_number INTEGER,
+    started_at TEXT,
+    updated_at TEXT NOT NULL,
+    search_seconds REAL,
+    message_seconds REAL,
+    total_seconds REAL,
+    returned_at TEXT,
+    failed_attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_day, chat_key)
+);
+CREATE INDEX IF NOT EXISTS idx_chat_runs_key ON chat_runs (chat_key);
+CREATE INDEX IF NOT EXISTS idx_chat_runs_day ON chat_runs (run_day, status);
+CREATE TABLE IF NOT EXISTS imported_files (
+    path TEXT PRIMARY KEY,
+    imported_at TEXT NOT NULL,
+    records INTEGER NOT NULL
+);
+"""
+
+# "NOT_FOUND Row64: name", "FAILED Row1: name", "Row65: name"
+_PROCESSED_LINE = re.compile(r"^(?:(NOT_FOUND|FAILED)\s+)?Row\s*(\d+):\s*(.+)$")
+
+_state = {'conn': None, 'path': None}
+
+
+def get_run_day(dt=None):
+    """GMT+7 calendar date (YYYY-MM-DD) used as the day boundary for runs"""
+    if dt is None:
+        dt = datetime.now(GMT_PLUS_7)
+    return dt.astimezone(GMT_PLUS_7).strftime("%Y-%m-%d")
+
+
+def _now():
+    return datetime.now(GMT_PLUS_7).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def chat_key(chat_name):
+    """Normalized key for a chat name: Unicode NFC, whitespace removed, case-folded"""
+    normalized = unicodedata.normalize('NFC', chat_name)
+    return "".join(normalized.split()).casefold()
+
+
+def parse_processed_line(line):
+    """Parse a processed_chats line into (status, row_number, chat_name), or None"""
+    match = _PROCESSED_LINE.match(line.strip())
+    if not match:
+        return None
+    prefix, row, name = match.groups()
+    status = {'NOT_FOUND': STATUS_NOT_FOUND, 'FAILED': STATUS_FAILED}.get(prefix, STATUS_SENT)
+    return status, int(row), name.strip()
+
+
+def open_run_state(path=RUN_STATE_DB):
+    """Open (creating if needed) the state database; returns the connection"""
+    if _state['conn'] is not None and _state['path'] == path:
+        return _state['conn']
+    close_run_state()
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(chat_runs)")}
+    if 'returned_at' not in columns:
+        conn.execute("ALTER TABLE chat_runs ADD COLUMN returned_at TEXT")
+    if 'failed_attempts' not in columns:
+        conn.execute("ALTER TABLE chat_runs ADD COLUMN failed_attempts INTEGER NOT NULL DEFAULT 0")
+        conn.execute("UPDATE chat_runs SET failed_attempts = 1 WHERE status = ?", (STATUS_FAILED,))
+    conn.commit()
+    _state['conn'] = conn
+    _state['path'] = path
+    return conn
+
+
+def close_run_state():
+    """Close the state database if it is open"""
+    if _state['conn'] is not None:
+        _state['conn'].close()
+    _state['conn'] = None
+    _state['path'] = None
+
+
+def _connection():
+    return _state['conn'] or open_run_state()
+
+
+def record_chat_result(chat_name, status, row_number=None, day=None, search_seconds=None,
+                       message_seconds=None, total_seconds=None, started_at=None):
+    """Insert or update the chat's row for the day (committed immediately); failures are counted"""
+    conn = _connection()
+    now = _now()
+    conn.execute(
+        """INSERT INTO chat_runs (run_day, chat_key, chat_name, status, row_number, started_at, updated_at,
+                                  search_seconds, message_seconds, total_seconds, failed_attempts)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT (run_day, chat_key) DO UPDATE SET
+               chat_name = excluded.chat_name,
+               status = excluded.status,
+               row_number = COALESCE(excluded.row_number, chat_runs.row_number),
+               started_at = COALESCE(chat_runs.started_at, excluded.started_at),
+               updated_at = excluded.updated_at,
+               search_seconds = COALESCE(excluded.search_seconds, chat_runs.search_seconds),
+               message_seconds = COALESCE(excluded.message_seconds, chat_runs.message_seconds),
+               total_seconds = COALESCE(excluded.total_seconds, chat_runs.total_seconds),
+               failed_attempts = chat_runs.failed_attempts + excluded.failed_attempts""",
+        (day or get_run_day(), chat_key(chat_name), chat_name, status, row_number, started_at or now, now,
+         search_seconds, message_seconds, total_seconds, int(status == STATUS_FAILED))
+    )
+    conn.commit()
+
+
+def record_chat_returned(chat_name, day=None):
+    """Note that the bot got back to the chat list after the chat; the status is left as it is"""
+    conn = _connection()
+    now = _now()
+    conn.execute("UPDATE chat_runs SET returned_at = ?, updated_at = ? WHERE run_day = ? AND chat_key = ?",
+                 (now, now, day or get_run_day(), chat_key(chat_name)))
+    conn.commit()
+
+
+def get_chat_returned_at(chat_name, day=None):
+    """When the bot got back to the chat list after the chat on the day, or None"""
+    row = _connection().execute(
+        "SELECT returned_at FROM chat_runs WHERE run_day = ? AND chat_key = ?",
+        (day or get_run_day(), chat_key(chat_name))
+    ).fetchone()
+    return row[0] if row else None
+
+
+def queue_chats(entries, day=None):
+    """Add (row_number, chat_name) entries as 'queued' unless the chat already has a row for the day"""
+    conn = _connection()
+    now = _now()
+    day = day or get_run_day()
+    conn.executemany(
+        """INSERT OR IGNORE INTO chat_runs (run_day, chat_key, chat_name, status, row_number, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        [(day, chat_key(name), name, STATUS_QUEUED, row, now) for row, name in entries]
+    )
+    conn.commit()
+
+
+def get_chat_status(chat_name, day=None):
+    """Status recorded for the chat on the day, or None"""
+    row = _connection().execute(
+        "SELECT status FROM chat_runs WHERE run_day = ? AND chat_key = ?",
+        (day or get_run_day(), chat_key(chat_name))
+    ).fetchone()
+    return row[0] if row else None
+
+
+def load_chat_states(day=None):
+    """Map of chat key -> status for every chat recorded on the day"""
+    rows = _connection().execute(
+        "SELECT chat_key, status FROM chat_runs WHERE run_day = ?", (day or get_run_day(),)
+    ).fetchall()
+    return dict(rows)
+
+
+def load_done_chat_keys(day=None, statuses=DONE_STATUSES, max_failed_attempts=MAX_FAILED_ATTEMPTS):
+    """Set of chat keys already handled on the day, for O(1) skip checks
+
+    Failed chats count as handled only after max_failed_attempts failures.
+    """
+    placeholders = ", ".join("?" for _ in statuses)
+    rows = _connection().execute(
+        f"""SELECT chat_key FROM chat_runs WHERE run_day = ?
+            AND (status IN ({placeholders}) OR (status = ? AND failed_attempts >= ?))""",
+        (day or get_run_day(), *statuses, STATUS_FAILED, max_failed_attempts)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def _mark_imported(conn, path, records):
+    conn.execute("INSERT OR REPLACE INTO imported_files (path, imported_at, records) VALUES (?, ?, ?)",
+                 (os.path.basename(path), _now(), records))
+
+
+def _already_imported(conn, path):
+    return conn.execute("SELECT 1 FROM imported_files WHERE path = ?",
+                        (os.path.basename(path),)).fetchone() is not None
+
+
+def import_legacy_logs(txt_dir="txt"):
+    """Import processed_chats_*.txt and not_found_chats_*.txt once each; returns records added
+
+    Existing rows win over imported ones, and processed_chats files are read
+    first because they carry the row number and the failed/sent outcome.
+    """
+    conn = _connection()
+    added = 0
+    sources = ([(path, 'processed') for path in sorted(glob.glob(os.path.join(txt_dir, "processed_chats_*.txt")))]
+               + [(path, 'not_found') for path in sorted(glob.glob(os.path.join(txt_dir, "not_found_chats_*.txt")))])
+
+    for path, kind in sources:
+        if _already_imported(conn, path):
+            continue
+        stamp = os.path.basename(path).rsplit('_', 1)[1][:-4]
+        try:
+            day = datetime.strptime(stamp, "%Y-%m-%d" if kind == 'processed' else "%Y%m%d").strftime("%Y-%m-%d")
+            with open(path, 'r', encoding='utf-8') as file:
+                lines = [line.strip() for line in file if line.strip()]
+        except (ValueError, OSError) as e:
+            print(f"[STATE] Skipping {path}: {e}")
+            continue
+
+        records = []
+        for line in lines:
+            if kind == 'processed':
+                parsed = parse_processed_line(line)
+                if parsed:
+                    records.append((day, parsed[2], parsed[0], parsed[1]))
+            elif not line.startswith('['):  # skip the per-run timestamp lines
+                records.append((day, line, STATUS_NOT_FOUND, None))
+
+        before = conn.total_changes
+        conn.executemany(
+            """INSERT OR IGNORE INTO chat_runs (run_day, chat_key, chat_name, status, row_number, updated_at,
+                                               failed_attempts)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            [(day, chat_key(name), name, status, row, _now(), int(status == STATUS_FAILED))
+             for day, name, status, row in records]
+        )
+        count = conn.total_changes - before
+        _mark_imported(conn, path, count)
+        added += count
+
+    conn.commit()
+    return added
+
+
+def get_day_summary(day=None):
+    """Count of chats per status for the day"""
+    rows = _connection().execute(
+        "SELECT status, COUNT(*) FROM chat_runs WHERE run_day = ? GROUP BY status",
+        (day or get_run_day(),)
+    ).fetchall()
+    return dict(rows)
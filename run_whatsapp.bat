@@ -15,7 +15,7 @@ echo.
 echo Starting WhatsApp automation...
 echo.
 
-python whatsapp.py
+python whatsapp.py %*
 
 echo.
 echo Automation completed. Press any key to exit.
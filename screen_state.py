@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Screen-state detection shared by the sender and the scraper.
+
+classify_screen() decides which screen a page_source snapshot shows (chat
+list, search results, conversation, attach sheet, gallery, media preview,
+lock screen, a dialog or another app) from weighted signals found in one
+walk of the tree, with a confidence value. detect_screen() costs one
+round-trip: a single page_source.
+
+navigate_to_chat_list() replaces probe-then-BACK sequences: every step takes
+one snapshot and runs the transition handler for the detected state, so
+BACK is only pressed on screens it is known to leave, other apps are
+brought back with activate_app, and an unrecognised screen is given time to
+settle instead of being backed out of.
+"""
+
+import time
+
+from ui_snapshot import (parse_hierarchy, iter_nodes, CONTACT_ROW_ID, TITLE_ID, CONVERSATION_NAME_ID, ENTRY_ID)
+
+WHATSAPP_PACKAGE = "com.whatsapp"
+SYSTEMUI_PACKAGE = "com.android.systemui"
+
+SCREEN_CHAT_LIST = "chat_list"
+SCREEN_SEARCH_RESULTS = "search_results"
+SCREEN_CONVERSATION = "conversation"
+SCREEN_ATTACH_SHEET = "attach_sheet"
+SCREEN_GALLERY = "gallery"
+SCREEN_MEDIA_PREVIEW = "media_preview"
+SCREEN_LOCK = "lock_screen"
+SCREEN_DIALOG = "dialog"
+SCREEN_FOREIGN_APP = "foreign_app"
+SCREEN_UNKNOWN = "unknown"
+
+# WhatsApp screens above the chat list, left with the up button or BACK
+INNER_SCREENS = (SCREEN_SEARCH_RESULTS, SCREEN_CONVERSATION, SCREEN_ATTACH_SHEET, SCREEN_GALLERY,
+                 SCREEN_MEDIA_PREVIEW, SCREEN_DIALOG)
+
+# Below this the best guess is reported as SCREEN_UNKNOWN
+MIN_CONFIDENCE = 0.45
+
+SEARCH_MENU_ID = "com.whatsapp:id/menuitem_search"
+# Search entry points of the chat list: the toolbar icon, and the search bar of newer versions
+SEARCH_ENTRY_IDS = {SEARCH_MENU_ID, "com.whatsapp:id/search", "com.whatsapp:id/search_bar_inner_layout"}
+SEARCH_FIELD_ID = "com.whatsapp:id/search_src_text"
+NEW_CHAT_ID = "com.whatsapp:id/fab"
+ATTACH_ID = "com.whatsapp:id/attach"
+SEND_ID = "com.whatsapp:id/send"
+CAPTION_ID = "com.whatsapp:id/caption"
+
+ATTACH_OPTION_TEXTS = {"Document", "Camera", "Gallery", "Audio", "Location", "Contact", "Poll"}
+GALLERY_TITLES = {"Recents", "Gallery", "All photos", "Camera"}
+DIALOG_IDS = {"android:id/alertTitle", "android:id/button1", "android:id/button2", "android:id/message"}
+DIALOG_PACKAGES = {"com.google.android.permissioncontroller", "com.android.permissioncontroller",
+                   "com.android.packageinstaller"}
+UP_BUTTON_DESCS = {"Navigate up", "Back"}
+
+KEYCODE_BACK = 4
+KEYCODE_WAKEUP = 224
+
+# (signal, weight) per WhatsApp screen; negative weights are signals that rule the screen out
+_SIGNALS = {
+    SCREEN_CHAT_LIST: (('search_menu', 0.4), ('new_chat_button', 0.3), ('chat_rows', 0.15), ('app_title', 0.15),
+                       ('chats_tab', 0.15), ('search_field', -1.0), ('entry', -1.0), ('caption', -1.0)),
+    SCREEN_SEARCH_RESULTS: (('search_field', 0.7), ('result_titles', 0.2), ('no_results', 0.2), ('chat_rows', 0.1),
+                            ('entry', -1.0)),
+    SCREEN_CONVERSATION: (('entry', 0.5), ('conversation_name', 0.3), ('attach_button', 0.2),
+                          ('attach_options', -0.6)),
+    SCREEN_ATTACH_SHEET: (('attach_options', 0.6), ('entry', 0.2), ('attach_button', 0.2)),
+    SCREEN_GALLERY: (('thumbnails', 0.6), ('gallery_title', 0.3), ('entry', -1.0), ('caption', -1.0)),
+    SCREEN_MEDIA_PREVIEW: (('caption', 0.6), ('send_button', 0.2), ('photo_view', 0.2), ('entry', -1.0)),
+}
+
+# Detection statistics for the run report
+_screen_stats = {
+    'detections': 0,
+    'seconds': 0.0,
+    'by_state': {},         # state -> detections
+    'actions': {},          # transition action -> count
+    'low_confidence': 0     # detections that ended as SCREEN_UNKNOWN
+}
+
+
+def _collect_signals(root):
+    """Signals present on the screen and the foreground package, from one walk of the tree"""
+    signals = set()
+    packages = {}
+    attach_options = 0
+    thumbnails = 0
+    for node in iter_nodes(root):
+        if node is root:
+            continue
+        if node.get('package'):
+            packages[node['package']] = packages.get(node['package'], 0) + 1
+        if not node['displayed']:
+            continue
+        rid, text, desc = node['rid'], node['text'], node['desc']
+
+        if rid in SEARCH_ENTRY_IDS or (desc == "Search" and not rid.endswith("search_src_text")):
+            signals.add('search_menu')
+        elif rid == NEW_CHAT_ID:
+            signals.add('new_chat_button')
+        elif rid == CONTACT_ROW_ID:
+            signals.add('chat_rows')
+        elif rid == SEARCH_FIELD_ID:
+            signals.add('search_field')
+        elif rid == TITLE_ID:
+            signals.add('result_titles')
+        elif rid == ENTRY_ID:
+            signals.add('entry')
+        elif rid == CONVERSATION_NAME_ID:
+            signals.add('conversation_name')
+        elif rid == ATTACH_ID:
+            signals.add('attach_button')
+        elif rid == CAPTION_ID:
+            signals.add('caption')
+        elif rid == SEND_ID:
+            signals.add('send_button')
+        elif 'photo_view' in rid or 'media_view' in rid:
+            signals.add('photo_view')
+        elif rid in DIALOG_IDS:
+            signals.add('dialog')
+        elif rid.startswith(SYSTEMUI_PACKAGE) and ('keyguard' in rid or 'lock_icon' in rid):
+            signals.add('keyguard')
+
+        if 'thumb' in rid or ('ImageView' in node['class'] and desc.startswith("Photo")):
+            thumbnails += 1
+        if text in ATTACH_OPTION_TEXTS or 'pickfiletype' in rid:
+            attach_options += 1
+        if text in GALLERY_TITLES and not rid:
+            signals.add('gallery_title')
+        if text in ("WhatsApp", "Chats") and not rid:
+            signals.add('app_title')
+        # The Chats tab of the bottom navigation (the search results' "Chats" header is a TITLE_ID)
+        if "Chats" in (text, desc) and rid != TITLE_ID:
+            signals.add('chats_tab')
+        if text.startswith("No results"):
+            signals.add('no_results')
+        if desc in UP_BUTTON_DESCS:
+            signals.add('up_button')
+
+    if attach_options >= 2:
+        signals.add('attach_options')
+    if thumbnails >= 3:
+        signals.add('thumbnails')
+    # Status bar and navigation nodes belong to systemui on every screen; they only decide on the lock screen
+    foreground = max(packages, key=lambda package: (package != SYSTEMUI_PACKAGE, packages[package]), default='')
+    return signals, foreground
+
+
+def classify_screen(root):
+    """Classify a parsed hierarchy
+
+    Returns {'state', 'confidence', 'package', 'signals', 'scores', 'root'}; 'root'
+    is the snapshot itself so callers can keep working on it without another round-trip.
+    """
+    result = {'state': SCREEN_UNKNOWN, 'confidence': 0.0, 'package': '', 'signals': [], 'scores': {}, 'root': root}
+    if root is None:
+        return result
+    signals, foreground = _collect_signals(root)
+    result['package'] = foreground
+    result['signals'] = sorted(signals)
+
+    if 'keyguard' in signals:
+        result.update(state=SCREEN_LOCK, confidence=0.95)
+        return result
+    if foreground in DIALOG_PACKAGES or 'dialog' in signals:
+        result.update(state=SCREEN_DIALOG, confidence=0.9 if foreground != WHATSAPP_PACKAGE else 0.75)
+        return result
+    if foreground and foreground != WHATSAPP_PACKAGE:
+        result.update(state=SCREEN_FOREIGN_APP, confidence=0.9)
+        return result
+
+    scores = {state: sum(weight for signal, weight in weights if signal in signals)
+              for state, weights in _SIGNALS.items()}
+    result['scores'] = {state: round(score, 2) for state, score in scores.items()}
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    best, runner_up = scores[ranked[0]], max(scores[ranked[1]], 0.0)
+    # A close runner-up halves its share of the margin off the confidence
+    confidence = round(max(0.0, min(1.0, best) - runner_up * 0.5), 2)
+    result['confidence'] = confidence
+    if confidence >= MIN_CONFIDENCE:
+        result['state'] = ranked[0]
+    return result
+
+
+def detect_screen(driver):
+    """Classify the current screen with a single page_source round-trip"""
+    start = time.time()
+    snapshot = classify_screen(parse_hierarchy(driver.page_source))
+    _screen_stats['detections'] += 1
+    _screen_stats['seconds'] += time.time() - start
+    _screen_stats['by_state'][snapshot['state']] = _screen_stats['by_state'].get(snapshot['state'], 0) + 1
+    if snapshot['state'] == SCREEN_UNKNOWN:
+        _screen_stats['low_confidence'] += 1
+    return snapshot
+
+
+def wait_for_screen(driver, states, timeout=5.0, poll_interval=0.3):
+    """Poll until the screen is one of states; returns that snapshot, or None on timeout"""
+    states = (states,) if isinstance(states, str) else tuple(states)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            snapshot = detect_screen(driver)
+            if snapshot['state'] in states:
+                return snapshot
+        except Exception:
+            pass
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        time.sleep(min(poll_interval, remaining))
+
+
+def _wait_for_change(driver, state, timeout, poll_interval=0.15):
+    """Poll until the screen is no longer state; returns the last snapshot"""
+    deadline = time.time() + timeout
+    while True:
+        snapshot = detect_screen(driver)
+        remaining = deadline - time.time()
+        if snapshot['state'] != state or remaining <= 0:
+            return snapshot
+        time.sleep(min(poll_interval, remaining))
+
+
+# Transition handlers: one step from the detected screen towards the chat list; each returns its action name
+
+def _leave_whatsapp_screen(driver, snapshot):
+    """Up button when the screen has one (closes search even with the keyboard open), else BACK"""
+    if 'up_button' in snapshot['signals']:
+        for node in iter_nodes(snapshot['root']):
+            if node['desc'] in UP_BUTTON_DESCS and node['displayed']:
+                x1, y1, x2, y2 = node['bounds']
+                driver.tap([((x1 + x2) // 2, (y1 + y2) // 2)])
+                return 'up_button'
+    driver.press_keycode(KEYCODE_BACK)
+    return 'back'
+
+
+def _dismiss_dialog(driver, snapshot):
+    driver.press_keycode(KEYCODE_BACK)
+    return 'back'
+
+
+def _bring_whatsapp_front(driver, snapshot):
+    driver.activate_app(WHATSAPP_PACKAGE)
+    return 'activate_app'
+
+
+def _wake_and_unlock(driver, snapshot):
+    """Wake and swipe the keyguard away (works for swipe-only locks)"""
+    driver.press_keycode(KEYCODE_WAKEUP)
+    width, height = snapshot['root']['bounds'][2] or 1080, snapshot['root']['bounds'][3] or 2400
+    driver.swipe(width // 2, int(height * 0.8), width // 2, int(height * 0.3), 300)
+    return 'unlock_swipe'
+
+
+def _settle(driver, snapshot):
+    """Unrecognised screen (mid-animation or unknown layout): wait for the next snapshot, no BACK"""
+    time.sleep(0.3)
+    return 'settle'
+
+
+TRANSITIONS = {
+    SCREEN_SEARCH_RESULTS: _leave_whatsapp_screen,
+    SCREEN_CONVERSATION: _leave_whatsapp_screen,
+    SCREEN_ATTACH_SHEET: _leave_whatsapp_screen,
+    SCREEN_GALLERY: _leave_whatsapp_screen,
+    SCREEN_MEDIA_PREVIEW: _leave_whatsapp_screen,
+    SCREEN_DIALOG: _dismiss_dialog,
+    SCREEN_FOREIGN_APP: _bring_whatsapp_front,
+    SCREEN_LOCK: _wake_and_unlock,
+    SCREEN_UNKNOWN: _settle,
+}
+
+
+def navigate_to_chat_list(driver, max_steps=5, step_timeout=1.5, snapshot=None):
+    """Walk to the main chat list one detected screen at a time
+
+    Returns the final snapshot; its 'state' is SCREEN_CHAT_LIST on success.
+    An unknown screen seen twice in a row is handed to activate_app.
+    """
+    snapshot = snapshot or detect_screen(driver)
+    previous_state = None
+    for _ in range(max_steps):
+        state = snapshot['state']
+        if state == SCREEN_CHAT_LIST:
+            return snapshot
+        handler = TRANSITIONS[state]
+        if state == SCREEN_UNKNOWN and previous_state == SCREEN_UNKNOWN:
+            handler = _bring_whatsapp_front
+        action = handler(driver, snapshot)
+        _screen_stats['actions'][action] = _screen_stats['actions'].get(action, 0) + 1
+        print(f"[SCREEN] {state} ({snapshot['confidence']:.2f}) -> {action}")
+        previous_state = state
+        snapshot = _wait_for_change(driver, state, step_timeout) if state != SCREEN_UNKNOWN else detect_screen(driver)
+    return snapshot
+
+
+def get_screen_state_stats():
+    return _screen_stats
+
+
+def reset_screen_state_stats():
+    _screen_stats.update(detections=0, seconds=0.0, by_state={}, actions={}, low_confidence=0)
+
+
+def format_screen_state_stats():
+    """Summary lines of screen detections and the navigation actions they led to"""
+    if not _screen_stats['detections']:
+        return []
+    average = _screen_stats['seconds'] / _screen_stats['detections']
+    lines = [f"[SCREEN] {_screen_stats['detections']} screen detections (avg {average * 1000:.0f}ms, one round-trip each), "
+             f"{_screen_stats['low_confidence']} unknown"]
+    by_state = ", ".join(f"{state} {count}" for state, count in
+                         sorted(_screen_stats['by_state'].items(), key=lambda item: -item[1]))
+    lines.append(f"   - States: {by_state}")
+    if _screen_stats['actions']:
+        actions = ", ".join(f"{action} {count}" for action, count in sorted(_screen_stats['actions'].items()))
+        lines.append(f"   - Navigation: {actions}")
+    return lines
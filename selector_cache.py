@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Persistent selector-resolution cache.
+
+Remembers which selector from a fallback list actually found each logical
+element (attach button, message input, ...) so later lookups try the winner
+first and push failing selectors to the back. The table is stored per device
+UDID and is thrown away when the installed WhatsApp version changes.
+"""
+
+import json
+import os
+
+from json_store import update_json_file
+
+SELECTOR_CACHE_FILE = "txt/selector_cache.json"
+
+# Active cache state for the current device
+_cache = {
+    'device': None,
+    'version': None,
+    'elements': {},     # element name -> {'winner': key or None, 'demoted': [keys]}
+    'persist': False,
+    'path': SELECTOR_CACHE_FILE
+}
+
+
+def selector_key(selector):
+    """Stable string key for a (by, value) selector tuple"""
+    return f"{selector[0]}={selector[1]}"
+
+
+def _read_cache_file(path):
+    """Read the whole cache file (all devices), or an empty table"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        print(f"[SELECTOR] Failed to read selector cache, starting fresh: {e}")
+        return {}
+
+
+def load_selector_cache(device_id, app_version, path=SELECTOR_CACHE_FILE):
+    """Load the cached selector table for a device; invalidates it if the app version changed"""
+    _cache['device'] = device_id
+    _cache['version'] = app_version
+    _cache['elements'] = {}
+    _cache['path'] = path
+    # Without a device and version we can't tell when the table goes stale, so keep it in memory only
+    _cache['persist'] = bool(device_id and app_version)
+
+    if not _cache['persist']:
+        print("[SELECTOR] Device or WhatsApp version unknown, selector cache will not be persisted")
+        return _cache
+
+    entry = _read_cache_file(path).get(device_id)
+    if not entry:
+        print(f"[SELECTOR] No cached selectors for {device_id} yet")
+    elif entry.get('version') != app_version:
+        print(f"[SELECTOR] WhatsApp version changed ({entry.get('version')} -> {app_version}), selector cache invalidated")
+    else:
+        _cache['elements'] = entry.get('elements', {})
+        print(f"[SELECTOR] Loaded cached selectors for {len(_cache['elements'])} elements (WhatsApp {app_version})")
+
+    return _cache
+
+
+def save_selector_cache():
+    """Write the current device's table back to disk, keeping other devices' entries"""
+    if not _cache['persist']:
+        return False
+    def put(data):
+        data[_cache['device']] = {
+            'version': _cache['version'],
+            'elements': _cache['elements']
+        }
+
+    # Fleet workers share the file: locked read-modify-write, atomic replace
+    try:
+        update_json_file(_cache['path'], put)
+        return True
+    except Exception as e:
+        print(f"[SELECTOR] Failed to save selector cache: {e}")
+        return False
+
+
+def order_selectors(element_name, selectors):
+    """Return selectors in cached order: last winner, then defaults, then demoted ones"""
+    entry = _cache['elements'].get(element_name)
+    if not entry:
+        return list(selectors)
+
+    by_key = {selector_key(selector): selector for selector in selectors}
+    winner = entry.get('winner')
+    demoted = [key for key in entry.get('demoted', []) if key in by_key and key != winner]
+
+    ordered = [by_key[winner]] if winner in by_key else []
+    ordered += [selector for key, selector in by_key.items() if key != winner and key not in demoted]
+    ordered += [by_key[key] for key in demoted]
+    return ordered
+
+
+def record_selector_hit(element_name, selector):
+    """Remember the selector that found the element"""
+    key = selector_key(selector)
+    entry = _cache['elements'].setdefault(element_name, {'winner': None, 'demoted': []})
+    if entry['winner'] == key and key not in entry['demoted']:
+        return
+    entry['winner'] = key
+    if key in entry['demoted']:
+        entry['demoted'].remove(key)
+    save_selector_cache()
+
+
+def record_selector_miss(element_name, selector):
+    """Move a selector that failed to the back of the list"""
+    key = selector_key(selector)
+    entry = _cache['elements'].setdefault(element_name, {'winner': None, 'demoted': []})
+    if entry['demoted'][-1:] == [key] and entry['winner'] != key:
+        return
+    if entry['winner'] == key:
+        entry['winner'] = None
+    if key in entry['demoted']:
+        entry['demoted'].remove(key)
+    entry['demoted'].append(key)
+    save_selector_cache()
+
+
+def get_selector_table():
+    """Copy of the current device's element table (recorded in session traces)"""
+    return json.loads(json.dumps(_cache['elements']))
+
+
+def set_selector_table(elements):
+    """Use a given element table in memory, without persisting it (trace replay)"""
+    _cache['elements'] = json.loads(json.dumps(elements or {}))
+    _cache['persist'] = False
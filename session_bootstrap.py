@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Session bootstrap modes for setup_driver.
+
+    cold  full UiAutomator2 bootstrap: server install check, device
+          initialization and WhatsApp launched through its activity
+    fast  reuses the server APKs already on the device, skips device
+          initialization and logcat capture, and attaches to the running
+          WhatsApp process instead of relaunching it (autoLaunch off)
+    auto  fast on a known-good device, else cold
+
+A device becomes known-good after a session on it has answered its first
+command; a fast session that can't be created clears the flag, so the next
+one bootstraps cold and reinstalls what is missing. Time-to-first-command
+(session creation plus the first answered command) is kept per mode for the
+run summary and stored per device serial in the device profile cache, so
+cold and fast startups can be compared across runs.
+"""
+
+import time
+from datetime import datetime
+
+from device_profiles import load_bootstrap_state, save_bootstrap_state
+
+BOOTSTRAP_MODES = ('cold', 'fast')
+
+# Server launch budget (ms) per mode; the fast one only starts an installed server
+SERVER_LAUNCH_TIMEOUT = {'cold': 60000, 'fast': 20000}
+SERVER_INSTALL_TIMEOUT = 60000
+
+# mode -> {'count', 'failed', 'session', 'first_command', 'attached'}
+_bootstrap_stats = {}
+
+
+def resolve_bootstrap_mode(requested, udid):
+    """'cold' or 'fast' for a requested mode; 'auto' is fast only on a known-good device"""
+    if requested != 'auto':
+        return requested
+    if udid and load_bootstrap_state(udid)['known_good']:
+        return 'fast'
+    return 'cold'
+
+
+def apply_bootstrap_options(options, mode):
+    """Set the UiAutomator2 capabilities of a bootstrap mode (the cold one also needs appActivity)"""
+    options.uiautomator2_server_launch_timeout = SERVER_LAUNCH_TIMEOUT[mode]
+    options.uiautomator2_server_install_timeout = SERVER_INSTALL_TIMEOUT
+    if mode == 'fast':
+        options.skip_server_installation = True
+        options.skip_device_initialization = True
+        options.skip_logcat_capture = True
+        # Attach to whatever WhatsApp is doing; open_whatsapp_business brings it forward if needed
+        options.set_capability('appium:autoLaunch', False)
+    return options
+
+
+def _stats(mode):
+    return _bootstrap_stats.setdefault(mode, {'count': 0, 'failed': 0, 'session': 0.0,
+                                              'first_command': 0.0, 'attached': 0})
+
+
+def record_bootstrap_failure(mode, udid):
+    """Count a session that could not be created; a failed fast session clears the known-good flag"""
+    _stats(mode)['failed'] += 1
+    if mode == 'fast' and udid:
+        state = load_bootstrap_state(udid)
+        if state['known_good']:
+            state['known_good'] = None
+            save_bootstrap_state(udid, state)
+
+
+def record_first_command(driver, mode, udid, session_seconds, start):
+    """Send the session's first command, record the times and mark the device known-good
+
+    start is the time.perf_counter() value taken before the session was requested. Returns
+    the package in front (the command sent), or None if it failed.
+    """
+    try:
+        package = driver.current_package
+    except Exception as e:
+        print(f"[BOOTSTRAP] First command on the {mode} session failed: {e}")
+        _stats(mode)['failed'] += 1
+        return None
+    first_command = time.perf_counter() - start
+
+    stats = _stats(mode)
+    stats['count'] += 1
+    stats['session'] += session_seconds
+    stats['first_command'] += first_command
+    if package == "com.whatsapp":
+        stats['attached'] += 1
+    print(f"[BOOTSTRAP] {mode} session: first command after {first_command:.2f}s "
+          f"(session {session_seconds:.2f}s), {package} in front")
+
+    if udid:
+        state = load_bootstrap_state(udid)
+        state['known_good'] = state['known_good'] or datetime.now().isoformat(timespec='seconds')
+        state['first_command'][mode] = round(first_command, 2)
+        save_bootstrap_state(udid, state)
+    return package
+
+
+def get_bootstrap_stats():
+    return _bootstrap_stats
+
+
+def reset_bootstrap_stats():
+    _bootstrap_stats.clear()
+
+
+def format_bootstrap_report(udid=None):
+    """Lines with the average time-to-first-command per mode (and the device's last stored times)"""
+    lines = []
+    for mode in BOOTSTRAP_MODES:
+        stats = _bootstrap_stats.get(mode)
+        if not stats:
+            continue
+        line = f"{mode}: {stats['count']} sessions"
+        if stats['count']:
+            line += (f", first command after {stats['first_command'] / stats['count']:.2f}s"
+                     f" (session {stats['session'] / stats['count']:.2f}s),"
+                     f" WhatsApp already in front {stats['attached']}/{stats['count']}")
+        if stats['failed']:
+            line += f", {stats['failed']} failed"
+        lines.append(line)
+    if lines and udid:
+        stored = load_bootstrap_state(udid)['first_command']
+        if len(stored) > 1:
+            lines.append("last per mode on this device: "
+                         + ", ".join(f"{mode} {stored[mode]:.2f}s" for mode in BOOTSTRAP_MODES if mode in stored))
+    return lines
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Session recovery bookkeeping.
+
+Failures are classified as soft (the session works but the UI is somewhere
+unexpected: stale element, wrong screen) or hard (the session or the
+UiAutomator2 server is gone). Soft failures are recovered by navigation,
+hard ones by a new session. Every recovery is timed into a histogram so
+the cost of bad days is visible in the run summary.
+"""
+
+FAILURE_SOFT = "soft"
+FAILURE_HARD = "hard"
+
+# Error text that means the session or the server behind it is gone
+HARD_FAILURE_TERMS = (
+    "session",
+    "connection",
+    "socket",
+    "timeout",
+    "network",
+    "instrumentation",
+    "uiautomator2 server",
+    "crashed"
+)
+
+# Recovery path names in the order they are tried
+RECOVERY_PATHS = ("navigation", "fast_session", "full_session")
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket is open-ended
+RECOVERY_BUCKETS = (1, 2, 5, 10, 20, 40)
+
+_recovery_stats = {}
+
+
+def classify_failure(error=None, session_alive=True):
+    """'hard' if the session is dead or the error names a driver/connection problem, else 'soft'"""
+    if not session_alive:
+        return FAILURE_HARD
+    if error is not None and any(term in str(error).lower() for term in HARD_FAILURE_TERMS):
+        return FAILURE_HARD
+    return FAILURE_SOFT
+
+
+def bucket_label(seconds):
+    """Histogram bucket for a recovery time, e.g. '<2s' or '>=40s'"""
+    for bound in RECOVERY_BUCKETS:
+        if seconds < bound:
+            return f"<{bound}s"
+    return f">={RECOVERY_BUCKETS[-1]}s"
+
+
+def record_recovery(path, seconds, success):
+    """Add one recovery attempt to the stats of its path"""
+    stats = _recovery_stats.setdefault(path, {'count': 0, 'failed': 0, 'total': 0.0, 'buckets': {}})
+    stats['count'] += 1
+    stats['total'] += seconds
+    if not success:
+        stats['failed'] += 1
+    label = bucket_label(seconds)
+    stats['buckets'][label] = stats['buckets'].get(label, 0) + 1
+
+
+def get_recovery_stats():
+    """Recovery stats per path: {'count', 'failed', 'total', 'buckets'}"""
+    return _recovery_stats
+
+
+def reset_recovery_stats():
+    """Forget all recorded recoveries"""
+    _recovery_stats.clear()
+
+
+def format_recovery_histogram():
+    """Summary lines (one per path, buckets in order), empty if nothing was recovered"""
+    labels = [f"<{bound}s" for bound in RECOVERY_BUCKETS] + [f">={RECOVERY_BUCKETS[-1]}s"]
+    lines = []
+    for path in RECOVERY_PATHS:
+        stats = _recovery_stats.get(path)
+        if not stats:
+            continue
+        buckets = ", ".join(f"{label}: {stats['buckets'][label]}" for label in labels if label in stats['buckets'])
+        lines.append(f"{path}: {stats['count']} recoveries ({stats['failed']} failed), "
+                     f"avg {stats['total'] / stats['count']:.2f}s [{buckets}]")
+    return lines
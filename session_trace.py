@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Session trace recorder.
+
+Wraps a driver's execute() (the same hook install_latency_tracking uses) and
+writes every command, its parameters, its response or error and its timing
+to a gzipped JSON-lines trace file. Long strings such as page sources and
+screenshots are stored once per distinct content and referenced by hash;
+long parameters (pushed files, clipboard payloads) are kept as a hash only.
+Scripts also write notes with the inputs a replay needs (chat selection,
+resume state, photo transfers). replay_trace.py re-runs the bot against a trace.
+
+No appium/selenium import here; tracing is a no-op until open_trace() is called.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+
+TRACE_VERSION = 1
+
+# Strings at least this long are stored as blobs (responses) or hashes (parameters)
+BLOB_MIN_LENGTH = 1024
+
+# Key selenium uses for element references in W3C responses
+W3C_ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+_trace = {
+    'file': None,
+    'path': None,
+    'start': None,
+    'commands': 0,
+    'blobs': set()
+}
+
+
+def open_trace(path, script, context=None):
+    """Start writing a trace file; drivers passed to trace_driver() afterwards are recorded"""
+    close_trace()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _trace['file'] = gzip.open(path, 'wt', encoding='utf-8')
+    _trace['path'] = path
+    _trace['start'] = time.time()
+    _trace['commands'] = 0
+    _trace['blobs'] = set()
+    _write({'type': 'header', 'version': TRACE_VERSION, 'script': script, 'started': _trace['start'],
+            'argv': sys.argv[1:], 'context': context or {}})
+    print(f"[TRACE] Recording session to {path}")
+    return path
+
+
+def is_tracing():
+    return _trace['file'] is not None
+
+
+def close_trace():
+    """Finish the trace file; returns the number of commands recorded"""
+    if _trace['file'] is None:
+        return 0
+    count = _trace['commands']
+    try:
+        _write({'type': 'end', 't': _elapsed(), 'commands': count})
+        _trace['file'].close()
+        print(f"[TRACE] {count} commands written to {_trace['path']}")
+    except Exception as e:
+        print(f"[TRACE] Failed to close trace file: {e}")
+    _trace['file'] = None
+    return count
+
+
+def _elapsed():
+    return round(time.time() - _trace['start'], 4)
+
+
+def _write(record):
+    _trace['file'].write(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=_encode_object))
+    _trace['file'].write("\n")
+
+
+def _encode_object(value):
+    """json.dumps fallback for objects that aren't elements or plain data"""
+    return {'__object__': type(value).__name__}
+
+
+def _digest(text):
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _encode(value, store_blobs):
+    """Plain-data copy of a command parameter or response value
+
+    Elements become W3C element references, long strings become blob references
+    (written once) or, for parameters, just their hash and length.
+    """
+    if isinstance(value, dict):
+        return {str(key): _encode(item, store_blobs) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, store_blobs) for item in value]
+    if isinstance(value, str) and len(value) >= BLOB_MIN_LENGTH:
+        digest = _digest(value)
+        if not store_blobs:
+            return {'__sha1__': digest, 'length': len(value)}
+        if digest not in _trace['blobs']:
+            _trace['blobs'].add(digest)
+            _write({'type': 'blob', 'sha1': digest, 'data': value})
+        return {'__blob__': digest}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, 'id') and hasattr(value, 'parent'):
+        return {W3C_ELEMENT_KEY: value.id}
+    return _encode_object(value)
+
+
+def encode_params(params):
+    """Command parameters as they are stored in a trace (used to compare replayed commands)"""
+    return _encode(params, store_blobs=False) if params else None
+
+
+def command_key(command, params):
+    """Command name plus the script for execute_script calls ('w3cExecuteScript mobile: pressKey')"""
+    if isinstance(params, dict) and isinstance(params.get('script'), str):
+        return f"{command} {params['script']}"
+    return command
+
+
+def _record_command(command, params, start, duration, response=None, error=None):
+    record = {'type': 'cmd', 't': round(start - _trace['start'], 4), 'dur': round(duration, 4),
+              'cmd': command, 'params': params}
+    if error is not None:
+        record['error'] = {'class': type(error).__name__,
+                           'message': getattr(error, 'msg', None) or str(error)}
+    elif isinstance(response, dict):
+        record['value'] = _encode(response.get('value'), store_blobs=True)
+    _write(record)
+    _trace['commands'] += 1
+
+
+def trace_driver(driver):
+    """Record every command the driver sends while a trace is open; returns the driver"""
+    if _trace['file'] is None:
+        return driver
+    original_execute = driver.execute
+
+    def traced_execute(driver_command, params=None):
+        if _trace['file'] is None:
+            return original_execute(driver_command, params)
+        # Copy before selenium adds the session id to the caller's dict
+        recorded_params = encode_params(params)
+        start = time.time()
+        try:
+            response = original_execute(driver_command, params)
+        except Exception as e:
+            _record_command(driver_command, recorded_params, start, time.time() - start, error=e)
+            raise
+        _record_command(driver_command, recorded_params, start, time.time() - start, response=response)
+        return response
+
+    driver.execute = traced_execute
+    _write({'type': 'session', 't': _elapsed(), 'session_id': getattr(driver, 'session_id', None),
+            'capabilities': _encode(getattr(driver, 'caps', None) or {}, store_blobs=False)})
+    return driver
+
+
+def trace_note(kind, data=None):
+    """Record script-side context (inputs, decisions) between commands"""
+    if _trace['file'] is None:
+        return
+    _write({'type': 'note', 't': _elapsed(), 'kind': kind, 'data': _encode(data, store_blobs=True)})
+
+
+def read_trace(path):
+    """Load a trace file; returns {'header', 'events', 'blobs', 'complete'}
+
+    A trace cut short by a crash is read up to its last complete line.
+    """
+    header, events, blobs, complete = None, [], {}, False
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        try:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                kind = record.get('type')
+                if kind == 'header':
+                    header = record
+                elif kind == 'blob':
+                    blobs[record['sha1']] = record['data']
+                elif kind == 'end':
+                    complete = True
+                else:
+                    events.append(record)
+        except (EOFError, OSError):
+            pass
+    if header is None:
+        raise ValueError(f"{path} is not a session trace")
+    return {'header': header, 'events': events, 'blobs': blobs, 'complete': complete}
+
+
+def resolve_blobs(value, blobs):
+    """Replace blob references in a recorded value with their content"""
+    if isinstance(value, dict):
+        if '__blob__' in value:
+            return blobs.get(value['__blob__'], '')
+        return {key: resolve_blobs(item, blobs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_blobs(item, blobs) for item in value]
+    return value
+
+
+def get_trace_notes(trace, kind):
+    """Data of every note of one kind, in order"""
+    return [resolve_blobs(event.get('data'), trace['blobs'])
+            for event in trace['events'] if event['type'] == 'note' and event['kind'] == kind]
+
+
+def summarize_trace(trace):
+    """Per-command counts and device time of a trace"""
+    commands = [event for event in trace['events'] if event['type'] == 'cmd']
+    by_command = {}
+    for event in commands:
+        stats = by_command.setdefault(command_key(event['cmd'], event.get('params')),
+                                      {'count': 0, 'seconds': 0.0, 'errors': 0})
+        stats['count'] += 1
+        stats['seconds'] += event['dur']
+        stats['errors'] += 'error' in event
+    last = trace['events'][-1]['t'] if trace['events'] else 0.0
+    return {
+        'script': trace['header'].get('script'),
+        'complete': trace['complete'],
+        'commands': len(commands),
+        'sessions': sum(1 for event in trace['events'] if event['type'] == 'session'),
+        'errors': sum(stats['errors'] for stats in by_command.values()),
+        'device_seconds': sum(event['dur'] for event in commands),
+        'wall_seconds': max(last, commands[-1]['t'] + commands[-1]['dur'] if commands else 0.0),
+        'page_source_bytes': sum(len(data) for data in trace['blobs'].values()),
+        'by_command': by_command
+    }
+
+
+def format_trace_summary(summary, top=12):
+    """Printable per-command table of summarize_trace() output"""
+    lines = [f"[TRACE] {summary['script']}: {summary['commands']} commands in {summary['sessions']} session(s), "
+             f"{summary['errors']} errors, {summary['device_seconds']:.1f}s device time of "
+             f"{summary['wall_seconds']:.1f}s wall time{'' if summary['complete'] else ' (incomplete trace)'}"]
+    ranked = sorted(summary['by_command'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+    for name, stats in ranked[:top]:
+        average_ms = stats['seconds'] / stats['count'] * 1000
+        errors = f", {stats['errors']} errors" if stats['errors'] else ""
+        lines.append(f"   - {name}: {stats['count']} x {average_ms:.0f}ms = {stats['seconds']:.2f}s{errors}")
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Offline test for the adb shell input backend (no device needed; a local sh stands in for adb shell)
+"""
+
+import os
+import tempfile
+
+from replay_trace import ReplayDriver
+from adb_input import (AdbShell, AdbShellError, input_command, install_adb_input, get_input_stats,
+                       reset_input_stats, format_input_latency_report)
+
+
+class _RecordingDriver(ReplayDriver):
+    """Appium driver without a server; keeps the commands that reach it"""
+
+    def __init__(self):
+        super().__init__(None, "recording-session")
+        self.sent = []
+
+    def execute(self, driver_command, params=None):
+        self.sent.append((driver_command, params))
+        return {'value': None}
+
+
+def _commands(call):
+    driver = _RecordingDriver()
+    call(driver)
+    return driver.sent
+
+
+def test_input_commands():
+    """Appium's own tap/swipe/press_keycode payloads map to `input` lines; anything else stays on Appium"""
+    def translated(call):
+        return [input_command(command, params) for command, params in _commands(call)]
+
+    assert translated(lambda d: d.tap([(100, 200)])) == [('tap', "input tap 100 200")]
+    assert translated(lambda d: d.tap([(100, 200)], 800)) == [('swipe', "input swipe 100 200 100 200 800")]
+    assert translated(lambda d: d.swipe(540, 1800, 540, 600, 600)) == [('swipe', "input swipe 540 1800 540 600 600")]
+    assert translated(lambda d: d.press_keycode(4)) == [('keyevent', "input keyevent 4")]
+    # Multi-touch, key modifiers and element commands have no `input` equivalent
+    assert translated(lambda d: d.tap([(10, 20), (30, 40)])) == [None]
+    assert translated(lambda d: d.press_keycode(29, metastate=4096)) == [None]
+    assert input_command('findElement', {'using': 'id', 'value': "com.whatsapp:id/entry"}) is None
+    print("OK input commands")
+
+
+def test_shell_runs_commands_in_one_process():
+    """Lines run in the same shell (state persists), failures and exits are reported"""
+    shell = AdbShell(argv=['sh']).start()
+    try:
+        shell.run("COUNT=41")
+        assert shell.run("echo $((COUNT + 1))") == "42\n"
+        try:
+            shell.run("false")
+            assert False, "non-zero exit must raise"
+        except AdbShellError as e:
+            assert "exited with 1" in str(e) and not e.may_have_run
+        try:
+            shell.run("sleep 2", timeout=0.2)
+            assert False, "timeout must raise"
+        except AdbShellError as e:
+            assert "did not finish" in str(e) and e.may_have_run
+        assert not shell.is_alive()
+    finally:
+        shell.close()
+    print("OK shell runs commands in one process")
+
+
+def test_driver_input_through_shell():
+    """Taps, swipes and keys go to the shell, element commands to Appium; a dead shell falls back"""
+    reset_input_stats()
+    with tempfile.TemporaryDirectory() as scratch:
+        log_path = os.path.join(scratch, "input.log")
+        shell = AdbShell(argv=['sh']).start()
+        shell.run(f"input() {{ echo \"$*\" >> {log_path}; }}")
+        driver = install_adb_input(_RecordingDriver(), shell=shell)
+
+        driver.tap([(540, 300)])
+        driver.press_keycode(4)
+        driver.swipe(540, 1800, 540, 600, 600)
+        driver.find_elements('id', "com.whatsapp:id/entry")
+        with open(log_path) as file:
+            assert file.read().splitlines() == ["tap 540 300", "keyevent 4", "swipe 540 1800 540 600 600"]
+        assert [command for command, _ in driver.sent] == ['findElements']
+
+        shell.close()
+        driver.tap([(540, 300)])
+        driver.tap([(540, 400)])
+    assert [command for command, _ in driver.sent] == ['findElements', 'actions', 'actions']
+    stats = get_input_stats()
+    assert stats['adb']['tap']['count'] == 1 and stats['appium']['tap']['count'] == 2 and stats['fallbacks'] == 1
+    report = "\n".join(format_input_latency_report())
+    assert "tap: adb 1 x" in report and "appium 2 x" in report and "1 adb input failures" in report
+    print("OK driver input through shell")
+
+
+def test_unconfirmed_input_not_resent():
+    """A line that may have run is raised, not sent again through Appium; later input uses Appium"""
+    reset_input_stats()
+
+    class _HungShell:
+        def run(self, command, timeout=None):
+            raise AdbShellError(f"'{command}' did not finish within 5.0s", may_have_run=True)
+
+        def close(self):
+            pass
+
+    driver = install_adb_input(_RecordingDriver(), shell=_HungShell())
+    try:
+        driver.press_keycode(4)
+        assert False, "an unconfirmed key press must raise"
+    except AdbShellError as e:
+        assert e.may_have_run
+    assert driver.sent == []
+
+    driver.press_keycode(4)
+    assert [command for command, _ in driver.sent] == ['w3cExecuteScript']
+    stats = get_input_stats()
+    assert stats['unconfirmed'] == 1 and stats['fallbacks'] == 0 and stats['appium']['keyevent']['count'] == 1
+    assert "1 adb input actions were not confirmed" in "\n".join(format_input_latency_report())
+    print("OK unconfirmed input not resent")
+
+
+if __name__ == "__main__":
+    test_input_commands()
+    test_shell_runs_commands_in_one_process()
+    test_driver_input_through_shell()
+    test_unconfirmed_input_not_resent()
+    print("\nOK All tests passed!")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Offline test for coordinate calibration from hierarchy snapshots (no device needed)
+"""
+
+from ui_snapshot import parse_hierarchy
+from calibration import coordinates_from_snapshot, check_config_against_snapshot, find_first_thumbnail
+
+
+def _node(cls, rid="", bounds="[0,0][0,0]", text="", desc=""):
+    return (f'<{cls} class="{cls}" resource-id="{rid}" text="{text}" content-desc="{desc}" '
+            f'displayed="true" bounds="{bounds}" />')
+
+
+def _hierarchy(*children):
+    return ('<hierarchy index="0" class="hierarchy" width="1080" height="2400">'
+            '<android.widget.FrameLayout class="android.widget.FrameLayout" displayed="true" bounds="[0,0][1080,2400]">'
+            + "".join(children)
+            + '</android.widget.FrameLayout></hierarchy>')
+
+
+PREVIEW = parse_hierarchy(_hierarchy(
+    _node("android.widget.EditText", "com.whatsapp:id/caption", "[40,2250][900,2350]"),
+    _node("android.widget.ImageButton", "com.whatsapp:id/send", "[940,2240][1060,2360]", desc="Send"),
+))
+
+GALLERY = parse_hierarchy(_hierarchy(
+    _node("android.widget.ImageView", "", "[0,0][1080,200]"),          # toolbar banner, not a thumbnail
+    _node("android.widget.ImageView", "", "[360,1200][720,1560]"),
+    _node("android.widget.ImageView", "", "[0,1200][360,1560]"),
+    _node("android.widget.ImageView", "", "[0,1560][360,1920]"),
+))
+
+
+def test_coordinates_from_snapshots():
+    """Element centers become profile coordinates"""
+    assert coordinates_from_snapshot('preview', PREVIEW, 1080) == {
+        'caption_area_x_offset': -70, 'caption_area_y': 2300, 'send_button_x': 1000, 'send_button_y': 2300}
+    assert coordinates_from_snapshot('gallery', GALLERY, 1080) == {'photo_select_x': 180, 'photo_select_y': 1380}
+    assert find_first_thumbnail(parse_hierarchy(_hierarchy()), 1080) is None
+
+    chat_list = parse_hierarchy(_hierarchy(
+        _node("android.widget.TextView", "com.whatsapp:id/menuitem_search", "[900,120][1000,220]")))
+    assert coordinates_from_snapshot('chat_list', chat_list, 1080) == {'search_button_x': 950, 'search_button_y': 170}
+    print("OK coordinates from snapshots")
+
+
+def test_check_config():
+    """Tap points outside their element are reported; absent elements are not checked"""
+    config = {'caption_area_x_offset': 0, 'caption_area_y': 2330, 'send_button_x': 990, 'send_button_y': 2310,
+              'photo_select_x': 180, 'photo_select_y': 400}
+    assert check_config_against_snapshot(config, 'preview', PREVIEW, 1080) == []
+
+    off = dict(config, send_button_y=1533)
+    assert check_config_against_snapshot(off, 'preview', PREVIEW, 1080) == ['send_button_x', 'send_button_y']
+    assert check_config_against_snapshot(config, 'gallery', GALLERY, 1080) == ['photo_select_x', 'photo_select_y']
+    assert check_config_against_snapshot(config, 'preview', parse_hierarchy(_hierarchy()), 1080) is None
+    print("OK check config")
+
+
+if __name__ == "__main__":
+    test_coordinates_from_snapshots()
+    test_check_config()
+    print("\nOK All tests passed!")
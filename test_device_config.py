@@ -4,7 +4,8 @@ Quick test script to verify device configuration system
 """
 
 # Import the device config system
-from whatsapp import DEVICE_CONFIGS, select_device_config, get_device_config
+from device_configs import DEVICE_CONFIGS, DEFAULT_DEVICE_CONFIG_NAME, select_device_config, get_device_config
+from chat_plan import parse_row_spec, build_row_selection
 
 def test_device_configs():
     """Test that all device configs have required keys"""
@@ -61,7 +62,25 @@ def test_get_device_config():
 
     print("="*60)
 
+def test_row_selection_arguments():
+    """--rows specs select the same entries as the interactive menu options"""
+    assert DEFAULT_DEVICE_CONFIG_NAME in DEVICE_CONFIGS
+
+    analysis = {'total': 10, 'entries': [(row, f"chat{row}") for row in range(1, 11)]}
+    assert len(build_row_selection(analysis, parse_row_spec("all"))['entries']) == 10
+    assert build_row_selection(analysis, parse_row_spec("4-"))['entries'][0] == (4, "chat4")
+    assert [row for row, _ in build_row_selection(analysis, parse_row_spec("3-5"))['entries']] == [3, 4, 5]
+    assert len(build_row_selection(analysis, parse_row_spec("2"))['entries']) == 2
+    assert build_row_selection(analysis, parse_row_spec("11-")) is None
+    try:
+        parse_row_spec("5-3")
+        assert False, "reversed range accepted"
+    except ValueError:
+        pass
+    print("OK row selection arguments")
+
 if __name__ == "__main__":
     test_device_configs()
     test_get_device_config()
+    test_row_selection_arguments()
     print("\nOK All tests passed!")
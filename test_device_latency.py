@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Offline test for the device latency estimator (no device needed)
+"""
+
+import time
+
+from device_latency import (install_latency_tracking, compute_adaptive_delay, get_screen_size,
+                            get_latency_stats, reset_latency_stats, record_command_latency)
+
+
+class _SlowDriver:
+    """Minimal stand-in with the execute() hook the estimator wraps"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.session_id = "session-1"
+        self.window_size_calls = 0
+
+    def execute(self, driver_command, params=None):
+        time.sleep(self.delay)
+        return {'value': None}
+
+    def get_window_size(self):
+        self.window_size_calls += 1
+        return {'width': 1080, 'height': 2400}
+
+
+def test_delay_follows_observed_latency():
+    """Delays use the EWMA of commands already sent, with the old probe thresholds"""
+    reset_latency_stats()
+    assert compute_adaptive_delay(1.0, 5.0) == (1.0, 'unknown')
+
+    driver = install_latency_tracking(_SlowDriver(0.01))
+    for _ in range(3):
+        driver.execute('findElement', {})
+    driver.execute('getPageSource')  # excluded: payload-sized, not a responsiveness sample
+    assert get_latency_stats()['samples'] == 3
+    assert compute_adaptive_delay(1.0, 5.0) == (0.7, 'fast')
+
+    for _ in range(30):
+        record_command_latency(0.8)
+    assert compute_adaptive_delay(1.0, 1.2) == (1.2, 'slow')
+    print("OK delay follows latency")
+
+
+def test_screen_size_cached_per_session():
+    """The window size is fetched once per session"""
+    reset_latency_stats()
+    driver = _SlowDriver(0)
+    assert get_screen_size(driver)['height'] == 2400
+    get_screen_size(driver)
+    assert driver.window_size_calls == 1
+
+    driver.session_id = "session-2"
+    get_screen_size(driver)
+    assert driver.window_size_calls == 2
+    print("OK screen size cache")
+
+
+if __name__ == "__main__":
+    test_delay_follows_observed_latency()
+    test_screen_size_cached_per_session()
+    print("\nOK All tests passed!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Offline test for putting the daily photo on the device (no device needed; adb is simulated)
+"""
+
+import os
+import tempfile
+
+import whatsapp
+from photo_prep import compute_file_hash
+
+
+class _FakeAdbShell:
+    """Files and adb shell commands of a phone, standing in for whatsapp.run_adb_shell"""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})     # device path -> sha256
+        self.commands = []
+
+    def __call__(self, args, udid=None, timeout=15):
+        self.commands.append(list(args))
+        if args[0] == 'sha256sum':
+            return f"{self.files[args[1]]}  {args[1]}\n" if args[1] in self.files else None
+        if args[0] == 'ls':
+            return "\n".join(os.path.basename(path) for path in self.files) + "\n"
+        if args[0] == 'rm':
+            self.files.pop(args[-1], None)
+        return ""
+
+
+def test_reused_photo_made_newest_in_gallery():
+    """A photo already on the device isn't pushed again, but gets a new mtime and media scan"""
+    original_shell, original_stream = whatsapp.run_adb_shell, whatsapp.stream_photo_to_device
+    original_transfer = dict(whatsapp._last_transfer)
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, "daily.jpg")
+        with open(photo, 'wb') as file:
+            file.write(b"\xff\xd8" + os.urandom(2048))
+        file_hash = compute_file_hash(photo)
+        device_path = whatsapp.device_photo_path_for(file_hash, ".jpg")
+        shell = _FakeAdbShell({device_path: file_hash})
+
+        def no_stream(*args, **kwargs):
+            raise AssertionError("a reused photo must not be transferred")
+
+        whatsapp.run_adb_shell, whatsapp.stream_photo_to_device = shell, no_stream
+        try:
+            assert whatsapp.transfer_photo_to_device(None, photo) == device_path
+            # The run summary reports the skipped transfer
+            assert whatsapp._last_transfer['reused']
+        finally:
+            whatsapp.run_adb_shell, whatsapp.stream_photo_to_device = original_shell, original_stream
+            whatsapp._last_transfer.update(original_transfer)
+
+    commands = [command[0] for command in shell.commands]
+    assert ['touch', device_path] in shell.commands
+    # mtime first, then a rescan; the MediaStore row isn't deleted (that would delete the file too)
+    assert commands.index('touch') < commands.index('am') and 'content' not in commands
+    assert device_path in shell.files
+    assert shell.commands[commands.index('am')][-1] == f"file://{device_path}"
+    print("OK reused photo made newest in gallery")
+
+
+def test_broken_stream_removes_part_file():
+    """A stream that breaks off midway doesn't leave its .part file on the device"""
+
+    class _BrokenPipe:
+        def write(self, data):
+            raise BrokenPipeError("adb went away")
+
+    class _BrokenProcess:
+        def __init__(self, *args, **kwargs):
+            self.stdin = _BrokenPipe()
+
+        def kill(self):
+            pass
+
+    device_path = whatsapp.device_photo_path_for("0" * 64, ".jpg")
+    shell = _FakeAdbShell({f"{device_path}.part": "partial"})
+    original_shell, original_popen = whatsapp.run_adb_shell, whatsapp.subprocess.Popen
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, "daily.jpg")
+        with open(photo, 'wb') as file:
+            file.write(os.urandom(4096))
+        whatsapp.run_adb_shell, whatsapp.subprocess.Popen = shell, _BrokenProcess
+        try:
+            assert whatsapp.stream_photo_to_device(photo, device_path, udid="serial") is False
+        finally:
+            whatsapp.run_adb_shell, whatsapp.subprocess.Popen = original_shell, original_popen
+
+    assert shell.commands == [['rm', '-f', f"{device_path}.part"]]
+    assert not shell.files
+    print("OK broken stream removes part file")
+
+
+if __name__ == "__main__":
+    test_reused_photo_made_newest_in_gallery()
+    test_broken_stream_removes_part_file()
+    print("\nOK All tests passed!")
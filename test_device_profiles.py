@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Offline test for the device profile cache (no device needed)
+"""
+
+import os
+import tempfile
+
+import whatsapp
+from device_configs import DEFAULT_DEVICE_CONFIG_NAME
+from device_profiles import (lookup_device_profile, remember_device_profile, load_calibrated_profile,
+                             save_calibrated_profile)
+
+
+def test_profile_cache_round_trip():
+    """Profiles are remembered per model and resolution"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "txt", "device_profiles.json")
+        assert lookup_device_profile("Redmi_9A", "720x1600", path) is None
+
+        remember_device_profile("Redmi_9A", "720x1600", "Redmi 9A", path)
+        assert lookup_device_profile("Redmi_9A", "720x1600", path) == "Redmi 9A"
+        # Same model with a different (override) resolution is a different profile
+        assert lookup_device_profile("Redmi_9A", "1080x2400", path) is None
+
+        # Calibrated coordinates are per WhatsApp version and don't replace the name entry
+        save_calibrated_profile("Redmi_9A", "720x1600", "2.25.1.1", {'send_button_x': 650}, path)
+        assert load_calibrated_profile("Redmi_9A", "720x1600", "2.25.1.1", path) == {'send_button_x': 650}
+        assert load_calibrated_profile("Redmi_9A", "720x1600", "2.25.2.0", path) is None
+        assert lookup_device_profile("Redmi_9A", "720x1600", path) == "Redmi 9A"
+
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("{not json")
+        assert lookup_device_profile("Redmi_9A", "720x1600", path) is None
+    print("OK profile cache")
+
+
+
+def test_unattended_default_not_remembered():
+    """An unknown device gets the default profile in unattended mode, but the guess isn't cached"""
+    names = ('get_device_model', 'get_screen_resolution', 'load_calibrated_profile', 'lookup_device_profile',
+             'remember_device_profile', 'NON_INTERACTIVE')
+    originals = {name: getattr(whatsapp, name) for name in names}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "device_profiles.json")
+        whatsapp.get_device_model = lambda udid: "Unknown_Phone_X"
+        whatsapp.get_screen_resolution = lambda udid: "1080x2400"
+        whatsapp.load_calibrated_profile = lambda model, resolution, version: None
+        whatsapp.lookup_device_profile = lambda model, resolution: lookup_device_profile(model, resolution, path)
+        whatsapp.remember_device_profile = lambda model, resolution, name: remember_device_profile(
+            model, resolution, name, path)
+        whatsapp.NON_INTERACTIVE = True
+        try:
+            assert whatsapp.resolve_device_config("serial") is not None
+            assert whatsapp.get_device_config_name() == DEFAULT_DEVICE_CONFIG_NAME
+            assert lookup_device_profile("Unknown_Phone_X", "1080x2400", path) is None
+        finally:
+            for name, value in originals.items():
+                setattr(whatsapp, name, value)
+    print("OK unattended default not remembered")
+
+if __name__ == "__main__":
+    test_profile_cache_round_trip()
+    test_unattended_default_not_remembered()
+    print("\nOK All tests passed!")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Offline test for the driver registry and the appium-free modules (no device needed)
+"""
+
+import gc
+
+from driver_registry import register_driver, get_registered_drivers, quit_registered_drivers
+from bench_startup import measure_import
+
+
+class FakeDriver:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+        if self.fail:
+            raise RuntimeError("session already gone")
+
+
+def test_quit_registered_drivers():
+    """Every registered driver is quit once, even if another one raises"""
+    broken, healthy = FakeDriver(fail=True), FakeDriver()
+    register_driver(broken)
+    register_driver(healthy)
+    assert quit_registered_drivers() == 1
+    assert (broken.quit_calls, healthy.quit_calls) == (1, 1)
+    assert get_registered_drivers() == []
+    assert quit_registered_drivers() == 0
+    print("OK quit registered drivers")
+
+
+def test_dropped_driver_leaves_registry():
+    """Drivers are held weakly"""
+    register_driver(FakeDriver())
+    gc.collect()
+    assert get_registered_drivers() == []
+    print("OK weak references")
+
+
+def test_light_modules_skip_appium():
+    """Config, planning and log modules import without appium/selenium"""
+    for module in ("device_configs", "adb_tools", "run_logs", "chat_plan", "whatsapp_fleet"):
+        result = measure_import(module)
+        assert result is not None, module
+        assert result[1] == [], (module, result[1])
+    print("OK light modules")
+
+
+if __name__ == "__main__":
+    test_quit_registered_drivers()
+    test_dropped_driver_leaves_registry()
+    test_light_modules_skip_appium()
+    print("\nOK All tests passed!")
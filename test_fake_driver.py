@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Offline test for the fake WhatsApp driver (no device needed)
+"""
+
+import os
+import tempfile
+import time
+
+import device_profiles
+import whatsapp
+from fake_driver import (FakeWhatsAppDriver, WebDriverException, NoSuchElementException, hierarchy_to_xml,
+                         SEARCH_FIELD_ID, ATTACH_ID, SCREEN_SEARCH, SCREEN_CONVERSATION, SCREEN_PREVIEW)
+from device_configs import DEVICE_CONFIGS, DEFAULT_DEVICE_CONFIG_NAME, get_device_config, set_device_config
+from calibration import check_config_against_snapshot
+from selector_cache import load_selector_cache, order_selectors, get_selector_table, selector_key
+from ui_snapshot import (parse_hierarchy, classify_search_results, node_center, find_sent_message,
+                         SEARCH_SINGLE_HIT, SEARCH_NO_RESULTS, SEARCH_MESSAGES_ONLY)
+
+NO_LATENCY = {'default': 0, 'getPageSource': 0, 'pushFile': 0}
+CONFIG = DEVICE_CONFIGS[DEFAULT_DEVICE_CONFIG_NAME]
+
+
+def _search(driver, query):
+    driver.find_element('id', SEARCH_FIELD_ID).send_keys(query)
+    time.sleep(driver.search_delay + 0.01)
+    return classify_search_results(parse_hierarchy(driver.page_source), query)
+
+
+def test_search_and_send_text():
+    """Search by tap coordinates, open the hit, paste and send"""
+    driver = FakeWhatsAppDriver(contacts=["NepalWin🇳🇵Niresh9090", "Ramesh"], latency=NO_LATENCY,
+                                search_delay=0.02)
+    driver.tap([(CONFIG['search_button_x'], CONFIG['search_button_y'])])
+    assert driver.screen == SCREEN_SEARCH and driver.is_keyboard_shown()
+
+    result = _search(driver, "Niresh9090")
+    assert result['state'] == SEARCH_SINGLE_HIT
+    driver.tap([node_center(result['match'])])
+    assert driver.screen == SCREEN_CONVERSATION and driver.open_chat == "NepalWin🇳🇵Niresh9090"
+
+    driver.find_element('id', "com.whatsapp:id/entry").click()
+    driver.set_clipboard_text("Good morning")
+    driver.press_keycode(279)
+    assert driver.switch_to.active_element.text == "Good morning"
+    driver.find_element('xpath', "//android.widget.ImageButton[contains(@resource-id, 'send')]").click()
+    assert find_sent_message(parse_hierarchy(driver.page_source), "Good morning") is not None
+
+    # Back returns to the search results with the query still typed
+    driver.press_keycode(4)
+    assert driver.screen == SCREEN_SEARCH
+    assert driver.find_elements('id', SEARCH_FIELD_ID)[0].text == "Niresh9090"
+    print("OK search and send text")
+
+
+def test_reused_search_never_opens_old_row():
+    """The previous query's row stays on screen past any grace period and is still not opened"""
+    driver = FakeWhatsAppDriver(contacts=["Ramesh", "Sita"], latency=NO_LATENCY, search_delay=2.0)
+    driver.tap([(CONFIG['search_button_x'], CONFIG['search_button_y'])])
+    assert _search(driver, "Ramesh")['state'] == SEARCH_SINGLE_HIT
+
+    driver.find_element('id', SEARCH_FIELD_ID).send_keys("Sita")
+    start = time.time()
+    assert whatsapp.wait_for_search_result_snapshot(driver, "Sita", start, require_name_match=True)
+    assert driver.open_chat == "Sita"
+    assert time.time() - start >= 1.9
+    print("OK reused search never opens old row")
+
+
+def test_missing_chats():
+    """Unknown names show 'No results', message-only names a 'Messages' section"""
+    driver = FakeWhatsAppDriver(contacts=["Ramesh"], message_only_names=["Ghost"], latency=NO_LATENCY,
+                                search_delay=0)
+    driver.tap([(CONFIG['search_button_x'], CONFIG['search_button_y'])])
+    assert _search(driver, "Nobody")['state'] == SEARCH_NO_RESULTS
+    assert _search(driver, "ghost")['state'] == SEARCH_MESSAGES_ONLY
+    try:
+        driver.find_element('id', "com.whatsapp:id/entry")
+        assert False, "entry field is not on the search screen"
+    except NoSuchElementException:
+        pass
+    print("OK missing chats")
+
+
+def test_photo_flow_matches_default_profile():
+    """The default profile's gallery, caption and send coordinates hit their elements"""
+    driver = FakeWhatsAppDriver(contacts=["Ramesh"], latency=NO_LATENCY, search_delay=0)
+    driver.tap([(CONFIG['search_button_x'], CONFIG['search_button_y'])])
+    driver.tap([node_center(_search(driver, "Ramesh")['match'])])
+    driver.find_element('id', ATTACH_ID).click()
+    driver.find_element('xpath', "//*[@text='Gallery']").click()
+    assert check_config_against_snapshot(CONFIG, 'gallery', parse_hierarchy(driver.page_source), 1080) == []
+
+    driver.tap([(CONFIG['photo_select_x'], CONFIG['photo_select_y'])])
+    assert driver.screen == SCREEN_PREVIEW
+    assert check_config_against_snapshot(CONFIG, 'preview', parse_hierarchy(driver.page_source), 1080) == []
+    driver.tap([(540 + CONFIG['caption_area_x_offset'], CONFIG['caption_area_y'])])
+    driver.execute_script("mobile: type", {"text": "caption"})
+    driver.tap([(CONFIG['send_button_x'], CONFIG['send_button_y'])])
+    assert driver.screen == SCREEN_CONVERSATION
+    assert driver.messages == {"Ramesh": ["caption"]}
+    print("OK photo flow")
+
+
+def test_live_correction_not_saved():
+    """Off coordinates found during a run are corrected in memory only, never written to the cache"""
+    driver = FakeWhatsAppDriver(contacts=["Ramesh"], latency=NO_LATENCY)
+    driver.tap([(CONFIG['search_button_x'], CONFIG['search_button_y'])])
+    driver.tap([node_center(_search(driver, "Ramesh")['match'])])
+    driver.find_element('id', ATTACH_ID).click()
+    driver.find_element('xpath', "//*[@text='Gallery']").click()
+    driver.tap([(CONFIG['photo_select_x'], CONFIG['photo_select_y'])])
+    assert driver.screen == SCREEN_PREVIEW
+
+    def no_write(*args, **kwargs):
+        raise AssertionError("a live correction must not be saved")
+
+    original_write, original_identity = device_profiles._write_entry, whatsapp.DEVICE_IDENTITY
+    original_log = whatsapp.log_script_event
+    device_profiles._write_entry = no_write
+    whatsapp.log_script_event = lambda event_type, message="": None
+    whatsapp.DEVICE_IDENTITY = {'model': "Redmi_9A", 'resolution': "1080x2400", 'version': "2.25.1.1"}
+    set_device_config(dict(CONFIG, send_button_x=CONFIG['send_button_x'] - 400), DEFAULT_DEVICE_CONFIG_NAME)
+    try:
+        whatsapp.validate_device_config(driver, 'preview')
+        assert get_device_config()['send_button_x'] == CONFIG['send_button_x']
+    finally:
+        device_profiles._write_entry, whatsapp.DEVICE_IDENTITY = original_write, original_identity
+        whatsapp.log_script_event = original_log
+        whatsapp._validated_screens.discard('preview')
+        set_device_config(CONFIG, DEFAULT_DEVICE_CONFIG_NAME)
+    print("OK live correction not saved")
+
+
+def test_fallback_list_waits_once():
+    """A missing element costs one timeout for the whole list; a hit demotes the selectors that missed before it"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.json")
+        load_selector_cache("da2a3288", "2.25.1", path=path)
+        driver = FakeWhatsAppDriver(contacts=["Ramesh"], latency={'default': 0, 'getPageSource': 0, 'pushFile': 0})
+        attach_selectors = [
+            ("id", "com.whatsapp:id/input_attach_button"),
+            ("xpath", "//*[@resource-id='com.whatsapp:id/input_attach_button']"),
+            ("xpath", "//android.widget.ImageButton[@content-desc='Attach']"),
+        ]
+        start = time.time()
+        assert whatsapp.find_with_selector_cache(driver, 'attach_button', attach_selectors, timeout=0.6,
+                                                 poll_frequency=0.1) is None
+        assert time.time() - start < 1.2
+        assert not os.path.exists(path)
+        assert order_selectors('attach_button', attach_selectors) == attach_selectors
+
+        search = [("id", "com.whatsapp:id/missing"), ("id", "com.whatsapp:id/menuitem_search")]
+        assert whatsapp.find_with_selector_cache(driver, 'search_button', search, timeout=1) is not None
+        assert order_selectors('search_button', search) == [search[1], search[0]]
+        assert get_selector_table()['search_button'] == {'winner': selector_key(search[1]),
+                                                         'demoted': [selector_key(search[0])]}
+        # Later tests in this process must not write into the removed directory
+        load_selector_cache(None, None)
+    print("OK fallback list waits once")
+
+
+def test_latency_failures_and_new_session():
+    """Commands are delayed and counted, injected failures raise, a dead session can be replaced"""
+    driver = FakeWhatsAppDriver(contacts=["Ramesh"], latency={'default': 0.01}, kill_after=3,
+                                failure_rate={'isKeyboardShown': 1.0})
+    start = time.time()
+    driver.get_window_size()
+    assert time.time() - start >= 0.01
+    try:
+        driver.is_keyboard_shown()
+        assert False, "failure was not injected"
+    except WebDriverException as e:
+        assert "socket" in str(e)
+
+    driver.get_window_size()
+    try:
+        driver.get_window_size()
+        assert False, "session should be dead"
+    except WebDriverException as e:
+        assert "session" in str(e)
+
+    session = driver.new_session()
+    assert session.session_id != driver.session_id
+    assert session.get_window_size()['width'] == 1080
+    stats = session.get_command_stats()
+    assert stats['commands'] == 5 and stats['failures'] == 2
+    assert stats['by_command']['getWindowRect']['count'] == 4
+    print("OK latency, failures and new session")
+
+
+def test_recorded_screen():
+    """A recorded chat list is served instead of the built-in one"""
+    recorded = FakeWhatsAppDriver(contacts=["Recorded Chat"], latency=NO_LATENCY)
+    xml = hierarchy_to_xml(recorded._current_tree())
+    driver = FakeWhatsAppDriver(contacts=[], latency=NO_LATENCY, recorded_screens={'chat_list': xml})
+    assert "Recorded Chat" in driver.page_source
+    driver.tap([(CONFIG['search_button_x'], CONFIG['search_button_y'])])
+    assert driver.screen == SCREEN_SEARCH
+    print("OK recorded screen")
+
+
+if __name__ == "__main__":
+    test_search_and_send_text()
+    test_reused_search_never_opens_old_row()
+    test_missing_chats()
+    test_photo_flow_matches_default_profile()
+    test_live_correction_not_saved()
+    test_fallback_list_waits_once()
+    test_latency_failures_and_new_session()
+    test_recorded_screen()
+    print("\nOK All tests passed!")
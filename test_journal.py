@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Offline test for the background journal writer (no device needed)
+"""
+
+import os
+import tempfile
+
+import journal
+from journal import journal_append, journal_flush, journal_close, get_journal_stats
+
+
+def test_flush_writes_everything_queued():
+    """journal_flush returns only after earlier records are on disk, batched per file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        processed = os.path.join(tmp, "txt", "processed.txt")
+        events = os.path.join(tmp, "txt", "events.txt")
+        before = get_journal_stats()['written']
+
+        for row in range(1, 4):
+            journal_append(processed, f"Row{row}: chat{row}\n")
+        journal_append(events, "[time] START: run\n")
+        assert journal_flush()
+
+        with open(processed, encoding='utf-8') as file:
+            assert file.read() == "Row1: chat1\nRow2: chat2\nRow3: chat3\n"
+        with open(events, encoding='utf-8') as file:
+            assert file.read() == "[time] START: run\n"
+        assert get_journal_stats()['written'] == before + 4
+        journal_close()
+    print("OK flush")
+
+
+def test_close_drains_queue():
+    """Records queued right before shutdown are still written"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "not_found.txt")
+        journal_append(path, "a\n")
+        journal_append(path, "b\n")
+        journal_close()
+        with open(path, encoding='utf-8') as file:
+            assert file.read() == "a\nb\n"
+    print("OK close drains")
+
+
+def test_flush_restarts_stopped_writer():
+    """Records still queued when the writer stopped are written by the next flush"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "processed.txt")
+        journal_close()
+        journal._journal_queue.put((path, "Row7: late\n"))
+        assert journal_flush()
+        with open(path, encoding='utf-8') as file:
+            assert file.read() == "Row7: late\n"
+        journal_close()
+    print("OK flush restarts stopped writer")
+
+
+if __name__ == "__main__":
+    test_flush_writes_everything_queued()
+    test_close_drains_queue()
+    test_flush_restarts_stopped_writer()
+    print("\nOK All tests passed!")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Offline test for the shared JSON files (no device needed; worker processes are local Pythons)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import json_store
+from json_store import JsonStoreError, file_lock, update_json_file
+from device_profiles import save_bootstrap_state, load_bootstrap_state, remember_device_profile, lookup_device_profile
+
+WORKERS = 6
+SAVES_PER_WORKER = 15
+
+_WORKER = """
+import sys
+from device_profiles import save_bootstrap_state
+path, worker, saves = sys.argv[1], sys.argv[2], int(sys.argv[3])
+for count in range(saves):
+    save_bootstrap_state(f"serial-{worker}", {'known_good': "yes", 'first_command': {'fast': count}}, path)
+"""
+
+
+def test_concurrent_saves_keep_every_entry():
+    """Workers saving at the same moment neither drop each other's entries nor the existing ones"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "device_profiles.json")
+        remember_device_profile("Redmi_9A", "720x1600", "redmi_9a", path)
+        here = os.path.dirname(os.path.abspath(__file__))
+        workers = [subprocess.Popen([sys.executable, "-c", _WORKER, path, str(worker), str(SAVES_PER_WORKER)],
+                                    cwd=here) for worker in range(WORKERS)]
+        assert all(worker.wait(timeout=60) == 0 for worker in workers)
+
+        assert lookup_device_profile("Redmi_9A", "720x1600", path) == "redmi_9a"
+        for worker in range(WORKERS):
+            assert load_bootstrap_state(f"serial-{worker}", path)['first_command'] == {'fast': SAVES_PER_WORKER - 1}
+        assert sorted(os.listdir(tmp)) == ["device_profiles.json"]
+    print("OK concurrent saves keep every entry")
+
+
+def test_unreadable_file_not_overwritten():
+    """A file that can't be parsed is kept, and a held lock makes the save fail instead of waiting forever"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "device_profiles.json")
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"Redmi_9A|720x1600": {"profile": "redmi')
+        try:
+            update_json_file(path, lambda data: data.update(extra=1))
+            assert False, "a broken file must not be replaced"
+        except JsonStoreError:
+            pass
+        save_bootstrap_state("serial", {'known_good': "yes"}, path)
+        with open(path, encoding='utf-8') as file:
+            assert file.read().endswith('"redmi')
+
+        os.remove(path)
+        original_timeout, json_store.LOCK_TIMEOUT = json_store.LOCK_TIMEOUT, 0.2
+        try:
+            with file_lock(path):
+                try:
+                    update_json_file(path, lambda data: None)
+                    assert False, "a held lock must time out"
+                except JsonStoreError:
+                    pass
+        finally:
+            json_store.LOCK_TIMEOUT = original_timeout
+        update_json_file(path, lambda data: data.update(ok=True))
+        with open(path, encoding='utf-8') as file:
+            assert json.load(file) == {'ok': True}
+    print("OK unreadable file not overwritten")
+
+
+if __name__ == "__main__":
+    test_concurrent_saves_keep_every_entry()
+    test_unreadable_file_not_overwritten()
+    print("\nOK All tests passed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Offline test for the native selector compiler (no device needed)
+"""
+
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException
+
+from fake_driver import FakeWhatsAppDriver
+from native_selectors import (compile_selector, install_native_selectors, get_native_selector_stats,
+                              reset_native_selector_stats, format_native_selector_stats)
+from bench_selectors import collect_xpath_selectors, fake_dumps, _xpath_lookup, _node_keys
+from ui_snapshot import parse_hierarchy, find_by_selector
+
+NO_LATENCY = {'default': 0, 'getPageSource': 0, 'pushFile': 0}
+
+
+def test_compile_selector():
+    """Single id/desc become id/accessibility id, other simple forms UiSelector, the rest stays XPath"""
+    cases = [
+        ("//*[@resource-id='com.whatsapp:id/entry']", False, ('id', "com.whatsapp:id/entry")),
+        ("//*[@content-desc='Search']", False, ('accessibility id', "Search")),
+        ("//android.widget.TextView[@text='Groups']", False,
+         ('-android uiautomator', 'new UiSelector().className("android.widget.TextView").text("Groups")')),
+        ("//*[contains(@text, 'No results')]", False, ('-android uiautomator', 'new UiSelector().textContains("No results")')),
+        ("//android.widget.ImageButton[contains(@resource-id, 'send')]", False,
+         ('-android uiautomator', 'new UiSelector().className("android.widget.ImageButton").resourceIdMatches(".*send.*")')),
+        (".//android.widget.TextView", True, ('-android uiautomator', 'new UiSelector().className("android.widget.TextView")')),
+        # Everything, an absolute path from an element, regex syntax in a contains() and unparseable forms
+        ("//*", False, ('xpath', "//*")),
+        ("//*[@text='Chats']", True, ('xpath', "//*[@text='Chats']")),
+        ("//*[contains(@resource-id, 'a.b')]", False, ('xpath', "//*[contains(@resource-id, 'a.b')]")),
+        ("//android.widget.LinearLayout/android.widget.TextView", False,
+         ('xpath', "//android.widget.LinearLayout/android.widget.TextView")),
+        # The same UiSelector method twice keeps only the last value on the device
+        ("//*[contains(@content-desc, 'Groups filter') and contains(@content-desc, 'unselected')]", False,
+         ('xpath', "//*[contains(@content-desc, 'Groups filter') and contains(@content-desc, 'unselected')]")),
+        ("//*[@text='Chats' and @text='Groups']", False, ('xpath', "//*[@text='Chats' and @text='Groups']")),
+    ]
+    for xpath, scoped, expected in cases:
+        assert compile_selector('xpath', xpath, scoped=scoped) == expected, (xpath, compile_selector('xpath', xpath, scoped))
+    assert compile_selector('id', "com.whatsapp:id/entry") == ('id', "com.whatsapp:id/entry")
+
+    # The offline UiSelector evaluation replaces a repeated method too, like the device
+    root = parse_hierarchy('<hierarchy><android.view.View content-desc="Unread filter, unselected" '
+                           'displayed="true" bounds="[0,0][10,10]" /></hierarchy>')
+    chained = 'new UiSelector().descriptionContains("Groups filter").descriptionContains("unselected")'
+    assert len(find_by_selector(root, '-android uiautomator', chained)) == 1
+    print("OK compile selector")
+
+
+def test_bot_selectors_equivalent():
+    """Every XPath the bot uses finds the same nodes in native form on every fake screen"""
+    selectors = collect_xpath_selectors()
+    assert len(selectors) > 30
+    roots = [parse_hierarchy(xml) for xml in fake_dumps().values()]
+    for xpath in selectors:
+        scoped = xpath.startswith('.')
+        by, value = compile_selector('xpath', xpath, scoped=scoped)
+        for root in roots:
+            expected = _node_keys(_xpath_lookup(root, xpath[1:] if scoped else xpath))
+            assert _node_keys(find_by_selector(root, by, value)) == expected, (xpath, by, value)
+    print("OK bot selectors equivalent")
+
+
+def test_driver_sends_native_lookups():
+    """Lookups are sent natively, the caller still gets its elements and not-found errors"""
+    reset_native_selector_stats()
+    driver = FakeWhatsAppDriver(contacts=["Ramesh"], latency=NO_LATENCY)
+    sent = _record_finds(driver)
+    install_native_selectors(driver)
+    assert driver.find_elements('xpath', "//*[@text='Ramesh']")
+    assert driver.find_elements('xpath', "//*") and driver.find_elements('id', "com.whatsapp:id/fab") is not None
+    try:
+        driver.find_element('xpath', "//*[@resource-id='com.whatsapp:id/entry']")
+        assert False, "no entry field on the chat list"
+    except NoSuchElementException:
+        pass
+    assert sent == ['-android uiautomator', 'xpath', 'id', 'id']
+    stats = get_native_selector_stats()
+    assert stats['native'] == {'-android uiautomator': 1, 'id': 1} and stats['xpath'] == 1 and stats['fallbacks'] == 0
+    assert format_native_selector_stats().startswith("[SELECTOR] 2/3 lookups native")
+    print("OK driver sends native lookups")
+
+
+def test_rejected_native_form_falls_back():
+    """A server that refuses the native form gets XPath, for that lookup and every later one"""
+    reset_native_selector_stats()
+    sent = []
+
+    class _NoUiSelectorDriver:
+        def execute(self, driver_command, params=None):
+            sent.append(params['using'])
+            if params['using'] == '-android uiautomator':
+                raise InvalidSelectorException("UiSelector is not supported")
+            return {'value': ["element"]}
+
+    driver = install_native_selectors(_NoUiSelectorDriver())
+    for _ in range(2):
+        assert driver.execute('findElements', {'using': 'xpath', 'value': "//*[@text='Gallery']"}) == {'value': ["element"]}
+    assert sent == ['-android uiautomator', 'xpath', 'xpath']
+    stats = get_native_selector_stats()
+    assert stats['fallbacks'] == 1 and stats['xpath'] == 2 and stats['native'] == {}
+    print("OK rejected native form falls back")
+
+
+def _record_finds(driver):
+    """List of the strategies find commands reach the driver with"""
+    sent = []
+    original_execute = driver.execute
+
+    def recording_execute(driver_command, params=None):
+        if driver_command.startswith('find'):
+            sent.append(params['using'])
+        return original_execute(driver_command, params)
+
+    driver.execute = recording_execute
+    return sent
+
+
+if __name__ == "__main__":
+    test_compile_selector()
+    test_bot_selectors_equivalent()
+    test_driver_sends_native_lookups()
+    test_rejected_native_form_falls_back()
+    print("\nOK All tests passed!")
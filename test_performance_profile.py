@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Offline test for the UiAutomator2 performance profiles (no device needed; adb settings are a dict)
+"""
+
+import os
+import tempfile
+
+import performance_profile
+from replay_trace import ReplayDriver
+from device_profiles import (load_performance_result, save_performance_result, load_device_settings_backup,
+                             save_device_settings_backup)
+from performance_profile import (FEATURES, LIGHT_IME, PERFORMANCE_PROFILES, resolve_profile, session_settings,
+                                 apply_performance_profile, restore_device_settings)
+
+STOCK_IME = "com.google.android.inputmethod.latin/com.android.inputmethod.latin.LatinIME"
+
+_PATCHED = ('get_device_setting', 'put_device_setting', 'list_input_methods', 'set_input_method',
+            'load_performance_result', 'load_device_settings_backup', 'save_device_settings_backup')
+_ORIGINALS = {name: getattr(performance_profile, name) for name in _PATCHED}
+
+
+def _unpatch():
+    for name, function in _ORIGINALS.items():
+        setattr(performance_profile, name, function)
+
+
+class _RecordingDriver(ReplayDriver):
+    """Appium driver without a server; keeps the commands that reach it"""
+
+    def __init__(self):
+        super().__init__(None, "recording-session")
+        self.sent = []
+
+    def execute(self, driver_command, params=None):
+        self.sent.append((driver_command, params))
+        return {'value': None}
+
+
+class _FakeDevice:
+    """Android settings and input methods of one phone, patched over the adb_tools calls"""
+
+    def __init__(self, backup_path, imes=(STOCK_IME, LIGHT_IME)):
+        self.backup_path = backup_path
+        self.settings = {('global', 'window_animation_scale'): "1.0",
+                         ('global', 'transition_animation_scale'): "1.0",
+                         ('secure', 'default_input_method'): STOCK_IME}
+        self.imes = list(imes)
+        self.writes = 0
+
+    def install(self):
+        performance_profile.get_device_setting = lambda udid, namespace, key: self.settings.get((namespace, key))
+        performance_profile.put_device_setting = self.put
+        performance_profile.list_input_methods = lambda udid: self.imes
+        performance_profile.set_input_method = self.set_ime
+        performance_profile.load_device_settings_backup = lambda udid: load_device_settings_backup(
+            udid, self.backup_path)
+        performance_profile.save_device_settings_backup = lambda udid, originals: save_device_settings_backup(
+            udid, originals, self.backup_path)
+        return self
+
+    def put(self, udid, namespace, key, value):
+        self.writes += 1
+        self.settings[(namespace, key)] = str(value)
+        return True
+
+    def set_ime(self, udid, ime_id):
+        return self.put(udid, 'secure', 'default_input_method', ime_id)
+
+
+def test_resolve_profile():
+    """Named profiles, and 'auto' from the benchmark result with 'fast' as the fallback"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "device_profiles.json")
+        save_performance_result("Redmi_9A", "720x1600", ['no_animations', 'idle_wait'], {}, path)
+        assert load_performance_result("Redmi_9A", "720x1600", path)['features'] == ['no_animations', 'idle_wait']
+        performance_profile.load_performance_result = lambda model, resolution: load_performance_result(
+            model, resolution, path)
+        identity = {'model': "Redmi_9A", 'resolution': "720x1600", 'version': None}
+        # Device settings are never changed by 'auto', even when they were measured fastest
+        assert resolve_profile('auto', identity) == ('idle_wait',)
+        assert resolve_profile('auto', dict(identity, resolution="1080x2400")) == ('idle_wait', 'action_ack')
+        assert resolve_profile('auto', None) == ('idle_wait', 'action_ack')
+    assert resolve_profile('stock') == ()
+    assert resolve_profile('full') == FEATURES
+    assert session_settings(FEATURES) == {'waitForIdleTimeout': 0, 'actionAcknowledgmentTimeout': 0,
+                                          'ignoreUnimportantViews': True}
+    assert session_settings(('idle_wait',)) == {'waitForIdleTimeout': 0, 'actionAcknowledgmentTimeout': 3000,
+                                                'ignoreUnimportantViews': False}
+    _unpatch()
+    print("OK resolve profile")
+
+
+def test_apply_and_restore():
+    """One updateSettings per session, device settings changed once and put back on restore"""
+    with tempfile.TemporaryDirectory() as tmp:
+        device = _FakeDevice(os.path.join(tmp, "device_profiles.json")).install()
+        driver = _RecordingDriver()
+        assert apply_performance_profile(driver, "udid-1", FEATURES) == FEATURES
+        assert driver.sent == [('updateSettings', {'settings': session_settings(FEATURES)})]
+        assert device.settings[('global', 'window_animation_scale')] == "0"
+        assert device.settings[('global', 'animator_duration_scale')] == "0"
+        assert device.settings[('secure', 'default_input_method')] == LIGHT_IME
+
+        # A recovered session re-applies the session settings only
+        writes = device.writes
+        assert apply_performance_profile(_RecordingDriver(), "udid-1", FEATURES) == FEATURES
+        assert device.writes == writes
+
+        restore_device_settings()
+        assert device.settings[('global', 'window_animation_scale')] == "1.0"
+        # Unset before, so back to the Android default
+        assert device.settings[('global', 'animator_duration_scale')] == "1"
+        assert device.settings[('secure', 'default_input_method')] == STOCK_IME
+        assert load_device_settings_backup("udid-1", device.backup_path) == {}
+        _unpatch()
+    print("OK apply and restore")
+
+
+def test_missing_ime_and_rejected_settings():
+    """Features that can't be applied are left out of the result instead of failing the session"""
+    with tempfile.TemporaryDirectory() as tmp:
+        device = _FakeDevice(os.path.join(tmp, "device_profiles.json"), imes=[STOCK_IME]).install()
+
+        class _OldServerDriver(_RecordingDriver):
+            def execute(self, driver_command, params=None):
+                raise RuntimeError("unknown command updateSettings")
+
+        assert apply_performance_profile(_OldServerDriver(), "udid-2", FEATURES) == ('no_animations',)
+        assert device.settings[('secure', 'default_input_method')] == STOCK_IME
+        restore_device_settings()
+        assert device.settings[('global', 'window_animation_scale')] == "1.0"
+        _unpatch()
+    print("OK missing IME and rejected settings")
+
+
+def test_restore_after_killed_run():
+    """Originals are on disk before anything changes; the next run puts them back"""
+    with tempfile.TemporaryDirectory() as tmp:
+        device = _FakeDevice(os.path.join(tmp, "device_profiles.json")).install()
+        apply_performance_profile(_RecordingDriver(), "udid-3", FEATURES)
+        backup = load_device_settings_backup("udid-3", device.backup_path)
+        assert backup['animations']['window_animation_scale'] == "1.0" and backup['ime'] == STOCK_IME
+
+        # kill -9: the process state is gone, nothing was restored
+        performance_profile._device_originals.clear()
+        performance_profile._device_features.clear()
+        assert device.settings[('global', 'window_animation_scale')] == "0"
+
+        apply_performance_profile(_RecordingDriver(), "udid-3", PERFORMANCE_PROFILES['fast'])
+        assert device.settings[('global', 'window_animation_scale')] == "1.0"
+        assert device.settings[('secure', 'default_input_method')] == STOCK_IME
+        assert load_device_settings_backup("udid-3", device.backup_path) == {}
+        restore_device_settings()
+        _unpatch()
+    print("OK restore after killed run")
+
+
+if __name__ == "__main__":
+    test_resolve_profile()
+    test_apply_and_restore()
+    test_missing_ime_and_rejected_settings()
+    test_restore_after_killed_run()
+    print("\nOK All tests passed!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Offline test for daily photo preprocessing (no device needed)
+"""
+
+import os
+import tempfile
+
+import photo_prep
+from photo_prep import prepare_daily_photo, target_long_edge, format_prep_report
+
+
+def test_target_long_edge():
+    """Never upscale past WhatsApp's limit, and follow smaller screens"""
+    assert target_long_edge(None) == 1600
+    assert target_long_edge({'width': 1220, 'height': 2712}) == 1600
+    assert target_long_edge({'width': 480, 'height': 854}) == 854
+    print("OK target long edge")
+
+
+def test_prepare_photo():
+    """Large photos are downscaled once and reused from the cache on the next run"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "daily.jpg")
+        cache_dir = os.path.join(tmp, ".cache")
+
+        if photo_prep.Image is None:
+            with open(source, 'wb') as file:
+                file.write(b"\xff\xd8" + os.urandom(4096))
+            path, report = prepare_daily_photo(source, cache_dir=cache_dir)
+            assert path == source and report['status'] == 'skipped'
+            print("OK preprocessing skipped without Pillow")
+            return
+
+        photo_prep.Image.effect_noise((4000, 3000), 64).convert('RGB').save(source, quality=98)
+        path, report = prepare_daily_photo(source, {'width': 720, 'height': 1600}, cache_dir=cache_dir)
+        assert report['status'] == 'prepared' and report['bytes_saved'] > 0
+        with photo_prep.Image.open(path) as image:
+            assert max(image.size) == 1600
+            assert not image.info.get('exif')
+
+        again, report = prepare_daily_photo(source, {'width': 720, 'height': 1600}, cache_dir=cache_dir)
+        assert again == path and report['status'] == 'cached'
+        assert "saved" in format_prep_report(report, 1024 * 1024)
+        print("OK preprocessing and cache")
+
+
+def test_transparent_png_flattened():
+    """A transparent PNG is flattened onto white, and the report says so"""
+    if photo_prep.Image is None:
+        print("OK transparency flattening skipped without Pillow")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "daily.png")
+        cache_dir = os.path.join(tmp, ".cache")
+        photo_prep.Image.effect_noise((3000, 2000), 64).convert('RGBA').save(source)
+        with photo_prep.Image.open(source) as image:
+            image.putalpha(0)
+            image.save(source)
+
+        path, report = prepare_daily_photo(source, cache_dir=cache_dir)
+        assert report['alpha_flattened'] and path != source
+        with photo_prep.Image.open(path) as image:
+            assert image.getpixel((0, 0)) == (255, 255, 255)
+        assert "transparency flattened onto white" in format_prep_report(report)
+
+        _, report = prepare_daily_photo(source, cache_dir=cache_dir)
+        assert report['status'] == 'cached' and report['alpha_flattened']
+    print("OK transparent PNG flattened")
+
+
+def test_format_prep_report():
+    """The report says when the transfer was skipped because the device already had the photo"""
+    report = {'original_bytes': 4 * 1024 * 1024, 'prepared_bytes': 1024 * 1024,
+              'bytes_saved': 3 * 1024 * 1024, 'long_edge': 1600, 'cached': True,
+              'alpha_flattened': False, 'status': 'cached'}
+    assert "~3.00s transfer time saved" in format_prep_report(report, 1024 * 1024)
+    line = format_prep_report(report, None, device_copy_reused=True)
+    assert "already on the device so the 1.00MB transfer was skipped" in line
+    assert "transfer time saved" not in line and "transparency" not in line
+    print("OK prep report")
+
+
+if __name__ == "__main__":
+    test_target_long_edge()
+    test_prepare_photo()
+    test_transparent_png_flattened()
+    test_format_prep_report()
+    print("\nOK All tests passed!")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Offline test for the SQLite run-state store (no device needed)
+"""
+
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from run_state import (open_run_state, close_run_state, record_chat_result, load_done_chat_keys, get_chat_status,
+                       import_legacy_logs, parse_processed_line, get_run_day, chat_key, get_day_summary,
+                       queue_chats, load_chat_states, record_chat_returned, get_chat_returned_at, STATUS_QUEUED, STATUS_SEARCHING, STATUS_COMPOSING,
+                       STATUS_RETURNED, STATUS_SENT, STATUS_FAILED, STATUS_NOT_FOUND, MAX_FAILED_ATTEMPTS,
+                       SEND_UNCONFIRMED_STATUSES)
+
+
+def test_keys_and_day_boundary():
+    """Log lines and bare names share a key; the day rolls over at GMT+7 midnight"""
+    status, row, name = parse_processed_line("NOT_FOUND Row64: NepalWin 🇳🇵Ubin0007")
+    assert (status, row) == (STATUS_NOT_FOUND, 64)
+    assert chat_key(name) == chat_key("NepalWin🇳🇵Ubin0007")
+    assert parse_processed_line("Row65: NepalWin🇳🇵Niresh9090") == (STATUS_SENT, 65, "NepalWin🇳🇵Niresh9090")
+    assert parse_processed_line("[2025-10-13 14:57:05 GMT+7]") is None
+
+    # 17:30 UTC is already the next day in GMT+7
+    assert get_run_day(datetime(2025, 10, 13, 17, 30, tzinfo=timezone.utc)) == "2025-10-14"
+    assert get_run_day(datetime(2025, 10, 13, 16, 30, tzinfo=timezone.utc)) == "2025-10-13"
+    print("OK keys and day boundary")
+
+
+def test_record_skip_and_import():
+    """Recorded and imported chats are skipped for their day only; imports run once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "processed_chats_2025-10-13.txt"), 'w', encoding='utf-8') as file:
+            file.write("Row60: NepalWin🇳🇵Junkiri Tamang\nFAILED Row61: Other\n")
+        with open(os.path.join(tmp, "not_found_chats_20251013.txt"), 'w', encoding='utf-8') as file:
+            file.write("[2025-10-13 14:57:05 GMT+7]\nNepalWin 🇳🇵Ubin0007\nOther\n")
+
+        open_run_state(os.path.join(tmp, "run_state.db"))
+        try:
+            assert import_legacy_logs(tmp) == 3
+            assert import_legacy_logs(tmp) == 0
+            assert get_chat_status("Other", day="2025-10-13") == STATUS_FAILED
+            assert get_day_summary("2025-10-13") == {STATUS_SENT: 1, STATUS_FAILED: 1, STATUS_NOT_FOUND: 1}
+
+            record_chat_result("NepalWin🇳🇵Niresh9090", STATUS_SENT, 65, day="2025-10-14", search_seconds=1.2)
+            done = load_done_chat_keys("2025-10-14")
+            assert chat_key("NepalWin🇳🇵Niresh9090") in done
+            assert chat_key("NepalWin🇳🇵Junkiri Tamang") not in done
+            assert chat_key("NepalWin🇳🇵Junkiri Tamang") in load_done_chat_keys("2025-10-13")
+            # An imported failure is one attempt, so the chat is retried
+            assert chat_key("Other") not in load_done_chat_keys("2025-10-13")
+        finally:
+            close_run_state()
+    print("OK record / skip / import")
+
+
+def test_send_cycle_states():
+    """Queued chats keep their progress; only finished chats are skipped on resume"""
+    with tempfile.TemporaryDirectory() as tmp:
+        open_run_state(os.path.join(tmp, "run_state.db"))
+        day = "2025-10-14"
+        try:
+            queue_chats([(1, "Alpha"), (2, "Beta"), (3, "Gamma")], day=day)
+            record_chat_result("Alpha", STATUS_SEARCHING, 1, day=day)
+            record_chat_result("Alpha", STATUS_SENT, 1, day=day, search_seconds=2.0)
+            record_chat_returned("Alpha", day=day)
+            record_chat_result("Beta", STATUS_COMPOSING, 2, day=day)
+            # Rows written as 'returned' by older versions still count as done
+            record_chat_result("Delta", STATUS_RETURNED, 4, day=day)
+
+            # Queuing again (a restarted run) must not reset progress
+            queue_chats([(1, "Alpha"), (2, "Beta"), (3, "Gamma")], day=day)
+            states = load_chat_states(day)
+            # The return step doesn't replace the send outcome
+            assert states == {chat_key("Alpha"): STATUS_SENT, chat_key("Beta"): STATUS_COMPOSING,
+                              chat_key("Gamma"): STATUS_QUEUED, chat_key("Delta"): STATUS_RETURNED}
+            assert get_chat_returned_at("Alpha", day=day) is not None
+            assert get_chat_returned_at("Beta", day=day) is None
+            assert load_done_chat_keys(day) == {chat_key("Alpha"), chat_key("Delta")}
+        finally:
+            close_run_state()
+    print("OK send cycle states")
+
+
+def test_failed_chats_retried_up_to_limit():
+    """A failed chat is searched again by the next run until it has failed MAX_FAILED_ATTEMPTS times"""
+    with tempfile.TemporaryDirectory() as tmp:
+        open_run_state(os.path.join(tmp, "run_state.db"))
+        day = "2025-10-14"
+        try:
+            for _ in range(MAX_FAILED_ATTEMPTS):
+                assert chat_key("Alpha") not in load_done_chat_keys(day)
+                record_chat_result("Alpha", STATUS_SEARCHING, 1, day=day)
+                record_chat_result("Alpha", STATUS_FAILED, 1, day=day)
+            assert chat_key("Alpha") in load_done_chat_keys(day)
+
+            # A later success still wins
+            record_chat_result("Beta", STATUS_FAILED, 2, day=day)
+            record_chat_result("Beta", STATUS_SENT, 2, day=day)
+            assert chat_key("Beta") in load_done_chat_keys(day)
+            assert STATUS_FAILED in SEND_UNCONFIRMED_STATUSES
+        finally:
+            close_run_state()
+    print("OK failed chats retried up to the limit")
+
+
+if __name__ == "__main__":
+    test_keys_and_day_boundary()
+    test_record_skip_and_import()
+    test_send_cycle_states()
+    test_failed_chats_retried_up_to_limit()
+    print("\nOK All tests passed!")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Offline test for screen-state detection and navigation (no device needed)
+"""
+
+from fake_driver import FakeWhatsAppDriver, SEARCH_FIELD_ID, ATTACH_ID, SCREEN_HOME
+from ui_snapshot import parse_hierarchy, classify_search_results, node_center
+from screen_state import (classify_screen, detect_screen, navigate_to_chat_list, reset_screen_state_stats,
+                          get_screen_state_stats, SCREEN_CHAT_LIST, SCREEN_SEARCH_RESULTS, SCREEN_CONVERSATION,
+                          SCREEN_ATTACH_SHEET, SCREEN_GALLERY, SCREEN_MEDIA_PREVIEW, SCREEN_LOCK, SCREEN_DIALOG,
+                          SCREEN_FOREIGN_APP, SCREEN_UNKNOWN)
+
+NO_LATENCY = {'default': 0, 'getPageSource': 0, 'pushFile': 0}
+
+LOCK_SCREEN = """<hierarchy rotation="0">
+  <android.widget.FrameLayout package="com.android.systemui" bounds="[0,0][1080,2400]">
+    <android.widget.TextView package="com.android.systemui" resource-id="com.android.systemui:id/clock_view" text="12:30" bounds="[100,300][980,500]"/>
+    <android.widget.ImageView package="com.android.systemui" resource-id="com.android.systemui:id/lock_icon" content-desc="Unlock" bounds="[480,2000][600,2120]"/>
+    <android.widget.FrameLayout package="com.android.systemui" resource-id="com.android.systemui:id/keyguard_bottom_area" bounds="[0,1900][1080,2400]"/>
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+PERMISSION_DIALOG = """<hierarchy rotation="0">
+  <android.widget.FrameLayout package="com.google.android.permissioncontroller" bounds="[0,0][1080,2400]">
+    <android.widget.TextView package="com.google.android.permissioncontroller" resource-id="com.android.permissioncontroller:id/permission_message" text="Allow WhatsApp to access photos and media?" bounds="[100,1200][980,1300]"/>
+    <android.widget.Button package="com.google.android.permissioncontroller" text="Allow" bounds="[100,1400][980,1500]"/>
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+BLANK_WHATSAPP = """<hierarchy rotation="0">
+  <android.widget.FrameLayout package="com.whatsapp" bounds="[0,0][1080,2400]">
+    <android.widget.ProgressBar package="com.whatsapp" bounds="[480,1140][600,1260]"/>
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+
+# Newer WhatsApp: search bar instead of the toolbar icon, Chats tab in the bottom navigation
+NEW_CHAT_LIST = """<hierarchy rotation="0">
+  <android.widget.FrameLayout package="com.whatsapp" bounds="[0,0][1080,2400]">
+    <android.widget.TextView package="com.whatsapp" resource-id="com.whatsapp:id/toolbar_title" text="WhatsApp" bounds="[40,180][400,260]"/>
+    <android.widget.LinearLayout package="com.whatsapp" resource-id="com.whatsapp:id/search_bar_inner_layout" bounds="[40,290][1040,400]">
+      <android.widget.TextView package="com.whatsapp" resource-id="com.whatsapp:id/search_bar_hint" text="Ask Meta AI or Search" bounds="[140,310][900,380]"/>
+    </android.widget.LinearLayout>
+    <android.widget.RelativeLayout package="com.whatsapp" resource-id="com.whatsapp:id/contact_row_container" bounds="[0,420][1080,600]">
+      <android.widget.TextView package="com.whatsapp" resource-id="com.whatsapp:id/conversations_row_contact_name" text="Ramesh" bounds="[200,440][800,500]"/>
+    </android.widget.RelativeLayout>
+    <android.widget.ImageButton package="com.whatsapp" resource-id="com.whatsapp:id/fab" content-desc="New chat" bounds="[880,2000][1040,2160]"/>
+    <android.widget.FrameLayout package="com.whatsapp" resource-id="com.whatsapp:id/navigation_bar_item_chats" content-desc="Chats" bounds="[0,2200][270,2400]">
+      <android.widget.TextView package="com.whatsapp" resource-id="com.whatsapp:id/navigation_bar_item_label_view" text="Chats" bounds="[60,2330][210,2380]"/>
+    </android.widget.FrameLayout>
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+
+def _walk_to_preview(driver):
+    """Visit every WhatsApp screen of a photo send and return (expected state, page source) pairs"""
+    screens = [(SCREEN_CHAT_LIST, driver.page_source)]
+    driver.find_element('id', "com.whatsapp:id/menuitem_search").click()
+    driver.find_element('id', SEARCH_FIELD_ID).send_keys("Ramesh")
+    screens.append((SCREEN_SEARCH_RESULTS, driver.page_source))
+    match = classify_search_results(parse_hierarchy(screens[-1][1]), "Ramesh")['match']
+    driver.tap([node_center(match)])
+    screens.append((SCREEN_CONVERSATION, driver.page_source))
+    driver.find_element('id', ATTACH_ID).click()
+    screens.append((SCREEN_ATTACH_SHEET, driver.page_source))
+    driver.find_element('xpath', "//*[@text='Gallery']").click()
+    screens.append((SCREEN_GALLERY, driver.page_source))
+    driver.find_elements('id', "com.whatsapp:id/thumb")[0].click()
+    screens.append((SCREEN_MEDIA_PREVIEW, driver.page_source))
+    return screens
+
+
+def test_classify_screens():
+    """Every screen of the fake app, the lock screen, a dialog and another app are told apart"""
+    driver = FakeWhatsAppDriver(contacts=["Ramesh", "Sita"], latency=NO_LATENCY, search_delay=0)
+    for expected, source in _walk_to_preview(driver):
+        snapshot = classify_screen(parse_hierarchy(source))
+        assert snapshot['state'] == expected, (expected, snapshot['state'], snapshot['scores'])
+        assert snapshot['confidence'] >= 0.7, (expected, snapshot['confidence'])
+
+    driver.screen = SCREEN_HOME
+    assert classify_screen(parse_hierarchy(driver.page_source))['state'] == SCREEN_FOREIGN_APP
+    assert classify_screen(parse_hierarchy(LOCK_SCREEN))['state'] == SCREEN_LOCK
+    assert classify_screen(parse_hierarchy(PERMISSION_DIALOG))['state'] == SCREEN_DIALOG
+    blank = classify_screen(parse_hierarchy(BLANK_WHATSAPP))
+    assert blank['state'] == SCREEN_UNKNOWN and blank['confidence'] < 0.45
+    assert classify_screen(None)['state'] == SCREEN_UNKNOWN
+    print("OK classify screens")
+
+
+def test_search_bar_chat_list():
+    """The chat list of newer versions (search bar, Chats tab, titled toolbar) is recognised"""
+    snapshot = classify_screen(parse_hierarchy(NEW_CHAT_LIST))
+    assert snapshot['state'] == SCREEN_CHAT_LIST, snapshot['scores']
+    assert {'search_menu', 'chats_tab'} <= set(snapshot['signals'])
+    assert snapshot['confidence'] >= 0.7
+    print("OK search bar chat list")
+
+
+def test_navigate_from_preview():
+    """One snapshot per step, one BACK per screen, none once the chat list is reached"""
+    reset_screen_state_stats()
+    driver = FakeWhatsAppDriver(contacts=["Ramesh", "Sita"], latency=NO_LATENCY, search_delay=0)
+    _walk_to_preview(driver)
+    start = len(driver.command_log)
+    snapshot = navigate_to_chat_list(driver)
+    assert snapshot['state'] == SCREEN_CHAT_LIST
+    commands = [command for command, *_ in driver.command_log[start:]]
+    # preview -> gallery -> conversation -> search results -> chat list
+    assert commands.count('pressKeyCode') == 4
+    assert commands.count('getPageSource') == 5
+
+    start = len(driver.command_log)
+    assert navigate_to_chat_list(driver)['state'] == SCREEN_CHAT_LIST
+    assert [command for command, *_ in driver.command_log[start:]] == ['getPageSource']
+    stats = get_screen_state_stats()
+    assert stats['detections'] == 6 and stats['actions'] == {'back': 4}
+    print("OK navigate from preview")
+
+
+def test_navigate_from_other_app():
+    """Another app in front is left with activate_app, not by backing out of it"""
+    reset_screen_state_stats()
+    driver = FakeWhatsAppDriver(contacts=["Ramesh"], latency=NO_LATENCY)
+    driver.screen = SCREEN_HOME
+    assert navigate_to_chat_list(driver)['state'] == SCREEN_CHAT_LIST
+    commands = [command for command, *_ in driver.command_log]
+    assert 'activateApp' in commands and 'pressKeyCode' not in commands
+    print("OK navigate from other app")
+
+
+def test_unknown_screen_never_pressed_back():
+    """An unrecognised screen gets time to settle and then activate_app, never a blind BACK"""
+    reset_screen_state_stats()
+    sent = []
+
+    class _LoadingDriver:
+        page_source = BLANK_WHATSAPP
+
+        def press_keycode(self, keycode):
+            sent.append(('press_keycode', keycode))
+
+        def activate_app(self, package):
+            sent.append(('activate_app', package))
+
+    snapshot = navigate_to_chat_list(_LoadingDriver(), max_steps=2)
+    assert snapshot['state'] == SCREEN_UNKNOWN
+    assert sent == [('activate_app', "com.whatsapp")]
+    assert get_screen_state_stats()['actions'] == {'settle': 1, 'activate_app': 1}
+    assert detect_screen(_LoadingDriver())['state'] == SCREEN_UNKNOWN
+    print("OK unknown screen never pressed back")
+
+
+if __name__ == "__main__":
+    test_classify_screens()
+    test_search_bar_chat_list()
+    test_navigate_from_preview()
+    test_navigate_from_other_app()
+    test_unknown_screen_never_pressed_back()
+    print("\nOK All tests passed!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Offline test for the persistent selector-resolution cache (no device needed)
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from selector_cache import (load_selector_cache, order_selectors, record_selector_hit,
+                            record_selector_miss)
+
+SELECTORS = [
+    ("id", "com.whatsapp:id/entry"),
+    ("xpath", "//*[@resource-id='com.whatsapp:id/entry']"),
+    ("xpath", "//android.widget.EditText[contains(@resource-id, 'entry')]"),
+]
+
+
+def test_winner_first_and_demotion():
+    """The last winning selector moves to the front and misses go to the back"""
+    with tempfile.TemporaryDirectory() as tmp:
+        load_selector_cache("da2a3288", "2.25.1", path=os.path.join(tmp, "cache.json"))
+        assert order_selectors('message_input', SELECTORS) == SELECTORS
+
+        record_selector_miss('message_input', SELECTORS[0])
+        record_selector_hit('message_input', SELECTORS[2])
+        assert order_selectors('message_input', SELECTORS) == [SELECTORS[2], SELECTORS[1], SELECTORS[0]]
+
+        # A winner that starts failing loses its spot
+        record_selector_miss('message_input', SELECTORS[2])
+        assert order_selectors('message_input', SELECTORS) == [SELECTORS[1], SELECTORS[0], SELECTORS[2]]
+    print("OK winner first / demotion")
+
+
+def test_persisted_per_device_and_invalidated_on_version_change():
+    """The table survives a reload but not a WhatsApp upgrade"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.json")
+        load_selector_cache("da2a3288", "2.25.1", path=path)
+        record_selector_hit('message_input', SELECTORS[1])
+
+        load_selector_cache("other-device", "2.25.1", path=path)
+        assert order_selectors('message_input', SELECTORS) == SELECTORS
+
+        load_selector_cache("da2a3288", "2.25.1", path=path)
+        assert order_selectors('message_input', SELECTORS)[0] == SELECTORS[1]
+
+        load_selector_cache("da2a3288", "2.25.2", path=path)
+        assert order_selectors('message_input', SELECTORS) == SELECTORS
+    print("OK persistence / invalidation")
+
+
+def test_unknown_version_not_persisted():
+    """Without a version the cache still works in memory but writes nothing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.json")
+        load_selector_cache("da2a3288", None, path=path)
+        record_selector_hit('message_input', SELECTORS[1])
+        assert order_selectors('message_input', SELECTORS)[0] == SELECTORS[1]
+        assert not os.path.exists(path)
+    print("OK in-memory only without version")
+
+
+_WORKER = """
+import sys
+from selector_cache import load_selector_cache, record_selector_hit
+path, device = sys.argv[1], sys.argv[2]
+load_selector_cache(device, "2.25.1", path=path)
+for count in range(20):
+    record_selector_hit(f"element_{count}", ("id", f"com.whatsapp:id/{device}"))
+"""
+
+
+def test_fleet_workers_keep_each_others_devices():
+    """Workers saving at the same moment don't overwrite the other devices' tables"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.json")
+        devices = [f"device-{number}" for number in range(5)]
+        here = os.path.dirname(os.path.abspath(__file__))
+        workers = [subprocess.Popen([sys.executable, "-c", _WORKER, path, device], cwd=here) for device in devices]
+        assert all(worker.wait(timeout=60) == 0 for worker in workers)
+        for device in devices:
+            load_selector_cache(device, "2.25.1", path=path)
+            own = ("id", f"com.whatsapp:id/{device}")
+            assert order_selectors('element_19', SELECTORS + [own])[0] == own
+    print("OK fleet workers keep each other's devices")
+
+
+if __name__ == "__main__":
+    test_winner_first_and_demotion()
+    test_persisted_per_device_and_invalidated_on_version_change()
+    test_unknown_version_not_persisted()
+    test_fleet_workers_keep_each_others_devices()
+    print("\nOK All tests passed!")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Offline test for the session bootstrap modes (no device needed)
+"""
+
+import os
+import tempfile
+import time
+
+from appium.options.android.uiautomator2.base import UiAutomator2Options
+
+import session_bootstrap
+from device_profiles import load_bootstrap_state, save_bootstrap_state
+from fake_driver import FakeWhatsAppDriver, SCREEN_HOME
+from session_bootstrap import (resolve_bootstrap_mode, apply_bootstrap_options, record_bootstrap_failure,
+                               record_first_command, get_bootstrap_stats, reset_bootstrap_stats,
+                               format_bootstrap_report)
+
+NO_LATENCY = {'default': 0, 'getPageSource': 0, 'pushFile': 0}
+
+
+def _use_cache(path):
+    """Point the module's cache calls at a temporary file"""
+    session_bootstrap.load_bootstrap_state = lambda udid: load_bootstrap_state(udid, path)
+    session_bootstrap.save_bootstrap_state = lambda udid, state: save_bootstrap_state(udid, state, path)
+
+
+def _unpatch():
+    session_bootstrap.load_bootstrap_state = load_bootstrap_state
+    session_bootstrap.save_bootstrap_state = save_bootstrap_state
+
+
+def test_bootstrap_options():
+    """Cold keeps the full bootstrap; fast skips install, initialization and the app launch"""
+    cold = apply_bootstrap_options(UiAutomator2Options(), 'cold').to_capabilities()
+    assert cold['appium:uiautomator2ServerLaunchTimeout'] == 60000
+    assert not any(key in cold for key in ('appium:skipServerInstallation', 'appium:skipDeviceInitialization',
+                                           'appium:autoLaunch'))
+
+    fast = apply_bootstrap_options(UiAutomator2Options(), 'fast').to_capabilities()
+    assert fast['appium:skipServerInstallation'] is True and fast['appium:skipDeviceInitialization'] is True
+    assert fast['appium:autoLaunch'] is False and fast['appium:skipLogcatCapture'] is True
+    assert fast['appium:uiautomator2ServerLaunchTimeout'] == 20000
+    print("OK bootstrap options")
+
+
+def test_known_good_lifecycle():
+    """auto goes fast after a good session, back to cold after a failed fast one"""
+    reset_bootstrap_stats()
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_cache(os.path.join(tmp, "device_profiles.json"))
+        try:
+            assert resolve_bootstrap_mode('auto', "R58M") == 'cold'
+            assert resolve_bootstrap_mode('auto', None) == 'cold'
+            assert resolve_bootstrap_mode('fast', None) == 'fast'
+
+            driver = FakeWhatsAppDriver(contacts=["Ramesh"], latency=NO_LATENCY)
+            assert record_first_command(driver, 'cold', "R58M", 1.5, time.perf_counter() - 1.6) == "com.whatsapp"
+            assert resolve_bootstrap_mode('auto', "R58M") == 'fast'
+            assert resolve_bootstrap_mode('auto', "emulator-5554") == 'cold'
+
+            driver.screen = SCREEN_HOME
+            record_first_command(driver, 'fast', "R58M", 0.4, time.perf_counter() - 0.5)
+            stored = session_bootstrap.load_bootstrap_state("R58M")['first_command']
+            assert set(stored) == {'cold', 'fast'}
+
+            record_bootstrap_failure('fast', "R58M")
+            assert resolve_bootstrap_mode('auto', "R58M") == 'cold'
+            # The measured times survive the reset of the flag
+            assert session_bootstrap.load_bootstrap_state("R58M")['first_command'] == stored
+
+            stats = get_bootstrap_stats()
+            assert stats['cold']['count'] == 1 and stats['cold']['attached'] == 1
+            assert stats['fast']['count'] == 1 and stats['fast']['attached'] == 0 and stats['fast']['failed'] == 1
+            report = format_bootstrap_report("R58M")
+            assert report[0].startswith("cold: 1 sessions") and "1 failed" in report[1]
+            assert report[2].startswith("last per mode on this device: cold ")
+        finally:
+            _unpatch()
+    print("OK known-good lifecycle")
+
+
+if __name__ == "__main__":
+    test_bootstrap_options()
+    test_known_good_lifecycle()
+    print("\nOK All tests passed!")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Offline test for failure classification and the recovery histogram (no device needed)
+"""
+
+from session_recovery import (classify_failure, bucket_label, record_recovery, get_recovery_stats,
+                              reset_recovery_stats, format_recovery_histogram, FAILURE_SOFT, FAILURE_HARD)
+
+
+def test_classify_failure():
+    """Dead sessions and connection errors are hard, UI errors are soft"""
+    assert classify_failure(Exception("stale element reference: element is not attached")) == FAILURE_SOFT
+    assert classify_failure(Exception("no such element")) == FAILURE_SOFT
+    assert classify_failure(None) == FAILURE_SOFT
+    assert classify_failure(Exception("A session is either terminated or not started")) == FAILURE_HARD
+    assert classify_failure(Exception("Connection refused")) == FAILURE_HARD
+    assert classify_failure(Exception("no such element"), session_alive=False) == FAILURE_HARD
+    print("OK classify failure")
+
+
+def test_recovery_histogram():
+    """Recoveries land in per-path time buckets"""
+    reset_recovery_stats()
+    assert format_recovery_histogram() == []
+    assert bucket_label(0.4) == "<1s"
+    assert bucket_label(7) == "<10s"
+    assert bucket_label(55) == ">=40s"
+
+    record_recovery('navigation', 0.8, True)
+    record_recovery('navigation', 1.5, True)
+    record_recovery('fast_session', 6.0, False)
+    stats = get_recovery_stats()
+    assert stats['navigation']['count'] == 2
+    assert stats['navigation']['buckets'] == {'<1s': 1, '<2s': 1}
+    assert stats['fast_session']['failed'] == 1
+
+    lines = format_recovery_histogram()
+    assert lines[0].startswith("navigation: 2 recoveries (0 failed)")
+    assert "<10s: 1" in lines[1]
+    print("OK recovery histogram")
+
+
+if __name__ == "__main__":
+    test_classify_failure()
+    test_recovery_histogram()
+    print("\nOK All tests passed!")
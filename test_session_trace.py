@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Offline test for session traces and their replay (no device needed)
+"""
+
+import os
+import tempfile
+
+from selenium.common.exceptions import NoSuchElementException, InvalidSessionIdException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from fake_driver import FakeWhatsAppDriver
+from session_trace import (open_trace, close_trace, trace_driver, trace_note, read_trace, get_trace_notes,
+                           summarize_trace, W3C_ELEMENT_KEY)
+from replay_trace import ReplayDriver, TraceReplay
+from device_latency import reset_latency_stats
+import whatsapp
+
+NO_LATENCY = {'default': 0, 'getPageSource': 0, 'pushFile': 0}
+ENTRY_ID = "com.whatsapp:id/entry"
+
+
+class _ScriptedDriver(ReplayDriver):
+    """Appium driver answering from a script instead of a server, to record traces of real commands"""
+
+    def __init__(self):
+        super().__init__(None, "scripted-session")
+        self.misses_left = 2
+
+    def execute(self, driver_command, params=None):
+        if driver_command == 'findElement':
+            if self.misses_left:
+                self.misses_left -= 1
+                raise NoSuchElementException("An element could not be located on the page")
+            return {'value': self._unwrap_value({W3C_ELEMENT_KEY: "element-1"})}
+        if driver_command == 'getWindowRect':
+            return {'value': {'x': 0, 'y': 0, 'width': 1080, 'height': 2400}}
+        if driver_command == 'getPageSource':
+            return {'value': "<hierarchy>" + "<node/>" * 300 + "</hierarchy>"}
+        return {'value': None}
+
+
+def _session(driver):
+    """The bot code under test: unlock, wait for the entry field, click it, read the screen"""
+    assert whatsapp.turn_screen_on_and_unlock(driver)
+    entry = WebDriverWait(driver, 5, poll_frequency=0.05).until(
+        EC.presence_of_element_located(('id', ENTRY_ID)))
+    entry.click()
+    return entry.id, driver.page_source, driver.page_source
+
+
+def _record(path, session):
+    open_trace(path, 'test')
+    driver = trace_driver(_ScriptedDriver())
+    try:
+        return session(driver)
+    finally:
+        close_trace()
+
+
+def test_record_fake_session():
+    """Commands, errors and notes are written; identical page sources are stored once"""
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "fake.trace.gz")
+        open_trace(path, 'test', {'device': 'fake'})
+        driver = trace_driver(FakeWhatsAppDriver(contacts=["Ramesh"], latency=NO_LATENCY))
+        trace_note('inputs', {'chat_file': "Ramesh\n" * 400})
+        first, second = driver.page_source, driver.page_source
+        try:
+            driver.find_element('id', ENTRY_ID)
+        except NoSuchElementException:
+            pass
+        driver.find_element('xpath', "//*[@text='Ramesh']")
+        assert close_trace() == 4
+
+        trace = read_trace(path)
+    assert trace['complete'] and trace['header']['context'] == {'device': 'fake'}
+    # One blob for both identical page sources, one for the long note
+    assert first == second and sorted(trace['blobs'].values()) == sorted([first, "Ramesh\n" * 400])
+    assert get_trace_notes(trace, 'inputs') == [{'chat_file': "Ramesh\n" * 400}]
+    commands = [event for event in trace['events'] if event['type'] == 'cmd']
+    assert commands[2]['error']['class'] == 'NoSuchElementException'
+    summary = summarize_trace(trace)
+    assert summary['commands'] == 4 and summary['errors'] == 1 and summary['sessions'] == 1
+    assert (summary['by_command']['findElement']['count'], summary['by_command']['findElement']['errors']) == (2, 1)
+    print("OK record fake session")
+
+
+def test_replay_reproduces_session():
+    """A replay returns the recorded elements, errors and sources, in the recorded (virtual) time"""
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "session.trace.gz")
+        recorded = _record(path, _session)
+        trace = read_trace(path)
+
+    # The recording cached the screen size for this session id; a replay starts fresh like a new process
+    reset_latency_stats()
+    replay = TraceReplay(trace)
+    with replay.clock.installed():
+        replayed = _session(replay.new_driver())
+    assert replayed == recorded
+    results = replay.results(0.0)
+    assert results['served'] == results['recorded_commands'] == summarize_trace(trace)['commands']
+    assert results['divergence'] is None and results['skipped'] == 0 and results['changed_params'] == 0
+    # 0.5s unlock pause plus two 0.05s polls of the wait, regardless of how fast this machine is
+    assert 0.59 < results['simulated_seconds'] < 0.6 + sum(event['dur'] for event in trace['events']
+                                                         if event['type'] == 'cmd') + 0.01
+    print("OK replay reproduces session")
+
+
+def test_replay_reports_divergence():
+    """Commands the trace doesn't have end the session; commands the bot no longer sends are skipped"""
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "session.trace.gz")
+        _record(path, _session)
+        trace = read_trace(path)
+
+    replay = TraceReplay(trace)
+    with replay.clock.installed():
+        driver = replay.new_driver()
+        # Skips the recorded unlock and wait, jumps to the page source
+        source = driver.page_source
+        try:
+            driver.quit()
+            assert False, "quit is not in the trace"
+        except InvalidSessionIdException as e:
+            assert "quit" in str(e)
+    assert source.startswith("<hierarchy>")
+    results = replay.results(0.0)
+    assert results['served'] == 1 and results['skipped'] == results['recorded_commands'] - 1
+    assert "'quit'" in results['divergence']
+    print("OK replay divergence")
+
+
+if __name__ == "__main__":
+    test_record_fake_session()
+    test_replay_reproduces_session()
+    test_replay_reports_divergence()
+    print("\nOK All tests passed!")
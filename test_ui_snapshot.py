@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Offline test for the page_source search result classifier (no device needed)
+"""
+
+from ui_snapshot import (parse_hierarchy, classify_search_results, node_center, find_node, find_by_selector,
+                         get_open_conversation_name, find_sent_message,
+                         SEARCH_SINGLE_HIT, SEARCH_MULTIPLE_HITS, SEARCH_CHATS_NO_MATCH,
+                         SEARCH_MESSAGES_ONLY, SEARCH_NO_RESULTS, SEARCH_PENDING)
+
+
+def _text_view(text, rid="", bounds="[0,0][0,0]"):
+    return (f'<android.widget.TextView class="android.widget.TextView" text="{text}" '
+            f'resource-id="{rid}" displayed="true" bounds="{bounds}" />')
+
+
+def _contact_row(name, y):
+    return (f'<android.widget.LinearLayout class="android.widget.LinearLayout" '
+            f'resource-id="com.whatsapp:id/contact_row_container" displayed="true" '
+            f'bounds="[0,{y}][1080,{y + 180}]">'
+            + _text_view(name, "com.whatsapp:id/conversations_row_contact_name", f"[200,{y + 20}][800,{y + 80}]")
+            + _text_view("12:30", "com.whatsapp:id/conversations_row_date", f"[900,{y + 20}][1050,{y + 80}]")
+            + '</android.widget.LinearLayout>')
+
+
+def _hierarchy(*children):
+    return ("<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+            '<hierarchy index="0" class="hierarchy" width="1080" height="2400">'
+            '<android.widget.FrameLayout class="android.widget.FrameLayout" displayed="true" bounds="[0,0][1080,2400]">'
+            + "".join(children)
+            + '</android.widget.FrameLayout></hierarchy>')
+
+
+CHATS_TITLE = _text_view("Chats", "com.whatsapp:id/title", "[40,300][300,360]")
+MESSAGES_TITLE = _text_view("Messages", "com.whatsapp:id/title", "[40,900][300,960]")
+
+
+def test_single_hit():
+    """A single row under 'Chats' is opened at the center of its bounds"""
+    root = parse_hierarchy(_hierarchy(CHATS_TITLE, _contact_row("NepalWin🇳🇵Niresh9090", 400)))
+    result = classify_search_results(root, "Niresh9090")
+    assert result['state'] == SEARCH_SINGLE_HIT
+    assert node_center(result['match']) == (540, 490)
+    print("OK single hit")
+
+
+def test_multiple_hits_pick_matching_name():
+    """With several rows the first one containing the search term wins"""
+    root = parse_hierarchy(_hierarchy(
+        CHATS_TITLE,
+        _contact_row("Ramesh", 400),
+        _contact_row("NepalWin🇳🇵Niresh9090", 580),
+    ))
+    result = classify_search_results(root, "niresh9090")
+    assert result['state'] == SEARCH_MULTIPLE_HITS
+    assert result['match_name'] == "NepalWin🇳🇵Niresh9090"
+    assert len(result['rows']) == 2
+    print("OK multiple hits")
+
+
+def test_rows_above_chats_title_ignored():
+    """Rows above the 'Chats' header are not search results"""
+    root = parse_hierarchy(_hierarchy(_contact_row("Ramesh", 100), CHATS_TITLE, _contact_row("Other", 400), _contact_row("Another", 580)))
+    result = classify_search_results(root, "Niresh")
+    assert result['state'] == SEARCH_CHATS_NO_MATCH
+    assert len(result['rows']) == 2
+    print("OK rows above title ignored")
+
+
+def test_stale_single_row_rejected_when_name_required():
+    """A leftover row from the previous query is not opened while the stale guard is active"""
+    root = parse_hierarchy(_hierarchy(CHATS_TITLE, _contact_row("NepalWin🇳🇵Ramesh", 400)))
+    assert classify_search_results(root, "Niresh9090", require_name_match=True)['state'] == SEARCH_CHATS_NO_MATCH
+    assert classify_search_results(root, "Ramesh", require_name_match=True)['state'] == SEARCH_SINGLE_HIT
+    assert classify_search_results(root, "Niresh9090")['state'] == SEARCH_SINGLE_HIT
+
+    # Unnamed rows are a fallback only when names aren't required
+    unnamed = parse_hierarchy(_hierarchy(CHATS_TITLE, _contact_row("", 400), _contact_row("Ramesh", 580)))
+    assert classify_search_results(unnamed, "Niresh9090", require_name_match=True)['state'] == SEARCH_CHATS_NO_MATCH
+    assert classify_search_results(unnamed, "Niresh9090")['state'] == SEARCH_MULTIPLE_HITS
+    single_unnamed = parse_hierarchy(_hierarchy(CHATS_TITLE, _contact_row("", 400)))
+    assert classify_search_results(single_unnamed, "Niresh9090", require_name_match=True)['state'] == SEARCH_CHATS_NO_MATCH
+    print("OK stale row guard")
+
+
+def test_messages_only_and_no_results():
+    """'No results' under a Messages section is not a final answer"""
+    messages = parse_hierarchy(_hierarchy(MESSAGES_TITLE, _text_view("No results found")))
+    assert classify_search_results(messages, "x")['state'] == SEARCH_MESSAGES_ONLY
+
+    no_results = parse_hierarchy(_hierarchy(_text_view("No results found for 'x'")))
+    assert classify_search_results(no_results, "x")['state'] == SEARCH_NO_RESULTS
+
+    loading = parse_hierarchy(_hierarchy(_text_view("Searching...")))
+    assert classify_search_results(loading, "x")['state'] == SEARCH_PENDING
+    print("OK messages-only / no results / pending")
+
+
+def test_hidden_nodes_and_bad_xml():
+    """Hidden nodes are skipped and unparsable sources classify as pending"""
+    hidden = _hierarchy(CHATS_TITLE.replace('displayed="true"', 'displayed="false"'))
+    assert find_node(parse_hierarchy(hidden), text="Chats") is None
+    assert classify_search_results(parse_hierarchy("<hierarchy"), "x")['state'] == SEARCH_PENDING
+    print("OK hidden nodes / bad xml")
+
+
+def test_find_by_selector():
+    """Appium selectors used for readiness checks evaluate against a snapshot"""
+    root = parse_hierarchy(_hierarchy(CHATS_TITLE, _contact_row("NepalWin🇳🇵Niresh9090", 400)))
+    assert len(find_by_selector(root, "xpath", "//*[@text='Chats']")) == 1
+    assert len(find_by_selector(root, "id", "com.whatsapp:id/contact_row_container")) == 1
+    assert len(find_by_selector(root, "xpath", "//android.widget.TextView[contains(@text, 'Niresh')]")) == 1
+    assert find_by_selector(root, "xpath", "//android.widget.TextView[@resource-id='com.whatsapp:id/title' and @text='Messages']") == []
+    # Positional and relative XPaths can't be evaluated locally
+    assert find_by_selector(root, "xpath", ".//android.widget.TextView[2]") is None
+    print("OK find_by_selector")
+
+
+def _bubble(text, y, rid="com.whatsapp:id/message_text", outgoing=True):
+    status = ('<android.widget.ImageView class="android.widget.ImageView" resource-id="com.whatsapp:id/status" '
+              f'content-desc="Read" displayed="true" bounds="[980,{y + 120}][1040,{y + 160}]" />') if outgoing else ""
+    return (f'<android.widget.LinearLayout class="android.widget.LinearLayout" displayed="true" '
+            f'bounds="[40,{y}][1040,{y + 160}]">' + _text_view(text, rid, f"[300,{y}][1040,{y + 120}]") + status
+            + '</android.widget.LinearLayout>')
+
+
+def _day_header(label, y):
+    return _text_view(label, "com.whatsapp:id/conversation_row_date_divider", f"[440,{y}][640,{y + 60}]")
+
+
+def test_conversation_and_sent_message():
+    """An open conversation is recognized and today's (cut-off) message found as our newest bubble"""
+    message = "Good morning! Today's offer: deposit now and get a 10% bonus on every game until midnight."
+    conversation = parse_hierarchy(_hierarchy(
+        _text_view("NepalWin🇳🇵Niresh9090", "com.whatsapp:id/conversation_contact_name", "[150,80][700,140]"),
+        _day_header("Today", 400),
+        _bubble("Hi", 500, outgoing=False),
+        _bubble(message[:70] + "…", 900, rid="com.whatsapp:id/caption"),
+        _bubble("Thanks!", 1100, outgoing=False),
+        _text_view("", "com.whatsapp:id/entry", "[20,2200][900,2300]"),
+    ))
+    assert get_open_conversation_name(conversation) == "NepalWin🇳🇵Niresh9090"
+    assert find_sent_message(conversation, message) is not None
+    assert find_sent_message(conversation, "Hi there, a completely different message") is None
+
+    chat_list = parse_hierarchy(_hierarchy(CHATS_TITLE, _contact_row("Ramesh", 400)))
+    assert get_open_conversation_name(chat_list) is None
+    print("OK conversation / sent message")
+
+
+def test_same_text_sent_yesterday_not_counted():
+    """Yesterday's copy of the daily text, or an older copy followed by a newer send, is not today's send"""
+    message = "Good morning! Today's offer: deposit now and get a 10% bonus on every game until midnight."
+    yesterday = parse_hierarchy(_hierarchy(_day_header("Yesterday", 400), _bubble(message, 500),
+                                           _day_header("Today", 800), _bubble("Are you there?", 900, outgoing=False)))
+    assert find_sent_message(yesterday, message) is None
+
+    no_header = parse_hierarchy(_hierarchy(_bubble(message, 500)))
+    assert find_sent_message(no_header, message) is None
+
+    older_copy = parse_hierarchy(_hierarchy(_day_header("Today", 400), _bubble(message, 500),
+                                            _bubble("Another message we sent later", 800)))
+    assert find_sent_message(older_copy, message) is None
+    print("OK same text sent yesterday not counted")
+
+if __name__ == "__main__":
+    test_single_hit()
+    test_multiple_hits_pick_matching_name()
+    test_rows_above_chats_title_ignored()
+    test_stale_single_row_rejected_when_name_required()
+    test_messages_only_and_no_results()
+    test_hidden_nodes_and_bad_xml()
+    test_find_by_selector()
+    test_conversation_and_sent_message()
+    test_same_text_sent_yesterday_not_counted()
+    print("\nOK All tests passed!")
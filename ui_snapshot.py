@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+UI hierarchy snapshot helpers.
+
+Parses the XML returned by driver.page_source into a compact tree of plain
+dicts so screen checks can be done locally from a single Appium round-trip.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+
+# WhatsApp resource ids used when reading search results
+TITLE_ID = "com.whatsapp:id/title"
+CONTACT_ROW_ID = "com.whatsapp:id/contact_row_container"
+CONTACT_NAME_ID = "com.whatsapp:id/conversations_row_contact_name"
+
+# Conversation screen: header name, message entry and message bubble texts
+CONVERSATION_NAME_ID = "com.whatsapp:id/conversation_contact_name"
+ENTRY_ID = "com.whatsapp:id/entry"
+MESSAGE_TEXT_IDS = ("com.whatsapp:id/message_text", "com.whatsapp:id/caption")
+# Delivery ticks shown only in outgoing bubbles, and the day headers between messages
+MESSAGE_STATUS_ID = "com.whatsapp:id/status"
+DATE_DIVIDER_ID = "com.whatsapp:id/conversation_row_date_divider"
+TODAY_LABEL = "Today"
+
+# Search result classifications
+SEARCH_SINGLE_HIT = "single"
+SEARCH_MULTIPLE_HITS = "multiple"
+SEARCH_CHATS_NO_MATCH = "chats_no_match"
+SEARCH_MESSAGES_ONLY = "messages_only"
+SEARCH_NO_RESULTS = "no_results"
+SEARCH_PENDING = "pending"
+
+_BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+def parse_bounds(bounds_text):
+    """Parse a UiAutomator bounds string like '[0,84][1080,220]' into (x1, y1, x2, y2)"""
+    match = _BOUNDS_PATTERN.match(bounds_text or "")
+    if not match:
+        return (0, 0, 0, 0)
+    return tuple(int(value) for value in match.groups())
+
+
+def _build_node(element):
+    """Convert one XML element (and its children) into a compact node dict"""
+    attrs = element.attrib
+    return {
+        'class': attrs.get('class', element.tag),
+        'package': attrs.get('package', ''),
+        'rid': attrs.get('resource-id', ''),
+        'text': attrs.get('text', ''),
+        'desc': attrs.get('content-desc', ''),
+        'bounds': parse_bounds(attrs.get('bounds')),
+        # Older servers omit "displayed"; treat missing as visible
+        'displayed': attrs.get('displayed', 'true') == 'true',
+        'focused': attrs.get('focused', 'false') == 'true',
+        'children': [_build_node(child) for child in element]
+    }
+
+
+def parse_hierarchy(xml_source):
+    """Parse a page_source XML string into a compact node tree, or None if it can't be parsed"""
+    if not xml_source:
+        return None
+    try:
+        root = ET.fromstring(xml_source)
+    except ET.ParseError as e:
+        print(f"[SNAPSHOT] Failed to parse page source: {e}")
+        return None
+    return _build_node(root)
+
+
+def iter_nodes(node):
+    """Yield a node and all of its descendants in document order"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(current['children']))
+
+
+def find_nodes(root, rid=None, text=None, text_contains=None, cls=None, displayed_only=True):
+    """Return all nodes matching every given attribute filter"""
+    matches = []
+    for node in iter_nodes(root):
+        if displayed_only and not node['displayed']:
+            continue
+        if rid is not None and node['rid'] != rid:
+            continue
+        if text is not None and node['text'] != text:
+            continue
+        if text_contains is not None and text_contains not in node['text']:
+            continue
+        if cls is not None and node['class'] != cls:
+            continue
+        matches.append(node)
+    return matches
+
+
+def find_node(root, **filters):
+    """Return the first node matching the filters, or None"""
+    matches = find_nodes(root, **filters)
+    return matches[0] if matches else None
+
+
+# Node keys for the XPath attributes used by the bot's selectors
+_XPATH_ATTRIBUTES = {
+    'text': 'text',
+    'resource-id': 'rid',
+    'content-desc': 'desc',
+    'class': 'class'
+}
+
+_XPATH_PATTERN = re.compile(r"^//(\*|[\w.]+)(?:\[(.*)\])?$")
+_PREDICATE_EQUALS = re.compile(r"^@([\w-]+)\s*=\s*'([^']*)'$")
+_PREDICATE_CONTAINS = re.compile(r"^contains\(\s*@([\w-]+)\s*,\s*'([^']*)'\s*\)$")
+
+
+def parse_simple_xpath(xpath):
+    """Parse the simple XPath form used by our selectors
+
+    Supports //tag or //* with predicates joined by 'and', where each predicate is
+    @attr='value' or contains(@attr, 'value'). Returns (class or None, [(op, node_key, value)])
+    or None if the expression is outside that subset.
+    """
+    match = _XPATH_PATTERN.match(xpath.strip())
+    if not match:
+        return None
+    tag, predicate_text = match.groups()
+    conditions = []
+    if predicate_text:
+        for predicate in predicate_text.split(' and '):
+            predicate = predicate.strip()
+            equals = _PREDICATE_EQUALS.match(predicate)
+            contains = _PREDICATE_CONTAINS.match(predicate)
+            found = equals or contains
+            if not found or found.group(1) not in _XPATH_ATTRIBUTES:
+                return None
+            op = 'eq' if equals else 'contains'
+            conditions.append((op, _XPATH_ATTRIBUTES[found.group(1)], found.group(2)))
+    return (None if tag == '*' else tag, conditions)
+
+
+# UiSelector methods the native selector compiler emits, as (op, node key)
+_UISELECTOR_METHODS = {
+    'text': ('eq', 'text'),
+    'textContains': ('contains', 'text'),
+    'description': ('eq', 'desc'),
+    'descriptionContains': ('contains', 'desc'),
+    'resourceId': ('eq', 'rid'),
+    'resourceIdMatches': ('contains', 'rid'),
+    'className': ('eq', 'class'),
+    'classNameMatches': ('contains', 'class')
+}
+
+_UISELECTOR_PATTERN = re.compile(r"^new UiSelector\(\)((?:\.\w+\(\"(?:[^\"\\]|\\.)*\"\))+)$")
+_UISELECTOR_CALL = re.compile(r"\.(\w+)\(\"((?:[^\"\\]|\\.)*)\"\)")
+# ".*word.*" is the only regex form the compiler writes (resourceIdMatches/classNameMatches)
+_CONTAINS_REGEX = re.compile(r"^\.\*([\w:/ -]+)\.\*$")
+
+
+def parse_uiselector(expression):
+    """Parse a UiSelector chain of the form native_selectors.compile_selector() writes
+
+    Returns [(op, node_key, value)] like parse_simple_xpath(), or None if the
+    expression uses anything else. As on the device, a method called twice
+    keeps only its last value.
+    """
+    match = _UISELECTOR_PATTERN.match(expression.strip())
+    if not match:
+        return None
+    conditions = {}
+    for method, argument in _UISELECTOR_CALL.findall(match.group(1)):
+        if method not in _UISELECTOR_METHODS:
+            return None
+        op, key = _UISELECTOR_METHODS[method]
+        value = re.sub(r"\\(.)", r"\1", argument)
+        if method.endswith('Matches'):
+            contained = _CONTAINS_REGEX.match(value)
+            if not contained:
+                return None
+            value = contained.group(1)
+        conditions[method] = (op, key, value)
+    return list(conditions.values())
+
+
+def _match_conditions(root, cls, conditions, displayed_only):
+    matches = []
+    for node in iter_nodes(root):
+        if displayed_only and not node['displayed']:
+            continue
+        if cls is not None and node['class'] != cls:
+            continue
+        if all(node[key] == expected if op == 'eq' else expected in node[key]
+               for op, key, expected in conditions):
+            matches.append(node)
+    return matches
+
+
+def find_by_selector(root, by, value, displayed_only=True):
+    """Evaluate an Appium (by, value) selector against a snapshot
+
+    Returns the list of matching nodes, or None if the selector can't be evaluated locally.
+    """
+    if by == 'id':
+        return find_nodes(root, rid=value, displayed_only=displayed_only)
+    if by == 'accessibility id':
+        return [node for node in iter_nodes(root)
+                if node['desc'] == value and (node['displayed'] or not displayed_only)]
+    if by == '-android uiautomator':
+        conditions = parse_uiselector(value)
+        return None if conditions is None else _match_conditions(root, None, conditions, displayed_only)
+    if by != 'xpath':
+        return None
+
+    parsed = parse_simple_xpath(value)
+    if parsed is None:
+        return None
+    cls, conditions = parsed
+    return _match_conditions(root, cls, conditions, displayed_only)
+
+
+def node_center(node):
+    """Get the tap point (center) of a node's bounds"""
+    x1, y1, x2, y2 = node['bounds']
+    return ((x1 + x2) // 2, (y1 + y2) // 2)
+
+
+def get_row_name(row):
+    """Extract the chat name shown in a contact row, mirroring the element-based selectors"""
+    # Same priority as the legacy name selectors: exact id, partial id, first TextView
+    name_node = find_node(row, rid=CONTACT_NAME_ID, displayed_only=False)
+    if name_node is None:
+        for node in iter_nodes(row):
+            if 'contact_name' in node['rid'] and node['class'] == 'android.widget.TextView':
+                name_node = node
+                break
+    if name_node is None:
+        name_node = find_node(row, cls='android.widget.TextView', displayed_only=False)
+    return name_node['text'] if name_node is not None else None
+
+
+def classify_search_results(root, chat_name, require_name_match=False):
+    """Classify a search results snapshot for chat_name
+
+    With require_name_match only rows whose readable name contains chat_name are
+    accepted, single or not, and unnamed rows never are (used whenever results of
+    the previous query may still be displayed).
+
+    Returns a dict with:
+        state: one of the SEARCH_* constants
+        rows: list of (row_node, name) visible under the 'Chats' section
+        match: row node to open (single/multiple hits), else None
+        match_name: name shown on the matched row
+    """
+    result = {'state': SEARCH_PENDING, 'rows': [], 'match': None, 'match_name': None}
+    if root is None:
+        return result
+
+    chats_title = find_node(root, rid=TITLE_ID, text='Chats')
+    messages_title = find_node(root, rid=TITLE_ID, text='Messages')
+
+    if chats_title is not None:
+        title_y = chats_title['bounds'][1]
+        rows = [row for row in find_nodes(root, rid=CONTACT_ROW_ID) if row['bounds'][1] > title_y]
+        result['rows'] = [(row, get_row_name(row)) for row in rows]
+
+        search_term = chat_name.lower()
+        name = result['rows'][0][1] if len(rows) == 1 else None
+        stale_row = require_name_match and not (name and search_term in name.lower())
+        if len(rows) == 1 and not stale_row:
+            result['state'] = SEARCH_SINGLE_HIT
+            result['match'] = rows[0]
+            result['match_name'] = result['rows'][0][1]
+            return result
+
+        if len(rows) > 1:
+            # Rows without a readable name are kept as fallbacks, in screen order, unless names are required
+            for row, name in result['rows']:
+                if (not name and not require_name_match) or (name and search_term in name.lower()):
+                    result['state'] = SEARCH_MULTIPLE_HITS
+                    result['match'] = row
+                    result['match_name'] = name or "Unknown"
+                    return result
+
+        result['state'] = SEARCH_CHATS_NO_MATCH
+        return result
+
+    if messages_title is not None:
+        result['state'] = SEARCH_MESSAGES_ONLY
+        return result
+
+    # "No results" only counts when neither section is shown
+    if find_node(root, text_contains='No results') is not None:
+        result['state'] = SEARCH_NO_RESULTS
+
+    return result
+
+
+def get_open_conversation_name(root):
+    """Name in the conversation header if a conversation is open, else None"""
+    if root is None or find_node(root, rid=ENTRY_ID) is None:
+        return None
+    header = find_node(root, rid=CONVERSATION_NAME_ID)
+    return header['text'] if header is not None else None
+
+
+def _squash(text):
+    return " ".join(text.split())
+
+
+def _message_bubbles(node):
+    """[bubble node, outgoing] pairs in a subtree; a bubble is outgoing if the largest
+    container holding only that bubble also holds a delivery status icon"""
+    bubbles, statuses = [], 0
+    for child in node['children']:
+        child_bubbles, child_statuses = _message_bubbles(child)
+        bubbles += child_bubbles
+        statuses += child_statuses
+    if node['displayed'] and node['rid'] in MESSAGE_TEXT_IDS:
+        bubbles.append([node, False])
+    if node['rid'] == MESSAGE_STATUS_ID:
+        statuses += 1
+    if len(bubbles) == 1 and statuses:
+        bubbles[0][1] = True
+    return bubbles, statuses
+
+
+def find_sent_message(root, message, prefix_length=60):
+    """Our newest outgoing bubble (text or photo caption) if it shows message and was sent today, or None
+
+    Only the newest outgoing bubble counts, and only under a "Today" day header,
+    so the same daily text sent yesterday is never taken for today's send. Layouts
+    without delivery icons treat every bubble as outgoing. Only the start of the
+    message is compared because long bubbles are cut off ("Read more").
+    """
+    if root is None or not message.strip():
+        return None
+    bubbles, statuses = _message_bubbles(root)
+    candidates = [node for node, outgoing in bubbles if outgoing or not statuses]
+    if not candidates:
+        return None
+    newest = max(candidates, key=lambda node: node['bounds'][1])
+
+    headers = [node for node in find_nodes(root, rid=DATE_DIVIDER_ID) if node['bounds'][1] <= newest['bounds'][1]]
+    if not headers or max(headers, key=lambda node: node['bounds'][1])['text'].strip().lower() != TODAY_LABEL.lower():
+        return None
+
+    expected = _squash(message)[:prefix_length]
+    shown = _squash(newest['text']).rstrip('…').rstrip('.').rstrip()
+    # A short bubble like "Hi" must not count as a cut-off copy of a longer message
+    if len(shown) < min(len(expected), 20):
+        return None
+    if shown.startswith(expected) or expected.startswith(shown[:prefix_length]):
+        return newest
+    return None
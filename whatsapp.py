@@ -1,174 +1,199 @@
 #!/usr/bin/env python3
 
-from appium.webdriver.webdriver import WebDriver
-from appium.options.android.uiautomator2.base import UiAutomator2Options
 from selenium.webdriver.common.by import By as AppiumBy
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 import time
 import os
+import argparse
 import base64
+import json
 import signal
 import subprocess
-from datetime import datetime, timezone, timedelta
-
-# GMT+7 timezone
-GMT_PLUS_7 = timezone(timedelta(hours=7))
+from ui_snapshot import (parse_hierarchy, classify_search_results, node_center, find_by_selector,
+                         get_open_conversation_name, find_sent_message, SEARCH_SINGLE_HIT, SEARCH_MULTIPLE_HITS, SEARCH_MESSAGES_ONLY,
+                         SEARCH_NO_RESULTS)
+from device_latency import (install_latency_tracking, compute_adaptive_delay, get_screen_size,
+                            get_latency_stats)
+from photo_prep import compute_file_hash, prepare_daily_photo, format_prep_report
+from run_state import (open_run_state, import_legacy_logs, record_chat_result, record_chat_returned,
+                       load_done_chat_keys, load_chat_states, queue_chats, get_run_day, chat_key, STATUS_QUEUED, STATUS_SEARCHING, STATUS_OPENED,
+                       STATUS_COMPOSING, STATUS_SENT, STATUS_FAILED, STATUS_NOT_FOUND,
+                       SEND_UNCONFIRMED_STATUSES)
+from journal import journal_flush, journal_close, get_journal_stats
+from session_recovery import (classify_failure, record_recovery, format_recovery_histogram,
+                              FAILURE_SOFT)
+from device_profiles import lookup_device_profile, remember_device_profile, load_calibrated_profile
+from calibration import check_config_against_snapshot, coordinates_from_snapshot
+from device_configs import (DEVICE_CONFIGS, DEFAULT_DEVICE_CONFIG_NAME, get_device_config, set_device_config,
+                            get_selected_device_config, get_device_config_name, select_device_config,
+                            match_device_config)
+from adb_tools import get_adb_devices, get_installed_app_version, get_screen_resolution, get_device_model
+from run_logs import format_gmt7_time, log_not_found_chat, log_script_event, save_processed_chat
+from chat_plan import analyze_chat_entries, show_selection_menu, parse_row_spec, build_row_selection
+from driver_registry import register_driver, quit_registered_drivers
+from selector_cache import (load_selector_cache, order_selectors, record_selector_hit, record_selector_miss,
+                            get_selector_table)
+from session_trace import open_trace, close_trace, trace_driver, trace_note
+from native_selectors import install_native_selectors, format_native_selector_stats
+from adb_input import install_adb_input, close_adb_shells, format_input_latency_report
+from performance_profile import apply_performance_profile, resolve_profile, restore_device_settings, PERFORMANCE_PROFILES
+from session_bootstrap import (resolve_bootstrap_mode, apply_bootstrap_options, record_bootstrap_failure,
+                               record_first_command, format_bootstrap_report, BOOTSTRAP_MODES)
+from screen_state import (detect_screen, navigate_to_chat_list, format_screen_state_stats, SCREEN_CHAT_LIST,
+                          INNER_SCREENS)
 
 # Configuration: Chat name prefix to remove before searching
 CHAT_NAME_PREFIX_TO_REMOVE = "NepalWin🇳🇵"  # Change this to customize what prefix to remove
 
-# Device-specific coordinate configurations
-DEVICE_CONFIGS = {
-    "Redmi Note 13 Pro": {
-        "photo_select_x": 180,
-        "photo_select_y": 1350,
-        "photo_select_fallback_x": 180,
-        "photo_select_fallback_y": 400,
-        "caption_area_x_offset": 0,  # Offset from center, 0 means use center
-        "caption_area_y": 2330,
-        "caption_fallback_x": 360,
-        "caption_fallback_y": 1400,
-        "send_button_x": 990,
-        "send_button_y": 2310,
-        "search_button_x": 525,
-        "search_button_y": 330
-    },
-
-    "Redmi 9A": {
-        "photo_select_x": 120,
-        "photo_select_y": 670,
-        "photo_select_fallback_x": 180,
-        "photo_select_fallback_y": 400,
-        "caption_area_x_offset": 0,  # Offset from center, 0 means use center
-        "caption_area_y": 1533,
-        "caption_fallback_x": 360,
-        "caption_fallback_y": 1400,
-        "send_button_x": 650,
-        "send_button_y": 1533,
-        "search_button_x": 525,
-        "search_button_y": 225
-    }
-
-    # Add your custom device configurations here
-    # Example:
-    # "Samsung Galaxy S21": {
-    #     "photo_select_x": 200,
-    #     "photo_select_y": 1400,
-    #     ...
-    # }
-}
-
-# Global variable to store selected device configuration
-# Initialize with default to prevent None errors
-SELECTED_DEVICE_CONFIG = None
+# Search result detection mode:
+#   "snapshot" - fetch page_source once per poll and classify it locally (1 round-trip per poll)
+#   "elements" - probe each title/row/name element separately (legacy, 20-60 round-trips per poll)
+SEARCH_RESULT_MODE = "snapshot"
+
+# Stay-in-search mode: after a send, go back only to the search results and type the next
+# query into the still-open search field instead of reopening search from the chat list
+STAY_IN_SEARCH = True
+
+# Message entry mode:
+#   "clipboard" - put the daily message on the device clipboard once and paste it per chat
+#   "type"      - type the full message with mobile: type for every chat (legacy)
+MESSAGE_ENTRY_MODE = "clipboard"
+
+# Element lookup mode:
+#   "native" - send XPath selectors as resource-id / accessibility id / UiSelector lookups
+#              where an equivalent exists (no XML dump of the screen per lookup)
+#   "xpath"  - send every selector as written
+SELECTOR_MODE = "native"
+
+# Input backend for taps, swipes and key presses:
+#   "appium" - send them through the Appium session
+#   "adb"    - write them as `input ...` commands into a persistent adb shell (element queries stay on Appium)
+INPUT_MODE = "appium"
+
+# UiAutomator2 performance profile applied to every session (see performance_profile.py):
+#   "auto"  - the session features bench_uia2_settings.py measured fastest on this device, else "fast"
+#   "fast"  - no idle/acknowledgment waits (session settings only)
+#   "full"  - also compressed tree, no animations and the keyboard-less IME; the last two change
+#             device settings, which are restored at exit (or by the next run after a crash)
+#   "stock" - server and device defaults
+PERFORMANCE_PROFILE = "auto"
+
+# Session bootstrap (see session_bootstrap.py):
+#   "auto" - "fast" once the device has had a good session, else "cold"
+#   "cold" - server install check, device initialization, WhatsApp launched
+#   "fast" - installed server reused, no device initialization, attach to the running WhatsApp
+BOOTSTRAP_MODE = "auto"
+
+# Model, resolution and WhatsApp version of the selected device (key for calibrated profiles)
+DEVICE_IDENTITY = None
 
 # Global variable to store selected ADB device UDID
 SELECTED_ADB_DEVICE = None
 
-def get_device_config():
-    """Get current device config, fallback to default if not set"""
-    global SELECTED_DEVICE_CONFIG
-    if SELECTED_DEVICE_CONFIG is None:
-        print("[WARNING] Device config not set, using default")
-        SELECTED_DEVICE_CONFIG = DEVICE_CONFIGS["default"]
-    return SELECTED_DEVICE_CONFIG
+# Appium server and UiAutomator2 system port (overridden per device by whatsapp_fleet.py workers)
+APPIUM_SERVER_URL = "http://localhost:4723"
+UIAUTOMATOR2_SYSTEM_PORT = None
 
-def select_device_config():
-    """Interactive device selection menu"""
-    global SELECTED_DEVICE_CONFIG
+# Chat list to process
+CHAT_NAME_FILE = "txt/chat_name.txt"
 
-    print("\n" + "="*60)
-    print("[DEVICE] DEVICE CONFIGURATION SETUP")
-    print("="*60)
+# Unattended mode: no prompts. The device is auto-selected (or given with --udid), the
+# coordinate profile comes from --device-config or the device profile cache, and the rows
+# from ROW_SELECTION ({'mode', 'start', 'end'} as returned by parse_row_spec; None = ask)
+NON_INTERACTIVE = False
+ROW_SELECTION = None
 
-    # List all available device configurations
-    device_names = list(DEVICE_CONFIGS.keys())
+# Fleet worker progress file (JSON), written for whatsapp_fleet.py
+WORKER_STATUS_FILE = None
 
-    print("\n[DEVICE] Available device configurations:")
-    for idx, device_name in enumerate(device_names, 1):
-        print(f"{idx}. {device_name}")
+# Session trace file (--trace); every Appium command is recorded for replay_trace.py
+TRACE_FILE = None
 
-    print(f"\n[DEVICE] Enter device number (1-{len(device_names)}) or press ENTER for default:")
 
-    while True:
-        try:
-            choice = input("Device selection: ").strip()
+# Screens whose coordinates were already checked against the live hierarchy this run
+_validated_screens = set()
 
-            # Default choice
-            if choice == "":
-                selected_device = "default"
-                print(f"[DEVICE] Using default device configuration")
-                break
+def validate_device_config(driver, screen):
+    """Check the profile's tap points for a screen against one hierarchy snapshot (once per run)
 
-            # Validate numeric choice
-            choice_num = int(choice)
-            if 1 <= choice_num <= len(device_names):
-                selected_device = device_names[choice_num - 1]
-                print(f"[DEVICE] Selected device: {selected_device}")
-                break
-            else:
-                print(f"[ERROR] Please enter a number between 1 and {len(device_names)}")
+    Coordinates that miss their element are reported and replaced with the
+    element's center for this run only. The snapshot heuristics can pick the
+    wrong element during a live send, so nothing is saved here; run
+    calibrate_device.py to store a calibrated profile.
+    """
+    if screen in _validated_screens:
+        return
+    _validated_screens.add(screen)
 
-        except ValueError:
-            print("[ERROR] Please enter a valid number or press ENTER for default")
-        except KeyboardInterrupt:
-            print("\n[ERROR] Device selection cancelled")
-            return None
+    config = get_device_config()
+    try:
+        root = parse_hierarchy(driver.page_source)
+        width = get_screen_size(driver)['width']
+    except Exception as e:
+        print(f"[CALIBRATION] Could not read the {screen} screen: {e}")
+        return
 
-    SELECTED_DEVICE_CONFIG = DEVICE_CONFIGS[selected_device]
+    mismatched = check_config_against_snapshot(config, screen, root, width)
+    if mismatched is None:
+        print(f"[CALIBRATION] {screen}: elements not found in the hierarchy, coordinates not checked")
+        return
+    if not mismatched:
+        print(f"[CALIBRATION] {screen}: coordinates OK")
+        return
 
-    # Display selected coordinates
-    print(f"\n[DEVICE] Loaded coordinates for '{selected_device}':")
-    print(f"   - Photo select: ({SELECTED_DEVICE_CONFIG['photo_select_x']}, {SELECTED_DEVICE_CONFIG['photo_select_y']})")
-    print(f"   - Caption area Y: {SELECTED_DEVICE_CONFIG['caption_area_y']}")
-    print(f"   - Send button: ({SELECTED_DEVICE_CONFIG['send_button_x']}, {SELECTED_DEVICE_CONFIG['send_button_y']})")
-    print(f"   - Search button: ({SELECTED_DEVICE_CONFIG['search_button_x']}, {SELECTED_DEVICE_CONFIG['search_button_y']})")
-    print("="*60)
+    corrected = coordinates_from_snapshot(screen, root, width)
+    set_device_config({**config, **corrected}, get_device_config_name())
+    changes = ", ".join(f"{key} {config[key]}->{corrected[key]}" for key in mismatched if key in corrected)
+    print(f"[CALIBRATION] {screen}: coordinates were off, corrected for this run ({changes}); "
+          f"run calibrate_device.py to store them")
+    log_script_event("calibration", f"{screen} coordinates off, corrected for this run: {changes}")
+
+def resolve_device_config(udid, app_version=None):
+    """Pick the coordinate profile for a device without asking when possible
+
+    Order: calibrated profile (model + resolution + WhatsApp version), device
+    profile cache (model + resolution), then the model name matched against
+    DEVICE_CONFIGS, then the interactive menu (or the default profile in
+    unattended mode). The choice is remembered for the next run, except the
+    unattended default, which is only a guess.
+    """
+    global DEVICE_IDENTITY
+
+    model = get_device_model(udid)
+    resolution = get_screen_resolution(udid)
+    DEVICE_IDENTITY = {'model': model, 'resolution': resolution, 'version': app_version}
+
+    calibrated = load_calibrated_profile(model, resolution, app_version)
+    if calibrated:
+        # Fallback coordinates aren't calibrated; take them from the default profile
+        config = set_device_config({**DEVICE_CONFIGS[DEFAULT_DEVICE_CONFIG_NAME], **calibrated}, "calibrated")
+        print(f"[DEVICE] {model} ({resolution}): using calibrated profile for WhatsApp {app_version}")
+        return config
+
+    profile_name = lookup_device_profile(model, resolution)
+    source = "profile cache"
+
+    if profile_name not in DEVICE_CONFIGS:
+        profile_name = match_device_config(model)
+        source = "model name"
+
+    if profile_name is None:
+        if NON_INTERACTIVE:
+            profile_name = DEFAULT_DEVICE_CONFIG_NAME
+            source = "default"
+            print("[DEVICE] No profile known for this device, using the default without remembering it")
+        elif select_device_config() is None:
+            return None
+        else:
+            profile_name = get_device_config_name()
+            source = "menu"
 
-    return SELECTED_DEVICE_CONFIG
+    config = set_device_config(DEVICE_CONFIGS[profile_name], profile_name)
+    print(f"[DEVICE] {model} ({resolution or 'unknown resolution'}): using '{profile_name}' ({source})")
+    if source != "default":
+        remember_device_profile(model, resolution, profile_name)
+    return config
 
-def get_adb_devices():
-    """Get list of connected ADB devices"""
-    try:
-        result = subprocess.run(['adb', 'devices', '-l'],
-                              capture_output=True,
-                              text=True,
-                              check=True)
-
-        lines = result.stdout.strip().split('\n')
-        devices = []
-
-        # Skip first line "List of devices attached"
-        for line in lines[1:]:
-            if line.strip() and 'device' in line:
-                parts = line.split()
-                if len(parts) >= 2:
-                    udid = parts[0]
-                    # Extract model and product info if available
-                    model = "Unknown"
-                    product = "Unknown"
-
-                    for part in parts:
-                        if part.startswith('model:'):
-                            model = part.split(':')[1]
-                        elif part.startswith('product:'):
-                            product = part.split(':')[1]
-
-                    devices.append({
-                        'udid': udid,
-                        'model': model,
-                        'product': product
-                    })
-
-        return devices
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Failed to get ADB devices: {e}")
-        return []
-    except FileNotFoundError:
-        print("[ERROR] ADB command not found. Please ensure ADB is installed and in PATH.")
-        return []
 
 def select_adb_device():
     """Interactive ADB device selection menu"""
@@ -188,6 +213,10 @@ def select_adb_device():
         print("  3. Run 'adb devices' to verify connection")
         return None
 
+    if len(devices) > 1 and NON_INTERACTIVE:
+        print(f"[ERROR] {len(devices)} devices connected; pass --udid to choose one in unattended mode")
+        return None
+
     if len(devices) == 1:
         # Only one device, auto-select it
         device = devices[0]
@@ -257,91 +286,54 @@ def clean_chat_name(chat_name):
         print(f"[CLEAN] Using name as-is: '{chat_name}'")
         return chat_name.strip()
 
-def get_gmt7_time():
-    """Get current time in GMT+7 timezone"""
-    return datetime.now(GMT_PLUS_7)
-
-def format_gmt7_time(dt=None):
-    """Format datetime as string in GMT+7"""
-    if dt is None:
-        dt = get_gmt7_time()
-    return dt.strftime("%Y-%m-%d %H:%M:%S GMT+7")
-
-# Global variable to track if timestamp was written for this session
-_timestamp_written_today = False
-
-def log_not_found_chat(chat_name, row_number=None):
-    """Log chat name that was not found to a file with timestamp"""
-    global _timestamp_written_today
-
-    try:
-        log_filename = f"txt/not_found_chats_{get_gmt7_time().strftime('%Y%m%d')}.txt"
 
-        # Create txt directory if it doesn't exist
-        os.makedirs('txt', exist_ok=True)
 
-        with open(log_filename, 'a', encoding='utf-8') as file:
-            # Write timestamp only once per script run
-            if not _timestamp_written_today:
-                timestamp = format_gmt7_time()
-                file.write(f"[{timestamp}]\n")
-                _timestamp_written_today = True
 
-            file.write(f"{chat_name}\n")
 
-        print(f"[LOG] Recorded not found chat: {chat_name} in {log_filename}")
-
-    except Exception as e:
-        print(f"[ERROR] Failed to log not found chat: {str(e)}")
-
-
-def log_script_event(event_type, message=""):
-    """Log script start/end events with GMT+7 timestamp"""
-    try:
-        log_filename = f"txt/script_log_{get_gmt7_time().strftime('%Y%m%d')}.txt"
-
-        # Create txt directory if it doesn't exist
-        os.makedirs('txt', exist_ok=True)
-
-        timestamp = format_gmt7_time()
-        log_entry = f"[{timestamp}] {event_type.upper()}: {message}\n"
-
-        with open(log_filename, 'a', encoding='utf-8') as file:
-            file.write(log_entry)
-
-        print(f"[LOG] {event_type.upper()}: {message}")
-
-    except Exception as e:
-        print(f"[ERROR] Failed to log script event: {str(e)}")
 
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
     print("\033[1;35m\n\n🛑 Stopping automation (Ctrl+C pressed)...\033[0m")
     print("Cleaning up...")
-    try:
-        # Try to quit driver if it exists
-        import gc
-        for obj in gc.get_objects():
-            if hasattr(obj, 'quit') and 'webdriver' in str(type(obj)):
-                obj.quit()
-                break
-    except:
-        pass
+    # Write out queued processed/not-found/log records before exiting
+    journal_close()
+    close_trace()
+    close_adb_shells()
+    restore_device_settings()
+    # Quit the sessions setup_driver() registered (no heap scan)
+    quit_registered_drivers()
     os._exit(0)
 
-def setup_driver():
-    """Initialize Appium driver with Android capabilities"""
+def setup_driver(mode=None):
+    """Initialize Appium driver with Android capabilities
+
+    mode is the bootstrap mode, "cold" or "fast" (defaults to BOOTSTRAP_MODE).
+    Hard recovery asks for "fast" first and "cold" when that fails; an "auto"
+    start that picked "fast" falls back to "cold" itself.
+    """
     global SELECTED_ADB_DEVICE
 
+    requested = mode or BOOTSTRAP_MODE
+    mode = resolve_bootstrap_mode(requested, SELECTED_ADB_DEVICE)
+
+    # Imported here so planning/config/log code paths don't pay for the WebDriver stack
+    from appium.webdriver.webdriver import WebDriver
+    from appium.options.android.uiautomator2.base import UiAutomator2Options
+
     options = UiAutomator2Options()
     options.platform_name = "Android"
     options.device_name = "Android Device"
     options.automation_name = "UiAutomator2"
     options.app_package = "com.whatsapp"
-    options.app_activity = "com.whatsapp.home.ui.HomeActivity"
+    if mode == "cold":
+        options.app_activity = "com.whatsapp.home.ui.HomeActivity"
     options.no_reset = True
     options.full_reset = False
 
+    # Separate UiAutomator2 server port per device so parallel sessions don't collide
+    if UIAUTOMATOR2_SYSTEM_PORT:
+        options.system_port = UIAUTOMATOR2_SYSTEM_PORT
+
     # Set specific device UDID if selected
     if SELECTED_ADB_DEVICE:
         options.udid = SELECTED_ADB_DEVICE
@@ -351,11 +343,31 @@ def setup_driver():
 
     # Add session stability options
     options.new_command_timeout = 300  # 5 minutes timeout
-    options.uiautomator2_server_launch_timeout = 60000  # 60 seconds
-    options.uiautomator2_server_install_timeout = 60000  # 60 seconds
+    apply_bootstrap_options(options, mode)
 
     # Connect to Appium server
-    driver = WebDriver("http://localhost:4723", options=options)
+    print(f"[DRIVER] Bootstrapping {mode} session")
+    start = time.perf_counter()
+    try:
+        driver = WebDriver(APPIUM_SERVER_URL, options=options)
+    except Exception as e:
+        record_bootstrap_failure(mode, SELECTED_ADB_DEVICE)
+        if mode == "fast" and requested == "auto":
+            print(f"[DRIVER] Fast session failed, bootstrapping cold: {e}")
+            return setup_driver("cold")
+        raise
+    session_seconds = time.perf_counter() - start
+    install_latency_tracking(driver)
+    if SELECTOR_MODE == "native":
+        install_native_selectors(driver)
+    if INPUT_MODE == "adb":
+        install_adb_input(driver, SELECTED_ADB_DEVICE)
+    # Outermost wrapper: traces keep the logical selectors, durations include the wrappers
+    trace_driver(driver)
+    register_driver(driver)
+    record_first_command(driver, mode, SELECTED_ADB_DEVICE, session_seconds, start)
+    # Every new session, including recovered ones, starts from the same settings
+    apply_performance_profile(driver, SELECTED_ADB_DEVICE, resolve_profile(PERFORMANCE_PROFILE, DEVICE_IDENTITY))
     return driver
 
 def is_driver_alive(driver):
@@ -366,8 +378,99 @@ def is_driver_alive(driver):
     except Exception:
         return False
 
-def recover_session(driver, max_attempts=3):
-    """Attempt to recover the Appium session with multiple strategies"""
+def recover_by_navigation(driver, max_steps=5):
+    """Soft recovery: walk back to the chat list on the existing session, one detected screen per step"""
+    try:
+        if navigate_to_chat_list(driver, max_steps=max_steps)['state'] == SCREEN_CHAT_LIST:
+            return True
+        # Screen not recognised or WhatsApp not responding to navigation: bring it back to the front
+        driver.activate_app("com.whatsapp")
+        return bool(wait_for_ui(driver, 'main_screen', timeout=3.0, label='recovery_chat_list'))
+    except Exception as e:
+        print(f"[RECOVERY] Navigation recovery failed: {e}")
+        return False
+
+def _fast_session_recovery(driver):
+    """Hard recovery fast path: new session on the warm UiAutomator2 server, no fixed sleeps"""
+    if driver:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    try:
+        print("[RECOVERY] Creating fast-path session (skip server install / device init)...")
+        new_driver = setup_driver("fast")
+    except Exception as e:
+        print(f"[RECOVERY] Fast-path session failed: {e}")
+        return None
+
+    if recover_by_navigation(new_driver):
+        return new_driver
+
+    # Screen may have gone off; unlock and try once more before giving up on the fast path
+    if turn_screen_on_and_unlock(new_driver) and recover_by_navigation(new_driver):
+        return new_driver
+
+    print("[RECOVERY] Fast-path session is up but WhatsApp is not on the chat list")
+    try:
+        new_driver.quit()
+    except Exception:
+        pass
+    return None
+
+def recover_session(driver, max_attempts=3, error=None):
+    """Recover from a failure: navigation for soft failures, a new session for hard ones
+
+    Hard failures try a fast-path session first and fall back to the full
+    setup/unlock/open sequence. Every recovery is timed into the recovery histogram.
+    """
+    start = time.time()
+
+    # The error text is checked first so a known-dead session isn't probed again
+    if driver is not None and classify_failure(error) == FAILURE_SOFT and is_driver_alive(driver):
+        print("[RECOVERY] Soft failure, recovering by navigation...")
+        if recover_by_navigation(driver):
+            record_recovery('navigation', time.time() - start, True)
+            print(f"[RECOVERY] Back on the chat list in {time.time() - start:.2f}s")
+            return driver
+        record_recovery('navigation', time.time() - start, False)
+        print("[RECOVERY] Navigation did not reach the chat list, recreating the session")
+
+    start = time.time()
+    new_driver = _fast_session_recovery(driver)
+    record_recovery('fast_session', time.time() - start, new_driver is not None)
+    if new_driver:
+        print(f"[RECOVERY] Session recovered via fast path in {time.time() - start:.2f}s")
+        return new_driver
+
+    start = time.time()
+    new_driver = _full_session_recovery(None, max_attempts)
+    record_recovery('full_session', time.time() - start, new_driver is not None)
+    return new_driver
+
+def print_recovery_stats():
+    """Print the recovery-time histogram and log it with the run"""
+    lines = format_recovery_histogram()
+    if not lines:
+        return
+    print("[RECOVERY] Recovery times:")
+    for line in lines:
+        print(f"   - {line}")
+    log_script_event("recovery", "; ".join(lines))
+
+def print_bootstrap_stats():
+    """Print time-to-first-command per session bootstrap mode and log it with the run"""
+    lines = format_bootstrap_report(SELECTED_ADB_DEVICE)
+    if not lines:
+        return
+    print("[BOOTSTRAP] Session startup:")
+    for line in lines:
+        print(f"   - {line}")
+    log_script_event("bootstrap", "; ".join(lines))
+
+def _full_session_recovery(driver, max_attempts=3):
+    """Full recovery: fresh session with server install/device init, unlock and reopen WhatsApp"""
     for attempt in range(max_attempts):
         try:
             print(f"[RECOVERY] Attempting to recover Appium session... (Attempt {attempt + 1}/{max_attempts})")
@@ -387,7 +490,7 @@ def recover_session(driver, max_attempts=3):
             # Strategy 3: Create new session with enhanced error handling
             try:
                 print("[RECOVERY] Creating new Appium session...")
-                new_driver = setup_driver()
+                new_driver = setup_driver("cold")
                 print("[RECOVERY] New session created successfully")
             except Exception as setup_error:
                 print(f"[RECOVERY] Failed to create new session: {setup_error}")
@@ -474,8 +577,8 @@ def turn_screen_on_and_unlock(driver):
         driver.press_keycode(224)  # KEYCODE_WAKEUP (safer than power toggle)
         time.sleep(.5)
         
-        # Verify screen is responsive
-        screen_size = driver.get_window_size()
+        # Verify screen is responsive (also primes the cached screen size)
+        screen_size = get_screen_size(driver)
         print(f"Screen active - size: {screen_size['width']}x{screen_size['height']}")
         
         # Single wake signal and minimal user activity to prevent sleep
@@ -491,135 +594,149 @@ def turn_screen_on_and_unlock(driver):
 
 
 
+# Time-to-ready per WhatsApp launch attempt: dicts with method, attempt, ready, seconds
+_startup_timings = []
+
 def wait_for_whatsapp_loaded(driver, timeout=15):
     """Wait for WhatsApp to be fully loaded with proper backend checks"""
     print("[LOAD] Waiting for WhatsApp to fully load...")
-    wait = WebDriverWait(driver, timeout)
 
     try:
-        # Wait for main WhatsApp elements to be present and stable
-        main_indicators = [
-            # Main chat list indicators
-            (AppiumBy.XPATH, "//*[@text='WhatsApp']"),
-            (AppiumBy.XPATH, "//*[@text='Chats']"),
-            (AppiumBy.ID, "com.whatsapp:id/menuitem_search"),
-            (AppiumBy.ID, "com.whatsapp:id/search"),
-            # Floating action button (new chat)
-            (AppiumBy.ID, "com.whatsapp:id/fab"),
-        ]
-
-        # Wait for at least one main indicator to be present
-        element_found = False
-        for selector_type, selector in main_indicators:
-            try:
-                element = wait.until(EC.presence_of_element_located((selector_type, selector)))
-                if element.is_displayed():
-                    print(f"[LOAD] Found main element: {selector}")
-                    element_found = True
-                    break
-            except TimeoutException:
-                continue
-
-        if not element_found:
-            print("[LOAD] No main WhatsApp elements found")
+        # One snapshot per poll classifies the screen
+        def main_screen_reached(drv):
+            snapshot = detect_screen(drv)
+            if snapshot['state'] in INNER_SCREENS:
+                # WhatsApp resumed on an open chat, search or picker: walk back instead of waiting it out
+                snapshot = navigate_to_chat_list(drv, snapshot=snapshot)
+            return snapshot if snapshot['state'] == SCREEN_CHAT_LIST else None
+
+        snapshot = wait_for_ui(driver, main_screen_reached, timeout=timeout, poll_interval=0.3,
+                               label='whatsapp_main')
+        if not snapshot:
+            print("[LOAD] WhatsApp chat list not detected")
             return False
+        print(f"[LOAD] Chat list detected (confidence {snapshot['confidence']:.2f})")
 
-        # Additional stability check - wait a bit more for backend to settle
-        print("[LOAD] Main elements found, waiting for backend stability...")
-        time.sleep(2.5)  # Allow backend processes to complete
-
-        # Verify app is still responsive
-        try:
-            driver.get_window_size()  # Simple responsiveness test
-            print("[LOAD] WhatsApp is fully loaded and responsive")
-            return True
-        except:
-            print("[LOAD] App became unresponsive")
-            return False
+        # Additional stability check - give the chat list a moment to populate
+        if 'chat_rows' not in snapshot['signals']:
+            print("[LOAD] No chat rows yet, waiting for chat list to populate...")
+            wait_for_ui(driver, 'chat_rows', timeout=2.5)
+        print("[LOAD] WhatsApp is fully loaded and responsive")
+        return True
 
     except Exception as e:
         print(f"[LOAD] Error waiting for WhatsApp: {e}")
         return False
 
+def _timed_launch(driver, method, attempt, launch):
+    """Run a launch action, wait for WhatsApp to be ready and record the time-to-ready"""
+    start = time.time()
+    ready = False
+    try:
+        ready = bool(launch()) and wait_for_whatsapp_loaded(driver)
+        return ready
+    finally:
+        _startup_timings.append({
+            'method': method,
+            'attempt': attempt,
+            'ready': ready,
+            'seconds': time.time() - start
+        })
+
+def print_startup_timing_report():
+    """Print time-to-ready for every launch method tried, and log the winning one"""
+    if not _startup_timings:
+        return
+    print("[STARTUP] WhatsApp launch timing:")
+    for timing in _startup_timings:
+        status = "ready" if timing['ready'] else "not ready"
+        print(f"   - Attempt {timing['attempt']} {timing['method']}: {status} after {timing['seconds']:.2f}s")
+
+    total = sum(timing['seconds'] for timing in _startup_timings)
+    ready = [timing for timing in _startup_timings if timing['ready']]
+    if ready:
+        log_script_event("startup", f"WhatsApp ready via {ready[-1]['method']} in {ready[-1]['seconds']:.2f}s "
+                                    f"(attempt {ready[-1]['attempt']}, {len(_startup_timings)} launches, total {total:.2f}s)")
+    else:
+        log_script_event("startup", f"WhatsApp not ready after {len(_startup_timings)} launches, total {total:.2f}s")
+
 def open_whatsapp_business(driver):
     """Open WhatsApp application with improved reliability and loading detection"""
     max_attempts = 3
+    _startup_timings.clear()
 
-    for attempt in range(max_attempts):
-        print(f"Opening WhatsApp... (Attempt {attempt + 1}/{max_attempts})")
+    try:
+        for attempt in range(1, max_attempts + 1):
+            print(f"Opening WhatsApp... (Attempt {attempt}/{max_attempts})")
 
-        try:
-            # Method 1: Use activate_app first (most reliable)
-            print("[OPEN] Trying activate_app method...")
-            driver.activate_app("com.whatsapp")
-            time.sleep(1)  # Brief wait for app launch
-
-            # Check if app actually opened
-            if wait_for_whatsapp_loaded(driver):
-                print("[SUCCESS] WhatsApp opened using activate_app!")
-                return True
-            else:
+            try:
+                # Method 1: Use activate_app first (most reliable)
+                print("[OPEN] Trying activate_app method...")
+
+                def activate():
+                    driver.activate_app("com.whatsapp")
+                    return True
+
+                if _timed_launch(driver, 'activate_app', attempt, activate):
+                    print("[SUCCESS] WhatsApp opened using activate_app!")
+                    return True
                 print("[FAIL] activate_app launched but app not properly loaded")
 
-        except Exception as e:
-            print(f"[FAIL] activate_app failed: {str(e)}")
+            except Exception as e:
+                print(f"[FAIL] activate_app failed: {str(e)}")
 
-        try:
-            # Method 2: Try start_activity as fallback
-            print("[OPEN] Trying start_activity method...")
-            driver.start_activity("com.whatsapp", "com.whatsapp.home.ui.HomeActivity")
-            time.sleep(1.5)
-
-            if wait_for_whatsapp_loaded(driver):
-                print("[SUCCESS] WhatsApp opened using start_activity!")
-                return True
-            else:
-                print("[FAIL] start_activity launched but app not properly loaded")
+            try:
+                # Method 2: Try start_activity as fallback
+                print("[OPEN] Trying start_activity method...")
 
-        except Exception as e2:
-            print(f"[FAIL] start_activity failed: {str(e2)}")
+                def start_activity():
+                    driver.start_activity("com.whatsapp", "com.whatsapp.home.ui.HomeActivity")
+                    return True
 
-        try:
-            # Method 3: Find and tap WhatsApp icon with better detection
-            print("[OPEN] Trying icon tap method...")
-
-            # Enhanced icon search with more selectors
-            icon_selectors = [
-                (AppiumBy.XPATH, "//android.widget.TextView[@text='WhatsApp']"),
-                (AppiumBy.XPATH, "//android.widget.TextView[@text='WA']"),
-                (AppiumBy.XPATH, "//*[contains(@text, 'WhatsApp')]"),
-                (AppiumBy.XPATH, "//*[@content-desc='WhatsApp']"),
-                (AppiumBy.XPATH, "//*[contains(@content-desc, 'WhatsApp')]")
-            ]
-
-            icon_found = False
-            for selector_type, selector in icon_selectors:
-                try:
-                    whatsapp_element = driver.find_element(selector_type, selector)
-                    if whatsapp_element.is_displayed():
-                        whatsapp_element.click()
-                        time.sleep(1.5)
+                if _timed_launch(driver, 'start_activity', attempt, start_activity):
+                    print("[SUCCESS] WhatsApp opened using start_activity!")
+                    return True
+                print("[FAIL] start_activity launched but app not properly loaded")
 
-                        if wait_for_whatsapp_loaded(driver):
-                            print(f"[SUCCESS] WhatsApp opened by tapping icon!")
+            except Exception as e2:
+                print(f"[FAIL] start_activity failed: {str(e2)}")
+
+            try:
+                # Method 3: Find and tap WhatsApp icon from a single hierarchy snapshot
+                print("[OPEN] Trying icon tap method...")
+
+                icon_selectors = [
+                    (AppiumBy.XPATH, "//android.widget.TextView[@text='WhatsApp']"),
+                    (AppiumBy.XPATH, "//android.widget.TextView[@text='WA']"),
+                    (AppiumBy.XPATH, "//*[contains(@text, 'WhatsApp')]"),
+                    (AppiumBy.XPATH, "//*[@content-desc='WhatsApp']"),
+                    (AppiumBy.XPATH, "//*[contains(@content-desc, 'WhatsApp')]")
+                ]
+
+                def tap_icon():
+                    root = parse_hierarchy(driver.page_source)
+                    for selector in icon_selectors:
+                        matches = find_by_selector(root, *selector) if root is not None else None
+                        if matches:
+                            driver.tap([node_center(matches[0])])
                             return True
-                        else:
-                            print(f"[FAIL] Icon tap launched but app not properly loaded")
-                        icon_found = True
-                        break
-                except:
-                    continue
+                    print("[FAIL] WhatsApp icon not found on current screen")
+                    return False
+
+                if _timed_launch(driver, 'icon_tap', attempt, tap_icon):
+                    print(f"[SUCCESS] WhatsApp opened by tapping icon!")
+                    return True
 
-            if not icon_found:
-                print("[FAIL] WhatsApp icon not found on current screen")
+            except Exception as e3:
+                print(f"[FAIL] Icon tap method failed: {str(e3)}")
 
-        except Exception as e3:
-            print(f"[FAIL] Icon tap method failed: {str(e3)}")
+            # If this wasn't the last attempt, wait before retrying
+            if attempt < max_attempts:
+                print(f"[RETRY] All methods failed, waiting before attempt {attempt + 1}...")
+                time.sleep(3)
 
-        # If this wasn't the last attempt, wait before retrying
-        if attempt < max_attempts - 1:
-            print(f"[RETRY] All methods failed, waiting before attempt {attempt + 2}...")
-            time.sleep(3)
+    finally:
+        print_startup_timing_report()
 
     print("[ERROR] All attempts failed to open WhatsApp properly")
     print("Please ensure:")
@@ -646,196 +763,73 @@ def read_daily_message():
         return None
 
 
-def analyze_chat_entries():
-    """Analyze txt/chat_name.txt and categorize entries"""
-    try:
-        with open('txt/chat_name.txt', 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-        total_entries = 0
-        phone_numbers = 0
-        groups = 0
-        all_entries = []
-
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            # Skip empty lines and comments
-            if line and not line.startswith('#'):
-                # Parse formatted entries like "  - Row 982: NepalWin🇳🇵Shankartr88"
-                chat_name = line
-                original_row = line_num
-
-                # Check if line has the "- Row X:" format
-                if "- Row" in line and ":" in line:
-                    parts = line.split(":", 1)
-                    if len(parts) == 2:
-                        # Extract row number from "- Row 982" part
-                        row_part = parts[0].strip()
-                        if "Row" in row_part:
-                            try:
-                                row_number = int(row_part.split("Row")[1].strip())
-                                original_row = row_number
-                            except:
-                                pass  # Keep original line_num if parsing fails
 
-                        # Extract chat name from the part after ":"
-                        chat_name = parts[1].strip()
 
-                # Skip if chat name is empty after parsing
-                if not chat_name:
-                    continue
 
-                all_entries.append((original_row, chat_name))
-                total_entries += 1
 
-                # Check if it's a phone number (contains only digits and +)
-                clean_for_check = chat_name.replace('NepalWin🇳🇵', '').replace('+', '').replace(' ', '').replace('-', '')
-                if clean_for_check.isdigit():
-                    phone_numbers += 1
-                else:
-                    groups += 1
+def load_processed_chats_today():
+    """Load the keys of chats already handled today (GMT+7 day) from the run-state store
 
-        return {
-            'total': total_entries,
-            'phones': phone_numbers,
-            'groups': groups,
-            'entries': all_entries
-        }
+    Returns (processed_keys, log_file, run_day). Old processed/not-found text
+    logs are imported into the store the first time they are seen.
+    """
+    run_day = get_run_day()
+    log_file = f"txt/processed_chats_{run_day}.txt"
 
-    except FileNotFoundError:
-        print("[ERROR] txt/chat_name.txt not found!")
-        return None
+    processed_chats = set()
+    try:
+        open_run_state()
+        imported = import_legacy_logs()
+        if imported:
+            print(f"[STATE] Imported {imported} records from old processed/not-found logs")
+        processed_chats = load_done_chat_keys(run_day)
+        print(f"Loaded {len(processed_chats)} previously processed chats for {run_day}")
     except Exception as e:
-        print(f"[ERROR] Error analyzing chat entries: {str(e)}")
-        return None
+        print(f"Error loading processed chats: {str(e)}")
 
-def show_selection_menu(analysis):
-    """Show interactive menu for row selection"""
-    print("\n" + "="*60)
-    print("[TARGET] CHAT TARGETING MENU")
-    print("="*60)
-    print(f"[STATS] Total entries in file: {analysis['total']} ({analysis['phones']} phones + {analysis['groups']} groups)")
-    print()
-    print("[TARGET] Row Selection Options:")
-    print("1. Process all entries (default)")
-    print("2. Start from specific row")
-    print("3. Process specific range")
-    print("4. Process only first N entries")
-    print()
+    return processed_chats, log_file, run_day
 
-    while True:
-        try:
-            choice = input("Enter your choice (1-4) or press ENTER for default: ").strip()
-
-            # Default choice (process all)
-            if choice == "" or choice == "1":
-                return {
-                    'mode': 'all',
-                    'start': 1,
-                    'end': analysis['total'],
-                    'entries': analysis['entries']
-                }
-
-            # Start from specific row
-            elif choice == "2":
-                while True:
-                    try:
-                        start_row = input(f"Enter starting row number (1-{analysis['total']}): ").strip()
-                        start_row = int(start_row)
-                        if 1 <= start_row <= analysis['total']:
-                            selected_entries = analysis['entries'][start_row-1:]
-                            print(f"[SUCCESS] Will process {len(selected_entries)} entries starting from row {start_row}")
-                            return {
-                                'mode': 'start_from',
-                                'start': start_row,
-                                'end': analysis['total'],
-                                'entries': selected_entries
-                            }
-                        else:
-                            print(f"[ERROR] Please enter a number between 1 and {analysis['total']}")
-                    except ValueError:
-                        print("[ERROR] Please enter a valid number")
-
-            # Process specific range
-            elif choice == "3":
-                while True:
-                    try:
-                        start_row = input(f"Enter starting row (1-{analysis['total']}): ").strip()
-                        start_row = int(start_row)
-                        if not (1 <= start_row <= analysis['total']):
-                            print(f"[ERROR] Start row must be between 1 and {analysis['total']}")
-                            continue
-
-                        end_row = input(f"Enter ending row ({start_row}-{analysis['total']}): ").strip()
-                        end_row = int(end_row)
-                        if not (start_row <= end_row <= analysis['total']):
-                            print(f"[ERROR] End row must be between {start_row} and {analysis['total']}")
-                            continue
-
-                        selected_entries = analysis['entries'][start_row-1:end_row]
-                        print(f"[SUCCESS] Will process {len(selected_entries)} entries from row {start_row} to {end_row}")
-                        return {
-                            'mode': 'range',
-                            'start': start_row,
-                            'end': end_row,
-                            'entries': selected_entries
-                        }
-                    except ValueError:
-                        print("[ERROR] Please enter valid numbers")
-
-            # Process only first N entries
-            elif choice == "4":
-                while True:
-                    try:
-                        count = input(f"Enter number of entries to process (1-{analysis['total']}): ").strip()
-                        count = int(count)
-                        if 1 <= count <= analysis['total']:
-                            selected_entries = analysis['entries'][:count]
-                            print(f"[SUCCESS] Will process first {count} entries")
-                            return {
-                                'mode': 'first_n',
-                                'start': 1,
-                                'end': count,
-                                'entries': selected_entries
-                            }
-                        else:
-                            print(f"[ERROR] Please enter a number between 1 and {analysis['total']}")
-                    except ValueError:
-                        print("[ERROR] Please enter a valid number")
+def set_chat_state(run_day, original_row, chat_name, state):
+    """Persist a send-cycle transition (searching/opened/composing) for a chat"""
+    try:
+        record_chat_result(chat_name, state, original_row, day=run_day)
+    except Exception as e:
+        print(f"[ERROR] Failed to record chat state: {e}")
 
-            else:
-                print("[ERROR] Please enter 1, 2, 3, 4, or press ENTER for default")
+def set_chat_returned(run_day, chat_name):
+    """Persist the return to the chat list after a chat, keeping its send outcome"""
+    try:
+        record_chat_returned(chat_name, day=run_day)
+    except Exception as e:
+        print(f"[ERROR] Failed to record chat state: {e}")
 
-        except KeyboardInterrupt:
-            print("\n[ERROR] Operation cancelled by user")
-            return None
+def is_conversation_open(driver, chat_name):
+    """True if the conversation with chat_name is the screen currently shown"""
+    try:
+        name = get_open_conversation_name(parse_hierarchy(driver.page_source))
+    except Exception:
+        return False
+    return bool(name) and chat_name.lower() in name.lower()
 
-def load_processed_chats_today():
-    """Load list of chats that have already been processed today"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    log_file = f"txt/processed_chats_{today}.txt"
-    
-    processed_chats = set()
-    if os.path.exists(log_file):
-        try:
-            with open(log_file, 'r', encoding='utf-8') as file:
-                for line in file:
-                    chat_name = line.strip()
-                    if chat_name:
-                        processed_chats.add(chat_name)
-            print(f"Loaded {len(processed_chats)} previously processed chats from {log_file}")
-        except Exception as e:
-            print(f"Error loading processed chats: {str(e)}")
-    
-    return processed_chats, log_file
+def verify_message_sent(driver, message):
+    """True if the open conversation already shows our message (text or photo caption)"""
+    try:
+        root = parse_hierarchy(driver.page_source)
+    except Exception as e:
+        print(f"[RESUME] Could not read the conversation: {e}")
+        return False
+    return find_sent_message(root, message) is not None
 
-def save_processed_chat(log_file, chat_name):
-    """Save a processed chat to today's log file"""
+def mark_chat_processed(processed_chats, log_file, run_day, original_row, chat_name, status, **timings):
+    """Record a chat's outcome in the state store, today's text log and the skip set"""
+    prefix = {STATUS_FAILED: "FAILED ", STATUS_NOT_FOUND: "NOT_FOUND "}.get(status, "")
+    processed_chats.add(chat_key(chat_name))
+    save_processed_chat(log_file, f"{prefix}Row{original_row}: {chat_name}")
     try:
-        with open(log_file, 'a', encoding='utf-8') as file:
-            file.write(f"{chat_name}\n")
+        record_chat_result(chat_name, status, original_row, day=run_day, **timings)
     except Exception as e:
-        print(f"Error saving processed chat: {str(e)}")
+        print(f"[ERROR] Failed to record chat state: {e}")
+
 
 def get_daily_photo_path():
     """Get the path to the only photo in daily_photos folder"""
@@ -865,8 +859,196 @@ def get_daily_photo_path():
         print(f"Error checking daily_photos folder: {str(e)}")
         return None
 
+# Device folder and filename prefix for the daily photo
+DEVICE_PHOTO_DIR = "/sdcard/Pictures"
+DEVICE_PHOTO_PREFIX = "whatsapp_daily_"
+
+def run_adb_shell(args, udid=None, timeout=15):
+    """Run an adb shell command on the selected device; returns stdout, or None if adb failed"""
+    udid = udid or SELECTED_ADB_DEVICE
+    command = ['adb'] + (['-s', udid] if udid else []) + ['shell'] + list(args)
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            return None
+        return result.stdout
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError) as e:
+        print(f"[ADB] Shell command failed ({' '.join(args)}): {e}")
+        return None
+
+# Streaming photo transfer: bytes read and written per chunk (caps transfer memory use)
+PHOTO_STREAM_CHUNK_SIZE = 256 * 1024
+PHOTO_STREAM_MAX_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Most recent real photo transfer, used to estimate transfer time saved by preprocessing;
+# reused is set when the photo was already on the device and nothing was pushed
+_last_transfer = {'bytes': 0, 'seconds': 0.0, 'reused': False}
+
+def get_transfer_throughput():
+    """Bytes per second of the last photo transfer, or None if nothing was transferred"""
+    if not _last_transfer['bytes'] or not _last_transfer['seconds']:
+        return None
+    return _last_transfer['bytes'] / _last_transfer['seconds']
+
+def stream_photo_to_device(local_photo_path, device_path, chunk_size=PHOTO_STREAM_CHUNK_SIZE, udid=None):
+    """Stream a file to the device over adb in bounded chunks, with progress reporting
+
+    Writes to a .part file through 'adb exec-in' (binary-safe, no base64) and renames it
+    when complete, so an interrupted transfer never leaves a truncated photo in place.
+    Returns True on success, False if the stream failed (caller falls back to push_file).
+    """
+    udid = udid or SELECTED_ADB_DEVICE
+    chunk_size = max(1, min(chunk_size, PHOTO_STREAM_MAX_CHUNK_SIZE))
+    temp_path = f"{device_path}.part"
+    file_size = os.path.getsize(local_photo_path)
+    command = ['adb'] + (['-s', udid] if udid else []) + ['exec-in', f"cat > '{temp_path}'"]
+
+    start = time.time()
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except (FileNotFoundError, OSError) as e:
+        print(f"[PHOTO] Streaming transfer unavailable: {e}")
+        return False
+
+    sent = 0
+    next_report = 25
+    try:
+        with open(local_photo_path, 'rb') as photo_file:
+            for chunk in iter(lambda: photo_file.read(chunk_size), b''):
+                process.stdin.write(chunk)
+                sent += len(chunk)
+                percent = sent * 100 // file_size if file_size else 100
+                if percent >= next_report:
+                    print(f"[PHOTO] Streamed {sent / (1024 * 1024):.1f}/{file_size / (1024 * 1024):.1f}MB ({percent}%)")
+                    next_report = (percent // 25 + 1) * 25
+        process.stdin.close()
+        _, stderr = process.communicate(timeout=60)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        process.kill()
+        print(f"[PHOTO] Streaming transfer failed after {sent} bytes: {e}")
+        run_adb_shell(['rm', '-f', temp_path], udid=udid)
+        return False
+
+    if process.returncode != 0:
+        print(f"[PHOTO] Streaming transfer failed: {stderr.decode('utf-8', 'replace').strip()}")
+        run_adb_shell(['rm', '-f', temp_path], udid=udid)
+        return False
+
+    if run_adb_shell(['mv', '-f', temp_path, device_path], udid=udid) is None:
+        print(f"[PHOTO] Failed to move streamed file into place: {device_path}")
+        run_adb_shell(['rm', '-f', temp_path], udid=udid)
+        return False
+
+    # adb writes bypass MediaStore, so ask the media scanner to index the photo for the gallery
+    scan_photo_for_gallery(device_path, udid=udid)
+
+    elapsed = time.time() - start
+    print(f"[PHOTO] Streamed {file_size} bytes in {elapsed:.2f}s ({chunk_size // 1024}KB chunks)")
+    return True
+
+def scan_photo_for_gallery(device_path, udid=None):
+    """Ask the media scanner to index a device file so it shows in the gallery"""
+    return run_adb_shell(['am', 'broadcast', '-a', 'android.intent.action.MEDIA_SCANNER_SCAN_FILE',
+                          '-d', f"file://{device_path}"], udid=udid)
+
+def _delete_media_store_entry(device_path, udid=None):
+    """Drop a file's MediaStore row; MediaProvider deletes the file with it, so only use it on removed files"""
+    return run_adb_shell(['content', 'delete', '--uri', 'content://media/external/images/media',
+                          '--where', f"\"_data='{device_path}'\""], udid=udid)
+
+def make_newest_in_gallery(device_path, udid=None):
+    """Make a reused device photo the newest gallery item again (send_message_with_photo picks the first tile)
+
+    The file gets a fresh mtime and is rescanned, so the media scanner updates
+    its date and photos that reached the phone since the last run don't end up
+    in front of it. Its MediaStore row is left alone: deleting an images row
+    deletes the file as well.
+    """
+    run_adb_shell(['touch', device_path], udid=udid)
+    scan_photo_for_gallery(device_path, udid=udid)
+
+def push_photo_single_call(driver, local_photo_path, device_path):
+    """Push a file with one push_file call (whole file base64-encoded in memory)"""
+    file_size_mb = os.path.getsize(local_photo_path) / (1024 * 1024)
+
+    # Read the photo file
+    try:
+        with open(local_photo_path, 'rb') as photo_file:
+            photo_data = photo_file.read()
+        print(f"[PHOTO] Read {len(photo_data)} bytes from file")
+    except Exception as e:
+        print(f"[ERROR] Failed to read photo file: {e}")
+        return False
+
+    # Check file size limit
+    if file_size_mb > 10:
+        print(f"[WARNING] Large file size: {file_size_mb:.2f}MB. May take longer to transfer.")
+
+    # Convert to base64 for transfer
+    try:
+        photo_base64 = base64.b64encode(photo_data).decode('utf-8')
+        print(f"[PHOTO] Base64 conversion complete, length: {len(photo_base64)}")
+    except Exception as e:
+        print(f"[ERROR] Base64 conversion failed: {e}")
+        return False
+
+    # Transfer file to device
+    start_transfer = time.time()
+    try:
+        driver.push_file(device_path, photo_base64)
+        transfer_time = time.time() - start_transfer
+        print(f"[PHOTO] File push completed in {transfer_time:.2f}s")
+        return True
+    except Exception as e:
+        transfer_time = time.time() - start_transfer
+        print(f"[ERROR] File push failed after {transfer_time:.2f}s: {e}")
+        return False
+
+def device_photo_path_for(file_hash, file_ext):
+    """Content-addressed device path for a photo"""
+    return f"{DEVICE_PHOTO_DIR}/{DEVICE_PHOTO_PREFIX}{file_hash[:16]}{file_ext}"
+
+def check_device_file(device_path, file_size, file_hash):
+    """Verify a device file against the local copy without pulling it back
+
+    Returns True (matches), False (missing or different) or None (adb unavailable).
+    Uses sha256sum on the device, falling back to a size check with stat.
+    """
+    output = run_adb_shell(['sha256sum', device_path])
+    if output and output.split():
+        return output.split()[0] == file_hash
+
+    output = run_adb_shell(['stat', '-c', '%s', device_path])
+    if output is None:
+        # stat also fails when the file doesn't exist; tell that apart from adb being unavailable
+        return False if run_adb_shell(['echo', 'ok']) else None
+    try:
+        return int(output.strip()) == file_size
+    except ValueError:
+        return False
+
+def prune_stale_daily_photos(keep_path):
+    """Delete old whatsapp_daily_* files from the device gallery, keeping keep_path"""
+    output = run_adb_shell(['ls', DEVICE_PHOTO_DIR])
+    if output is None:
+        return 0
+
+    removed = 0
+    for name in output.split():
+        device_path = f"{DEVICE_PHOTO_DIR}/{name}"
+        if not name.startswith(DEVICE_PHOTO_PREFIX) or device_path == keep_path:
+            continue
+        if run_adb_shell(['rm', '-f', device_path]) is not None:
+            # Drop the MediaStore entry too so the gallery doesn't keep a dead thumbnail
+            _delete_media_store_entry(device_path)
+            removed += 1
+
+    if removed:
+        print(f"[PHOTO] Pruned {removed} stale {DEVICE_PHOTO_PREFIX}* file(s) from the device")
+    return removed
+
 def transfer_photo_to_device(driver, local_photo_path):
-    """Transfer photo from PC to Android device with reliable file handling (improved version)"""
+    """Transfer photo from PC to Android device, reusing an identical copy already on the device"""
     try:
         print(f"[PHOTO] Starting photo transfer for: {local_photo_path}")
 
@@ -889,63 +1071,40 @@ def transfer_photo_to_device(driver, local_photo_path):
             print(f"[ERROR] Unsupported file type: {file_ext}. Supported: {valid_extensions}")
             return None
 
-        # Create timestamped filename to avoid conflicts
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        device_filename = f"whatsapp_daily_{timestamp}{file_ext}"
-        device_path = f'/sdcard/Pictures/{device_filename}'
+        # Content-addressed filename: the same image always maps to the same device file
+        file_hash = compute_file_hash(local_photo_path)
+        device_path = device_photo_path_for(file_hash, file_ext)
         print(f"[PHOTO] Device path: {device_path}")
 
-        # Read the photo file
-        try:
-            with open(local_photo_path, 'rb') as photo_file:
-                photo_data = photo_file.read()
-            print(f"[PHOTO] Read {len(photo_data)} bytes from file")
-        except Exception as e:
-            print(f"[ERROR] Failed to read photo file: {e}")
-            return None
-
-        # Check file size limit
-        if file_size_mb > 10:
-            print(f"[WARNING] Large file size: {file_size_mb:.2f}MB. May take longer to transfer.")
-
-        # Convert to base64 for transfer
-        try:
-            photo_base64 = base64.b64encode(photo_data).decode('utf-8')
-            print(f"[PHOTO] Base64 conversion complete, length: {len(photo_base64)}")
-        except Exception as e:
-            print(f"[ERROR] Base64 conversion failed: {e}")
-            return None
-
-        # Transfer file to device
-        start_transfer = time.time()
-        try:
-            driver.push_file(device_path, photo_base64)
-            transfer_time = time.time() - start_transfer
-            print(f"[PHOTO] File push completed in {transfer_time:.2f}s")
-        except Exception as e:
-            transfer_time = time.time() - start_transfer
-            print(f"[ERROR] File push failed after {transfer_time:.2f}s: {e}")
-            return None
+        if check_device_file(device_path, file_size, file_hash):
+            print(f"[SUCCESS] Photo already on device, reusing {device_path} (no push needed)")
+            _last_transfer['reused'] = True
+            make_newest_in_gallery(device_path)
+            prune_stale_daily_photos(device_path)
+            return device_path
 
-        # Verify transfer success using pull_file (more reliable than shell commands)
-        try:
-            verify_data = driver.pull_file(device_path)
-            if verify_data:
-                decoded_data = base64.b64decode(verify_data)
-                if len(decoded_data) == file_size:
-                    print(f"[SUCCESS] Photo verified on device: {device_path} ({file_size_mb:.2f}MB)")
-                    return device_path
-                else:
-                    print(f"[WARNING] File size mismatch. Expected: {file_size}, Got: {len(decoded_data)}")
-                    print(f"[INFO] Photo may still be transferred to: {device_path}")
-                    return device_path
-            else:
-                print(f"[ERROR] Photo transfer verification failed")
+        # Stream over adb in bounded chunks; fall back to a single push_file call
+        transfer_start = time.time()
+        if not stream_photo_to_device(local_photo_path, device_path):
+            print("[PHOTO] Falling back to single-call push_file transfer...")
+            if not push_photo_single_call(driver, local_photo_path, device_path):
                 return None
-        except Exception as verify_error:
-            print(f"[WARNING] Verification failed: {verify_error}")
-            print(f"[INFO] Photo transferred to device: {device_path} (verification skipped)")
+        _last_transfer['bytes'] = file_size
+        _last_transfer['seconds'] = time.time() - transfer_start
+        _last_transfer['reused'] = False
+
+        # Verify on the device (checksum or size) instead of pulling the whole file back
+        verified = check_device_file(device_path, file_size, file_hash)
+        if verified is None:
+            print(f"[INFO] Photo transferred to device: {device_path} (verification skipped, adb unavailable)")
             return device_path
+        if not verified:
+            print(f"[ERROR] Photo transfer verification failed for {device_path}")
+            return None
+
+        print(f"[SUCCESS] Photo verified on device: {device_path} ({file_size_mb:.2f}MB)")
+        prune_stale_daily_photos(device_path)
+        return device_path
 
     except Exception as e:
         print(f"[ERROR] Error transferring photo to device: {str(e)}")
@@ -953,33 +1112,239 @@ def transfer_photo_to_device(driver, local_photo_path):
         print(f"[DEBUG] Full error traceback: {traceback.format_exc()}")
         return None
 
-def adaptive_wait(driver, base_delay=1.0, max_delay=5.0):
-    """Intelligent delay based on device performance and network conditions"""
+def find_with_selector_cache(driver, element_name, selectors, timeout, condition=None, poll_frequency=0.5):
+    """Wait once for any of a fallback selector list and remember the one that matched
+
+    Every poll tries the selectors in cached order (last winner first), like
+    EC.any_of, so a missing element costs one timeout in total. When one
+    matches, the selectors tried before it in that same poll are demoted and
+    the winner is recorded; a timeout leaves the cache as it is, since nothing
+    may have been on screen yet. condition defaults to EC.element_to_be_clickable.
+    """
+    # selenium's wait support pulls in the WebDriver stack; only load it once a session exists
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    condition = condition or EC.element_to_be_clickable
+    ordered = order_selectors(element_name, selectors)
+
+    def first_match(drv):
+        for index, selector in enumerate(ordered):
+            try:
+                element = condition(selector)(drv)
+            except WebDriverException:
+                continue
+            if element:
+                return index, element
+        return False
+
     try:
-        # Test device responsiveness
-        start_time = time.time()
-        driver.get_window_size()  # Simple responsiveness test
-        response_time = time.time() - start_time
-
-        # Adjust delay based on response time
-        if response_time > 0.5:  # Slow device
-            delay = min(base_delay * 1.5, max_delay)
-            print(f"[DELAY] Slow device detected ({response_time:.2f}s), using {delay:.1f}s delay")
-        elif response_time > 0.2:  # Normal device
-            delay = base_delay
-            print(f"[DELAY] Normal response ({response_time:.2f}s), using {delay:.1f}s delay")
-        else:  # Fast device
-            delay = max(base_delay * 0.7, 0.3)
-            print(f"[DELAY] Fast device ({response_time:.2f}s), using {delay:.1f}s delay")
-
-        time.sleep(delay)
-        return delay
+        index, element = WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(first_match)
+    except TimeoutException:
+        return None
+    for missed in ordered[:index]:
+        record_selector_miss(element_name, missed)
+    record_selector_hit(element_name, ordered[index])
+    return element
+
+# Per-condition wait statistics: name -> {'count', 'total', 'timeouts'}
+_wait_stats = {}
+
+def _search_field_focused(driver):
+    """Search input exists and has focus"""
+    fields = driver.find_elements(AppiumBy.ID, "com.whatsapp:id/search_src_text")
+    return bool(fields) and fields[0].get_attribute("focused") == "true"
+
+def _search_results_present(driver):
+    """Search results list (section title or contact row) is rendered"""
+    return bool(driver.find_elements(AppiumBy.ID, "com.whatsapp:id/title")
+                or driver.find_elements(AppiumBy.ID, "com.whatsapp:id/contact_row_container"))
+
+def _conversation_visible(driver):
+    """Conversation screen with the message entry field is shown"""
+    return bool(driver.find_elements(AppiumBy.ID, "com.whatsapp:id/entry"))
+
+def _conversation_hidden(driver):
+    """Conversation entry field is gone (left the chat or another screen covers it)"""
+    return not driver.find_elements(AppiumBy.ID, "com.whatsapp:id/entry")
+
+def _chat_list_visible(driver):
+    """Main chat list (search menu item or new chat button) is shown"""
+    return bool(driver.find_elements(AppiumBy.ID, "com.whatsapp:id/menuitem_search")
+                or driver.find_elements(AppiumBy.ID, "com.whatsapp:id/fab"))
+
+def _main_screen_snapshot(driver):
+    """Screen snapshot when it is classified as the main chat list"""
+    snapshot = detect_screen(driver)
+    return snapshot if snapshot['state'] == SCREEN_CHAT_LIST else None
+
+def _chat_rows_visible(driver):
+    """At least one chat row is rendered in the list"""
+    return bool(driver.find_elements(AppiumBy.ID, "com.whatsapp:id/contact_row_container"))
+
+def _keyboard_visible(driver):
+    """Soft keyboard is shown"""
+    return driver.is_keyboard_shown()
+
+# Named UI conditions usable with wait_for_ui
+UI_CONDITIONS = {
+    'search_field_focused': _search_field_focused,
+    'search_results': _search_results_present,
+    'conversation': _conversation_visible,
+    'conversation_hidden': _conversation_hidden,
+    'chat_list': _chat_list_visible,
+    'main_screen': _main_screen_snapshot,
+    'chat_rows': _chat_rows_visible,
+    'keyboard': _keyboard_visible,
+}
+
+def wait_for_ui(driver, condition, timeout=5.0, poll_interval=0.15, label=None):
+    """Wait until a named UI condition (or a callable taking the driver) returns a truthy value
+
+    Returns the condition's value, or None on timeout. Exceptions raised by the
+    condition count as "not ready yet". Every wait logs how long it actually took.
+    """
+    check = UI_CONDITIONS[condition] if isinstance(condition, str) else condition
+    name = label or (condition if isinstance(condition, str) else condition.__name__)
+    start = time.time()
+    value = None
+
+    while True:
+        try:
+            value = check(driver)
+        except Exception:
+            value = None
+        elapsed = time.time() - start
+        if value or elapsed >= timeout:
+            break
+        time.sleep(min(poll_interval, timeout - elapsed))
+
+    stats = _wait_stats.setdefault(name, {'count': 0, 'total': 0.0, 'timeouts': 0})
+    stats['count'] += 1
+    stats['total'] += elapsed
+    if value:
+        print(f"[WAIT] '{name}' ready after {elapsed:.2f}s")
+        return value
+
+    stats['timeouts'] += 1
+    print(f"[WAIT] '{name}' not reached after {elapsed:.2f}s (timeout {timeout:.1f}s)")
+    return None
 
+def print_wait_stats():
+    """Print a summary of time spent in wait_for_ui per condition"""
+    if not _wait_stats:
+        return
+    print(f"[WAIT] Wait summary:")
+    for name, stats in sorted(_wait_stats.items(), key=lambda item: -item[1]['total']):
+        average = stats['total'] / stats['count']
+        print(f"   - {name}: {stats['count']} waits, avg {average:.2f}s, total {stats['total']:.1f}s, {stats['timeouts']} timeouts")
+
+def adaptive_wait(driver, base_delay=1.0, max_delay=5.0):
+    """Intelligent delay based on the device latency estimate (no extra probe command)"""
+    delay, category = compute_adaptive_delay(base_delay, max_delay)
+    latency = get_latency_stats()['ewma']
+
+    if category == 'slow':
+        print(f"[DELAY] Slow device detected ({latency:.2f}s avg), using {delay:.1f}s delay")
+    elif category == 'normal':
+        print(f"[DELAY] Normal response ({latency:.2f}s avg), using {delay:.1f}s delay")
+    elif category == 'fast':
+        print(f"[DELAY] Fast device ({latency:.2f}s avg), using {delay:.1f}s delay")
+    else:
+        print(f"[DELAY] No latency samples yet, using base delay {base_delay}s")
+
+    time.sleep(delay)
+    return delay
+
+def print_latency_stats():
+    """Print the device latency estimator state"""
+    stats = get_latency_stats()
+    if not stats['samples']:
+        return
+    print(f"[LATENCY] Command latency: avg {stats['ewma']:.3f}s (EWMA), "
+          f"min {stats['min']:.3f}s, max {stats['max']:.3f}s over {stats['samples']} commands")
+
+# Clipboard staging state: which session/text is currently on the device clipboard
+_clipboard_state = {'session': None, 'text': None}
+
+# Message entry timing per method: 'paste' / 'type' -> {'count', 'total'}
+_entry_timing_stats = {
+    'paste': {'count': 0, 'total': 0.0},
+    'type': {'count': 0, 'total': 0.0}
+}
+
+KEYCODE_PASTE = 279
+
+def stage_message_clipboard(driver, message):
+    """Put the message on the device clipboard (once per session)"""
+    session = getattr(driver, 'session_id', None)
+    if _clipboard_state['session'] == session and _clipboard_state['text'] == message:
+        return True
+    try:
+        start = time.time()
+        driver.set_clipboard_text(message)
+        _clipboard_state['session'] = session
+        _clipboard_state['text'] = message
+        print(f"[CLIPBOARD] Message staged on device clipboard ({len(message)} chars, {time.time() - start:.2f}s)")
+        return True
     except Exception as e:
-        # If test fails, use base delay
-        print(f"[DELAY] Responsiveness test failed, using base delay {base_delay}s")
-        time.sleep(base_delay)
-        return base_delay
+        print(f"[CLIPBOARD] Failed to stage message on clipboard: {e}")
+        _clipboard_state['session'] = None
+        return False
+
+def _record_entry_time(method, seconds):
+    """Add one message entry timing sample"""
+    stats = _entry_timing_stats[method]
+    stats['count'] += 1
+    stats['total'] += seconds
+
+def _type_message(driver, message, field=None):
+    """Type the message with mobile: type, or send_keys on the field as a fallback"""
+    try:
+        driver.execute_script("mobile: type", {"text": message})
+    except Exception:
+        if field is None:
+            raise
+        field.send_keys(message)
+
+def enter_message(driver, message, field=None):
+    """Enter the message into the focused entry/caption field, pasting it when possible
+
+    The pasted text length is verified against the message; on mismatch the field is
+    cleared and the message is typed instead. Returns the method used ('paste' or 'type').
+    """
+    start = time.time()
+    if MESSAGE_ENTRY_MODE == "clipboard" and stage_message_clipboard(driver, message):
+        try:
+            driver.press_keycode(KEYCODE_PASTE)
+            target = field if field is not None else driver.switch_to.active_element
+            pasted_text = target.text or ""
+            if len(pasted_text.strip()) == len(message.strip()):
+                elapsed = time.time() - start
+                _record_entry_time('paste', elapsed)
+                print(f"[CLIPBOARD] Message pasted and verified ({len(pasted_text)} chars, {elapsed:.2f}s)")
+                return 'paste'
+            print(f"[CLIPBOARD] Pasted length {len(pasted_text)} != message length {len(message)}, typing instead")
+            target.clear()
+            # Clipboard content can't be trusted any more, stage it again next time
+            _clipboard_state['session'] = None
+        except Exception as e:
+            print(f"[CLIPBOARD] Paste failed, typing instead: {e}")
+
+    start = time.time()
+    _type_message(driver, message, field)
+    _record_entry_time('type', time.time() - start)
+    return 'type'
+
+def print_entry_timing_stats():
+    """Compare paste and typing times for message entry"""
+    averages = {}
+    for method, stats in _entry_timing_stats.items():
+        if stats['count']:
+            averages[method] = stats['total'] / stats['count']
+            print(f"[ENTRY] {method}: {stats['count']} messages, avg {averages[method]:.2f}s")
+    if len(averages) == 2:
+        print(f"[ENTRY] Paste saves {averages['type'] - averages['paste']:.2f}s per message vs typing")
 
 def send_message_with_photo(driver, message):
     """Optimized photo + message sending with adaptive delays"""
@@ -987,9 +1352,7 @@ def send_message_with_photo(driver, message):
     print(f"[INFO] Fast photo + message send...")
 
     try:
-        wait = WebDriverWait(driver, timeout=12, poll_frequency=0.3)  # Increased timeout, adjusted polling
-        
-        # Step 1: Click attachment button (parallel search with EC.any_of)
+        # Step 1: Click attachment button
         step_start = time.time()
         attachment_selectors = [
             (AppiumBy.ID, "com.whatsapp:id/attach"),
@@ -997,12 +1360,11 @@ def send_message_with_photo(driver, message):
             (AppiumBy.XPATH, "//android.widget.ImageButton[contains(@resource-id, 'attach')]")
         ]
         
-        # Use EC.any_of for parallel search
-        attachment_btn = wait.until(
-            EC.any_of(
-                *[EC.element_to_be_clickable(selector) for selector in attachment_selectors]
-            )
-        )
+        # Last working selector first, failing selectors are demoted for the next chat
+        attachment_btn = find_with_selector_cache(driver, 'attach_button', attachment_selectors,
+                                                  timeout=12, poll_frequency=0.3)
+        if not attachment_btn:
+            raise Exception("Attachment button not found")
         attachment_btn.click()
         adaptive_wait(driver, 0.8, 2.0)  # Adaptive delay
         print(f"[INFO] Attachment clicked ({time.time() - step_start:.2f}s)")
@@ -1014,13 +1376,8 @@ def send_message_with_photo(driver, message):
             (AppiumBy.XPATH, "//android.widget.TextView[@text='Gallery']")
         ]
 
-        gallery_btn = None
-        for selector_type, selector in gallery_selectors:
-            try:
-                gallery_btn = wait.until(EC.element_to_be_clickable((selector_type, selector)))
-                break
-            except TimeoutException:
-                continue
+        gallery_btn = find_with_selector_cache(driver, 'gallery_button', gallery_selectors,
+                                               timeout=12, poll_frequency=0.3)
 
         if not gallery_btn:
             raise Exception("Gallery button not found")
@@ -1032,11 +1389,12 @@ def send_message_with_photo(driver, message):
         # Step 3: Select first photo with proper element verification
         step_start = time.time()
         try:
-            # Wait for gallery to fully load
-            time.sleep(.2)
+            # Wait for gallery to cover the conversation screen
+            wait_for_ui(driver, 'conversation_hidden', timeout=0.2)
+            validate_device_config(driver, 'gallery')
 
             # Use simple tap on first photo position - more reliable than element selection
-            screen_size = driver.get_window_size()
+            screen_size = get_screen_size(driver)
 
             # Use device-specific coordinates for photo selection
             config = get_device_config()
@@ -1070,9 +1428,10 @@ def send_message_with_photo(driver, message):
         try:
             # Wait for photo preview to load
             adaptive_wait(driver, 0.5, 1.2)
+            validate_device_config(driver, 'preview')
 
             # Tap on caption area at bottom of screen
-            screen_size = driver.get_window_size()
+            screen_size = get_screen_size(driver)
             # Use device-specific X coordinate (with optional offset from center)
             config = get_device_config()
             caption_x = screen_size['width'] // 2 + config['caption_area_x_offset']
@@ -1091,17 +1450,16 @@ def send_message_with_photo(driver, message):
                 caption_fallback_x = config['caption_fallback_x']
                 caption_fallback_y = config['caption_fallback_y']
                 driver.tap([(caption_fallback_x, caption_fallback_y)])
-                time.sleep(.5)
+                wait_for_ui(driver, 'keyboard', timeout=0.5)
                 print(f"[INFO] Caption area tapped via fallback")
             except:
                 print(f"[WARNING] Caption area not accessible, will send without caption")  
         
-        # Text input using mobile:type method
+        # Caption input: paste from the staged clipboard, or mobile:type
         step_start = time.time()
         try:
-            # Use mobile:type - reliable and doesn't require adb_shell feature
-            driver.execute_script("mobile: type", {"text": message})
-            print(f"[INFO] Caption text sent via mobile:type ({time.time() - step_start:.2f}s)")
+            method = enter_message(driver, message)
+            print(f"[INFO] Caption text entered via {method} ({time.time() - step_start:.2f}s)")
 
         except Exception as e:
             print(f"[WARNING] Text input failed, sending photo without caption: {e}")
@@ -1124,7 +1482,8 @@ def send_message_with_photo(driver, message):
             click_time = time.time() - click_start
             print(f"[DEBUG] Send button tapped in {click_time:.2f}s")
 
-            time.sleep(0.1)  # Wait for message to send
+            # Media preview closes back to the conversation once the send is accepted
+            wait_for_ui(driver, 'conversation', timeout=0.1)
             print(f"[INFO] Sent ({time.time() - step_start:.2f}s)")
 
         except Exception as send_error:
@@ -1149,8 +1508,6 @@ def send_message_to_chat(driver, message):
     print(f"[INFO] Fast text send...")
     
     try:
-        wait = WebDriverWait(driver, 2)  # 2 second timeout
-        
         # Find message input (faster selectors)
         input_selectors = [
             (AppiumBy.ID, "com.whatsapp:id/entry"),
@@ -1158,13 +1515,7 @@ def send_message_to_chat(driver, message):
             (AppiumBy.XPATH, "//android.widget.EditText[contains(@resource-id, 'entry')]")
         ]
         
-        message_input = None
-        for selector_type, selector in input_selectors:
-            try:
-                message_input = wait.until(EC.element_to_be_clickable((selector_type, selector)))
-                break
-            except TimeoutException:
-                continue
+        message_input = find_with_selector_cache(driver, 'message_input', input_selectors, timeout=2)
                 
         if not message_input:
             raise Exception("Message input not found")
@@ -1174,13 +1525,10 @@ def send_message_to_chat(driver, message):
         message_input.click()
         message_input.clear()
         
-        # Try fast text input methods
-        try:
-            driver.execute_script("mobile: type", {"text": message})
-        except:
-            message_input.send_keys(message)
+        # Paste from the staged clipboard, or type the message
+        method = enter_message(driver, message, message_input)
             
-        print(f"📝 Text entered ({time.time() - step_start:.2f}s)")
+        print(f"📝 Text entered via {method} ({time.time() - step_start:.2f}s)")
         
         # Find and click send button (faster)
         send_selectors = [
@@ -1189,19 +1537,17 @@ def send_message_to_chat(driver, message):
             (AppiumBy.XPATH, "//android.widget.ImageButton[contains(@resource-id, 'send')]")
         ]
         
-        send_button = None
-        for selector_type, selector in send_selectors:
-            try:
-                send_button = wait.until(EC.element_to_be_clickable((selector_type, selector)))
-                break
-            except TimeoutException:
-                continue
+        send_button = find_with_selector_cache(driver, 'send_button', send_selectors, timeout=2)
                 
         if not send_button:
             raise Exception("Send button not found")
             
         send_button.click()
-        time.sleep(0.5)  # Reduced from 2s
+
+        # WhatsApp clears the entry field once the message is queued
+        def entry_cleared(drv):
+            return message_input.text != message
+        wait_for_ui(driver, entry_cleared, timeout=0.5, label='entry_cleared')
         
         total_time = time.time() - start_time
         print(f"[DONE] Text sent! Total: {total_time:.2f}s")
@@ -1221,136 +1567,184 @@ def go_back_to_chat_list(driver):
     try:
         # Press back button to return to chat list
         driver.press_keycode(4)  # KEYCODE_BACK
-        time.sleep(1.5)
+        wait_for_ui(driver, 'conversation_hidden', timeout=1.5)
         return True
     except Exception as e:
         print(f"Error going back to chat list: {str(e)}")
         return False
 
 
-def search_and_find_chat(driver, chat_name):
-    """Search for a specific chat using WhatsApp search functionality"""
-    search_start = time.time()
-    try:
-        print(f"Searching for chat: {chat_name}")
+# Time from search start until the query is typed, per search path
+_search_prepare_stats = {
+    'reused': {'count': 0, 'total': 0.0},
+    'full': {'count': 0, 'total': 0.0}
+}
 
-        # First, ensure we're on the main WhatsApp screen
-        try:
-            # print("[DEBUG] Checking if we're on main WhatsApp screen...")
-            # Check for WhatsApp main elements
-            main_elements = [
-                (AppiumBy.XPATH, "//*[@text='WhatsApp']"),
-                (AppiumBy.XPATH, "//*[@text='Chats']"),
-                (AppiumBy.ID, "com.whatsapp:id/menuitem_search"),
-                (AppiumBy.ID, "com.whatsapp:id/search")
-            ]
-
-            main_found = False
-            for selector in main_elements:
-                try:
-                    element = driver.find_element(*selector)
-                    if element.is_displayed():
-                        print(f"[DEBUG] Found main screen element: {selector}")
-                        main_found = True
-                        break
-                except:
-                    continue
+def open_search_and_type(driver, chat_name):
+    """Full search path: return to the main screen, open search and type the query"""
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
 
-            if not main_found:
-                # print("[DEBUG] Not on main screen, pressing back to return...")
-                driver.press_keycode(4)  # Back button
-                time.sleep(.5)
-        except:
-            pass
+    # First, ensure we're on the main WhatsApp screen (one snapshot when we already are)
+    try:
+        snapshot = navigate_to_chat_list(driver)
+        if snapshot['state'] != SCREEN_CHAT_LIST:
+            print(f"[SEARCH] Chat list not reached (screen: {snapshot['state']}), activating search anyway")
+    except Exception as e:
+        print(f"[SEARCH] Screen check failed: {e}")
+
+    # # Look for search button/icon - try multiple selectors with timeout
+    # search_selectors = [
+    #     # Regular WhatsApp selectors (priority)
+    #     (AppiumBy.ID, "com.whatsapp:id/menuitem_search"),
+    #     (AppiumBy.ID, "com.whatsapp:id/search"),
+    #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/menuitem_search']"),
+    #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/search']"),
+    #     # WhatsApp specific selectors (fallback)
+    #     (AppiumBy.ID, "com.whatsapp:id/search_bar_inner_layout"),
+    #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/search_bar_inner_layout']"),
+    #     (AppiumBy.ID, "com.whatsapp:id/menuitem_search"),
+    #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/menuitem_search']"),
+    #     # Generic search selectors
+    #     (AppiumBy.XPATH, "//*[@content-desc='Search']"),
+    #     (AppiumBy.XPATH, "//*[contains(@content-desc, 'Search')]"),
+    #     (AppiumBy.XPATH, "//*[@text='Search']")
+    # ]
+
+    # wait = WebDriverWait(driver, 3)
+    # search_button = None
+
+    # try:
+    #     # Use EC.any_of for parallel search of all selectors
+    #     search_button = wait.until(
+    #         EC.any_of(
+    #             *[EC.element_to_be_clickable(selector) for selector in search_selectors]
+    #         )
+    #     )
+    #     print(f"[DEBUG] Found search button using parallel search")
+    # except TimeoutException:
+    #     print(f"[DEBUG] Search button not found with any of {len(search_selectors)} selectors")
+
+    # if search_button:
+    #     # Click on search button
+    #     search_button.click()
+    #     time.sleep(.5)
+    #     print("[DEBUG] Search activated successfully")
+    # else:
+    #     print("[DEBUG] Search button not found, trying alternative methods...")
+
+    # Wait for search functionality to be ready and activate it
+    print("[SEARCH] Activating search...")
+    search_activated = False
+
+    # Try WebDriverWait first for search button
+    try:
+        wait = WebDriverWait(driver, 2)
+        search_element = wait.until(EC.element_to_be_clickable((AppiumBy.ID, "com.whatsapp:id/menuitem_search")))
+        search_element.click()
+        search_activated = True
+        print("[SEARCH] Search activated via element click")
+    except:
+        # Fallback to coordinate tap using device-specific coordinates
+        config = get_device_config()
+        search_x = config['search_button_x']
+        search_y = config['search_button_y']
+        driver.tap([(search_x, search_y)])
+        search_activated = True
+        print(f"[SEARCH] Search activated by coordinate tap at ({search_x}, {search_y})")
+
+    if not search_activated:
+        print("[ERROR] Failed to activate search")
+        return False
+
+    # Wait for search input field to be ready
+    wait_for_ui(driver, 'search_field_focused', timeout=1.0)
 
-        # # Look for search button/icon - try multiple selectors with timeout
-        # search_selectors = [
-        #     # Regular WhatsApp selectors (priority)
-        #     (AppiumBy.ID, "com.whatsapp:id/menuitem_search"),
-        #     (AppiumBy.ID, "com.whatsapp:id/search"),
-        #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/menuitem_search']"),
-        #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/search']"),
-        #     # WhatsApp specific selectors (fallback)
-        #     (AppiumBy.ID, "com.whatsapp:id/search_bar_inner_layout"),
-        #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/search_bar_inner_layout']"),
-        #     (AppiumBy.ID, "com.whatsapp:id/menuitem_search"),
-        #     (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/menuitem_search']"),
-        #     # Generic search selectors
-        #     (AppiumBy.XPATH, "//*[@content-desc='Search']"),
-        #     (AppiumBy.XPATH, "//*[contains(@content-desc, 'Search')]"),
-        #     (AppiumBy.XPATH, "//*[@text='Search']")
-        # ]
-
-        # wait = WebDriverWait(driver, 3)
-        # search_button = None
-
-        # try:
-        #     # Use EC.any_of for parallel search of all selectors
-        #     search_button = wait.until(
-        #         EC.any_of(
-        #             *[EC.element_to_be_clickable(selector) for selector in search_selectors]
-        #         )
-        #     )
-        #     print(f"[DEBUG] Found search button using parallel search")
-        # except TimeoutException:
-        #     print(f"[DEBUG] Search button not found with any of {len(search_selectors)} selectors")
-
-        # if search_button:
-        #     # Click on search button
-        #     search_button.click()
-        #     time.sleep(.5)
-        #     print("[DEBUG] Search activated successfully")
-        # else:
-        #     print("[DEBUG] Search button not found, trying alternative methods...")
-
-        # Wait for search functionality to be ready and activate it
-        print("[SEARCH] Activating search...")
-        search_activated = False
-
-        # Try WebDriverWait first for search button
+    # Input Unicode text with better error handling
+    try:
+        # Wait for search field to be available
+        wait = WebDriverWait(driver, 3)
         try:
-            wait = WebDriverWait(driver, 2)
-            search_element = wait.until(EC.element_to_be_clickable((AppiumBy.ID, "com.whatsapp:id/menuitem_search")))
-            search_element.click()
-            search_activated = True
-            print("[SEARCH] Search activated via element click")
+            search_input = wait.until(EC.element_to_be_clickable((AppiumBy.ID, "com.whatsapp:id/search_src_text")))
+            search_input.click()
+            search_input.clear()
+            search_input.send_keys(chat_name)
+            print(f"[SEARCH] Text input via search field element: '{chat_name}'")
         except:
-            # Fallback to coordinate tap using device-specific coordinates
-            config = get_device_config()
-            search_x = config['search_button_x']
-            search_y = config['search_button_y']
-            driver.tap([(search_x, search_y)])
-            search_activated = True
-            print(f"[SEARCH] Search activated by coordinate tap at ({search_x}, {search_y})")
-
-        if not search_activated:
-            print("[ERROR] Failed to activate search")
+            # Fallback to mobile:type
+            driver.execute_script("mobile: type", {"text": chat_name})
+            print(f"[SEARCH] Text input via mobile:type: '{chat_name}'")
+    except Exception as e:
+        print(f"[ERROR] Failed to input search text: {e}")
+        return False
+
+    return True
+
+def reuse_open_search(driver, chat_name):
+    """Stay-in-search path: type the next query into the search field that is still open
+
+    Returns False when the search UI is gone so the caller can fall back to the full path.
+    """
+    try:
+        fields = driver.find_elements(AppiumBy.ID, "com.whatsapp:id/search_src_text")
+        if not fields:
             return False
+        search_input = fields[0]
+        search_input.clear()  # Select-all/clear of the previous query
+        search_input.send_keys(chat_name)
+        print(f"[SEARCH] Reused open search field: '{chat_name}'")
+        return True
+    except Exception as e:
+        print(f"[SEARCH] Could not reuse open search field, using full search path: {e}")
+        return False
 
-        # Wait for search input field to be ready
-        time.sleep(1.0)  # Allow search interface to fully load
+def leave_search_results(driver):
+    """Leave the search results after a miss (kept open in stay-in-search mode)"""
+    if STAY_IN_SEARCH:
+        return
+    navigate_to_chat_list(driver)
+
+def record_search_prepare(reused, seconds):
+    """Record how long it took to get the query typed, per search path"""
+    stats = _search_prepare_stats['reused' if reused else 'full']
+    stats['count'] += 1
+    stats['total'] += seconds
+    print(f"[SEARCH] Query ready in {seconds:.2f}s ({'reused search' if reused else 'full search path'})")
+
+def print_search_prepare_stats():
+    """Compare the stay-in-search path against the full search path"""
+    averages = {}
+    for path, stats in _search_prepare_stats.items():
+        if stats['count']:
+            averages[path] = stats['total'] / stats['count']
+            print(f"[SEARCH] {path} search path: {stats['count']} chats, avg {averages[path]:.2f}s to query ready")
+    if len(averages) == 2:
+        saved = averages['full'] - averages['reused']
+        print(f"[SEARCH] Stay-in-search saves {saved:.2f}s per chat vs the full search path")
 
-        # Input Unicode text with better error handling
-        try:
-            # Wait for search field to be available
-            wait = WebDriverWait(driver, 3)
-            try:
-                search_input = wait.until(EC.element_to_be_clickable((AppiumBy.ID, "com.whatsapp:id/search_src_text")))
-                search_input.click()
-                search_input.clear()
-                search_input.send_keys(chat_name)
-                print(f"[SEARCH] Text input via search field element: '{chat_name}'")
-            except:
-                # Fallback to mobile:type
-                driver.execute_script("mobile: type", {"text": chat_name})
-                print(f"[SEARCH] Text input via mobile:type: '{chat_name}'")
-        except Exception as e:
-            print(f"[ERROR] Failed to input search text: {e}")
+def search_and_find_chat(driver, chat_name):
+    """Search for a specific chat using WhatsApp search functionality"""
+    search_start = time.time()
+    try:
+        print(f"Searching for chat: {chat_name}")
+
+        # Stay-in-search reuses the open search field; falls back to the full path when it is gone
+        prepare_start = time.time()
+        search_reused = (STAY_IN_SEARCH and SEARCH_RESULT_MODE == "snapshot"
+                         and reuse_open_search(driver, chat_name))
+        if not search_reused and not open_search_and_type(driver, chat_name):
             return False
+        record_search_prepare(search_reused, time.time() - prepare_start)
 
         # Enhanced waiting logic with backend loading consideration
         print(f"[WAIT] Waiting for backend to process search results...")
-        time.sleep(1.5)  # Initial wait for backend processing
+        wait_for_ui(driver, 'search_results', timeout=1.5)
+
+        if SEARCH_RESULT_MODE == "snapshot":
+            # Results of the previous query may still be on screen after a reused search
+            return wait_for_search_result_snapshot(driver, chat_name, search_start,
+                                                   require_name_match=search_reused)
+
         max_wait_time = 20  # Maximum wait time in seconds
         wait_start = time.time()
         last_message_time = 0  # Track when we last showed a wait message
@@ -1375,7 +1769,7 @@ def search_and_find_chat(driver, chat_name):
                             (AppiumBy.XPATH, "//*[@resource-id='com.whatsapp:id/contact_row_container']")
                         ]
 
-                        for selector in chat_container_selectors:
+                        for selector in order_selectors('chat_container', chat_container_selectors):
                             try:
                                 chat_containers = driver.find_elements(*selector)
                                 visible_chats = []
@@ -1387,6 +1781,9 @@ def search_and_find_chat(driver, chat_name):
                                         if container_location['y'] > chats_location['y']:
                                             visible_chats.append(chat_container)
 
+                                if visible_chats:
+                                    record_selector_hit('chat_container', selector)
+
                                 # If only one chat found, click it directly without verification
                                 if len(visible_chats) == 1:
                                     search_time = time.time() - search_start
@@ -1492,8 +1889,7 @@ def search_and_find_chat(driver, chat_name):
                         print(f"[EARLY_EXIT] Seen 'Messages section' {messages_section_count} times with no results - chat likely doesn't exist")
                         print(f"[EARLY_EXIT] Exiting search after {search_time:.2f}s instead of waiting full timeout")
                         # Go back to main screen before returning
-                        driver.press_keycode(4)  # Back button
-                        time.sleep(0.5)
+                        navigate_to_chat_list(driver)
                         return False
 
                     # Only consider "No results" as truly unavailable when NO sections exist
@@ -1512,8 +1908,7 @@ def search_and_find_chat(driver, chat_name):
                                     search_time = time.time() - search_start
                                     print(f"[\033[91mCONFIRMED\033[0m] Standalone 'No results found' - chat '{chat_name}' truly unavailable after {search_time:.2f}s")
                                     # Go back to main screen before returning
-                                    driver.press_keycode(4)  # Back button
-                                    time.sleep(0.5)
+                                    navigate_to_chat_list(driver)
                                     return False
                             except:
                                 continue
@@ -1544,8 +1939,7 @@ def search_and_find_chat(driver, chat_name):
         search_time = time.time() - search_start
         print(f"[TIMEOUT] Neither 'No results' nor chat under 'Chats' found after {search_time:.2f}s - assuming not found")
         # Go back to main screen
-        driver.press_keycode(4)  # Back button
-        time.sleep(0.5)
+        navigate_to_chat_list(driver)
         return False
 
     except Exception as e:
@@ -1553,6 +1947,94 @@ def search_and_find_chat(driver, chat_name):
         print(f"[ERROR] Error searching for chat '{chat_name}' after {search_time:.2f}s: {str(e)}")
         return False
 
+def wait_for_search_result_snapshot(driver, chat_name, search_start, max_wait_time=20, max_repeated_messages=5,
+                                    min_messages_wait=2.5, require_name_match=False):
+    """Poll search results using one page_source snapshot per iteration and open the matching chat
+
+    With require_name_match (reused search field) only a row whose name contains chat_name
+    is opened, for the whole wait, so rows left over from the previous query never are.
+    """
+    wait_start = time.time()
+    messages_section_count = 0
+    poll_count = 0
+
+    def search_result_decided(drv):
+        """Return the classification once it is final (hit, no results, or messages-only exit)"""
+        nonlocal messages_section_count, poll_count
+        poll_count += 1
+        result = classify_search_results(parse_hierarchy(drv.page_source), chat_name,
+                                         require_name_match=require_name_match)
+        state = result['state']
+
+        if state in (SEARCH_SINGLE_HIT, SEARCH_MULTIPLE_HITS, SEARCH_NO_RESULTS):
+            return result
+
+        if state == SEARCH_MESSAGES_ONLY:
+            messages_section_count += 1
+            if messages_section_count <= 3:
+                print(f"[DEBUG] 'Messages' section exists - 'No results' under it doesn't mean unavailable")
+            # Short polls must not shorten the old 5 x 0.5s grace period for slow result loading
+            if (messages_section_count >= max_repeated_messages
+                    and time.time() - wait_start >= min_messages_wait):
+                return result
+
+        # Results still loading, or 'Chats' shown without a matching row yet
+        return None
+
+    result = wait_for_ui(driver, search_result_decided, timeout=max_wait_time, poll_interval=0.25,
+                         label='search_result')
+    search_time = time.time() - search_start
+
+    if result is None:
+        print(f"[TIMEOUT] Neither 'No results' nor chat under 'Chats' found after {search_time:.2f}s ({poll_count} snapshots) - assuming not found")
+        leave_search_results(driver)
+        return False
+
+    state = result['state']
+    if state in (SEARCH_SINGLE_HIT, SEARCH_MULTIPLE_HITS):
+        tap_x, tap_y = node_center(result['match'])
+        if state == SEARCH_SINGLE_HIT:
+            print(f"[\033[92mSUCCESS\033[0m] Single chat found under 'Chats' section after {search_time:.2f}s ({poll_count} snapshots)")
+        else:
+            print(f"[VERIFY] Multiple chats found ({len(result['rows'])}), verifying matches...")
+            for _, row_name in result['rows']:
+                print(f"[VERIFY]   - '{row_name or 'Unknown'}'")
+            print(f"[\033[92mSUCCESS\033[0m] Verified chat match: '{result['match_name']}' after {search_time:.2f}s ({poll_count} snapshots)")
+        driver.tap([(tap_x, tap_y)])
+        print(f"[CLICKED] Opened chat by tapping row at ({tap_x}, {tap_y})")
+        return True
+
+    if state == SEARCH_NO_RESULTS:
+        print(f"[\033[91mCONFIRMED\033[0m] Standalone 'No results found' - chat '{chat_name}' truly unavailable after {search_time:.2f}s")
+    else:
+        print(f"[EARLY_EXIT] Seen 'Messages section' {messages_section_count} times with no results - chat likely doesn't exist")
+        print(f"[EARLY_EXIT] Exiting search after {search_time:.2f}s instead of waiting full timeout")
+    leave_search_results(driver)
+    return False
+
+def write_worker_status(state, position, total, successful_chats, failed_chats, started_at, current=None):
+    """Write this worker's progress to WORKER_STATUS_FILE for the fleet runner (no-op otherwise)"""
+    if not WORKER_STATUS_FILE:
+        return
+    status = {
+        'udid': SELECTED_ADB_DEVICE,
+        'state': state,
+        'position': position,
+        'total': total,
+        'successful': len(successful_chats),
+        'failed': len(failed_chats),
+        'current': current,
+        'elapsed': time.time() - started_at,
+        'updated': format_gmt7_time()
+    }
+    try:
+        temp_file = WORKER_STATUS_FILE + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(status, file, ensure_ascii=False)
+        os.replace(temp_file, WORKER_STATUS_FILE)
+    except Exception as e:
+        print(f"[ERROR] Failed to write worker status: {e}")
+
 def process_target_chats(driver):
     """Main function to send messages to specific chats listed in txt/chat_name.txt"""
     # Log script start time
@@ -1561,17 +2043,22 @@ def process_target_chats(driver):
     print("Starting to process target chats from txt/chat_name.txt...")
 
     # Analyze chat entries and show selection menu
-    analysis = analyze_chat_entries()
+    analysis = analyze_chat_entries(CHAT_NAME_FILE)
     if analysis is None:
         print("Failed to analyze chat entries. Stopping automation.")
         return
 
-    # Show interactive selection menu
-    selection = show_selection_menu(analysis)
+    # Show interactive selection menu (unless rows were given on the command line)
+    if ROW_SELECTION:
+        selection = build_row_selection(analysis, ROW_SELECTION)
+    else:
+        selection = show_selection_menu(analysis)
     if selection is None:
         print("No selection made. Stopping automation.")
         return
 
+    trace_note('selection', selection)
+
     # Extract selected chat names (only the chat names, not the line numbers)
     target_chat_names = [entry[1] for entry in selection['entries']]
 
@@ -1590,6 +2077,10 @@ def process_target_chats(driver):
 
     print(f"Daily message to send: {daily_message}")
 
+    # Stage the message on the device clipboard once for the whole run
+    if MESSAGE_ENTRY_MODE == "clipboard":
+        stage_message_clipboard(driver, daily_message)
+
     # Check and transfer daily photo
     photo_path = get_daily_photo_path()
     device_photo_path = None
@@ -1597,9 +2088,21 @@ def process_target_chats(driver):
 
     if photo_path:
         print(f"Found daily photo: {photo_path}")
+
+        # Downscale/strip once per distinct photo; reruns reuse the cached result
+        try:
+            screen_size = get_screen_size(driver)
+        except Exception:
+            screen_size = None
+        photo_path, prep_report = prepare_daily_photo(photo_path, screen_size)
+        trace_note('photo', {'path': photo_path, 'report': prep_report})
+
         print(f"[DEBUG] Attempting to transfer photo to device...")
         device_photo_path = transfer_photo_to_device(driver, photo_path)
+        trace_note('photo_transfer', {'device_path': device_photo_path})
         print(f"[DEBUG] Transfer result: {device_photo_path}")
+        print(format_prep_report(prep_report, get_transfer_throughput(),
+                                 device_copy_reused=bool(device_photo_path) and _last_transfer['reused']))
         if device_photo_path:
             send_photo = True
             print("Photo will be sent with each message")
@@ -1609,7 +2112,14 @@ def process_target_chats(driver):
         print("No daily photo found in daily_photos/ folder. Will send text messages only.")
 
     # Load previously processed chats for today
-    processed_chats, log_file = load_processed_chats_today()
+    processed_chats, log_file, run_day = load_processed_chats_today()
+    try:
+        chat_states = load_chat_states(run_day)
+        queue_chats(selection['entries'], day=run_day)
+    except Exception as e:
+        print(f"[STATE] Could not load chat states, resume disabled: {e}")
+        chat_states = {}
+    trace_note('resume_state', {'run_day': run_day, 'processed': sorted(processed_chats), 'chat_states': chat_states})
     overall_start = time.time()
 
     successful_chats = []
@@ -1619,27 +2129,33 @@ def process_target_chats(driver):
 
     for i, (original_row, target_chat_name) in enumerate(selection['entries']):
         chat_processing_start = time.time()
+        write_worker_status('running', i, len(target_chat_names), successful_chats, failed_chats,
+                            overall_start, current=target_chat_name)
 
         # Check if driver session is still alive before processing
         if not is_driver_alive(driver):
             print(f"[WARNING] Driver session lost, attempting recovery...")
-            recovered_driver = recover_session(driver, max_attempts=3)
+            recovered_driver = recover_session(driver, max_attempts=3, error="driver session lost")
             if recovered_driver:
                 driver = recovered_driver
                 print("[RECOVERY] Session recovered, continuing with automation")
             else:
                 print(f"[ERROR] Session recovery failed after multiple attempts, stopping automation")
                 break
+            # Re-stage the clipboard for the new session
+            if MESSAGE_ENTRY_MODE == "clipboard":
+                stage_message_clipboard(driver, daily_message)
             # Re-transfer photo if needed after session recovery
             if photo_path and send_photo:
                 print(f"[RECOVERY] Re-transferring photo after session recovery...")
                 device_photo_path = transfer_photo_to_device(driver, photo_path)
+                trace_note('photo_transfer', {'device_path': device_photo_path})
                 if not device_photo_path:
                     send_photo = False
                     print("[RECOVERY] Photo re-transfer failed, will send text only")
 
         # Skip if already processed today
-        if target_chat_name in processed_chats:
+        if chat_key(target_chat_name) in processed_chats:
             print(f"[\033[92m{i+1}/{len(target_chat_names)}\033[0m] [SKIP] Already processed today: {target_chat_name} (Row {original_row})")
             continue
 
@@ -1650,50 +2166,77 @@ def process_target_chats(driver):
 
         # Search for the specific chat using search functionality with enhanced error handling
         search_start = time.time()
-        try:
-            chat_found = safe_operation(search_and_find_chat, driver, clean_name, retry_count=1)
-        except Exception as search_error:
-            print(f"[ERROR] Search function failed: {search_error}")
-            # Try session recovery if it's a driver-related error
-            driver_errors = ["session", "connection", "socket", "timeout", "network"]
-            if any(error_term in str(search_error).lower() for error_term in driver_errors):
-                print("[ERROR] Detected driver-related error, attempting session recovery...")
-                recovered_driver = recover_session(driver, max_attempts=2)
-                if recovered_driver:
-                    driver = recovered_driver
-                    print("[RECOVERY] Retrying search after session recovery...")
-                    try:
-                        chat_found = search_and_find_chat(driver, clean_name)
-                    except Exception as retry_error:
-                        print(f"[ERROR] Search retry failed: {retry_error}")
+        previous_state = chat_states.get(chat_key(target_chat_name))
+        if previous_state and previous_state != STATUS_QUEUED:
+            print(f"[RESUME] Last run stopped this chat at '{previous_state}'")
+        if previous_state in (STATUS_OPENED, STATUS_COMPOSING) and is_conversation_open(driver, clean_name):
+            # The interrupted run already opened this chat and it is still on screen
+            print(f"[RESUME] Conversation with {clean_name} is still open, skipping search")
+            chat_found = True
+        else:
+            # Keep an unconfirmed send marked as such through the search, or a crash here would hide it
+            if previous_state not in SEND_UNCONFIRMED_STATUSES:
+                set_chat_state(run_day, original_row, target_chat_name, STATUS_SEARCHING)
+            try:
+                chat_found = safe_operation(search_and_find_chat, driver, clean_name, retry_count=1)
+            except Exception as search_error:
+                print(f"[ERROR] Search function failed: {search_error}")
+                # Try session recovery if it's a driver-related error
+                driver_errors = ["session", "connection", "socket", "timeout", "network"]
+                if any(error_term in str(search_error).lower() for error_term in driver_errors):
+                    print("[ERROR] Detected driver-related error, attempting session recovery...")
+                    recovered_driver = recover_session(driver, max_attempts=2, error=search_error)
+                    if recovered_driver:
+                        driver = recovered_driver
+                        print("[RECOVERY] Retrying search after session recovery...")
+                        try:
+                            chat_found = search_and_find_chat(driver, clean_name)
+                        except Exception as retry_error:
+                            print(f"[ERROR] Search retry failed: {retry_error}")
+                            chat_found = False
+                    else:
+                        print("[ERROR] Session recovery failed")
                         chat_found = False
                 else:
-                    print("[ERROR] Session recovery failed")
                     chat_found = False
-            else:
-                chat_found = False
         search_time = time.time() - search_start
 
         if chat_found:
+            # Keep an unconfirmed send marked as such until the conversation has been checked
+            if previous_state not in SEND_UNCONFIRMED_STATUSES:
+                set_chat_state(run_day, original_row, target_chat_name, STATUS_OPENED)
             try:
                 # Chat is already opened by search_and_find_chat function
                 # Send the daily message (with photo if available)
                 message_start = time.time()
+                # Sending is not idempotent: earlier results must be on disk so a
+                # crash during this send can't make a resumed run repeat them
+                if not journal_flush():
+                    raise RuntimeError("earlier results are not on disk yet (journal flush timed out), not sending")
                 try:
-                    if send_photo:
-                        success = send_message_with_photo(driver, daily_message)
+                    if previous_state in SEND_UNCONFIRMED_STATUSES and verify_message_sent(driver, daily_message):
+                        print(f"[RESUME] Message from the interrupted run is already in the conversation, not sending again")
+                        success = True
                     else:
-                        success = send_message_to_chat(driver, daily_message)
+                        set_chat_state(run_day, original_row, target_chat_name, STATUS_COMPOSING)
+                        if send_photo:
+                            success = send_message_with_photo(driver, daily_message)
+                        else:
+                            success = send_message_to_chat(driver, daily_message)
                 except Exception as message_error:
                     print(f"[ERROR] Message sending failed: {message_error}")
                     # Check if it's a session error
                     if not is_driver_alive(driver):
                         print(f"[WARNING] Session lost during message sending, attempting recovery...")
-                        driver = recover_session(driver)
+                        driver = recover_session(driver, error=message_error)
                         if driver:
                             # Try to find and open the chat again
                             chat_found_retry = search_and_find_chat(driver, clean_name)
-                            if chat_found_retry:
+                            if chat_found_retry and verify_message_sent(driver, daily_message):
+                                # The send went through before the session died
+                                print(f"[RECOVERY] Message is already in the conversation, not sending again")
+                                success = True
+                            elif chat_found_retry:
                                 try:
                                     if send_photo:
                                         success = send_message_with_photo(driver, daily_message)
@@ -1713,14 +2256,16 @@ def process_target_chats(driver):
                     message_type = "message + photo" if send_photo else "message"
                     print(f"[SUCCESS] Successfully sent {message_type} to: {target_chat_name} (Row {original_row})")
                     successful_chats.append((original_row, target_chat_name))
-                    processed_chats.add(target_chat_name)
-                    save_processed_chat(log_file, f"Row{original_row}: {target_chat_name}")
+                    mark_chat_processed(processed_chats, log_file, run_day, original_row, target_chat_name,
+                                        STATUS_SENT, search_seconds=search_time, message_seconds=message_time,
+                                        total_seconds=time.time() - chat_processing_start)
                 else:
                     message_type = "message + photo" if send_photo else "message"
                     print(f"[ERROR] Failed to send {message_type} to: {target_chat_name} (Row {original_row})")
                     failed_chats.append((original_row, target_chat_name))
-                    processed_chats.add(target_chat_name)
-                    save_processed_chat(log_file, f"FAILED Row{original_row}: {target_chat_name}")
+                    mark_chat_processed(processed_chats, log_file, run_day, original_row, target_chat_name,
+                                        STATUS_FAILED, search_seconds=search_time, message_seconds=message_time,
+                                        total_seconds=time.time() - chat_processing_start)
 
                 # Go back to chat list
                 back_start = time.time()
@@ -1728,14 +2273,16 @@ def process_target_chats(driver):
                 if driver:  # Check if driver is not None
                     try:
                         driver.press_keycode(4)  # KEYCODE_BACK
-                        time.sleep(1)
+                        wait_for_ui(driver, 'conversation_hidden', timeout=1.0)
                         back_time = time.time() - back_start
+                        if success:
+                            set_chat_returned(run_day, target_chat_name)
                         print(f"[CHECKED] Returned to chat list in {back_time:.2f}s")
                     except Exception as back_error:
                         print(f"[ERROR] Failed to go back to chat list: {back_error}")
                         back_time = time.time() - back_start
                         # Try session recovery
-                        driver = recover_session(driver)
+                        driver = recover_session(driver, error=back_error)
                         if not driver:
                             print(f"[ERROR] Session recovery failed, stopping automation")
                             break
@@ -1752,8 +2299,21 @@ def process_target_chats(driver):
 
             except Exception as e:
                 print(f"[ERROR] Error processing chat '{target_chat_name}' (Row {original_row}): {str(e)}")
-                failed_chats.append((original_row, target_chat_name))
-                go_back_to_chat_list(driver)
+                if chat_key(target_chat_name) not in processed_chats:
+                    failed_chats.append((original_row, target_chat_name))
+                    mark_chat_processed(processed_chats, log_file, run_day, original_row, target_chat_name,
+                                        STATUS_FAILED, search_seconds=search_time,
+                                        total_seconds=time.time() - chat_processing_start)
+                if is_driver_alive(driver):
+                    # The session still answers: back to the chat list and on to the next chat
+                    if not recover_by_navigation(driver):
+                        print(f"[WARNING] Chat list not reached, the next search starts from here")
+                    continue
+                recovered_driver = recover_session(driver, max_attempts=2, error=e)
+                if not recovered_driver:
+                    print(f"[ERROR] Session recovery failed, stopping automation")
+                    break
+                driver = recovered_driver
                 continue
         else:
             search_time = time.time() - search_start
@@ -1766,19 +2326,36 @@ def process_target_chats(driver):
             log_not_found_chat(target_chat_name, original_row)
 
             failed_chats.append((original_row, target_chat_name))
-            processed_chats.add(target_chat_name)
-            save_processed_chat(log_file, f"NOT_FOUND Row{original_row}: {target_chat_name}")
+            mark_chat_processed(processed_chats, log_file, run_day, original_row, target_chat_name,
+                                STATUS_NOT_FOUND, search_seconds=search_time,
+                                total_seconds=time.time() - chat_processing_start)
 
             print(f"[NEXT] Quickly moving to next chat...")
             continue
 
     overall_time = time.time() - overall_start
+    write_worker_status('done', len(target_chat_names), len(target_chat_names), successful_chats, failed_chats,
+                        overall_start)
     print(f"\n[INFO] Processing complete! Total time: {overall_time:.2f}s")
     print(f"[INFO] Summary:")
     print(f"   - Total target chats: {len(target_chat_names)}")
     print(f"   - Successfully processed: {len(successful_chats)}")
     print(f"   - Failed/Not found: {len(failed_chats)}")
     print(f"   - Average time per chat: {overall_time/len(target_chat_names):.2f}s")
+    print_wait_stats()
+    print_search_prepare_stats()
+    print_entry_timing_stats()
+    print_latency_stats()
+    print(format_native_selector_stats())
+    for line in format_screen_state_stats():
+        print(line)
+    for line in format_input_latency_report():
+        print(line)
+    print_recovery_stats()
+    print_bootstrap_stats()
+    journal_stats = get_journal_stats()
+    print(f"[JOURNAL] {journal_stats['written']} log records written in {journal_stats['batches']} batches, "
+          f"{journal_stats['errors']} write errors")
 
     if successful_chats:
         print(f"\n[SUCCESS] Successfully sent messages to {len(successful_chats)} chats:")
@@ -1794,49 +2371,164 @@ def process_target_chats(driver):
     summary_message = f"Script completed - Processed: {len(successful_chats)}, Failed: {len(failed_chats)}, Total time: {overall_time:.2f}s"
     log_script_event("end", summary_message)
 
-def main():
+def parse_args(argv=None):
+    """Command line options (all optional; without them the script runs interactively)
+
+    --config FILE reads the same options from a JSON file (keys as in the flag
+    names, with '_' instead of '-'); flags given on the command line win.
+    """
+    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser.add_argument('--config', help="JSON file with default values for these options")
+    config_args, _ = config_parser.parse_known_args(argv)
+
+    parser = argparse.ArgumentParser(description="Send the daily WhatsApp message to the chats in txt/chat_name.txt",
+                                     parents=[config_parser])
+    parser.add_argument('--udid', help="ADB device UDID (skips the device prompt)")
+    parser.add_argument('--device-config', help="DEVICE_CONFIGS profile name (skips the profile prompt)")
+    parser.add_argument('--appium-port', type=int, help="Appium server port (default 4723)")
+    parser.add_argument('--system-port', type=int, help="UiAutomator2 systemPort for this device")
+    parser.add_argument('--chat-file', help="Chat list file (default txt/chat_name.txt)")
+    parser.add_argument('--status-file', help="Write JSON progress to this file")
+    parser.add_argument('--rows', help="Rows to process without the menu: all, N- (from N), N-M (range) or N (first N)")
+    parser.add_argument('--non-interactive', action='store_true',
+                        help="Never prompt: auto-select the device and its profile, process --rows (default all)")
+    parser.add_argument('--worker', action='store_true',
+                        help="Fleet worker mode: process every row of the chat file without prompts")
+    parser.add_argument('--trace', help="Record every Appium command to this trace file (see replay_trace.py)")
+    parser.add_argument('--input', choices=["appium", "adb"],
+                        help="Backend for taps, swipes and key presses (default appium)")
+    parser.add_argument('--perf-profile', choices=["auto"] + list(PERFORMANCE_PROFILES),
+                        help="UiAutomator2 performance profile (default auto)")
+    parser.add_argument('--bootstrap', choices=["auto"] + list(BOOTSTRAP_MODES),
+                        help="Session bootstrap mode (default auto: fast on a known-good device)")
+
+    if config_args.config:
+        try:
+            with open(config_args.config, 'r', encoding='utf-8') as file:
+                defaults = json.load(file)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read config file {config_args.config}: {e}")
+        known = {action.dest for action in parser._actions}
+        unknown = set(defaults) - known
+        if unknown:
+            parser.error(f"unknown keys in {config_args.config}: {', '.join(sorted(unknown))}")
+        parser.set_defaults(**defaults)
+
+    return parser.parse_args(argv)
+
+def apply_command_line_args(args):
+    """Apply command line options to the module settings; returns False if they are invalid"""
+    global SELECTED_ADB_DEVICE, APPIUM_SERVER_URL, UIAUTOMATOR2_SYSTEM_PORT, CHAT_NAME_FILE, NON_INTERACTIVE, ROW_SELECTION, WORKER_STATUS_FILE, TRACE_FILE, INPUT_MODE, PERFORMANCE_PROFILE, BOOTSTRAP_MODE
+
+    if args.udid:
+        SELECTED_ADB_DEVICE = args.udid
+    if args.device_config:
+        if args.device_config not in DEVICE_CONFIGS:
+            print(f"[ERROR] Unknown device config '{args.device_config}'. Available: {list(DEVICE_CONFIGS.keys())}")
+            return False
+        set_device_config(DEVICE_CONFIGS[args.device_config], args.device_config)
+    if args.appium_port:
+        APPIUM_SERVER_URL = f"http://localhost:{args.appium_port}"
+    if args.system_port:
+        UIAUTOMATOR2_SYSTEM_PORT = args.system_port
+    if args.chat_file:
+        CHAT_NAME_FILE = args.chat_file
+    if args.status_file:
+        WORKER_STATUS_FILE = args.status_file
+    if args.trace:
+        TRACE_FILE = args.trace
+    if args.input:
+        INPUT_MODE = args.input
+    if args.perf_profile:
+        PERFORMANCE_PROFILE = args.perf_profile
+    if args.bootstrap:
+        BOOTSTRAP_MODE = args.bootstrap
+    NON_INTERACTIVE = args.non_interactive or args.worker
+    if args.rows:
+        try:
+            ROW_SELECTION = parse_row_spec(args.rows)
+        except ValueError as e:
+            print(f"[ERROR] Invalid --rows '{args.rows}': {e}")
+            return False
+    elif NON_INTERACTIVE:
+        ROW_SELECTION = {'mode': 'all'}
+    return True
+
+def _read_text_file(path):
+    """Contents of a text file, or None if it can't be read"""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read()
+    except OSError:
+        return None
+
+def run_automation(driver):
+    """Unlock the device, open WhatsApp and process the target chats on a started session"""
+    print("Attempting to turn on screen and unlock device...")
+    success = turn_screen_on_and_unlock(driver)
+    
+    if success:
+        print("Device is ready for automation!")
+        
+        # Open WhatsApp after successful unlock
+        whatsapp_success = open_whatsapp_business(driver)
+        
+        if whatsapp_success:
+            print("WhatsApp is now open and ready for use!")
+            # Cheap check of the profile's search button against the chat list
+            validate_device_config(driver, 'chat_list')
+            # Brief pause to ensure app is fully loaded
+            time.sleep(1.8)
+            
+            # Process target chats from txt/chat_name.txt and send daily messages
+            process_target_chats(driver)
+            
+        else:
+            print("Failed to open WhatsApp, but device is unlocked")
+        
+    else:
+        print("Unable to fully unlock device")
+
+def main(args=None):
     """Main function to control screen and unlock"""
     driver = None
 
+    if args is not None and not apply_command_line_args(args):
+        return
+
     try:
-        # First, select ADB device
-        adb_device = select_adb_device()
+        # First, select ADB device (unless given on the command line)
+        adb_device = SELECTED_ADB_DEVICE or select_adb_device()
         if adb_device is None:
             print("[ERROR] No ADB device selected. Exiting...")
             return
 
-        # Second, select device configuration (coordinate settings)
-        device_config = select_device_config()
+        # Load the selector cache for this device and installed WhatsApp version
+        app_version = get_installed_app_version(adb_device)
+        load_selector_cache(adb_device, app_version)
+
+        # Second, select device configuration (coordinate settings): from the command line,
+        # the device profile cache, the model name, or the menu as a last resort
+        device_config = get_selected_device_config() or resolve_device_config(adb_device, app_version)
         if device_config is None:
             print("[ERROR] No device configuration selected. Exiting...")
             return
 
+        if TRACE_FILE:
+            open_trace(TRACE_FILE, 'whatsapp', {'udid': adb_device, 'app_version': app_version})
+            trace_note('inputs', {
+                'device_config_name': get_device_config_name(),
+                'device_config': device_config,
+                'selectors': get_selector_table(),
+                'chat_file': _read_text_file(CHAT_NAME_FILE),
+                'daily_message': _read_text_file('txt/daily_message.txt'),
+            })
+
         print("\nStarting Appium session...")
         driver = setup_driver()
-        
-        print("Attempting to turn on screen and unlock device...")
-        success = turn_screen_on_and_unlock(driver)
-        
-        if success:
-            print("Device is ready for automation!")
-            
-            # Open WhatsApp after successful unlock
-            whatsapp_success = open_whatsapp_business(driver)
-            
-            if whatsapp_success:
-                print("WhatsApp is now open and ready for use!")
-                # Brief pause to ensure app is fully loaded
-                time.sleep(1.8)
-                
-                # Process target chats from txt/chat_name.txt and send daily messages
-                process_target_chats(driver)
-                
-            else:
-                print("Failed to open WhatsApp, but device is unlocked")
-            
-        else:
-            print("Unable to fully unlock device")
-            
+
+        run_automation(driver)
+
     except Exception as e:
         print(f"Error: {str(e)}")
         print("Make sure:")
@@ -1846,9 +2538,15 @@ def main():
         print("4. Device is detected (adb devices)")
         
     finally:
+        journal_close()
+        # Device settings first: nothing below may keep them changed after the run
+        restore_device_settings()
+        close_adb_shells()
         if driver:
+            # Recovery may have replaced the first session; quit every one setup_driver made
             print("Closing Appium session...")
-            driver.quit()
+            quit_registered_drivers()
+        close_trace()
 
 if __name__ == "__main__":
     # Set up signal handlers for stopping
@@ -1856,4 +2554,4 @@ if __name__ == "__main__":
     signal.signal(signal.SIGTERM, signal_handler)  # Kill command
     print("* Press Ctrl+C to stop the automation at any time")
     print("   (Note: On macOS terminal, use Ctrl+C, not Cmd+C)")
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
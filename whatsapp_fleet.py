@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+WhatsApp fleet runner: one worker process per connected ADB device
+
+Each device gets its own Appium server port, UiAutomator2 systemPort,
+DEVICE_CONFIGS profile and chat list, and runs whatsapp.py in worker mode.
+Workers report progress through small JSON status files which are combined
+into one progress line and a final summary.
+
+Chat lists: txt/chat_name_<udid>.txt is used when it exists, otherwise
+txt/chat_name.txt is split into contiguous blocks (one per device, original
+row numbers kept) under txt/fleet/.
+
+Usage:
+    python whatsapp_fleet.py
+    python whatsapp_fleet.py --use-running-servers
+    python whatsapp_fleet.py --profile R58M12345=SM-A105F --profile emulator-5554=Redmi 9A
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from adb_tools import get_adb_devices
+from device_configs import match_device_config, DEVICE_CONFIGS
+from chat_plan import analyze_chat_entries
+
+FLEET_DIR = "txt/fleet"
+BASE_APPIUM_PORT = 4723
+APPIUM_PORT_STEP = 10
+BASE_SYSTEM_PORT = 8200
+STATUS_POLL_INTERVAL = 5.0
+APPIUM_START_TIMEOUT = 30
+
+_children = []
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run whatsapp.py on every connected ADB device at once")
+    parser.add_argument('--profile', action='append', default=[], metavar='UDID=NAME',
+                        help="DEVICE_CONFIGS profile for a device (default: matched from the adb model name)")
+    parser.add_argument('--use-running-servers', action='store_true',
+                        help="Don't start Appium; expect servers on 4723, 4733, ... already running")
+    parser.add_argument('--devices', nargs='+', metavar='UDID', help="Only use these devices")
+    return parser.parse_args()
+
+
+def build_device_plan(devices, profile_overrides):
+    """Assign ports and a DEVICE_CONFIGS profile to each device; skips devices without a profile"""
+    plan = []
+    for index, device in enumerate(devices):
+        udid = device['udid']
+        profile = profile_overrides.get(udid) or match_device_config(device['model'])
+        if profile not in DEVICE_CONFIGS:
+            print(f"[FLEET] [WARNING] No device config for {udid} ({device['model']}), skipping it. "
+                  f"Use --profile {udid}=<name> with one of {list(DEVICE_CONFIGS.keys())}")
+            continue
+        plan.append({
+            'udid': udid,
+            'model': device['model'],
+            'profile': profile,
+            'appium_port': BASE_APPIUM_PORT + index * APPIUM_PORT_STEP,
+            'system_port': BASE_SYSTEM_PORT + index,
+            'status_file': os.path.join(FLEET_DIR, f"status_{udid}.json"),
+            'log_file': os.path.join(FLEET_DIR, f"worker_{udid}.log")
+        })
+    return plan
+
+
+def assign_chat_lists(plan):
+    """Give each worker a chat file: its own txt/chat_name_<udid>.txt or a block of txt/chat_name.txt"""
+    shared = [worker for worker in plan if not os.path.exists(f"txt/chat_name_{worker['udid']}.txt")]
+    for worker in plan:
+        if worker not in shared:
+            worker['chat_file'] = f"txt/chat_name_{worker['udid']}.txt"
+
+    if not shared:
+        return
+
+    analysis = analyze_chat_entries()
+    entries = analysis['entries'] if analysis else []
+    block_size = -(-len(entries) // len(shared)) if entries else 0
+
+    for index, worker in enumerate(shared):
+        block = entries[index * block_size:(index + 1) * block_size]
+        chat_file = os.path.join(FLEET_DIR, f"chat_name_{worker['udid']}.txt")
+        with open(chat_file, 'w', encoding='utf-8') as file:
+            for original_row, chat_name in block:
+                file.write(f"  - Row {original_row}: {chat_name}\n")
+        worker['chat_file'] = chat_file
+
+
+def wait_for_port(port, timeout=APPIUM_START_TIMEOUT):
+    """Wait until something accepts connections on localhost:port"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1)
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return True
+        time.sleep(0.5)
+    return False
+
+
+def start_appium_server(worker):
+    """Start an Appium server for one worker on its own port"""
+    appium = shutil.which('appium')
+    if not appium:
+        print("[FLEET] [ERROR] 'appium' not found in PATH (or pass --use-running-servers)")
+        return False
+    log = open(os.path.join(FLEET_DIR, f"appium_{worker['udid']}.log"), 'w', encoding='utf-8')
+    process = subprocess.Popen([appium, '--port', str(worker['appium_port'])],
+                               stdout=log, stderr=subprocess.STDOUT)
+    _children.append(process)
+    if not wait_for_port(worker['appium_port']):
+        print(f"[FLEET] [ERROR] Appium on port {worker['appium_port']} did not start")
+        return False
+    return True
+
+
+def start_worker(worker):
+    """Start whatsapp.py in worker mode for one device"""
+    if os.path.exists(worker['status_file']):
+        os.remove(worker['status_file'])
+    command = [
+        sys.executable, 'whatsapp.py', '--worker',
+        '--udid', worker['udid'],
+        '--device-config', worker['profile'],
+        '--appium-port', str(worker['appium_port']),
+        '--system-port', str(worker['system_port']),
+        '--chat-file', worker['chat_file'],
+        '--status-file', worker['status_file']
+    ]
+    log = open(worker['log_file'], 'w', encoding='utf-8')
+    worker['process'] = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                                         stdin=subprocess.DEVNULL, env=dict(os.environ, PYTHONUNBUFFERED='1'))
+    _children.append(worker['process'])
+
+
+def read_status(worker):
+    """Latest status written by a worker, or None before its first write"""
+    try:
+        with open(worker['status_file'], 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def print_progress(plan):
+    """One combined progress line plus one line per worker"""
+    done = total = successful = failed = 0
+    lines = []
+    for worker in plan:
+        status = read_status(worker) or {}
+        exit_code = worker['process'].poll()
+        state = status.get('state', 'starting')
+        if exit_code is not None and state != 'done':
+            state = f"exited ({exit_code})"
+        done += status.get('position', 0)
+        total += status.get('total', 0)
+        successful += status.get('successful', 0)
+        failed += status.get('failed', 0)
+        current = status.get('current') or ''
+        lines.append(f"  {worker['udid']:<20} {state:<12} {status.get('position', 0)}/{status.get('total', '?')} "
+                     f"ok={status.get('successful', 0)} failed={status.get('failed', 0)} {current}")
+    print(f"\n[FLEET] {done}/{total} chats | successful: {successful} | failed: {failed}")
+    for line in lines:
+        print(line)
+
+
+def print_summary(plan, started_at):
+    """Aggregated summary across all workers"""
+    elapsed = time.time() - started_at
+    successful = failed = 0
+    print("\n" + "=" * 60)
+    print("FLEET SUMMARY")
+    print("=" * 60)
+    for worker in plan:
+        status = read_status(worker) or {}
+        successful += status.get('successful', 0)
+        failed += status.get('failed', 0)
+        print(f"{worker['udid']} ({worker['profile']}): {status.get('successful', 0)} sent, "
+              f"{status.get('failed', 0)} failed, exit code {worker['process'].returncode}, log {worker['log_file']}")
+    print("-" * 60)
+    print(f"Devices: {len(plan)}")
+    print(f"Successful: {successful}")
+    print(f"Failed: {failed}")
+    print(f"Total time: {elapsed / 60:.1f} minutes")
+    if elapsed > 0:
+        print(f"Throughput: {successful / (elapsed / 60):.1f} chats/min")
+    print("=" * 60)
+
+
+def stop_children():
+    """Terminate all workers and Appium servers we started"""
+    for process in _children:
+        if process.poll() is None:
+            process.terminate()
+    for process in _children:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(FLEET_DIR, exist_ok=True)
+
+    devices = get_adb_devices()
+    if args.devices:
+        devices = [device for device in devices if device['udid'] in args.devices]
+    if not devices:
+        print("[FLEET] [ERROR] No ADB devices found")
+        return
+
+    overrides = dict(item.split('=', 1) for item in args.profile if '=' in item)
+    plan = build_device_plan(devices, overrides)
+    if not plan:
+        return
+    assign_chat_lists(plan)
+
+    for worker in plan:
+        print(f"[FLEET] {worker['udid']} ({worker['model']}): profile '{worker['profile']}', "
+              f"appium {worker['appium_port']}, systemPort {worker['system_port']}, chats {worker['chat_file']}")
+
+    started_at = time.time()
+    try:
+        for worker in list(plan):
+            if not args.use_running_servers and not start_appium_server(worker):
+                plan.remove(worker)
+                continue
+            start_worker(worker)
+
+        while any(worker['process'].poll() is None for worker in plan):
+            time.sleep(STATUS_POLL_INTERVAL)
+            print_progress(plan)
+    except KeyboardInterrupt:
+        print("\n[FLEET] Interrupted, stopping workers...")
+    finally:
+        stop_children()
+
+    print_summary([worker for worker in plan if 'process' in worker], started_at)
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    main()
@@ -3,18 +3,34 @@
 from appium.webdriver.webdriver import WebDriver
 from appium.options.android.uiautomator2.base import UiAutomator2Options
 from selenium.webdriver.common.by import By as AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+import argparse
 import time
 import os
 import signal
 import sys
 from datetime import datetime
 
+from session_trace import open_trace, close_trace, trace_driver
+from native_selectors import install_native_selectors
+from adb_input import install_adb_input, close_adb_shells, format_input_latency_report
+from adb_tools import get_adb_devices, get_device_model, get_screen_resolution
+from performance_profile import apply_performance_profile, resolve_profile, restore_device_settings, PERFORMANCE_PROFILES
+from session_bootstrap import (resolve_bootstrap_mode, apply_bootstrap_options, record_bootstrap_failure,
+                               record_first_command, format_bootstrap_report, BOOTSTRAP_MODES)
+from screen_state import detect_screen, wait_for_screen, navigate_to_chat_list, format_screen_state_stats, SCREEN_CHAT_LIST
+
 # Global variable to track the driver for cleanup
 _global_driver = None
 
+# Backend for taps, swipes and key presses: "appium" or "adb" (persistent adb shell, see adb_input.py)
+INPUT_MODE = "appium"
+
+# UiAutomator2 performance profile: "auto" (benchmarked for the device, else "fast"), "fast", "full" or "stock"
+PERFORMANCE_PROFILE = "auto"
+
+# Session bootstrap: "auto" (fast once the device has had a good session), "cold" or "fast" (see session_bootstrap.py)
+BOOTSTRAP_MODE = "auto"
+
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
     print("\n\n🛑 Stopping scraper (Ctrl+C pressed)...")
@@ -29,27 +45,53 @@ def signal_handler(sig, frame):
         except Exception as e:
             print(f"Error closing session: {e}")
 
+    close_trace()
+    close_adb_shells()
+    restore_device_settings()
     print("Scraper stopped. Goodbye!")
     sys.exit(0)
 
-def setup_driver():
-    """Initialize Appium driver with Android capabilities"""
+def setup_driver(mode=None):
+    """Initialize Appium driver with Android capabilities (mode: "cold" or "fast", default BOOTSTRAP_MODE)"""
+    # The scraper runs on adb's default device; known-good state is kept for it when there is only one
+    devices = get_adb_devices()
+    udid = devices[0]['udid'] if len(devices) == 1 else None
+    requested = mode or BOOTSTRAP_MODE
+    mode = resolve_bootstrap_mode(requested, udid)
+
     options = UiAutomator2Options()
     options.platform_name = "Android"
     options.device_name = "Android Device"
     options.automation_name = "UiAutomator2"
     options.app_package = "com.whatsapp"
-    options.app_activity = "com.whatsapp.home.ui.HomeActivity"
+    if mode == "cold":
+        options.app_activity = "com.whatsapp.home.ui.HomeActivity"
     options.no_reset = True
     options.full_reset = False
 
     # Add session stability options
     options.new_command_timeout = 300  # 5 minutes timeout
-    options.uiautomator2_server_launch_timeout = 60000  # 60 seconds
-    options.uiautomator2_server_install_timeout = 60000  # 60 seconds
+    apply_bootstrap_options(options, mode)
 
     # Connect to Appium server
-    driver = WebDriver("http://localhost:4723", options=options)
+    start = time.perf_counter()
+    try:
+        driver = WebDriver("http://localhost:4723", options=options)
+    except Exception as e:
+        record_bootstrap_failure(mode, udid)
+        if mode == "fast" and requested == "auto":
+            print(f"Fast session failed, bootstrapping cold: {e}")
+            return setup_driver("cold")
+        raise
+    session_seconds = time.perf_counter() - start
+    install_native_selectors(driver)
+    if INPUT_MODE == "adb":
+        install_adb_input(driver)
+    trace_driver(driver)
+    record_first_command(driver, mode, udid, session_seconds, start)
+    udid = udid or (driver.capabilities or {}).get('deviceUDID')
+    identity = {'model': get_device_model(udid), 'resolution': get_screen_resolution(udid)} if udid else None
+    apply_performance_profile(driver, udid, resolve_profile(PERFORMANCE_PROFILE, identity))
     return driver
 
 def turn_screen_on_and_unlock(driver):
@@ -164,36 +206,20 @@ def wait_for_chat_list_loaded(driver, timeout=10):
     """Wait for WhatsApp chat list to be fully loaded"""
     print("[LOAD] Waiting for chat list to load...")
 
-    # Wait for main WhatsApp elements to appear
-    wait = WebDriverWait(driver, timeout)
-
     try:
-        # Look for main WhatsApp indicators
-        main_indicators = [
-            (AppiumBy.XPATH, "//*[@text='Chats']"),
-            (AppiumBy.XPATH, "//*[@text='WhatsApp']"),
-            (AppiumBy.ID, "com.whatsapp:id/fab"),
-            (AppiumBy.ID, "com.whatsapp:id/menuitem_search")
-        ]
-
-        element_found = False
-        for selector_type, selector in main_indicators:
-            try:
-                element = wait.until(EC.presence_of_element_located((selector_type, selector)))
-                if element.is_displayed():
-                    print(f"[LOAD] Found main WhatsApp element: {selector}")
-                    element_found = True
-                    break
-            except TimeoutException:
-                continue
-
-        if not element_found:
-            print("[LOAD] No main WhatsApp elements found!")
+        # One snapshot per poll classifies the screen
+        snapshot = wait_for_screen(driver, SCREEN_CHAT_LIST, timeout=timeout)
+        if not snapshot:
+            print("[LOAD] WhatsApp chat list not detected!")
             return False
+        print(f"[LOAD] Chat list detected (confidence {snapshot['confidence']:.2f})")
 
         # Additional wait for chat list to populate
-        print("[LOAD] Main elements found, waiting for chat list to populate...")
-        time.sleep(3)  # Allow time for chats to load
+        deadline = time.time() + 3
+        while 'chat_rows' not in snapshot['signals'] and time.time() < deadline:
+            print("[LOAD] Waiting for chat list to populate...")
+            time.sleep(0.5)
+            snapshot = detect_screen(driver)
 
         return True
 
@@ -246,38 +272,16 @@ def scrape_all_chat_names(driver):
     try:
         print("Starting to scrape all chat names...")
 
-        # Check if we're already on the main WhatsApp screen before pressing back
+        # Detect the current screen and only navigate when it is not the main chat list
         try:
-            # Look for main WhatsApp indicators first
-            main_screen_indicators = [
-                (AppiumBy.XPATH, "//*[@text='Chats']"),
-                (AppiumBy.XPATH, "//*[@text='WhatsApp']"),
-                (AppiumBy.ID, "com.whatsapp:id/fab"),
-                (AppiumBy.ID, "com.whatsapp:id/menuitem_search")
-            ]
-
-            on_main_screen = False
-            for selector_type, selector in main_screen_indicators:
-                try:
-                    element = driver.find_element(selector_type, selector)
-                    if element.is_displayed():
-                        print(f"[SCREEN] Already on main screen - found: {selector}")
-                        on_main_screen = True
-                        break
-                except:
-                    continue
-
-            # Only press back if we're NOT on the main screen
-            if not on_main_screen:
-                print("[SCREEN] Not on main screen, pressing back to navigate there...")
-                driver.press_keycode(4)  # Back button to ensure main screen
-                time.sleep(1.5)
+            snapshot = navigate_to_chat_list(driver)
+            if snapshot['state'] == SCREEN_CHAT_LIST:
+                print(f"[SCREEN] On main WhatsApp screen (confidence {snapshot['confidence']:.2f}), proceeding with scraping")
             else:
-                print("[SCREEN] Already on main WhatsApp screen, proceeding with scraping")
+                print(f"[SCREEN] Main screen not reached (screen: {snapshot['state']})")
 
         except Exception as e:
             print(f"[SCREEN] Screen check failed: {e}")
-            # Don't press back if we can't determine screen state
 
         # Wait for chat list to be fully loaded
         if not wait_for_chat_list_loaded(driver):
@@ -584,9 +588,55 @@ def save_scraped_chats(chats, filename=None):
         print(f"[ERROR] Failed to save chat list: {str(e)}")
         return None
 
-def main():
+def run_scraper(driver):
+    """Unlock the device, open WhatsApp, scrape the chat list and save it"""
+    # Turn on screen and open WhatsApp
+    success = turn_screen_on_and_unlock(driver)
+    if success:
+        whatsapp_success = open_whatsapp(driver)
+        if whatsapp_success:
+            print("WhatsApp is now open and ready for scraping!")
+            time.sleep(2)  # Wait for WhatsApp to load
+
+            # Scrape all chats
+            scraped_chats = scrape_all_chat_names(driver)
+
+            # Save to file
+            if scraped_chats:
+                saved_file = save_scraped_chats(scraped_chats)
+                if saved_file:
+                    print(f"\n[SUCCESS] Scraped {len(scraped_chats)} chats successfully!")
+                    print(f"[OUTPUT] Results saved to: {saved_file}")
+                    print("\nYou can now use this file with your messaging script!")
+                else:
+                    print("[ERROR] Failed to save results")
+            else:
+                print("[ERROR] No chats were scraped")
+
+            for line in format_screen_state_stats() + format_input_latency_report() + format_bootstrap_report():
+                print(line)
+
+        else:
+            print("[ERROR] Failed to open WhatsApp")
+    else:
+        print("[ERROR] Failed to unlock device")
+
+def main(argv=None):
     """Main function to scrape WhatsApp chats"""
-    global _global_driver
+    global _global_driver, INPUT_MODE, PERFORMANCE_PROFILE, BOOTSTRAP_MODE
+
+    parser = argparse.ArgumentParser(description="Scrape the WhatsApp chat list into txt/scraped_chats_*.txt")
+    parser.add_argument('--trace', help="Record every Appium command to this trace file (see replay_trace.py)")
+    parser.add_argument('--input', choices=["appium", "adb"], default=INPUT_MODE,
+                        help="Backend for taps, swipes and key presses (default appium)")
+    parser.add_argument('--perf-profile', choices=["auto"] + list(PERFORMANCE_PROFILES), default=PERFORMANCE_PROFILE,
+                        help="UiAutomator2 performance profile (default auto)")
+    parser.add_argument('--bootstrap', choices=["auto"] + list(BOOTSTRAP_MODES), default=BOOTSTRAP_MODE,
+                        help="Session bootstrap mode (default auto: fast on a known-good device)")
+    args = parser.parse_args(argv)
+    BOOTSTRAP_MODE = args.bootstrap
+    INPUT_MODE = args.input
+    PERFORMANCE_PROFILE = args.perf_profile
 
     # Set up signal handlers for Ctrl+C
     signal.signal(signal.SIGINT, signal_handler)
@@ -602,36 +652,12 @@ def main():
         print("="*60)
         print("Starting WhatsApp chat scraping...")
 
+        if args.trace:
+            open_trace(args.trace, 'whatsapp_scraper')
         driver = setup_driver()
         _global_driver = driver  # Track for cleanup
 
-        # Turn on screen and open WhatsApp
-        success = turn_screen_on_and_unlock(driver)
-        if success:
-            whatsapp_success = open_whatsapp(driver)
-            if whatsapp_success:
-                print("WhatsApp is now open and ready for scraping!")
-                time.sleep(2)  # Wait for WhatsApp to load
-
-                # Scrape all chats
-                scraped_chats = scrape_all_chat_names(driver)
-
-                # Save to file
-                if scraped_chats:
-                    saved_file = save_scraped_chats(scraped_chats)
-                    if saved_file:
-                        print(f"\n[SUCCESS] Scraped {len(scraped_chats)} chats successfully!")
-                        print(f"[OUTPUT] Results saved to: {saved_file}")
-                        print("\nYou can now use this file with your messaging script!")
-                    else:
-                        print("[ERROR] Failed to save results")
-                else:
-                    print("[ERROR] No chats were scraped")
-
-            else:
-                print("[ERROR] Failed to open WhatsApp")
-        else:
-            print("[ERROR] Failed to unlock device")
+        run_scraper(driver)
 
     except Exception as e:
         print(f"[ERROR] Scraping failed: {str(e)}")
@@ -642,6 +668,8 @@ def main():
         print("4. Device is detected (adb devices)")
         print("5. WhatsApp is installed on the device")
     finally:
+        restore_device_settings()
+        close_adb_shells()
         if driver:
             print("Closing Appium session...")
             try:
@@ -650,6 +678,7 @@ def main():
             except Exception as e:
                 print(f"Error closing session: {e}")
         _global_driver = None  # Clear global reference
+        close_trace()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file